@@ -0,0 +1,48 @@
+"""
+Інтерфейс одиниці роботи (Unit of Work).
+
+Одиниця роботи охоплює обробку однієї команди: use case завантажують та змінюють
+агрегати через її репозиторії, а всі зміни записуються разом однією транзакцією
+під час commit().
+"""
+from abc import ABC, abstractmethod
+
+from domain.entities.character import Character
+from domain.repositories.character_repository import ICharacterRepository
+
+
+class IUnitOfWork(ABC):
+    """
+    Контракт одиниці роботи для однієї команди.
+
+    Репозиторій `characters` не пише в сховище одразу: його метод save()
+    лише реєструє персонажа як змінений. Запис усіх зареєстрованих змін
+    відбувається один раз у commit(). Вихід з контексту без commit()
+    відкочує всі зміни.
+    """
+    characters: ICharacterRepository
+
+    @abstractmethod
+    def register(self, character: Character) -> None:
+        """
+        Реєструє персонажа як змінений. Повторна реєстрація того самого
+        персонажа не призводить до повторного запису.
+        """
+        pass
+
+    @abstractmethod
+    def commit(self) -> None:
+        """Записує всі зареєстровані зміни та фіксує транзакцію."""
+        pass
+
+    @abstractmethod
+    def rollback(self) -> None:
+        """Відкидає всі зареєстровані зміни та відкочує транзакцію."""
+        pass
+
+    def __enter__(self) -> 'IUnitOfWork':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.rollback()
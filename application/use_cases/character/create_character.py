@@ -17,7 +17,7 @@ class CreateCharacterUseCase:
             ValueError: Якщо персонаж з таким telegram_user_id вже існує
         """
         # Перевіряємо чи не існує вже персонаж для цього користувача
-        existing = self.character_repository.get_by_telegram_user_id(request.telegram_user_id)
+        existing = self.character_repository.get_summary(request.telegram_user_id)
         if existing:
             raise ValueError(f"Персонаж для користувача {request.telegram_user_id} вже існує")
 
@@ -25,7 +25,7 @@ class GetCharacterStatsUseCase:
             ValueError: Якщо персонаж не знайдений
         """
         # Отримуємо персонажа
-        character = self.character_repository.get_by_telegram_user_id(request.telegram_user_id)
+        character = self.character_repository.get_summary(request.telegram_user_id)
         if not character:
             raise ValueError(f"Персонаж для користувача {request.telegram_user_id} не знайдений")
 
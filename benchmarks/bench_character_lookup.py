@@ -0,0 +1,98 @@
+"""
+Мікробенчмарк пропускної здатності пошуку персонажа за Telegram ID.
+
+Порівнює найгарячіший запит бота (get_for_combat) у кількох варіантах:
+- Query, що будується заново на кожен виклик (попередня реалізація);
+- заздалегідь побудований select() без кешу компіляції (query_cache_size=0);
+- заздалегідь побудований select() з кешем компіляції;
+- те саме через psycopg 3 із серверними підготовленими запитами (якщо встановлено).
+
+Запуск:
+    python -m benchmarks.bench_character_lookup
+"""
+import importlib.util
+from typing import Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import joinedload, load_only
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database.models import CharacterModel
+from infrastructure.persistence.repositories.postgres_character_repository import (
+    PostgresCharacterRepository, DOMAIN_COLUMNS
+)
+
+from benchmarks.common import create_benchmark_engine, benchmark_session, Timer, print_table
+
+LOOKUPS = 3000
+TELEGRAM_USER_ID = 950_001
+
+
+class QueryPerCallCharacterRepository(PostgresCharacterRepository):
+    """Попередня реалізація: запит будується та хешується на кожен виклик."""
+
+    def get_for_combat(self, telegram_user_id: int) -> Optional[Character]:
+        db_character = self.session.query(CharacterModel).options(
+            load_only(*DOMAIN_COLUMNS),
+            joinedload(CharacterModel.equipment),
+            joinedload(CharacterModel.combat_state)
+        ).filter(CharacterModel.telegram_user_id == telegram_user_id).populate_existing().first()
+        if db_character is None:
+            return None
+        return self._to_domain(db_character, with_inventory=False)
+
+
+def measure(engine, repo_cls) -> Timer:
+    timer = Timer()
+    with benchmark_session(engine) as session:
+        repo = repo_cls(session)
+        repo.save(Character(
+            telegram_user_id=TELEGRAM_USER_ID, name="Lookup",
+            base_stats=BaseStats(10, 10, 10, 100, 50),
+            equipped_items={'weapon': 'sword_01'}
+        ))
+        session.flush()
+        # Прогрів: кеш компіляції та підготовка запиту сервером.
+        for _ in range(20):
+            repo.get_for_combat(TELEGRAM_USER_ID)
+        for _ in range(LOOKUPS):
+            with timer.measure():
+                repo.get_for_combat(TELEGRAM_USER_ID)
+    return timer
+
+
+def main() -> None:
+    engine = create_benchmark_engine()
+    url = engine.url
+    variants = [
+        ("Query на кожен виклик", engine, QueryPerCallCharacterRepository),
+        ("select(), без кешу компіляції", create_engine(url, query_cache_size=0), PostgresCharacterRepository),
+        ("select(), кеш компіляції", engine, PostgresCharacterRepository),
+    ]
+    if importlib.util.find_spec("psycopg") is not None:
+        psycopg_url = make_url(url).set(drivername="postgresql+psycopg")
+        variants.append((
+            "select() + psycopg 3 PREPARE",
+            create_engine(psycopg_url, connect_args={'prepare_threshold': 0, 'client_encoding': 'utf8'}),
+            PostgresCharacterRepository,
+        ))
+
+    rows = []
+    for name, variant_engine, repo_cls in variants:
+        timer = measure(variant_engine, repo_cls)
+        rows.append([
+            name,
+            f"{1000 / timer.mean:.0f}",
+            f"{timer.mean * 1000:.0f}",
+            f"{timer.percentile(95) * 1000:.0f}",
+        ])
+        variant_engine.dispose()
+
+    print(f"get_for_combat, {LOOKUPS} викликів на одному з'єднанні\n")
+    print_table(["Варіант", "Пошуків/с", "мкс (сер.)", "мкс (p95)"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Бенчмарк кількості SQL-запитів на команду при збереженні персонажа.
+
+Порівнює попередню стратегію save() (повний перезапис усіх таблиць) з
+частковим збереженням на основі відстеження змін.
+
+Запуск:
+    python -m benchmarks.bench_character_save
+"""
+from collections import Counter
+from typing import Callable, Dict, List
+from uuid import UUID
+from datetime import datetime, timezone
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.database.models import (
+    CharacterModel, EquipmentModel, InventoryModel, CombatStateModel
+)
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+from benchmarks.common import create_benchmark_engine, benchmark_session, Timer, print_table
+
+ITERATIONS = 50
+
+
+class FullRewriteCharacterRepository(PostgresCharacterRepository):
+    """Відтворює попередню стратегію save(): SELECT, повний UPDATE, DELETE+INSERT інвентаря."""
+
+    def save(self, character: Character) -> None:
+        char_uuid = UUID(character.id)
+        db_character = self.session.query(CharacterModel).filter_by(id=char_uuid).first()
+        if db_character is None:
+            db_character = CharacterModel(id=char_uuid)
+            self.session.add(db_character)
+
+        values = self._character_values(character, (
+            'telegram_user_id', 'name', 'level', 'experience', 'base_stats',
+            'current_health', 'current_mana', 'location_id',
+        ))
+        for column, value in values.items():
+            setattr(db_character, column, value)
+        db_character.updated_at = datetime.now(timezone.utc)
+        db_character.last_activity_at = datetime.now(timezone.utc)
+
+        equipment = db_character.equipment
+        if equipment is None:
+            equipment = EquipmentModel(character_id=char_uuid)
+            self.session.add(equipment)
+        for slot in ('weapon', 'armor', 'helmet', 'boots', 'gloves', 'ring_1', 'ring_2', 'amulet'):
+            setattr(equipment, slot, character.equipped_items.get(slot))
+        equipment.updated_at = datetime.now(timezone.utc)
+
+        self.session.query(InventoryModel).filter_by(character_id=char_uuid).delete()
+        for item_id, quantity in Counter(character.inventory).items():
+            self.session.add(InventoryModel(
+                character_id=char_uuid, item_id=item_id, quantity=quantity,
+                acquired_at=datetime.now(timezone.utc)
+            ))
+
+        existing_combat = self.session.query(CombatStateModel).filter_by(character_id=char_uuid).first()
+        if character.combat_state is None:
+            if existing_combat:
+                self.session.delete(existing_combat)
+        else:
+            if existing_combat is None:
+                existing_combat = CombatStateModel(character_id=char_uuid)
+                self.session.add(existing_combat)
+            for column, value in self._combat_state_values(character.combat_state).items():
+                setattr(existing_combat, column, value)
+        character.mark_persisted()
+
+
+def _start_combat(character: Character) -> None:
+    character.combat_state = {
+        'enemy_id': 'goblin_01', 'enemy_level': 2,
+        'enemy_current_health': 80, 'enemy_max_health': 80, 'turn': 0,
+    }
+
+
+def _combat_turn(character: Character) -> None:
+    character.take_damage(3)
+    character.combat_state['enemy_current_health'] -= 10
+    character.combat_state['turn'] += 1
+
+
+def _victory(character: Character) -> None:
+    character.gain_experience(10)
+    character.add_item('potion_small')
+    character.combat_state = None
+
+
+def _rest(character: Character) -> None:
+    # Чергуємо значення, щоб кожне збереження дійсно змінювало здоров'я
+    full_health = character.base_stats.base_health
+    character.current_health = full_health - 1 if character.current_health == full_health else full_health
+
+
+def _travel(character: Character) -> None:
+    character.travel_to('dark_forest' if character.location_id != 'dark_forest' else 'town_main')
+
+
+COMMANDS: Dict[str, Callable[[Character], None]] = {
+    '/explore (start combat)': _start_combat,
+    '/attack (turn)': _combat_turn,
+    '/attack (victory)': _victory,
+    '/rest': _rest,
+    '/travel': _travel,
+    'no changes': lambda character: None,
+}
+
+
+def run_strategy(repo_cls, session, telegram_user_id: int) -> Dict[str, List[float]]:
+    """Виконує кожну команду ITERATIONS разів і повертає кількість запитів та час."""
+    repo = repo_cls(session)
+    results = {}
+    bind = session.get_bind()
+    character = Character(
+        telegram_user_id=telegram_user_id,
+        name="Bench", base_stats=BaseStats(10, 10, 10, 100, 50),
+        inventory=[f"item_{i % 20}" for i in range(40)]
+    )
+    repo.save(character)
+    session.flush()
+
+    for name, command in COMMANDS.items():
+        timer = Timer()
+        statements = 0
+        for _ in range(ITERATIONS):
+            character = repo.get(character.id)
+            if name in ('/attack (turn)', '/attack (victory)'):
+                if character.combat_state is None:
+                    _start_combat(character)
+                    repo.save(character)
+                    session.flush()
+            command(character)
+            with StatementCounter(bind) as counter, timer.measure():
+                repo.save(character)
+                session.flush()
+            statements += counter.count
+        results[name] = [statements / ITERATIONS, timer.mean]
+    return results
+
+
+def main() -> None:
+    engine = create_benchmark_engine()
+    with benchmark_session(engine) as session:
+        before = run_strategy(FullRewriteCharacterRepository, session, 900_001)
+    with benchmark_session(engine) as session:
+        after = run_strategy(PostgresCharacterRepository, session, 900_002)
+    engine.dispose()
+
+    rows = [
+        [name, f"{before[name][0]:.1f}", f"{after[name][0]:.1f}",
+         f"{before[name][1]:.2f}", f"{after[name][1]:.2f}"]
+        for name in COMMANDS
+    ]
+    print(f"Збереження персонажа (40 предметів в інвентарі), {ITERATIONS} повторів на команду\n")
+    print_table(["Команда", "Запитів до", "Запитів після", "мс до", "мс після"], rows)
+
+
+if __name__ == "__main__":
+    main()
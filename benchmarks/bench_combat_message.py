@@ -0,0 +1,82 @@
+"""
+Бенчмарк вихідних викликів Bot API на один бій.
+
+Раніше кожен /attack надсилав нове повідомлення (один sendMessage на хід).
+Тепер кнопки бою редагують одне повідомлення через CombatMessageEditor, а
+ходи, зроблені швидше, ніж бот оновлює повідомлення, об'єднуються в одне
+редагування. Бенчмарк імітує FIGHTS боїв по TURNS ходів з різними
+інтервалами між натисканнями та бот-заглушку із затримкою Telegram
+API_LATENCY_MS і рахує повідомлення/редагування на бій та час від
+останнього ходу до показу фінального стану.
+
+Запуск:
+    python -m benchmarks.bench_combat_message
+"""
+import asyncio
+import time
+from typing import List
+
+from presentation.telegram.combat_message import CombatMessageEditor
+from presentation.telegram.keyboards import get_combat_keyboard
+
+from benchmarks.common import Timer, print_table
+
+FIGHTS = 50
+TURNS = 12
+API_LATENCY_MS = 80
+DEBOUNCE_MS = (0, 150, 300)
+TAP_INTERVALS_MS = (50, 200, 600)
+
+
+class CountingBot:
+    """Бот-заглушка: рахує редагування та час показу останнього стану бою."""
+    def __init__(self):
+        self.calls = 0
+        self.rendered_at = {}
+
+    async def edit_message_text(self, text, chat_id, message_id, reply_markup=None, parse_mode=None):
+        self.calls += 1
+        await asyncio.sleep(API_LATENCY_MS / 1000)
+        if text.endswith(f"turn {TURNS - 1}"):
+            self.rendered_at[chat_id] = time.perf_counter()
+
+
+async def run(debounce_ms: int, tap_interval_ms: int) -> List[object]:
+    editor = CombatMessageEditor(debounce_seconds=debounce_ms / 1000)
+    bot = CountingBot()
+    last_turn_at = {}
+    final_render = Timer()
+
+    async def fight(chat_id: int) -> None:
+        for turn in range(TURNS):
+            editor.schedule(bot, chat_id, 1, f"fight {chat_id} turn {turn}", get_combat_keyboard())
+            if turn < TURNS - 1:
+                await asyncio.sleep(tap_interval_ms / 1000)
+        last_turn_at[chat_id] = time.perf_counter()
+
+    await asyncio.gather(*(fight(chat_id) for chat_id in range(FIGHTS)))
+    await editor.flush()
+    final_render.samples = [(bot.rendered_at[chat_id] - last_turn_at[chat_id]) * 1000 for chat_id in range(FIGHTS)]
+    return [
+        debounce_ms, tap_interval_ms, TURNS, f"{bot.calls / FIGHTS:.1f}", editor.stats.coalesced,
+        f"{final_render.percentile(50):.0f}", f"{final_render.percentile(95):.0f}",
+    ]
+
+
+def main() -> None:
+    rows = [
+        asyncio.run(run(debounce_ms, tap_interval_ms))
+        for tap_interval_ms in TAP_INTERVALS_MS
+        for debounce_ms in DEBOUNCE_MS
+    ]
+    print(f"{FIGHTS} боїв по {TURNS} ходів, затримка Telegram {API_LATENCY_MS} мс; "
+          f"окреме повідомлення на хід - {TURNS} викликів на бій\n")
+    print_table(
+        ["Debounce мс", "Інтервал ходів мс", "Ходів", "Редагувань на бій", "Об'єднано",
+         "Показ останнього ходу p50 мс", "p95 мс"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Бенчмарк кількості записів у базу за один бій.
+
+Проводить однакові бої (фіксоване зерно генератора випадкових чисел) через
+StartCombatUseCase та PerformAttackUseCase, як це роблять обробники /explore
+та /attack, і рахує INSERT/UPDATE/DELETE з усіма записами стану бою в базу
+та з CombatSessionCharacterRepository.
+
+Запуск:
+    python -m benchmarks.bench_combat_writes
+"""
+import os
+import random
+from typing import Callable, Dict
+
+from application.use_cases.combat.perform_attack_use_case import PerformAttackUseCase, PerformAttackRequest
+from application.use_cases.combat.start_combat import StartCombatUseCase, StartCombatRequest
+from domain.entities.character import Character
+from domain.repositories.character_repository import ICharacterRepository
+from domain.services.combat_calculator import CombatCalculator
+from domain.services.loot_generator import LootGenerator
+from domain.services.stats_calculator import StatsCalculator
+from domain.value_objects.stats import BaseStats
+from infrastructure.cache.backends import InMemoryCacheBackend
+from infrastructure.cache.combat_session_store import CombatSessionStore
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.repositories.combat_session_character_repository import CombatSessionCharacterRepository
+from infrastructure.persistence.repositories.identity_map_character_repository import IdentityMapCharacterRepository
+from infrastructure.persistence.repositories.json_enemy_repository import JsonEnemyRepository
+from infrastructure.persistence.repositories.json_item_repository import JsonItemRepository
+from infrastructure.persistence.repositories.json_location_repository import JsonLocationRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+from benchmarks.common import create_benchmark_engine, benchmark_session, print_table
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data")
+FIGHTS = 30
+WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def run_fights(session, make_repo: Callable[[], ICharacterRepository]) -> Dict[str, float]:
+    random.seed(42)
+    enemy_repo = JsonEnemyRepository(DATA_PATH)
+    location_repo = JsonLocationRepository(DATA_PATH)
+    stats_calculator = StatsCalculator(JsonItemRepository(DATA_PATH))
+    bind = session.get_bind()
+
+    character = Character(telegram_user_id=940_001, name="Duelist",
+                          base_stats=BaseStats(10, 10, 10, 500, 50), location_id="forest_dark")
+    PostgresCharacterRepository(session).save(character)
+    session.flush()
+
+    turns = 0
+    with StatementCounter(bind) as counter:
+        for _ in range(FIGHTS):
+            # Кожна команда - окреме оновлення зі своєю картою ідентичності.
+            repo = IdentityMapCharacterRepository(make_repo())
+            StartCombatUseCase(repo, enemy_repo, stats_calculator, location_repo).execute(
+                StartCombatRequest(character_id=character.id, enemy_id="goblin_01")
+            )
+            session.flush()
+
+            ended = False
+            while not ended:
+                repo = IdentityMapCharacterRepository(make_repo())
+                response = PerformAttackUseCase(
+                    repo, enemy_repo, stats_calculator, CombatCalculator(), LootGenerator()
+                ).execute(PerformAttackRequest(character_id=character.id))
+                session.flush()
+                turns += 1
+                ended = response.combat_ended
+
+            # Відновлюємо здоров'я між боями, як після /rest.
+            repo = IdentityMapCharacterRepository(make_repo())
+            rested = repo.get(character.id)
+            rested.current_health = rested.base_stats.base_health
+            repo.save(rested)
+            session.flush()
+
+    writes = sum(counter.count_of(verb) for verb in WRITE_VERBS)
+    combat_writes = sum(
+        1 for statement in counter.statements
+        if statement.lstrip().upper().startswith(WRITE_VERBS) and 'combat_states' in statement[:60]
+    )
+    return {
+        'turns': turns / FIGHTS,
+        'writes': writes / FIGHTS,
+        'combat_writes': combat_writes / FIGHTS,
+    }
+
+
+def main() -> None:
+    engine = create_benchmark_engine()
+    results = {}
+    with benchmark_session(engine) as session:
+        results['усе в базі'] = run_fights(session, lambda: PostgresCharacterRepository(session))
+    for every_turns in (5, 10):
+        store = CombatSessionStore(InMemoryCacheBackend())
+        with benchmark_session(engine) as session:
+            results[f'сесії, точка кожні {every_turns} ходів'] = run_fights(
+                session,
+                lambda: CombatSessionCharacterRepository(
+                    PostgresCharacterRepository(session), store, checkpoint_every_turns=every_turns
+                )
+            )
+    engine.dispose()
+
+    rows = [
+        [name, f"{r['turns']:.1f}", f"{r['writes']:.1f}", f"{r['combat_writes']:.1f}"]
+        for name, r in results.items()
+    ]
+    print(f"Записи в базу за один бій, {FIGHTS} боїв\n")
+    print_table(["Стратегія", "Ходів", "Записів усього", "Записів combat_states"], rows)
+
+
+if __name__ == "__main__":
+    main()
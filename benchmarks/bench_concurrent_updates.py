@@ -0,0 +1,142 @@
+"""
+Бенчмарк пропускної здатності паралельних оновлень персонажів.
+
+Кілька потоків з окремими з'єднаннями виконують команди "завантажити -
+змінити - зберегти" над спільним набором персонажів і порівнюють:
+- оптимістичне блокування: перевірка версії при UPDATE та повтор при конфлікті;
+- песимістичне блокування: SELECT ... FOR UPDATE перед завантаженням.
+
+Один персонаж на всі потоки моделює найгірший випадок (швидкі повторні
+натискання одного гравця), персонаж на потік - звичайну роботу бота.
+
+На відміну від інших бенчмарків, потокам потрібні справжні коміти, тому
+створені рядки видаляються після завершення, а таблиці - якщо їх створив бенчмарк.
+
+Запуск:
+    python -m benchmarks.bench_concurrent_updates
+"""
+import random
+import threading
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import delete, inspect, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database import Base
+from infrastructure.persistence.database.models import CharacterModel
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+from benchmarks.common import create_benchmark_engine, print_table
+
+WORKERS = 8
+UPDATES_PER_WORKER = 100
+FIRST_TELEGRAM_USER_ID = 930_001
+
+
+def optimistic_update(
+    session_factory: Callable[[], Session], character_id: str, stats: Dict[str, int], backoff: bool = False
+) -> None:
+    attempt = 0
+    while True:
+        with session_factory() as session:
+            repo = PostgresCharacterRepository(session)
+            character = repo.get(character_id)
+            character.experience += 1
+            try:
+                repo.save(character)
+                session.commit()
+                return
+            except ConcurrencyConflictError:
+                session.rollback()
+                stats['conflicts'] += 1
+            attempt += 1
+            if backoff:
+                # Як retry_on_conflict в обробниках: експоненційна затримка з розкидом.
+                time.sleep(min(0.05, 0.002 * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0))
+
+
+def pessimistic_update(session_factory: Callable[[], Session], character_id: str, stats: Dict[str, int]) -> None:
+    with session_factory() as session:
+        session.execute(
+            select(CharacterModel.id).where(CharacterModel.id == character_id).with_for_update()
+        )
+        repo = PostgresCharacterRepository(session)
+        character = repo.get(character_id)
+        character.experience += 1
+        repo.save(character)
+        session.commit()
+
+
+VARIANTS = (
+    ("оптимістичне, повтор одразу", optimistic_update),
+    ("оптимістичне, повтор із затримкою", lambda *args: optimistic_update(*args, backoff=True)),
+    ("SELECT FOR UPDATE", pessimistic_update),
+)
+
+
+def run(session_factory, character_ids: List[str], update) -> Dict[str, float]:
+    stats = {'conflicts': 0}
+    lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        local = {'conflicts': 0}
+        character_id = character_ids[index % len(character_ids)]
+        for _ in range(UPDATES_PER_WORKER):
+            update(session_factory, character_id, local)
+        with lock:
+            stats['conflicts'] += local['conflicts']
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(WORKERS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = WORKERS * UPDATES_PER_WORKER
+    return {'ops': total / elapsed, 'conflicts': stats['conflicts'] / total * 100}
+
+
+def main() -> None:
+    engine = create_benchmark_engine()
+    created_tables = not inspect(engine).has_table(CharacterModel.__tablename__)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    telegram_ids = list(range(FIRST_TELEGRAM_USER_ID, FIRST_TELEGRAM_USER_ID + WORKERS))
+
+    rows = []
+    try:
+        with session_factory() as session:
+            repo = PostgresCharacterRepository(session)
+            characters = [
+                Character(telegram_user_id=tg, name="Contended", base_stats=BaseStats(10, 10, 10, 100, 50))
+                for tg in telegram_ids
+            ]
+            for character in characters:
+                repo.save(character)
+            session.commit()
+        ids = [character.id for character in characters]
+
+        for scenario, character_ids in (("1 персонаж на всі потоки", ids[:1]), ("персонаж на потік", ids)):
+            for name, update in VARIANTS:
+                result = run(session_factory, character_ids, update)
+                rows.append([scenario, name, f"{result['ops']:.0f}", f"{result['conflicts']:.1f}"])
+    finally:
+        with session_factory() as session:
+            session.execute(delete(CharacterModel).where(CharacterModel.telegram_user_id.in_(telegram_ids)))
+            session.commit()
+        if created_tables:
+            Base.metadata.drop_all(engine)
+        engine.dispose()
+
+    print(f"{WORKERS} потоків по {UPDATES_PER_WORKER} оновлень\n")
+    print_table(["Навантаження", "Блокування", "Оновлень/с", "Конфліктів, %"], rows)
+
+
+if __name__ == "__main__":
+    main()
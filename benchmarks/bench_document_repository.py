@@ -0,0 +1,104 @@
+"""
+Бенчмарк документного сховища персонажів у порівнянні з реляційним.
+
+Для малого (10 предметів) та великого (1000 предметів) інвентаря вимірює
+завантаження персонажа та збереження типових змін: бойового ходу
+(здоров'я ворога та гравця) і отримання нового предмета.
+
+Запуск:
+    python -m benchmarks.bench_document_repository
+"""
+from typing import Callable, Dict, List
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.repositories.document_character_repository import DocumentCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+from benchmarks.common import create_benchmark_engine, benchmark_session, Timer, print_table
+
+INVENTORY_SIZES = {'малий': 10, 'великий': 1000}
+ITERATIONS = 50
+
+
+def combat_turn(character: Character, i: int) -> None:
+    character.combat_state = {
+        'enemy_id': 'goblin_01',
+        'enemy_level': 1,
+        'enemy_current_health': 100 - i % 50,
+        'enemy_max_health': 100,
+        'turn': i,
+    }
+    character.current_health = 90 - i % 2
+
+
+OPERATIONS: Dict[str, Callable[[Character, int], None]] = {
+    'бойовий хід': combat_turn,
+    'новий предмет': lambda c, i: c.add_item(f"loot_{i}"),
+}
+
+
+def run_backend(repo_cls, session, telegram_user_id: int, inventory_size: int) -> Dict[str, List[float]]:
+    repo = repo_cls(session)
+    bind = session.get_bind()
+    character = Character(
+        telegram_user_id=telegram_user_id, name="Collector",
+        base_stats=BaseStats(10, 10, 10, 100, 50),
+        equipped_items={'weapon': 'sword_01'},
+        inventory=[f"item_{i}" for i in range(inventory_size)]
+    )
+    repo.save(character)
+    session.flush()
+
+    results = {}
+    load_timer = Timer()
+    load_statements = 0
+    for _ in range(ITERATIONS):
+        session.expunge_all()
+        with StatementCounter(bind) as counter, load_timer.measure():
+            repo.get_by_telegram_user_id(telegram_user_id)
+        load_statements += counter.count
+    results['завантаження'] = [load_statements / ITERATIONS, load_timer.mean, load_timer.percentile(95)]
+
+    for name, operation in OPERATIONS.items():
+        timer = Timer()
+        statements = 0
+        for i in range(ITERATIONS):
+            character = repo.get(character.id)
+            operation(character, i)
+            with StatementCounter(bind) as counter, timer.measure():
+                repo.save(character)
+                session.flush()
+            statements += counter.count
+        results[name] = [statements / ITERATIONS, timer.mean, timer.percentile(95)]
+    return results
+
+
+def main() -> None:
+    engine = create_benchmark_engine()
+    rows = []
+    for offset, (size_name, size) in enumerate(INVENTORY_SIZES.items()):
+        with benchmark_session(engine) as session:
+            relational = run_backend(PostgresCharacterRepository, session, 920_001 + offset, size)
+        with benchmark_session(engine) as session:
+            document = run_backend(DocumentCharacterRepository, session, 920_101 + offset, size)
+        for operation in relational:
+            r, d = relational[operation], document[operation]
+            rows.append([
+                f"{size_name} ({size})", operation,
+                f"{r[0]:.1f}", f"{d[0]:.1f}",
+                f"{r[1]:.2f}", f"{d[1]:.2f}",
+                f"{r[2]:.2f}", f"{d[2]:.2f}",
+            ])
+    engine.dispose()
+
+    print(f"Реляційне (postgres) проти документного (document) сховища, {ITERATIONS} повторів\n")
+    print_table(
+        ["Інвентар", "Операція", "Запитів pg", "Запитів doc", "мс pg", "мс doc", "p95 pg", "p95 doc"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Бенчмарк журналу подій персонажа: швидкість дописування та відновлення стану.
+
+Для кількох інтервалів знімків (CHARACTER_SNAPSHOT_EVERY) вимірює:
+- дописування: ходи бою персонажів, кожен - save() з одним рядком журналу;
+- відновлення: get_by_telegram_user_id (знімок + хвіст подій) для
+  персонажів з довгою історією.
+
+Рідкісні знімки прискорюють запис, але подовжують хвіст, який треба
+застосувати при завантаженні. Межі задаються змінними оточення;
+якщо результат їх порушує, бенчмарк завершується з кодом 1 (для CI):
+    EVENT_APPEND_MIN_PER_SECOND - мінімум збережень за секунду (200).
+    EVENT_REBUILD_MAX_P95_MS - максимальний p95 відновлення стану, мс (20).
+
+Запуск:
+    python -m benchmarks.bench_event_log
+"""
+import os
+import sys
+import time
+from typing import Dict, List
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.repositories.event_sourced_character_repository import (
+    EventSourcedCharacterRepository
+)
+
+from benchmarks.common import create_benchmark_engine, benchmark_session, Timer, print_table
+
+CHARACTERS = 50
+# Остання версія не кратна інтервалам знімків, тож завантаження застосовує хвіст подій.
+SAVES_PER_CHARACTER = 199
+SNAPSHOT_INTERVALS = (10, 50, 200)
+FIRST_TELEGRAM_USER_ID = 920_001
+
+
+def run(snapshot_every: int) -> Dict[str, float]:
+    engine = create_benchmark_engine()
+    append_timer = Timer()
+    rebuild_timer = Timer()
+    telegram_ids = range(FIRST_TELEGRAM_USER_ID, FIRST_TELEGRAM_USER_ID + CHARACTERS)
+
+    with benchmark_session(engine) as session:
+        repo = EventSourcedCharacterRepository(session, snapshot_every=snapshot_every)
+        characters: List[Character] = []
+        for telegram_user_id in telegram_ids:
+            character = Character(
+                telegram_user_id=telegram_user_id, name="Journal",
+                base_stats=BaseStats(10, 10, 10, 100, 50),
+                equipped_items={'weapon': 'sword_01'},
+                inventory=['potion'] * 3,
+            )
+            repo.save(character)
+            characters.append(character)
+        session.flush()
+
+        started = time.perf_counter()
+        for turn in range(1, SAVES_PER_CHARACTER):
+            for character in characters:
+                with append_timer.measure():
+                    character.combat_state = {'enemy_id': 'goblin_01', 'enemy_level': 1,
+                                              'enemy_current_health': 30, 'enemy_max_health': 30,
+                                              'turn': turn}
+                    character.current_mana = 50 - turn % 50
+                    repo.save(character)
+                    session.flush()
+        elapsed = time.perf_counter() - started
+
+        for telegram_user_id in telegram_ids:
+            with rebuild_timer.measure():
+                repo.get_by_telegram_user_id(telegram_user_id)
+    engine.dispose()
+
+    return {
+        'saves_per_second': len(append_timer.samples) / elapsed,
+        'append_p95': append_timer.percentile(95),
+        'rebuild_mean': rebuild_timer.mean,
+        'rebuild_p95': rebuild_timer.percentile(95),
+    }
+
+
+def main() -> None:
+    min_saves_per_second = float(os.getenv('EVENT_APPEND_MIN_PER_SECOND', '200'))
+    max_rebuild_p95_ms = float(os.getenv('EVENT_REBUILD_MAX_P95_MS', '20'))
+
+    rows = []
+    violations = []
+    for snapshot_every in SNAPSHOT_INTERVALS:
+        result = run(snapshot_every)
+        rows.append([
+            snapshot_every,
+            f"{result['saves_per_second']:.0f}",
+            f"{result['append_p95']:.3f}",
+            f"{result['rebuild_mean']:.3f}",
+            f"{result['rebuild_p95']:.3f}",
+        ])
+        if result['saves_per_second'] < min_saves_per_second:
+            violations.append(f"знімок кожні {snapshot_every}: {result['saves_per_second']:.0f} збережень/с "
+                              f"< {min_saves_per_second:.0f}")
+        if result['rebuild_p95'] > max_rebuild_p95_ms:
+            violations.append(f"знімок кожні {snapshot_every}: p95 відновлення {result['rebuild_p95']:.3f} мс "
+                              f"> {max_rebuild_p95_ms:.0f} мс")
+
+    print(f"{CHARACTERS} персонажів, {SAVES_PER_CHARACTER} збережень на кожного; мс\n")
+    print_table(["Знімок кожні", "Збережень/с", "Запис p95", "Відновлення", "Відновлення p95"], rows)
+
+    if violations:
+        print("\nПорушено межі:")
+        for violation in violations:
+            print(f"  - {violation}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
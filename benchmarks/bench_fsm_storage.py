@@ -0,0 +1,89 @@
+"""
+Бенчмарк затримки операцій сховища FSM (presentation/telegram/storage.py).
+
+CLIENTS паралельних гравців виконують типовий для обробника набір операцій:
+get_state, set_state, update_data, get_data. Порівнюється MemoryStorage,
+RedisStorage над fakeredis (вартість серіалізації без мережі) та, якщо
+вказано --url, справжній Redis з різними розмірами пулу з'єднань.
+
+Запуск:
+    python -m benchmarks.bench_fsm_storage
+    python -m benchmarks.bench_fsm_storage --url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from presentation.telegram.storage import create_redis_storage
+
+from benchmarks.common import Timer, print_table
+
+CLIENTS = 100
+ROUNDS = 50
+POOL_SIZES = (5, 20, 100)
+OPERATIONS = ("get_state", "set_state", "update_data", "get_data")
+
+
+async def run(storage: BaseStorage, clients: int, rounds: int) -> List[object]:
+    timers: Dict[str, Timer] = {name: Timer() for name in OPERATIONS}
+
+    async def player(user_id: int) -> None:
+        key = StorageKey(bot_id=42, chat_id=user_id, user_id=user_id)
+        for step in range(rounds):
+            with timers['get_state'].measure():
+                await storage.get_state(key)
+            with timers['set_state'].measure():
+                await storage.set_state(key, f"Combat:turn{step % 3}")
+            with timers['update_data'].measure():
+                await storage.update_data(key, {'turn': step, 'enemy_health': 100 - step})
+            with timers['get_data'].measure():
+                await storage.get_data(key)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(player(900_000 + user_id) for user_id in range(clients)))
+    seconds = time.perf_counter() - started
+    await storage.close()
+    row: List[object] = [f"{clients * rounds * len(OPERATIONS) / seconds:.0f}"]
+    for name in OPERATIONS:
+        row += [f"{timers[name].percentile(50):.3f}", f"{timers[name].percentile(95):.3f}"]
+    return row
+
+
+def storages(url: Optional[str]) -> List[tuple]:
+    result = [("memory", "-", lambda: MemoryStorage())]
+    try:
+        from fakeredis import aioredis
+        result.append(("fakeredis", "-", lambda: create_redis_storage("", client=aioredis.FakeRedis())))
+    except ImportError:
+        print("fakeredis не встановлено, пропускаємо\n")
+    if url:
+        for size in POOL_SIZES:
+            result.append(("redis", size, lambda size=size: create_redis_storage(
+                url, max_connections=size, key_prefix="fsm_bench")))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Затримка операцій сховища FSM")
+    parser.add_argument('--url', help="Адреса Redis для порівняння (дані з префіксом fsm_bench)")
+    parser.add_argument('--clients', type=int, default=CLIENTS)
+    parser.add_argument('--rounds', type=int, default=ROUNDS)
+    args = parser.parse_args()
+
+    rows = []
+    for name, pool_size, factory in storages(args.url):
+        rows.append([name, pool_size] + asyncio.run(run(factory(), args.clients, args.rounds)))
+
+    print(f"{args.clients} гравців x {args.rounds} раундів, затримки в мс\n")
+    headers = ["Сховище", "Пул", "Операцій/с"]
+    for operation in OPERATIONS:
+        headers += [f"{operation} p50", f"{operation} p95"]
+    print_table(headers, rows)
+
+
+if __name__ == "__main__":
+    main()
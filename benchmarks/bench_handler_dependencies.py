@@ -0,0 +1,167 @@
+"""
+Бенчмарк підготовки залежностей обробника на одне оновлення.
+
+Порівнює попередню схему (кожен обробник створював JSON-репозиторії,
+калькулятори та сценарії заново, тож файли контенту перечитувалися, а кеші
+предметів і ворогів починали з нуля) з композиційним коренем Container, який
+створюється один раз при запуску бота. Для кожної команди вимірюється
+підготовка залежностей разом з роботою над контентом, яку виконує обробник
+(розрахунок характеристик, пошук ворога чи локації); запити до бази не
+входять у вимірювання - вони однакові в обох схемах.
+
+Пам'ять рахується tracemalloc: пік виділеного понад базовий рівень за одне
+оновлення та пам'ять, що лишилася зайнятою після всіх оновлень (кеші
+lru_cache на методах репозиторіїв тримають посилання на старі екземпляри).
+
+Запуск:
+    python -m benchmarks.bench_handler_dependencies
+"""
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from domain.entities.character import Character
+from domain.services.combat_calculator import CombatCalculator
+from domain.services.event_generator import EventGenerator
+from domain.services.loot_generator import LootGenerator
+from domain.services.stats_calculator import StatsCalculator
+from domain.value_objects.stats import BaseStats
+from application.use_cases.character import GetCharacterStatsUseCase
+from application.use_cases.character.travel import TravelUseCase
+from application.use_cases.combat.perform_attack_use_case import PerformAttackUseCase
+from application.use_cases.combat.start_combat import StartCombatUseCase
+from application.use_cases.events.generate_event_use_case import GenerateEventUseCase
+from infrastructure.persistence.repositories.json_enemy_repository import JsonEnemyRepository
+from infrastructure.persistence.repositories.json_item_repository import JsonItemRepository
+from infrastructure.persistence.repositories.json_location_repository import JsonLocationRepository
+from presentation.telegram.container import DATA_PATH, Container
+
+from benchmarks.common import Timer, print_table
+
+ITERATIONS = 200
+
+# Обробник отримує репозиторій персонажів з одиниці роботи; тут він не використовується.
+CHARACTER_REPO = None
+
+
+def make_character() -> Character:
+    return Character(
+        telegram_user_id=940_001, name="Wired",
+        base_stats=BaseStats(10, 10, 10, 100, 50),
+        location_id='forest_dark',
+        equipped_items={'weapon': 'axe_01', 'chest': 'chest_01'},
+        combat_state={'enemy_id': 'goblin_01', 'enemy_level': 1,
+                      'enemy_current_health': 30, 'enemy_max_health': 30, 'turn': 0},
+    )
+
+
+def inline_commands(character: Character) -> Dict[str, Callable[[], object]]:
+    """Попередня схема: залежності створюються в тілі обробника."""
+    def stats():
+        calculator = StatsCalculator(JsonItemRepository(DATA_PATH))
+        GetCharacterStatsUseCase(CHARACTER_REPO, calculator)
+        return calculator.calculate_total_stats(character)
+
+    def explore():
+        location_repo = JsonLocationRepository(DATA_PATH)
+        GenerateEventUseCase(CHARACTER_REPO, location_repo, EventGenerator())
+        enemy_repo = JsonEnemyRepository(DATA_PATH)
+        calculator = StatsCalculator(JsonItemRepository(DATA_PATH))
+        StartCombatUseCase(CHARACTER_REPO, enemy_repo, calculator, JsonLocationRepository(DATA_PATH))
+        enemy = enemy_repo.get_by_id(character.combat_state['enemy_id'])
+        return calculator.calculate_enemy_stats(enemy, character.level)
+
+    def attack():
+        enemy_repo = JsonEnemyRepository(DATA_PATH)
+        calculator = StatsCalculator(JsonItemRepository(DATA_PATH))
+        PerformAttackUseCase(CHARACTER_REPO, enemy_repo, calculator, CombatCalculator(), LootGenerator())
+        enemy_repo.get_by_id(character.combat_state['enemy_id'])
+        return calculator.calculate_total_stats(character)
+
+    def travel():
+        location_repo = JsonLocationRepository(DATA_PATH)
+        TravelUseCase(CHARACTER_REPO, location_repo)
+        return location_repo.get(character.location_id)
+
+    def rest():
+        JsonLocationRepository(DATA_PATH).get(character.location_id)
+        return StatsCalculator(JsonItemRepository(DATA_PATH)).calculate_total_stats(character)
+
+    return {'/stats': stats, '/explore': explore, '/attack': attack, '/travel': travel, '/rest': rest}
+
+
+def container_commands(container: Container, character: Character) -> Dict[str, Callable[[], object]]:
+    """Нова схема: сервіси беруться з контейнера, створюються лише сценарії."""
+    def stats():
+        container.character_stats(CHARACTER_REPO)
+        return container.stats_calculator.calculate_total_stats(character)
+
+    def explore():
+        container.generate_event(CHARACTER_REPO)
+        container.start_combat(CHARACTER_REPO)
+        enemy = container.enemy_repository.get_by_id(character.combat_state['enemy_id'])
+        return container.stats_calculator.calculate_enemy_stats(enemy, character.level)
+
+    def attack():
+        container.perform_attack(CHARACTER_REPO)
+        container.enemy_repository.get_by_id(character.combat_state['enemy_id'])
+        return container.stats_calculator.calculate_total_stats(character)
+
+    def travel():
+        container.travel(CHARACTER_REPO)
+        return container.location_repository.get(character.location_id)
+
+    def rest():
+        container.location_repository.get(character.location_id)
+        return container.stats_calculator.calculate_total_stats(character)
+
+    return {'/stats': stats, '/explore': explore, '/attack': attack, '/travel': travel, '/rest': rest}
+
+
+def measure(command: Callable[[], object]) -> Tuple[Timer, float, float]:
+    """Повертає таймер, середній пік пам'яті оновлення та залишок пам'яті, байти."""
+    command()  # прогрів
+    timer = Timer()
+    for _ in range(ITERATIONS):
+        with timer.measure():
+            command()
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    peaks = 0
+    for _ in range(ITERATIONS):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        command()
+        peaks += tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return timer, peaks / ITERATIONS, retained
+
+
+def main() -> None:
+    character = make_character()
+    container = Container()
+    before = inline_commands(character)
+    after = container_commands(container, character)
+
+    rows: List[List[object]] = []
+    for command in before:
+        b_timer, b_peak, b_retained = measure(before[command])
+        a_timer, a_peak, a_retained = measure(after[command])
+        rows.append([
+            command,
+            f"{b_timer.mean:.3f}", f"{a_timer.mean:.3f}",
+            f"{b_timer.percentile(95):.3f}", f"{a_timer.percentile(95):.3f}",
+            f"{b_peak / 1024:.1f}", f"{a_peak / 1024:.1f}",
+            f"{b_retained / 1024:.1f}", f"{a_retained / 1024:.1f}",
+        ])
+
+    print(f"Підготовка залежностей обробника, {ITERATIONS} оновлень на команду\n")
+    print_table(
+        ["Команда", "мс до", "мс після", "p95 до", "p95 після", "пік КБ до", "пік КБ після", "залишок КБ до", "залишок КБ після"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Бенчмарк завантаження персонажа для кожного обробника команд.
+
+Порівнює попередню стратегію (joinedload усіх чотирьох зв'язків у кожній
+команді) з частковими завантаженнями, які тепер використовують обробники:
+get_for_combat, get_for_inventory та get_summary.
+
+Запуск:
+    python -m benchmarks.bench_handler_loading
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import joinedload
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.database.models import CharacterModel
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+from benchmarks.common import create_benchmark_engine, benchmark_session, Timer, print_table
+
+INVENTORY_SIZES = (10, 500)
+ITERATIONS = 50
+
+# Команда -> метод репозиторію, яким обробник завантажує персонажа.
+HANDLER_LOADERS: Dict[str, str] = {
+    '/start': 'get_summary',
+    '/stats': 'get_summary',
+    '/explore': 'get_for_combat',
+    '/attack': 'get_for_combat',
+    '/flee': 'get_for_combat',
+    '/rest': 'get_for_combat',
+    '/travel': 'get_for_combat',
+    '/inventory': 'get_for_inventory',
+}
+
+
+class JoinedLoadCharacterRepository(PostgresCharacterRepository):
+    """Попередня стратегія: кожна команда завантажує весь агрегат одним joinedload-запитом."""
+
+    def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
+        db_character = self.session.query(CharacterModel).options(
+            joinedload(CharacterModel.equipment),
+            joinedload(CharacterModel.inventory),
+            joinedload(CharacterModel.stats_cache),
+            joinedload(CharacterModel.combat_state)
+        ).filter_by(telegram_user_id=telegram_user_id).populate_existing().first()
+        return self._to_domain(db_character) if db_character is not None else None
+
+    def get_for_combat(self, telegram_user_id: int) -> Optional[Character]:
+        return self.get_by_telegram_user_id(telegram_user_id)
+
+    def get_for_inventory(self, telegram_user_id: int) -> Optional[Character]:
+        return self.get_by_telegram_user_id(telegram_user_id)
+
+    def get_summary(self, telegram_user_id: int) -> Optional[Character]:
+        return self.get_by_telegram_user_id(telegram_user_id)
+
+
+def run_strategy(repo_cls, session, telegram_user_id: int, inventory_size: int) -> Dict[str, List[float]]:
+    repo = repo_cls(session)
+    bind = session.get_bind()
+    character = Character(
+        telegram_user_id=telegram_user_id, name="Loader",
+        base_stats=BaseStats(10, 10, 10, 100, 50),
+        equipped_items={'weapon': 'sword_01', 'armor': 'leather_armor_01'},
+        inventory=[f"item_{i}" for i in range(inventory_size)],
+        combat_state={'enemy_id': 'goblin_01', 'enemy_level': 1,
+                      'enemy_current_health': 30, 'enemy_max_health': 30, 'turn': 0}
+    )
+    repo.save(character)
+    repo.save_stats_cache(character.id, {
+        'max_health': 100, 'max_mana': 50, 'armor': 0, 'evasion': 0, 'energy_shield': 0,
+        'damage_min': 1, 'damage_max': 2, 'accuracy': 100, 'critical_chance': 0.05,
+        'critical_multiplier': 1.5, 'attack_speed': 1.0,
+    }, list(character.equipped_items.values()))
+    session.flush()
+
+    results = {}
+    for handler, loader in HANDLER_LOADERS.items():
+        timer = Timer()
+        statements = 0
+        for _ in range(ITERATIONS):
+            session.expunge_all()
+            with StatementCounter(bind) as counter, timer.measure():
+                getattr(repo, loader)(telegram_user_id)
+            statements += counter.count
+        results[handler] = [statements / ITERATIONS, timer.mean, timer.percentile(95)]
+    return results
+
+
+def main() -> None:
+    engine = create_benchmark_engine()
+    rows = []
+    for offset, size in enumerate(INVENTORY_SIZES):
+        with benchmark_session(engine) as session:
+            before = run_strategy(JoinedLoadCharacterRepository, session, 930_001 + offset, size)
+        with benchmark_session(engine) as session:
+            after = run_strategy(PostgresCharacterRepository, session, 930_101 + offset, size)
+        for handler, loader in HANDLER_LOADERS.items():
+            b, a = before[handler], after[handler]
+            rows.append([
+                size, handler, loader,
+                f"{b[0]:.1f}", f"{a[0]:.1f}",
+                f"{b[1]:.2f}", f"{a[1]:.2f}",
+                f"{b[2]:.2f}", f"{a[2]:.2f}",
+            ])
+    engine.dispose()
+
+    print(f"Завантаження персонажа обробниками, {ITERATIONS} повторів\n")
+    print_table(
+        ["Інвентар", "Команда", "Метод", "Запитів до", "Запитів після", "мс до", "мс після", "p95 до", "p95 після"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
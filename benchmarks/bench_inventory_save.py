@@ -0,0 +1,97 @@
+"""
+Бенчмарк збереження великих інвентарів (1000 різних предметів).
+
+Порівнює повний перезапис інвентаря (DELETE + INSERT усіх записів) зі
+збереженням дельт через INSERT ... ON CONFLICT DO UPDATE та цільові DELETE.
+
+Запуск:
+    python -m benchmarks.bench_inventory_save
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict
+from uuid import UUID
+
+from sqlalchemy import delete, insert
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.database.models import InventoryModel
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+from benchmarks.common import create_benchmark_engine, benchmark_session, Timer, print_table
+
+INVENTORY_SIZE = 1000
+ITERATIONS = 30
+
+
+class RewriteInventoryRepository(PostgresCharacterRepository):
+    """Попередня стратегія: інвентар видаляється та вставляється повністю."""
+
+    def _save_inventory(self, character: Character) -> None:
+        char_uuid = UUID(character.id)
+        self.session.execute(delete(InventoryModel).where(InventoryModel.character_id == char_uuid))
+        now = datetime.now(timezone.utc)
+        rows = [
+            {'character_id': char_uuid, 'item_id': item_id, 'quantity': quantity, 'acquired_at': now}
+            for item_id, quantity in Counter(character.inventory).items()
+        ]
+        if rows:
+            self.session.execute(insert(InventoryModel), rows)
+
+
+OPERATIONS: Dict[str, Callable[[Character, int], None]] = {
+    'loot 1 new item': lambda c, i: c.add_item(f"loot_{i}"),
+    'loot 1 stacked item': lambda c, i: c.add_item("item_0"),
+    'consume 1 of a stack': lambda c, i: c.remove_item("item_0"),
+    'drop 1 item entirely': lambda c, i: c.remove_item(f"item_{i + 1}"),
+}
+
+
+def run_strategy(repo_cls, session, telegram_user_id: int) -> Dict[str, list]:
+    repo = repo_cls(session)
+    bind = session.get_bind()
+    character = Character(
+        telegram_user_id=telegram_user_id, name="Hoarder",
+        base_stats=BaseStats(10, 10, 10, 100, 50),
+        inventory=[f"item_{i}" for i in range(INVENTORY_SIZE)] + ["item_0"] * 50
+    )
+    repo.save(character)
+    session.flush()
+
+    results = {}
+    for name, operation in OPERATIONS.items():
+        timer = Timer()
+        statements = 0
+        for i in range(ITERATIONS):
+            character = repo.get(character.id)
+            operation(character, i)
+            with StatementCounter(bind) as counter, timer.measure():
+                repo.save(character)
+                session.flush()
+            statements += counter.count
+        results[name] = [statements / ITERATIONS, timer.mean, timer.percentile(95)]
+    return results
+
+
+def main() -> None:
+    engine = create_benchmark_engine()
+    with benchmark_session(engine) as session:
+        before = run_strategy(RewriteInventoryRepository, session, 910_001)
+    with benchmark_session(engine) as session:
+        after = run_strategy(PostgresCharacterRepository, session, 910_002)
+    engine.dispose()
+
+    rows = [
+        [name, f"{before[name][0]:.1f}", f"{after[name][0]:.1f}",
+         f"{before[name][1]:.2f}", f"{after[name][1]:.2f}",
+         f"{before[name][2]:.2f}", f"{after[name][2]:.2f}"]
+        for name in OPERATIONS
+    ]
+    print(f"Збереження інвентаря з {INVENTORY_SIZE} предметів, {ITERATIONS} повторів на операцію\n")
+    print_table(["Операція", "Запитів до", "Запитів після", "мс до", "мс після", "p95 до", "p95 після"], rows)
+
+
+if __name__ == "__main__":
+    main()
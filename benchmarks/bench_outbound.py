@@ -0,0 +1,123 @@
+"""
+Бенчмарк планувальника вихідних повідомлень (presentation/telegram/outbound.py).
+
+Сесія-заглушка імітує обмеження Telegram (загальне та на чат) і відповідає
+429 з retry_after, коли їх перевищено. Навантаження - розсилка сповіщень
+по BROADCAST_CHATS чатах, під час якої PLAYERS гравців отримують по
+REPLIES_PER_PLAYER відповідей на команди. Порівнюється відправка напряму
+та через OutboundScheduler: кількість 429, час до доставки відповідей і
+сповіщень (p50/p95) та загальна тривалість.
+
+Щоб бенчмарк тривав секунди, а не хвилини, усі ліміти помножено на SPEEDUP.
+Загальний ліміт планувальника трохи нижчий за ліміт заглушки, як і радить
+Telegram, бо годинники бота й сервера не збігаються.
+
+Запуск:
+    python -m benchmarks.bench_outbound
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+
+from presentation.telegram.outbound import (
+    OutboundRateLimitMiddleware, OutboundScheduler, TokenBucket, as_notification,
+)
+
+from benchmarks.common import Timer, print_table
+
+SPEEDUP = 10
+GLOBAL_RATE = 30 * SPEEDUP
+CHAT_RATE = 1 * SPEEDUP
+CHAT_BURST = 3
+BROADCAST_CHATS = 300
+PLAYERS = 20
+REPLIES_PER_PLAYER = 5
+
+
+class TelegramLimitsSession(BaseSession):
+    """Сесія-заглушка: 429 при перевищенні загального ліміту або ліміту чату."""
+    def __init__(self):
+        super().__init__()
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_RATE)
+        self.chat_buckets: Dict[Any, TokenBucket] = {}
+        self.delivered = 0
+        self.rejected = 0
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None) -> Any:
+        await asyncio.sleep(0.001)
+        chat_bucket = self.chat_buckets.setdefault(method.chat_id, TokenBucket(CHAT_RATE, CHAT_BURST))
+        if self.global_bucket.delay() > 0 or chat_bucket.delay() > 0:
+            self.rejected += 1
+            # Telegram повертає retry_after у цілих секундах
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1)
+        self.global_bucket.take()
+        chat_bucket.take()
+        self.delivered += 1
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+async def run(scheduled: bool) -> List[object]:
+    session = TelegramLimitsSession()
+    bot = Bot(token="42:BENCHMARK", session=session)
+    scheduler = OutboundScheduler(global_rate=GLOBAL_RATE * 0.9, chat_rate=CHAT_RATE, chat_burst=CHAT_BURST)
+    if scheduled:
+        bot.session.middleware(OutboundRateLimitMiddleware(scheduler))
+    replies, notifications = Timer(), Timer()
+    failed = 0
+
+    async def send(timer: Timer, chat_id: int, text: str) -> None:
+        nonlocal failed
+        try:
+            with timer.measure():
+                await bot.send_message(chat_id=chat_id, text=text)
+        except TelegramRetryAfter:
+            failed += 1
+
+    async def broadcast() -> None:
+        with as_notification():
+            await asyncio.gather(*(send(notifications, 1_000 + chat_id, "event")
+                                   for chat_id in range(BROADCAST_CHATS)))
+
+    async def player(chat_id: int) -> None:
+        for step in range(REPLIES_PER_PLAYER):
+            await send(replies, chat_id, f"reply{step}")
+
+    started = time.perf_counter()
+    await asyncio.gather(broadcast(), *(player(chat_id) for chat_id in range(1, PLAYERS + 1)))
+    seconds = time.perf_counter() - started
+    await scheduler.drain()
+    return [
+        "планувальник" if scheduled else "напряму", session.delivered, session.rejected, failed,
+        f"{replies.percentile(50):.0f}", f"{replies.percentile(95):.0f}",
+        f"{notifications.percentile(50):.0f}", f"{notifications.percentile(95):.0f}", f"{seconds:.2f}",
+    ]
+
+
+def main() -> None:
+    # Попередження про кожну відповідь 429 не потрібні у виводі
+    logging.getLogger('presentation.telegram.outbound').setLevel(logging.ERROR)
+    rows = [asyncio.run(run(scheduled)) for scheduled in (False, True)]
+    print(f"Розсилка {BROADCAST_CHATS} чатам + {PLAYERS} гравців x {REPLIES_PER_PLAYER} відповідей, "
+          f"ліміти x{SPEEDUP}: {GLOBAL_RATE}/с загалом, {CHAT_RATE}/с на чат\n")
+    print_table(
+        ["Відправка", "Доставлено", "429", "Втрачено", "Відповідь p50 мс", "Відповідь p95 мс",
+         "Сповіщення p50 мс", "Сповіщення p95 мс", "Секунд"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Бенчмарк сховищ персонажів: PostgreSQL, SQLite та пам'ять процесу.
+
+Для кожного сховища виконує однаковий сценарій: створення персонажів,
+бойове завантаження (get_for_combat) та збереження ходу бою з комітом,
+і порівнює середню затримку та p95 кожної операції.
+
+SQLite працює з тимчасовим файлом (як у реальному розгортанні), PostgreSQL -
+з тестовою базою в транзакції, що відкатується.
+
+Запуск:
+    python -m benchmarks.bench_repository_backends
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from domain.entities.character import Character
+from domain.repositories.character_repository import ICharacterRepository
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database import Base
+from infrastructure.persistence.database.engine import enable_sqlite_foreign_keys, get_connect_args
+from infrastructure.persistence.repositories.in_memory_character_repository import InMemoryCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.repositories.sqlite_character_repository import SqliteCharacterRepository
+
+from benchmarks.common import create_benchmark_engine, benchmark_session, Timer, print_table
+
+CHARACTERS = 200
+TURNS = 5
+FIRST_TELEGRAM_USER_ID = 910_001
+
+Backend = Tuple[ICharacterRepository, Callable[[], None]]
+
+
+@contextmanager
+def postgres_backend() -> Iterator[Backend]:
+    engine = create_benchmark_engine()
+    with benchmark_session(engine) as session:
+        # Коміт у бенчмарку - flush: зовнішня транзакція відкатується після завершення.
+        yield PostgresCharacterRepository(session), session.flush
+    engine.dispose()
+
+
+@contextmanager
+def sqlite_backend() -> Iterator[Backend]:
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = create_engine(database_url, connect_args=get_connect_args(database_url))
+        enable_sqlite_foreign_keys(engine)
+        Base.metadata.create_all(engine)
+        with Session(engine, autoflush=False) as session:
+            yield SqliteCharacterRepository(session), session.commit
+        engine.dispose()
+
+
+@contextmanager
+def memory_backend() -> Iterator[Backend]:
+    yield InMemoryCharacterRepository(), lambda: None
+
+
+def run(backend: Backend) -> Dict[str, Timer]:
+    repo, commit = backend
+    timers = {'create': Timer(), 'load': Timer(), 'turn': Timer()}
+    telegram_ids = range(FIRST_TELEGRAM_USER_ID, FIRST_TELEGRAM_USER_ID + CHARACTERS)
+
+    for telegram_user_id in telegram_ids:
+        with timers['create'].measure():
+            repo.save(Character(
+                telegram_user_id=telegram_user_id, name="Backend",
+                base_stats=BaseStats(10, 10, 10, 100, 50),
+                equipped_items={'weapon': 'sword_01'},
+                inventory=['potion'] * 3 + ['apple'],
+            ))
+            commit()
+
+    for turn in range(TURNS):
+        for telegram_user_id in telegram_ids:
+            with timers['load'].measure():
+                character = repo.get_for_combat(telegram_user_id)
+            with timers['turn'].measure():
+                character.current_health -= 1
+                character.combat_state = {'enemy_id': 'goblin_01', 'enemy_level': 1,
+                                          'enemy_current_health': 30 - turn, 'enemy_max_health': 30,
+                                          'turn': turn}
+                repo.save(character)
+                commit()
+    return timers
+
+
+def main() -> None:
+    rows = []
+    for name, backend_factory in (
+        ("PostgreSQL", postgres_backend),
+        ("SQLite (файл)", sqlite_backend),
+        ("пам'ять процесу", memory_backend),
+    ):
+        with backend_factory() as backend:
+            timers = run(backend)
+        rows.append([name] + [
+            f"{timers[op].mean:.3f} / {timers[op].percentile(95):.3f}" for op in ('create', 'load', 'turn')
+        ])
+
+    print(f"{CHARACTERS} персонажів, {TURNS} ходів бою на кожного; мс, середнє / p95\n")
+    print_table(["Сховище", "Створення", "get_for_combat", "Хід бою + коміт"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Бенчмарк ThrottlingMiddleware під флудом командами.
+
+FLOODERS гравців надсилають /attack кожні FLOOD_INTERVAL_MS мс, а PLAYERS
+звичайних гравців - раз на PLAYER_INTERVAL_MS мс. Обробник-заглушка займає
+з'єднання з пулу на DB_QUERY_MS мс (пул POOL_SIZE з'єднань, як у
+create_db_engine). Порівнюються запуски без обмеження та з лімітами
+THROTTLE_LIMITS за замовчуванням: скільки транзакцій дійшло до бази,
+скільки оновлень відкинуто і скільки чекають команди звичайних гравців.
+
+Запуск:
+    python -m benchmarks.bench_throttling
+"""
+import asyncio
+import time
+from typing import List, Optional
+
+from aiogram import Bot
+from aiogram.types import Message, User
+
+from presentation.telegram.middlewares import ThrottlingMiddleware
+from presentation.telegram.middlewares.throttling import DEFAULT_LIMITS, parse_limits
+
+from benchmarks.bench_virtual_users import RecordingSession
+from benchmarks.common import Timer, print_table
+
+FLOODERS = 50
+PLAYERS = 50
+DURATION_SECONDS = 3.0
+FLOOD_INTERVAL_MS = 10
+PLAYER_INTERVAL_MS = 500
+DB_QUERY_MS = 20
+POOL_SIZE = 30
+
+
+async def run(throttling: Optional[ThrottlingMiddleware]) -> List[object]:
+    pool = asyncio.Semaphore(POOL_SIZE)
+    transactions = 0
+    player_latency = Timer()
+    # Відповіді про ліміт йдуть через сесію-заглушку Bot API
+    attack = Message.model_validate({
+        'message_id': 1, 'date': 0, 'text': "/attack", 'chat': {'id': 1, 'type': 'private'},
+    }).as_(Bot(token="42:BENCH", session=RecordingSession()))
+
+    async def handler(event, data):
+        nonlocal transactions
+        async with pool:
+            transactions += 1
+            await asyncio.sleep(DB_QUERY_MS / 1000)
+
+    async def feed(user_id: int) -> None:
+        data = {'event_from_user': User(id=user_id, is_bot=False, first_name="Bench")}
+        if throttling is None:
+            await handler(attack, data)
+        else:
+            await throttling(handler, attack, data)
+
+    async def player(user_id: int, interval_ms: float, timer: Optional[Timer]) -> None:
+        tasks = []
+        deadline = time.perf_counter() + DURATION_SECONDS
+        while time.perf_counter() < deadline:
+            if timer is None:
+                tasks.append(asyncio.create_task(feed(user_id)))
+            else:
+                with timer.measure():
+                    await feed(user_id)
+            await asyncio.sleep(interval_ms / 1000)
+        await asyncio.gather(*tasks)
+
+    await asyncio.gather(
+        *(player(user_id, FLOOD_INTERVAL_MS, None) for user_id in range(FLOODERS)),
+        *(player(10_000 + user_id, PLAYER_INTERVAL_MS, player_latency) for user_id in range(PLAYERS)),
+    )
+    metrics = throttling.metrics() if throttling else {'dropped_updates': 0, 'cooldown_replies': 0}
+    return [
+        "так" if throttling else "ні", transactions, metrics['dropped_updates'], metrics['cooldown_replies'],
+        f"{player_latency.percentile(50):.1f}", f"{player_latency.percentile(95):.1f}",
+    ]
+
+
+def check_overhead(iterations: int = 100_000) -> float:
+    """Середній час перевірки ліміту в мікросекундах."""
+    middleware = ThrottlingMiddleware(parse_limits(DEFAULT_LIMITS))
+    command = "attack"
+    started = time.perf_counter()
+    for index in range(iterations):
+        middleware.check(index % 1000, command)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def main() -> None:
+    rows = [
+        asyncio.run(run(None)),
+        asyncio.run(run(ThrottlingMiddleware(parse_limits(DEFAULT_LIMITS)))),
+    ]
+    print(f"{FLOODERS} гравців шлють /attack кожні {FLOOD_INTERVAL_MS} мс, {PLAYERS} гравців - кожні "
+          f"{PLAYER_INTERVAL_MS} мс, {DURATION_SECONDS:.0f} с; запит до бази {DB_QUERY_MS} мс, "
+          f"пул {POOL_SIZE} з'єднань\n")
+    print_table(
+        ["Обмеження", "Транзакцій", "Відкинуто", "Відповідей про ліміт",
+         "Команда гравця p50 мс", "p95 мс"],
+        rows
+    )
+    print(f"\nПеревірка ліміту: {check_overhead():.2f} мкс")
+
+
+if __name__ == "__main__":
+    main()
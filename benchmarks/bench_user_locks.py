@@ -0,0 +1,78 @@
+"""
+Бенчмарк вартості блокування користувача в одиниці роботи.
+
+Виконує типову бойову команду (блокування, get_for_combat, зміна здоров'я,
+коміт) без блокування, з блокуванням у пам'яті процесу та з advisory-блокуванням
+PostgreSQL і порівнює затримку та кількість SQL-запитів на команду.
+
+Запуск:
+    python -m benchmarks.bench_user_locks
+"""
+from typing import Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.unit_of_work import SqlAlchemyUnitOfWork
+from infrastructure.persistence.user_locks import (
+    IUserLockProvider, InProcessUserLockProvider, PostgresAdvisoryLockProvider
+)
+
+from benchmarks.common import create_benchmark_engine, benchmark_session, Timer, print_table
+
+COMMANDS = 1000
+TELEGRAM_USER_ID = 920_001
+
+
+class _NoLockProvider(IUserLockProvider):
+    """Базовий варіант без блокування."""
+
+    def acquire(self, session, telegram_user_id: int) -> None:
+        pass
+
+    def release(self, session, telegram_user_id: int) -> None:
+        pass
+
+
+def measure(engine, provider: Optional[IUserLockProvider]) -> tuple:
+    timer = Timer()
+    statements = 0
+    with benchmark_session(engine) as session:
+        PostgresCharacterRepository(session).save(Character(
+            telegram_user_id=TELEGRAM_USER_ID, name="Locked", base_stats=BaseStats(10, 10, 10, 100, 50)
+        ))
+        session.flush()
+        factory = sessionmaker(bind=session.get_bind(), autoflush=False, join_transaction_mode="create_savepoint")
+
+        for index in range(COMMANDS):
+            with timer.measure():
+                with SqlAlchemyUnitOfWork(factory, PostgresCharacterRepository, lock_provider=provider) as uow:
+                    uow.lock_user(TELEGRAM_USER_ID)
+                    character = uow.characters.get_for_combat(TELEGRAM_USER_ID)
+                    character.current_health = 50 + index % 50
+                    uow.characters.save(character)
+                    uow.commit()
+            statements += uow.stats.statements
+    return timer, statements / COMMANDS
+
+
+def main() -> None:
+    engine = create_benchmark_engine()
+    rows = []
+    for name, provider in (
+        ("без блокування", _NoLockProvider()),
+        ("у пам'яті процесу", InProcessUserLockProvider()),
+        ("pg_try_advisory_xact_lock", PostgresAdvisoryLockProvider()),
+    ):
+        timer, statements = measure(engine, provider)
+        rows.append([name, f"{statements:.1f}", f"{timer.mean:.2f}", f"{timer.percentile(95):.2f}"])
+    engine.dispose()
+
+    print(f"Бойова команда в одиниці роботи, {COMMANDS} команд\n")
+    print_table(["Блокування", "SQL-запитів", "мс (сер.)", "мс (p95)"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Навантажувальний тест бота віртуальними гравцями.
+
+Піднімає справжній диспетчер (create_dispatcher з handlers.router,
+middleware черг користувачів та залежностей) над базою бенчмарків
+(DATABASE_URL або .env.test) з налаштованим бекендом персонажів
+(CHARACTER_REPOSITORY_BACKEND тощо). Bot працює через сесію-заглушку, яка
+записує вихідні виклики і за бажанням імітує затримку Telegram
+(--api-latency-ms), тож Telegram не потрібен.
+
+Кожен з --players гравців проходить сценарій --rounds разів через
+dp.feed_update: /start (та ім'я персонажа в першому раунді) → /explore,
+доки не почнеться бій → /attack, доки бій не завершиться → /travel та
+кнопка першої локації → /rest. Наступну дію гравець обирає за відповіддю
+бота, між діями чекає випадкові 0..--think-ms мс.
+
+Як і в боті, одночасно обробляються не більше --max-concurrent-updates
+оновлень (BOT_MAX_CONCURRENT_UPDATES), а рушій бази створюється
+create_db_engine з тими самими налаштуваннями пулу з'єднань.
+
+Звіт: оновлень за секунду, вихідних викликів на оновлення та
+p50/p95/p99 часу обробки кожної команди (від feed_update до його
+завершення, разом з очікуванням у черзі гравця та циклі подій).
+
+Обробник тримає з'єднання з базою, поки чекає відповіді Telegram, тож з
+--api-latency-ms більше нуля одночасних оновлень має бути не більше, ніж
+з'єднань у пулі (pool_size + max_overflow = 30). Інакше видача з'єднання
+блокує цикл подій до таймауту пулу, і команди завершуються помилками.
+Без затримки Telegram обробники повідомлень виконуються не віддаючи
+керування циклу подій, а кнопки (фільтри F у aiogram виконуються в потоці)
+чекають, доки відпрацюють інші гравці, тож їхній час вищий.
+
+Персонажі віртуальних гравців мають telegram_user_id від
+FIRST_TELEGRAM_USER_ID і видаляються після завершення.
+
+Запуск:
+    python -m benchmarks.bench_virtual_users
+    python -m benchmarks.bench_virtual_users --players 200 --rounds 3 --think-ms 500 --api-latency-ms 50 \
+        --max-concurrent-updates 25
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message, Update
+from sqlalchemy import inspect
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.persistence.database import Base
+from infrastructure.persistence.database.engine import create_db_engine
+from infrastructure.persistence.database.models import CharacterModel
+from infrastructure.persistence.repositories.character_repository_factory import (
+    create_storage_repository, shutdown_character_repositories,
+)
+from infrastructure.persistence.unit_of_work import SqlAlchemyUnitOfWork
+from presentation.telegram.combat_message import CombatMessageEditor
+from presentation.telegram.container import Container
+from presentation.telegram.dispatcher import create_dispatcher
+
+from benchmarks.common import Timer, create_benchmark_engine, print_table
+
+PLAYERS = 50
+ROUNDS = 2
+FIRST_TELEGRAM_USER_ID = 970_001
+MAX_EXPLORES = 10
+MAX_ATTACKS = 30
+COMMANDS = ("start", "name", "explore", "attack", "travel", "travel_to", "rest")
+
+
+class RecordingSession(BaseSession):
+    """Сесія-заглушка Bot API: записує виклики та відповідає як Telegram."""
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.calls: Counter = Counter()
+        # Останнє повідомлення бота в кожному чаті - його "бачить" віртуальний гравець.
+        self.last_message: Dict[int, Message] = {}
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None) -> Any:
+        self.calls[type(method).__name__] += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        chat_id = getattr(method, 'chat_id', None)
+        text = getattr(method, 'text', None)
+        if chat_id is None or text is None:
+            return True
+        message = Message(
+            message_id=getattr(method, 'message_id', None) or next(self._message_ids),
+            date=int(time.time()),
+            chat=Chat(id=chat_id, type="private"),
+            text=text,
+            reply_markup=getattr(method, 'reply_markup', None),
+        )
+        self.last_message[chat_id] = message
+        return message
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+class VirtualPlayer:
+    """Гравець, що проходить сценарій і вимірює час обробки кожної команди."""
+    _update_ids = itertools.count(1)
+
+    def __init__(self, user_id: int, dp: Dispatcher, bot: Bot, session: RecordingSession,
+                 timers: Dict[str, Timer], errors: Counter, think_ms: float, concurrency: asyncio.Semaphore):
+        self.user_id = user_id
+        self.dp = dp
+        self.bot = bot
+        self.session = session
+        self.timers = timers
+        self.errors = errors
+        self.think_ms = think_ms
+        self.concurrency = concurrency
+
+    @property
+    def reply(self) -> Optional[Message]:
+        return self.session.last_message.get(self.user_id)
+
+    def buttons(self) -> List[str]:
+        markup = self.reply.reply_markup if self.reply else None
+        if markup is None:
+            return []
+        return [button.callback_data for row in markup.inline_keyboard for button in row]
+
+    async def send(self, command: str, text: str) -> None:
+        await self._feed(command, {
+            'message': {
+                'message_id': next(self._update_ids), 'date': int(time.time()), 'text': text,
+                'chat': {'id': self.user_id, 'type': 'private'},
+                'from': {'id': self.user_id, 'is_bot': False, 'first_name': 'Load'},
+            },
+        })
+
+    async def press(self, command: str, data: str) -> None:
+        await self._feed(command, {
+            'callback_query': {
+                'id': str(next(self._update_ids)), 'chat_instance': str(self.user_id), 'data': data,
+                'from': {'id': self.user_id, 'is_bot': False, 'first_name': 'Load'},
+                'message': {'message_id': self.reply.message_id, 'date': int(time.time()),
+                            'chat': {'id': self.user_id, 'type': 'private'}},
+            },
+        })
+
+    async def _feed(self, command: str, payload: Dict[str, Any]) -> None:
+        if self.think_ms:
+            await asyncio.sleep(random.uniform(0, self.think_ms) / 1000)
+        update = Update.model_validate({'update_id': next(self._update_ids), **payload}, context={"bot": self.bot})
+        try:
+            with self.timers[command].measure():
+                async with self.concurrency:
+                    await self.dp.feed_update(self.bot, update)
+        except Exception:
+            self.errors[command] += 1
+
+    async def play(self, rounds: int) -> None:
+        for _ in range(rounds):
+            await self.send("start", "/start")
+            if self.reply and "Введіть ім'я" in self.reply.text:
+                await self.send("name", f"Load{self.user_id}")
+
+            for _ in range(MAX_EXPLORES):
+                await self.send("explore", "/explore")
+                if "flee" in self.buttons() or (self.reply and "Ви вже в бою" in self.reply.text):
+                    break
+
+            for _ in range(MAX_ATTACKS):
+                await self.send("attack", "/attack")
+                if "flee" not in self.buttons():
+                    break
+
+            await self.send("travel", "/travel")
+            destinations = [data for data in self.buttons() if data.startswith("travel_to:")]
+            if destinations:
+                await self.press("travel_to", destinations[0])
+
+            await self.send("rest", "/rest")
+
+
+def delete_players(session_factory, telegram_ids: List[int]) -> None:
+    """Видаляє персонажів віртуальних гравців через репозиторій налаштованого бекенду."""
+    with session_factory() as session:
+        repository = create_storage_repository(session)
+        for telegram_user_id in telegram_ids:
+            character = repository.get_by_telegram_user_id(telegram_user_id)
+            if character is not None:
+                repository.delete(character.id)
+        session.commit()
+
+
+async def run(session_factory, players: int, rounds: int, think_ms: float, api_latency_ms: float,
+              max_concurrent_updates: int):
+    container = Container(
+        unit_of_work_factory=lambda name, read_only: SqlAlchemyUnitOfWork(
+            session_factory=session_factory, name=name, read_only=read_only,
+        ),
+        combat_messages=CombatMessageEditor(debounce_seconds=0),
+    )
+    dp, user_ordering = create_dispatcher(container)
+    session = RecordingSession(api_latency_ms)
+    bot = Bot(token="42:LOADTEST", session=session)
+    timers = {command: Timer() for command in COMMANDS}
+    errors: Counter = Counter()
+    concurrency = asyncio.Semaphore(max_concurrent_updates)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        VirtualPlayer(FIRST_TELEGRAM_USER_ID + index, dp, bot, session, timers, errors, think_ms,
+                      concurrency).play(rounds)
+        for index in range(players)
+    ))
+    seconds = time.perf_counter() - started
+    await dp.emit_shutdown(bot=bot)
+    return timers, errors, session.calls, seconds, user_ordering.metrics()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Навантажувальний тест бота віртуальними гравцями")
+    parser.add_argument('--players', type=int, default=PLAYERS)
+    parser.add_argument('--rounds', type=int, default=ROUNDS)
+    parser.add_argument('--think-ms', type=float, default=0, help="Пауза гравця між діями: випадкова 0..N мс")
+    parser.add_argument('--api-latency-ms', type=float, default=0, help="Затримка відповіді Telegram")
+    parser.add_argument('--max-concurrent-updates', type=int,
+                        default=int(os.getenv("BOT_MAX_CONCURRENT_UPDATES", "100")))
+    args = parser.parse_args()
+
+    # DATABASE_URL бенчмарків (або .env.test), але пул з'єднань - як у бота
+    create_benchmark_engine().dispose()
+    engine = create_db_engine(os.environ["DATABASE_URL"])
+    created_tables = not inspect(engine).has_table(CharacterModel.__tablename__)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    telegram_ids = list(range(FIRST_TELEGRAM_USER_ID, FIRST_TELEGRAM_USER_ID + args.players))
+
+    try:
+        # Залишки перерваного запуску
+        delete_players(session_factory, telegram_ids)
+        timers, errors, calls, seconds, ordering = asyncio.run(
+            run(session_factory, args.players, args.rounds, args.think_ms, args.api_latency_ms,
+                args.max_concurrent_updates)
+        )
+    finally:
+        shutdown_character_repositories()
+        delete_players(session_factory, telegram_ids)
+        if created_tables:
+            Base.metadata.drop_all(engine)
+        engine.dispose()
+
+    updates = sum(len(timer.samples) for timer in timers.values())
+    print(f"{args.players} гравців x {args.rounds} раундів, пауза 0..{args.think_ms:.0f} мс, "
+          f"затримка Telegram {args.api_latency_ms:.0f} мс, "
+          f"одночасно до {args.max_concurrent_updates} оновлень\n")
+    print(f"Оновлень: {updates} за {seconds:.1f} с ({updates / seconds:.0f}/с), "
+          f"вихідних викликів: {sum(calls.values())} ({sum(calls.values()) / updates:.2f} на оновлення)")
+    print(f"Виклики Bot API: {dict(calls)}")
+    print(f"Черги гравців: {ordering}\n")
+    print_table(
+        ["Команда", "Оновлень", "Помилок", "Середнє мс", "p50 мс", "p95 мс", "p99 мс"],
+        [[command, len(timer.samples), errors[command], f"{timer.mean:.1f}", f"{timer.percentile(50):.1f}",
+          f"{timer.percentile(95):.1f}", f"{timer.percentile(99):.1f}"]
+         for command, timer in timers.items() if timer.samples]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Навантажувальний тест webhook-сервера синтетичними оновленнями.
+
+За замовчуванням піднімає сервер у цьому ж процесі з диспетчером-заглушкою
+(обробник імітує роботу затримкою HANDLER_DELAY_MS і не звертається до
+Telegram), тож вимірюється саме прийом оновлень: затримка відповіді на
+POST, пропускна здатність та кількість відхилених (503) при різних
+обмеженнях паралельності.
+
+З --url оновлення надсилаються на вже запущеного бота
+(BOT_MODE=webhook без WEBHOOK_BASE_URL); відповіді бота в Telegram
+при цьому не доставляться, бо чатів синтетичних користувачів не існує.
+
+Запуск:
+    python -m benchmarks.bench_webhook
+    python -m benchmarks.bench_webhook --url http://127.0.0.1:8080/webhook --updates 5000
+"""
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp.test_utils import TestServer
+
+from presentation.telegram.webhook import REQUEST_HANDLER_KEY, WebhookSettings, create_webhook_app
+
+from benchmarks.common import Timer, print_table
+
+UPDATES = 2000
+CLIENT_CONCURRENCY = 50
+HANDLER_DELAY_MS = 5
+# (max_concurrent_updates, max_pending_updates)
+LIMITS = ((10, 1000), (100, 1000), (100, 200))
+COMMANDS = ("/stats", "/explore", "/attack", "/inventory")
+
+
+def synthetic_update(update_id: int, user_id: int, text: str) -> dict:
+    """Оновлення з текстовим повідомленням у приватному чаті, як його надсилає Telegram."""
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f"Load{user_id}"},
+            'text': text,
+        },
+    }
+
+
+async def post_updates(url: str, updates: int, concurrency: int, secret: Optional[str] = None):
+    """Надсилає оновлення з concurrency паралельних клієнтів: (таймер, відхилені, секунди)."""
+    timer = Timer()
+    rejected = 0
+    next_id = iter(range(updates))
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+
+    async def client(session: aiohttp.ClientSession) -> None:
+        nonlocal rejected
+        for update_id in next_id:
+            update = synthetic_update(update_id, 950_000 + update_id % 500, COMMANDS[update_id % len(COMMANDS)])
+            with timer.measure():
+                async with session.post(url, json=update, headers=headers) as response:
+                    await response.read()
+            if response.status != 200:
+                rejected += 1
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    return timer, rejected, time.perf_counter() - started
+
+
+def make_dispatcher(processed: List[float]) -> Dispatcher:
+    dp = Dispatcher()
+
+    @dp.message()
+    async def work(message: Message):
+        await asyncio.sleep(HANDLER_DELAY_MS / 1000)
+        processed.append(time.perf_counter())
+
+    return dp
+
+
+async def run_in_process(updates: int, concurrency: int) -> List[List[object]]:
+    rows = []
+    for max_concurrent, max_pending in LIMITS:
+        processed: List[float] = []
+        settings = WebhookSettings(max_concurrent_updates=max_concurrent, max_pending_updates=max_pending)
+        bot = Bot(token="42:BENCHMARK")
+        app = create_webhook_app(make_dispatcher(processed), bot, settings)
+        server = TestServer(app)
+        await server.start_server()
+        started = time.perf_counter()
+        try:
+            timer, rejected, seconds = await post_updates(str(server.make_url(settings.path)), updates, concurrency)
+            await app[REQUEST_HANDLER_KEY].drain(timeout=60)
+        finally:
+            await server.close()
+            await bot.session.close()
+        drained = (max(processed) - started) if processed else seconds
+        rows.append([
+            max_concurrent, max_pending, updates, rejected,
+            f"{updates / seconds:.0f}", f"{len(processed) / drained:.0f}",
+            f"{timer.percentile(50):.2f}", f"{timer.percentile(95):.2f}", f"{timer.percentile(99):.2f}",
+        ])
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Навантажувальний тест webhook-сервера")
+    parser.add_argument('--url', help="Адреса webhook запущеного бота")
+    parser.add_argument('--secret', help="WEBHOOK_SECRET запущеного бота")
+    parser.add_argument('--updates', type=int, default=UPDATES)
+    parser.add_argument('--concurrency', type=int, default=CLIENT_CONCURRENCY)
+    args = parser.parse_args()
+
+    if args.url:
+        timer, rejected, seconds = asyncio.run(post_updates(args.url, args.updates, args.concurrency, args.secret))
+        print(f"{args.updates} оновлень на {args.url}, клієнтів {args.concurrency}\n")
+        print_table(
+            ["Оновлень", "Відхилено", "Прийом/с", "p50 мс", "p95 мс", "p99 мс"],
+            [[args.updates, rejected, f"{args.updates / seconds:.0f}",
+              f"{timer.percentile(50):.2f}", f"{timer.percentile(95):.2f}", f"{timer.percentile(99):.2f}"]]
+        )
+        return
+
+    rows = asyncio.run(run_in_process(args.updates, args.concurrency))
+    print(f"Webhook-сервер у процесі, обробник {HANDLER_DELAY_MS} мс, клієнтів {args.concurrency}\n")
+    print_table(
+        ["Паралельно", "Черга", "Оновлень", "Відхилено", "Прийом/с", "Обробка/с", "p50 мс", "p95 мс", "p99 мс"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Бенчмарк обробки оновлень у кількох процесах.
+
+Обробник-заглушка виконує ті самі розрахунки, що й /attack (характеристики
+персонажа та серія ударів CombatCalculator), без бази даних, і відповідає
+через message.answer. Порівнюється обробка в одному процесі (звичайний
+диспетчер) з WorkerPool на 2 та 4 процеси: пропускна здатність та затримка
+від прийому оновлення до відповіді. Відповіді записує сесія-заглушка,
+тож до Telegram нічого не надсилається.
+
+Приріст можливий лише на машині з кількома ядрами (див. os.cpu_count()).
+
+Запуск:
+    python -m benchmarks.bench_workers
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message, Update
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from presentation.telegram.container import Container
+from presentation.telegram.workers import WorkerPool, create_receiver
+
+from benchmarks.common import print_table
+
+UPDATES = 400
+PLAYERS = 64
+ATTACKS_PER_UPDATE = 2000
+WORKER_COUNTS = (2, 4)
+
+
+class TimestampSession(BaseSession):
+    """Сесія-заглушка: запам'ятовує час відповіді на кожне оновлення."""
+    def __init__(self):
+        super().__init__()
+        self.answered: Dict[int, float] = {}
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None) -> Any:
+        self.answered[int(method.text)] = time.perf_counter()
+        return Message(message_id=len(self.answered), date=0, text=method.text,
+                       chat=Chat(id=method.chat_id, type="private"))
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def combat_dispatcher() -> Tuple[Dispatcher, None]:
+    """Диспетчер з обробником, що рахує бій як /attack."""
+    container = Container()
+    character = Character(
+        telegram_user_id=960_000, name="Worker", base_stats=BaseStats(10, 10, 10, 100, 50),
+        equipped_items={'weapon': 'axe_01', 'chest': 'chest_01'},
+    )
+    enemy = container.enemy_repository.get_by_id('goblin_01')
+    dp = Dispatcher()
+
+    @dp.message()
+    async def attack(message: Message):
+        player_stats = container.stats_calculator.calculate_total_stats(character)
+        enemy_stats = container.stats_calculator.calculate_enemy_stats(enemy, character.level)
+        for _ in range(ATTACKS_PER_UPDATE):
+            container.combat_calculator.perform_single_attack(player_stats, enemy_stats)
+        await message.answer(message.text)
+
+    return dp, None
+
+
+def make_update(update_id: int) -> Update:
+    user_id = 960_001 + update_id % PLAYERS
+    return Update.model_validate({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 0, 'text': str(update_id),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Load'},
+        },
+    })
+
+
+async def run(workers: int) -> Tuple[float, List[float]]:
+    """Повертає (оновлень за секунду, затримки в мс)."""
+    session = TimestampSession()
+    bot = Bot(token="42:BENCHMARK", session=session)
+    updates = [make_update(update_id) for update_id in range(UPDATES)]
+    received: Dict[int, float] = {}
+
+    if workers == 1:
+        dp, _ = combat_dispatcher()
+        pool = None
+    else:
+        pool = WorkerPool(bot, workers, dispatcher_factory=combat_dispatcher)
+        dp = create_receiver(pool)
+        pool.start()
+        # Прогрів: процеси запускаються й імпортують модулі кілька секунд.
+        await dp.feed_update(bot, make_update(UPDATES))
+        while UPDATES not in session.answered:
+            await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    tasks = []
+    for update in updates:
+        received[update.update_id] = time.perf_counter()
+        tasks.append(asyncio.create_task(dp.feed_update(bot, update)))
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    while len([u for u in received if u in session.answered]) < UPDATES:
+        await asyncio.sleep(0.01)
+    elapsed = max(session.answered[u] for u in received) - started
+
+    if pool is not None:
+        await pool.stop()
+    latencies = [(session.answered[u] - received[u]) * 1000 for u in received]
+    return UPDATES / elapsed, latencies
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def main() -> None:
+    rows = []
+    for workers in (1, *WORKER_COUNTS):
+        throughput, latencies = asyncio.run(run(workers))
+        rows.append([
+            workers, f"{throughput:.0f}",
+            f"{percentile(latencies, 50):.1f}", f"{percentile(latencies, 95):.1f}", f"{percentile(latencies, 99):.1f}",
+        ])
+
+    print(f"{UPDATES} оновлень від {PLAYERS} гравців, {ATTACKS_PER_UPDATE} ударів на оновлення, "
+          f"ядер: {os.cpu_count()}\n")
+    print_table(["Процесів", "Оновлень/с", "p50 мс", "p95 мс", "p99 мс"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Спільні інструменти для бенчмарків.
+
+Бенчмарки працюють з тією ж базою даних, що й тести (DATABASE_URL або .env.test),
+і виконують усі зміни в транзакції, яка відкатується після завершення.
+"""
+import os
+import time
+import statistics
+from contextlib import contextmanager
+from typing import Iterator, List, Sequence
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from infrastructure.persistence.database import Base
+from infrastructure.persistence.database.engine import get_connect_args
+
+
+def create_benchmark_engine() -> Engine:
+    """Створює рушій для бенчмарку на основі DATABASE_URL (або .env.test)."""
+    if not os.getenv("DATABASE_URL"):
+        load_dotenv(".env.test")
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise SystemExit("DATABASE_URL не встановлено. Вкажіть його або створіть .env.test.")
+    return create_engine(database_url, connect_args=get_connect_args(database_url))
+
+
+@contextmanager
+def benchmark_session(engine: Engine) -> Iterator[Session]:
+    """
+    Надає сесію, прив'язану до з'єднання з відкритою транзакцією.
+    Після завершення всі зміни відкатуються, тож база залишається чистою.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    Base.metadata.create_all(bind=connection)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=connection)()
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+class Timer:
+    """Накопичує тривалість повторюваних операцій у мілісекундах."""
+    def __init__(self) -> None:
+        self.samples: List[float] = []
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append((time.perf_counter() - start) * 1000)
+
+    def percentile(self, pct: float) -> float:
+        """Повертає перцентиль тривалості (0-100)."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples) if self.samples else 0.0
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence[object]]) -> None:
+    """Виводить результати бенчмарку у вигляді простої текстової таблиці."""
+    cells = [[str(h) for h in headers]] + [[str(c) for c in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for index, row in enumerate(cells):
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
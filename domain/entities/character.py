@@ -4,10 +4,18 @@
 Сутність - це об'єкт з унікальним ID, що має тривалий життєвий цикл і містить
 ключову бізнес-логіку, пов'язану з собою.
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Any
+from collections import Counter
 from domain.value_objects import BaseStats
+import copy
 import uuid
 
+# Скалярні поля, зміни яких відстежуються для часткового збереження.
+TRACKED_FIELDS = (
+    'telegram_user_id', 'name', 'level', 'experience', 'base_stats',
+    'current_health', 'current_mana', 'location_id',
+)
+
 class Character:
     """
     Головна сутність гри, що представляє персонажа. Інкапсулює в собі стан
@@ -29,7 +37,8 @@ class Character:
         inventory: Optional[List[str]] = None, # Список ID предметів в інвентарі.
         location_id: str = 'town_main', # Поточна локація персонажа.
         combat_state: Optional[dict] = None, # Стан бою, якщо персонаж у бою.
-        id: Optional[str] = None # Унікальний ID персонажа.
+        id: Optional[str] = None, # Унікальний ID персонажа.
+        version: int = 0 # Версія збереженого стану (0 - ще не збережений).
     ):
         # --- Ініціалізація атрибутів ---
         self.id = id or str(uuid.uuid4())
@@ -49,6 +58,14 @@ class Character:
         self.location_id = location_id
         self.combat_state = combat_state
 
+        # Версія для оптимістичного блокування: сховище відхиляє збереження,
+        # якщо з моменту завантаження персонажа його вже змінили.
+        self.version = version
+
+        # Знімок стану на момент останнього завантаження/збереження.
+        # None означає, що персонаж ще не збережений у сховищі.
+        self._persisted_state: Optional[Dict[str, Any]] = None
+
     # --- Бізнес-логіка, інкапсульована в сутності ---
 
     def is_alive(self) -> bool:
@@ -152,6 +169,112 @@ class Character:
         self.location_id = destination_id
 
 
+    # --- Відстеження змін (dirty tracking) ---
+
+
+    def _capture_state(self) -> Dict[str, Any]:
+        """Робить незалежну копію стану, з якою порівнюються подальші зміни."""
+        return {
+            'fields': {name: getattr(self, name) for name in TRACKED_FIELDS},
+            'equipped_items': dict(self.equipped_items),
+            'inventory': Counter(self.inventory),
+            'combat_state': copy.deepcopy(self.combat_state),
+        }
+
+
+    def mark_persisted(self) -> None:
+        """
+        Фіксує поточний стан як збережений.
+        Викликається репозиторієм після завантаження або збереження персонажа.
+        """
+        self._persisted_state = self._capture_state()
+
+
+    def mark_combat_state_persisted(self) -> None:
+        """
+        Фіксує поточний стан бою як збережений, не змінюючи знімок інших полів.
+        Використовується, коли стан бою зберігається поза основним сховищем.
+        """
+        if self._persisted_state is not None:
+            self._persisted_state['combat_state'] = copy.deepcopy(self.combat_state)
+
+
+    def inherit_persisted_state(self, other: 'Character') -> None:
+        """
+        Переносить знімок збереженого стану та його версію з іншого екземпляра
+        того ж персонажа. Потрібно, коли копія персонажа зберігається замість
+        оригіналу (наприклад, у кеші).
+        """
+        self._persisted_state = other._persisted_state
+        self.version = other.version
+
+
+    def is_new(self) -> bool:
+        """Перевіряє, чи персонаж ще жодного разу не зберігався у сховищі."""
+        return self._persisted_state is None
+
+
+    def get_changed_fields(self) -> Set[str]:
+        """
+        Повертає назви полів та колекцій, змінених з моменту завантаження.
+
+        Окрім скалярних полів з TRACKED_FIELDS, може містити
+        'equipped_items', 'inventory' та 'combat_state'.
+        Для нового персонажа повертає всі поля.
+        """
+        current = self._capture_state()
+        if self._persisted_state is None:
+            return set(TRACKED_FIELDS) | {'equipped_items', 'inventory', 'combat_state'}
+
+        persisted = self._persisted_state
+        changed = {
+            name for name in TRACKED_FIELDS
+            if current['fields'][name] != persisted['fields'][name]
+        }
+        for collection in ('equipped_items', 'inventory', 'combat_state'):
+            if current[collection] != persisted[collection]:
+                changed.add(collection)
+        return changed
+
+
+    def get_field_changes(self) -> Dict[str, tuple]:
+        """
+        Повертає змінені скалярні поля з TRACKED_FIELDS
+        у вигляді {назва: (збережене значення, поточне значення)}.
+        """
+        if self._persisted_state is None:
+            return {}
+        persisted = self._persisted_state['fields']
+        return {
+            name: (persisted[name], getattr(self, name))
+            for name in TRACKED_FIELDS
+            if getattr(self, name) != persisted[name]
+        }
+
+    def get_changed_equipment_slots(self) -> Dict[str, Optional[str]]:
+        """Повертає слоти екіпіровки, значення яких змінилося, з новими значеннями."""
+        persisted = self._persisted_state['equipped_items'] if self._persisted_state else {}
+        slots = set(persisted) | set(self.equipped_items)
+        return {
+            slot: self.equipped_items.get(slot)
+            for slot in slots
+            if self.equipped_items.get(slot) != persisted.get(slot)
+        }
+
+    def get_inventory_changes(self) -> Dict[str, int]:
+        """
+        Повертає зміну кількості кожного предмета з моменту завантаження.
+        Додатне значення - предмети додані, від'ємне - видалені.
+        """
+        persisted = self._persisted_state['inventory'] if self._persisted_state else Counter()
+        current = Counter(self.inventory)
+        return {
+            item_id: current[item_id] - persisted[item_id]
+            for item_id in set(persisted) | set(current)
+            if current[item_id] != persisted[item_id]
+        }
+
+
     # --- Представлення об'єкта ---
 
     def __repr__(self) -> str:
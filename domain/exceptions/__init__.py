@@ -0,0 +1,45 @@
+"""
+Винятки доменного шару.
+"""
+
+
+class ConcurrencyConflictError(Exception):
+    """
+    Агрегат було змінено іншою операцією після того, як його завантажили.
+
+    Виникає при збереженні, якщо версія в сховищі вже не збігається з версією,
+    з якою агрегат було прочитано. Операцію слід повторити з повторним завантаженням.
+    """
+    def __init__(self, entity_id: str, expected_version: int):
+        super().__init__(f"Персонаж {entity_id} змінено паралельно (очікувана версія {expected_version})")
+        self.entity_id = entity_id
+        self.expected_version = expected_version
+
+
+class ShardMovedError(ConcurrencyConflictError):
+    """
+    Кошик гравця перенесли на інший шард, поки команда працювала зі старим.
+
+    Це не конфлікт версій, але обробляється так само: команду слід повторити
+    з новою сесією, яка вже прив'яжеться до нового шарду.
+    """
+    def __init__(self, telegram_user_id: int):
+        Exception.__init__(self, f"Дані користувача {telegram_user_id} перенесено на інший шард")
+        self.telegram_user_id = telegram_user_id
+        self.entity_id = None
+        self.expected_version = None
+
+
+class UserLockTimeoutError(Exception):
+    """
+    Не вдалося за відведений час отримати блокування команд користувача.
+
+    Означає, що інша команда того самого гравця (можливо, в іншому екземплярі
+    бота) ще виконується. Повторювати операцію одразу немає сенсу.
+    """
+    def __init__(self, telegram_user_id: int, timeout_seconds: float):
+        super().__init__(
+            f"Команди користувача {telegram_user_id} заблоковано довше за {timeout_seconds} с"
+        )
+        self.telegram_user_id = telegram_user_id
+        self.timeout_seconds = timeout_seconds
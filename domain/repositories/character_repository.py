@@ -44,6 +44,37 @@ class ICharacterRepository(ABC):
         """
         pass
 
+    # --- Часткові завантаження для окремих команд ---
+    #
+    # Повертають персонажа лише з тими частинами агрегату, які потрібні команді.
+    # Незавантажені частини порожні (інвентар - [], екіпіровка - {}, бій - None)
+    # і не змінюються при збереженні, тож такого персонажа можна зберігати,
+    # якщо команда не змінює ці частини. Реалізація за замовчуванням
+    # завантажує персонажа повністю.
+
+    def get_for_combat(self, telegram_user_id: int) -> Optional[Character]:
+        """
+        Завантажує персонажа для бойових команд та подорожей:
+        основні поля, екіпіровка та стан бою, без інвентаря.
+
+        Додані до інвентаря предмети (здобич) зберігаються коректно.
+        """
+        return self.get_by_telegram_user_id(telegram_user_id)
+
+    def get_for_inventory(self, telegram_user_id: int) -> Optional[Character]:
+        """
+        Завантажує персонажа для роботи з інвентарем:
+        основні поля, екіпіровка та інвентар, без стану бою.
+        """
+        return self.get_by_telegram_user_id(telegram_user_id)
+
+    def get_summary(self, telegram_user_id: int) -> Optional[Character]:
+        """
+        Завантажує персонажа для перегляду профілю та характеристик:
+        основні поля та екіпіровка, без інвентаря та стану бою.
+        """
+        return self.get_by_telegram_user_id(telegram_user_id)
+
     @abstractmethod
     def delete(self, character_id: str) -> None:
         """
@@ -0,0 +1,17 @@
+"""
+Пакет кешування.
+
+Надає бекенди кешу з обмеженим часом життя записів: у пам'яті процесу та Redis,
+а також сховище живих бойових сесій поверх них.
+"""
+from .backends import ICacheBackend, InMemoryCacheBackend, RedisCacheBackend
+from .combat_session_store import CombatSession, CombatSessionStore, StaleCombatTurnError
+
+__all__ = [
+    "ICacheBackend",
+    "InMemoryCacheBackend",
+    "RedisCacheBackend",
+    "CombatSession",
+    "CombatSessionStore",
+    "StaleCombatTurnError",
+]
@@ -0,0 +1,131 @@
+"""
+Бекенди кешу "ключ-значення" з обмеженим часом життя записів.
+
+Надає спільний інтерфейс та дві реалізації: у пам'яті процесу (для одного
+екземпляра бота і тестів) та Redis (для кількох екземплярів).
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+
+class ICacheBackend(ABC):
+    """Інтерфейс сховища кешу, що працює з байтовими значеннями."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Повертає значення за ключем або None, якщо його немає чи термін дії минув."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        """Зберігає значення на ttl_seconds секунд."""
+        pass
+
+    @abstractmethod
+    def set_if(self, key: str, value: bytes, ttl_seconds: int,
+               condition: Callable[[Optional[bytes]], bool]) -> bool:
+        """
+        Атомарно зберігає значення, лише якщо condition(поточне значення) істинне.
+
+        :return: False, якщо умова не виконалась і значення не змінено.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        """Видаляє вказані ключі."""
+        pass
+
+
+class InMemoryCacheBackend(ICacheBackend):
+    """
+    Кеш у пам'яті процесу з TTL та витісненням найдавніше використаних записів.
+    Підходить для одного екземпляра бота та для тестів.
+    """
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl_seconds)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def set_if(self, key: str, value: bytes, ttl_seconds: int,
+               condition: Callable[[Optional[bytes]], bool]) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            current = entry[0] if entry is not None and entry[1] > time.monotonic() else None
+            if not condition(current):
+                return False
+            self._data[key] = (value, time.monotonic() + ttl_seconds)
+            self._data.move_to_end(key)
+            return True
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+
+class RedisCacheBackend(ICacheBackend):
+    """
+    Кеш у Redis. Дозволяє кільком екземплярам бота використовувати спільний кеш.
+
+    Приймає будь-який клієнт з інтерфейсом redis.Redis (зокрема fakeredis для тестів).
+    """
+    def __init__(self, client: Any):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisCacheBackend':
+        """Створює бекенд з пулом з'єднань за URL, наприклад redis://localhost:6379/0."""
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        self.client.set(key, value, ex=ttl_seconds)
+
+    def set_if(self, key: str, value: bytes, ttl_seconds: int,
+               condition: Callable[[Optional[bytes]], bool]) -> bool:
+        # Оптимістична транзакція: якщо ключ змінився між WATCH і EXEC, умова перевіряється знову.
+        from redis.exceptions import WatchError
+
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    if not condition(pipe.get(key)):
+                        return False
+                    pipe.multi()
+                    pipe.set(key, value, ex=ttl_seconds)
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*keys)
@@ -0,0 +1,129 @@
+"""
+Сховище живих бойових сесій.
+
+Поточний стан бою (здоров'я ворога, номер ходу) змінюється на кожному ході,
+тому зберігається тут, а в таблицю combat_states записуються лише контрольні
+точки. Працює поверх будь-якого ICacheBackend: у пам'яті процесу або в Redis.
+"""
+import json
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+from .backends import ICacheBackend
+
+logger = logging.getLogger(__name__)
+
+
+class StaleCombatTurnError(Exception):
+    """Хід бою відхилено: сесію вже змінив паралельний хід або бій завершився."""
+    def __init__(self, character_id: str, turn: int):
+        super().__init__(f"Хід {turn} бою персонажа {character_id} застарів")
+        self.character_id = character_id
+        self.turn = turn
+
+
+@dataclass
+class CombatSession:
+    """Живий стан бою персонажа та відомості про останню контрольну точку."""
+    character_id: str
+    state: Dict[str, Any]
+    checkpoint_turn: int
+    checkpointed_at: float
+
+    @property
+    def turn(self) -> int:
+        return self.state.get('turn', 0)
+
+    def is_checkpoint_due(self, turn: int, every_turns: int, interval_seconds: float) -> bool:
+        """Перевіряє, чи потрібно записати в базу даних стан бою на ході turn."""
+        return (
+            turn - self.checkpoint_turn >= every_turns
+            or time.time() - self.checkpointed_at >= interval_seconds
+        )
+
+
+class CombatSessionStore:
+    """
+    Зберігає бойові сесії з обмеженим часом життя.
+
+    Сесія, яка не оновлювалась довше за ttl_seconds (покинутий бій), зникає
+    сама; після цього бій продовжується з останньої контрольної точки в базі.
+    Помилки бекенду не переривають команду: сесія вважається відсутньою.
+    """
+    def __init__(self, backend: ICacheBackend, ttl_seconds: int = 3600, key_prefix: str = "combat"):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    def get(self, character_id: str) -> Optional[CombatSession]:
+        try:
+            data = self.backend.get(self._key(character_id))
+        except Exception as e:
+            logger.warning(f"Не вдалося прочитати бойову сесію {character_id}: {e}")
+            return None
+        if data is None:
+            return None
+        return CombatSession(**json.loads(data))
+
+    def set(self, session: CombatSession) -> bool:
+        """
+        Зберігає сесію та продовжує її час життя.
+
+        :return: False, якщо запис не вдався (тоді стан бою слід записати в базу).
+        """
+        try:
+            self.backend.set(
+                self._key(session.character_id),
+                json.dumps(asdict(session), separators=(',', ':')).encode(),
+                self.ttl_seconds
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Не вдалося зберегти бойову сесію {session.character_id}: {e}")
+            return False
+
+    def advance(self, session: CombatSession, previous: CombatSession) -> bool:
+        """
+        Зберігає наступний хід бою (compare-and-set): лише якщо збережена сесія
+        належить тому самому відрізку бою, що й previous (та сама контрольна
+        точка), і її хід менший за session.turn. Так хід, обчислений із
+        застарілого стану, не перезапише паралельний новіший хід.
+
+        :param previous: Сесія, з якої було обчислено хід.
+        :return: False, якщо запис не вдався (тоді стан бою слід записати в базу).
+        :raises StaleCombatTurnError: Якщо в сховищі вже новіший стан бою.
+        """
+        def is_older(current: Optional[bytes]) -> bool:
+            if current is None:
+                return False
+            stored = CombatSession(**json.loads(current))
+            return (
+                stored.checkpoint_turn == previous.checkpoint_turn
+                and stored.checkpointed_at == previous.checkpointed_at
+                and stored.turn < session.turn
+            )
+
+        try:
+            advanced = self.backend.set_if(
+                self._key(session.character_id),
+                json.dumps(asdict(session), separators=(',', ':')).encode(),
+                self.ttl_seconds,
+                is_older,
+            )
+        except Exception as e:
+            logger.warning(f"Не вдалося зберегти бойову сесію {session.character_id}: {e}")
+            return False
+        if not advanced:
+            raise StaleCombatTurnError(session.character_id, session.turn)
+        return True
+
+    def delete(self, character_id: str) -> None:
+        try:
+            self.backend.delete(self._key(character_id))
+        except Exception as e:
+            logger.warning(f"Не вдалося видалити бойову сесію {character_id}: {e}")
+
+    def _key(self, character_id: str) -> str:
+        return f"{self.key_prefix}:{character_id}"
@@ -0,0 +1,137 @@
+"""
+Події змін персонажа для журналу подій.
+
+Події виводяться зі змін, які відстежує сам персонаж (dirty tracking), тож
+use case нічого не знають про журнал. Кожна подія - словник з ключем 'type'
+та абсолютними значеннями змінених полів (крім інвентаря, де записується
+різниця), тому стан відновлюється простим послідовним застосуванням подій
+до документа персонажа (формат character_to_document).
+"""
+import copy
+from typing import Any, Dict, Iterable, List
+
+from domain.entities.character import Character
+from infrastructure.persistence.character_serializer import character_to_document
+
+CREATED = 'created'
+EXPERIENCE_GAINED = 'experience_gained'
+LEVEL_UP = 'level_up'
+VITALS_CHANGED = 'vitals_changed'
+DIED = 'died'
+TRAVELLED = 'travelled'
+PROFILE_CHANGED = 'profile_changed'
+ITEMS_CHANGED = 'items_changed'
+EQUIPMENT_CHANGED = 'equipment_changed'
+COMBAT_STARTED = 'combat_started'
+COMBAT_TURN = 'combat_turn'
+COMBAT_ENDED = 'combat_ended'
+DELETED = 'deleted'
+
+
+def _stats_dict(character: Character) -> Dict[str, int]:
+    return character_to_document(character)['base_stats']
+
+
+def character_events(character: Character) -> List[Dict[str, Any]]:
+    """
+    Повертає події, що описують зміни персонажа з моменту завантаження.
+    Для нового персонажа - одна подія 'created' з повним станом.
+    """
+    if character.is_new():
+        return [{'type': CREATED, 'state': character_to_document(character)}]
+
+    events: List[Dict[str, Any]] = []
+    fields = character.get_field_changes()
+
+    if 'level' in fields:
+        events.append({
+            'type': LEVEL_UP,
+            'level': character.level,
+            'experience': character.experience,
+            'base_stats': _stats_dict(character),
+        })
+    elif 'experience' in fields or 'base_stats' in fields:
+        old_experience, new_experience = fields.get('experience', (character.experience, character.experience))
+        events.append({
+            'type': EXPERIENCE_GAINED,
+            'amount': new_experience - old_experience,
+            'experience': new_experience,
+            'base_stats': _stats_dict(character),
+        })
+
+    if 'current_health' in fields or 'current_mana' in fields:
+        old_health = fields.get('current_health', (character.current_health,))[0]
+        died = character.current_health == 0 and old_health > 0
+        events.append({
+            'type': DIED if died else VITALS_CHANGED,
+            'current_health': character.current_health,
+            'current_mana': character.current_mana,
+        })
+
+    if 'location_id' in fields:
+        events.append({'type': TRAVELLED, 'from': fields['location_id'][0], 'to': character.location_id})
+
+    profile = {name: fields[name][1] for name in ('name', 'telegram_user_id') if name in fields}
+    if profile:
+        events.append({'type': PROFILE_CHANGED, **profile})
+
+    inventory_changes = character.get_inventory_changes()
+    if inventory_changes:
+        events.append({'type': ITEMS_CHANGED, 'delta': inventory_changes})
+
+    equipment_changes = character.get_changed_equipment_slots()
+    if equipment_changes:
+        events.append({'type': EQUIPMENT_CHANGED, 'slots': equipment_changes})
+
+    if 'combat_state' in character.get_changed_fields():
+        # Бій починається з нульового ходу; інші зміни стану бою - це ходи.
+        if character.combat_state is None:
+            events.append({'type': COMBAT_ENDED})
+        else:
+            started = character.combat_state.get('turn', 0) == 0
+            events.append({
+                'type': COMBAT_STARTED if started else COMBAT_TURN,
+                'state': copy.deepcopy(character.combat_state),
+            })
+    return events
+
+
+def apply_events(document: Dict[str, Any], events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Застосовує події до документа персонажа (змінюючи його) і повертає його.
+    Подія 'created' замінює документ повністю.
+    """
+    for event in events:
+        event_type = event['type']
+        if event_type == CREATED:
+            document.clear()
+            document.update(copy.deepcopy(event['state']))
+        elif event_type in (LEVEL_UP, EXPERIENCE_GAINED):
+            document['experience'] = event['experience']
+            document['base_stats'] = dict(event['base_stats'])
+            if event_type == LEVEL_UP:
+                document['level'] = event['level']
+        elif event_type in (VITALS_CHANGED, DIED):
+            document['current_health'] = event['current_health']
+            document['current_mana'] = event['current_mana']
+        elif event_type == TRAVELLED:
+            document['location_id'] = event['to']
+        elif event_type == PROFILE_CHANGED:
+            document.update({key: value for key, value in event.items() if key != 'type'})
+        elif event_type == ITEMS_CHANGED:
+            inventory = document['inventory']
+            for item_id, delta in event['delta'].items():
+                quantity = inventory.get(item_id, 0) + delta
+                if quantity > 0:
+                    inventory[item_id] = quantity
+                else:
+                    inventory.pop(item_id, None)
+        elif event_type == EQUIPMENT_CHANGED:
+            document['equipped_items'].update(event['slots'])
+        elif event_type in (COMBAT_STARTED, COMBAT_TURN):
+            document['combat_state'] = copy.deepcopy(event['state'])
+        elif event_type == COMBAT_ENDED:
+            document['combat_state'] = None
+        elif event_type != DELETED:
+            raise ValueError(f"Невідомий тип події персонажа: {event_type}")
+    return document
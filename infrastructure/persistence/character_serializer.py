@@ -0,0 +1,145 @@
+"""
+Компактна серіалізація агрегату персонажа.
+
+Використовується кешами, яким потрібно зберігати персонажа поза базою даних.
+Формат - JSON-масив з фіксованим порядком полів без назв ключів, що суттєво
+зменшує розмір запису. Перший елемент - версія формату.
+
+Для документного сховища є окремий формат - словник з іменованими полями
+(character_to_document), який зручно читати та індексувати в JSONB.
+"""
+import json
+from collections import Counter
+from typing import Any, Dict, List
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+
+FORMAT_VERSION = 2
+DOCUMENT_SCHEMA_VERSION = 1
+
+
+def character_to_list(character: Character) -> List[Any]:
+    """Перетворює персонажа на компактний список значень."""
+    stats = character.base_stats
+    return [
+        FORMAT_VERSION,
+        character.id,
+        character.telegram_user_id,
+        character.name,
+        character.level,
+        character.experience,
+        [stats.strength, stats.dexterity, stats.intelligence, stats.base_health, stats.base_mana],
+        character.current_health,
+        character.current_mana,
+        character.location_id,
+        dict(character.equipped_items),
+        dict(Counter(character.inventory)),
+        character.combat_state,
+        character.version,
+    ]
+
+
+def character_from_list(data: List[Any]) -> Character:
+    """
+    Відновлює персонажа з компактного списку значень.
+    Відновлений персонаж вважається збереженим (без незаписаних змін).
+    """
+    if not data or data[0] != FORMAT_VERSION:
+        raise ValueError(f"Непідтримувана версія формату персонажа: {data[0] if data else None}")
+
+    (_, character_id, telegram_user_id, name, level, experience, stats,
+     current_health, current_mana, location_id, equipped_items, inventory_counts, combat_state, version) = data
+
+    inventory: List[str] = []
+    for item_id, quantity in inventory_counts.items():
+        inventory.extend([item_id] * quantity)
+
+    character = Character(
+        id=character_id,
+        telegram_user_id=telegram_user_id,
+        name=name,
+        level=level,
+        experience=experience,
+        base_stats=BaseStats(*stats),
+        current_health=current_health,
+        current_mana=current_mana,
+        equipped_items=equipped_items,
+        inventory=inventory,
+        location_id=location_id,
+        combat_state=combat_state,
+        version=version,
+    )
+    character.mark_persisted()
+    return character
+
+
+def serialize_character(character: Character) -> bytes:
+    """Серіалізує персонажа в компактні байти."""
+    return json.dumps(character_to_list(character), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def deserialize_character(data: bytes) -> Character:
+    """Відновлює персонажа з байтів, отриманих від serialize_character."""
+    return character_from_list(json.loads(data))
+
+
+def character_to_document(character: Character) -> Dict[str, Any]:
+    """Перетворює персонажа на документ з іменованими полями (для JSONB)."""
+    stats = character.base_stats
+    return {
+        'id': character.id,
+        'telegram_user_id': character.telegram_user_id,
+        'name': character.name,
+        'level': character.level,
+        'experience': character.experience,
+        'base_stats': {
+            'strength': stats.strength,
+            'dexterity': stats.dexterity,
+            'intelligence': stats.intelligence,
+            'base_health': stats.base_health,
+            'base_mana': stats.base_mana,
+        },
+        'current_health': character.current_health,
+        'current_mana': character.current_mana,
+        'location_id': character.location_id,
+        'equipped_items': dict(character.equipped_items),
+        'inventory': dict(Counter(character.inventory)),
+        'combat_state': character.combat_state,
+    }
+
+
+def character_from_document(
+    document: Dict[str, Any],
+    schema_version: int = DOCUMENT_SCHEMA_VERSION,
+    version: int = 0
+) -> Character:
+    """
+    Відновлює персонажа з документа.
+    version - версія рядка документа (для оптимістичного блокування).
+    Відновлений персонаж вважається збереженим (без незаписаних змін).
+    """
+    if schema_version != DOCUMENT_SCHEMA_VERSION:
+        raise ValueError(f"Непідтримувана версія документа персонажа: {schema_version}")
+
+    inventory: List[str] = []
+    for item_id, quantity in document['inventory'].items():
+        inventory.extend([item_id] * quantity)
+
+    character = Character(
+        id=document['id'],
+        telegram_user_id=document['telegram_user_id'],
+        name=document['name'],
+        level=document['level'],
+        experience=document['experience'],
+        base_stats=BaseStats(**document['base_stats']),
+        current_health=document['current_health'],
+        current_mana=document['current_mana'],
+        equipped_items=document['equipped_items'],
+        inventory=inventory,
+        location_id=document['location_id'],
+        combat_state=document['combat_state'],
+        version=version,
+    )
+    character.mark_persisted()
+    return character
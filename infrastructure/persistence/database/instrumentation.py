@@ -0,0 +1,46 @@
+"""
+Інструменти для вимірювання роботи з базою даних.
+
+StatementCounter підраховує SQL-запити, що виконуються через рушій або з'єднання.
+Використовується в тестах та бенчмарках, щоб контролювати кількість запитів на команду.
+"""
+from typing import List, Union
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+
+class StatementCounter:
+    """
+    Контекстний менеджер, що рахує SQL-запити, виконані через вказаний bind.
+
+    Приклад:
+        with StatementCounter(engine) as counter:
+            repo.save(character)
+        print(counter.count, counter.statements)
+    """
+    def __init__(self, bind: Union[Engine, Connection]):
+        self.bind = bind
+        self.statements: List[str] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        # Службові запити точок збереження (вкладені транзакції) не є доступом до даних.
+        if 'SAVEPOINT' in statement[:30].upper():
+            return
+        self.statements.append(statement)
+
+    def __enter__(self) -> 'StatementCounter':
+        event.listen(self.bind, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        event.remove(self.bind, 'before_cursor_execute', self._on_execute)
+
+    @property
+    def count(self) -> int:
+        """Загальна кількість виконаних запитів."""
+        return len(self.statements)
+
+    def count_of(self, verb: str) -> int:
+        """Кількість запитів певного типу (SELECT, INSERT, UPDATE, DELETE)."""
+        verb = verb.upper()
+        return sum(1 for s in self.statements if s.lstrip().upper().startswith(verb))
@@ -0,0 +1,39 @@
+"""Add character_documents table
+
+Revision ID: 8f2d4c1a9b7e
+Revises: 3cc8052744f5
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2d4c1a9b7e'
+down_revision: Union[str, None] = '3cc8052744f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('character_documents',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('telegram_user_id', sa.BigInteger(), nullable=False),
+    sa.Column('schema_version', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('document', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('stats_cache', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_character_documents_telegram_user_id'), 'character_documents', ['telegram_user_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_character_documents_telegram_user_id'), table_name='character_documents')
+    op.drop_table('character_documents')
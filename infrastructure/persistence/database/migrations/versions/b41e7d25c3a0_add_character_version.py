@@ -0,0 +1,26 @@
+"""Add version column to characters
+
+Revision ID: b41e7d25c3a0
+Revises: 8f2d4c1a9b7e
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e7d25c3a0'
+down_revision: Union[str, None] = '8f2d4c1a9b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('characters', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('characters', 'version')
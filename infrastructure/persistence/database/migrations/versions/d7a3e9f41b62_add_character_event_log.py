@@ -0,0 +1,59 @@
+"""Add character event log and snapshots
+
+Revision ID: d7a3e9f41b62
+Revises: b41e7d25c3a0
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3e9f41b62'
+down_revision: Union[str, None] = 'b41e7d25c3a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Має збігатися з CHARACTER_EVENT_PARTITIONS у models.py.
+PARTITIONS = 8
+
+
+def upgrade() -> None:
+    op.create_table('character_events',
+    sa.Column('character_id', sa.UUID(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('event_types', sa.String(length=200), nullable=False),
+    sa.Column('events', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('character_id', 'version'),
+    postgresql_partition_by='HASH (character_id)'
+    )
+    op.create_index('idx_character_events_created', 'character_events', ['created_at'], unique=False)
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE character_events_p{remainder} PARTITION OF character_events "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+
+    op.create_table('character_snapshots',
+    sa.Column('character_id', sa.UUID(), nullable=False),
+    sa.Column('telegram_user_id', sa.BigInteger(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('document', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('stats_cache', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('character_id')
+    )
+    op.create_index(op.f('ix_character_snapshots_telegram_user_id'), 'character_snapshots', ['telegram_user_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_character_snapshots_telegram_user_id'), table_name='character_snapshots')
+    op.drop_table('character_snapshots')
+    # Секції видаляються разом з секціонованою таблицею.
+    op.drop_index('idx_character_events_created', table_name='character_events')
+    op.drop_table('character_events')
@@ -4,15 +4,21 @@
 Ці моделі використовуються репозиторіями для взаємодії з БД.
 """
 from sqlalchemy import (
-    String, Integer, BigInteger, DateTime,
-    Numeric, ForeignKey, Index, UniqueConstraint
+    String, Integer, BigInteger, Boolean, DateTime, JSON, Uuid,
+    Numeric, ForeignKey, Index, UniqueConstraint, DDL, event
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column
 from datetime import datetime, timezone
+from typing import Any
 import uuid
 from decimal import Decimal
 
+# Типи, що працюють і в PostgreSQL, і в SQLite: Uuid у PostgreSQL - це нативний UUID,
+# а в SQLite - рядок; JSONB використовується лише в PostgreSQL, в інших базах - JSON.
+UUID_TYPE = Uuid(as_uuid=True)
+JSON_DOCUMENT = JSON().with_variant(JSONB(), 'postgresql')
+
 # Створення базового класу для всіх моделей за допомогою сучасного синтаксису.
 # Всі наші моделі будуть наслідувати цей клас.
 class Base(DeclarativeBase):
@@ -23,7 +29,7 @@ class CharacterModel(Base):
     __tablename__ = 'characters'
 
     # --- Ідентифікатори ---
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID_TYPE, primary_key=True, default=uuid.uuid4)
     telegram_user_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False, index=True)
 
     # --- Основна інформація ---
@@ -45,6 +51,10 @@ class CharacterModel(Base):
     # --- Місцезнаходження ---
     location_id: Mapped[str] = mapped_column(String(50), nullable=False, default='town_main')
 
+    # --- Оптимістичне блокування ---
+    # Збільшується при кожному збереженні; UPDATE виконується лише за очікуваної версії.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default='1')
+
     # --- Часові мітки ---
     # default=lambda... - генерує значення за замовчуванням на стороні Python під час створення запису.
     # onupdate=lambda... - оновлює значення на стороні Python під час оновлення запису.
@@ -68,7 +78,7 @@ class InventoryModel(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     # Зовнішній ключ, що посилається на таблицю персонажів.
-    character_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('characters.id', ondelete='CASCADE'), nullable=False)
+    character_id: Mapped[uuid.UUID] = mapped_column(UUID_TYPE, ForeignKey('characters.id', ondelete='CASCADE'), nullable=False)
     item_id: Mapped[str] = mapped_column(String(100), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     acquired_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
@@ -89,7 +99,7 @@ class EquipmentModel(Base):
     __tablename__ = 'character_equipment'
 
     # ID персонажа є одночасно і первинним, і зовнішнім ключем (зв'язок один-до-одного).
-    character_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('characters.id', ondelete='CASCADE'), primary_key=True)
+    character_id: Mapped[uuid.UUID] = mapped_column(UUID_TYPE, ForeignKey('characters.id', ondelete='CASCADE'), primary_key=True)
 
     # Слоти екіпіровки. Можуть бути порожніми (nullable=True).
     weapon: Mapped[str | None] = mapped_column(String(100), nullable=True)
@@ -108,9 +118,9 @@ class CombatStateModel(Base):
     """Модель стану бою. Створюється, коли персонаж вступає в бій."""
     __tablename__ = 'combat_states'
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID_TYPE, primary_key=True, default=uuid.uuid4)
     # Унікальний зв'язок з персонажем: один персонаж може бути лише в одному бою одночасно.
-    character_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('characters.id', ondelete='CASCADE'), unique=True, nullable=False)
+    character_id: Mapped[uuid.UUID] = mapped_column(UUID_TYPE, ForeignKey('characters.id', ondelete='CASCADE'), unique=True, nullable=False)
     enemy_id: Mapped[str] = mapped_column(String(100), nullable=False)
     enemy_level: Mapped[int] = mapped_column(Integer, nullable=False)
     enemy_current_health: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -124,7 +134,7 @@ class StatsCacheModel(Base):
     """Модель для кешування розрахованих характеристик персонажа."""
     __tablename__ = 'character_stats_cache'
 
-    character_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('characters.id', ondelete='CASCADE'), primary_key=True)
+    character_id: Mapped[uuid.UUID] = mapped_column(UUID_TYPE, ForeignKey('characters.id', ondelete='CASCADE'), primary_key=True)
 
     # --- Кешовані характеристики ---
     # Ці поля дублюють розрахункові дані для швидкого доступу, щоб не перераховувати їх при кожному запиті.
@@ -147,3 +157,95 @@ class StatsCacheModel(Base):
     equipment_hash: Mapped[str] = mapped_column(String(64), nullable=False)
 
     character: Mapped["CharacterModel"] = relationship(back_populates="stats_cache")
+
+class CharacterDocumentModel(Base):
+    """
+    Альтернативне зберігання персонажа: весь агрегат в одному JSONB-документі.
+    Використовується DocumentCharacterRepository замість п'яти пов'язаних таблиць.
+    """
+    __tablename__ = 'character_documents'
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID_TYPE, primary_key=True)
+    telegram_user_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False, index=True)
+
+    # Версія структури документа (для міграції формату) та лічильник збережень.
+    schema_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    # Повний стан персонажа та кеш характеристик (разом з хешем екіпіровки).
+    document: Mapped[dict[str, Any]] = mapped_column(JSON_DOCUMENT, nullable=False)
+    stats_cache: Mapped[dict[str, Any] | None] = mapped_column(JSON_DOCUMENT, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+# Кількість хеш-секцій журналу подій персонажів (PARTITION BY HASH (character_id)).
+CHARACTER_EVENT_PARTITIONS = 8
+
+class CharacterEventModel(Base):
+    """
+    Журнал змін персонажа (лише додавання). Один рядок - одне збереження:
+    версія персонажа після нього та список подій (отримано досвід, здобич, смерть...).
+    Використовується EventSourcedCharacterRepository.
+
+    У PostgreSQL таблиця секціонована за хешем character_id, тож журнал
+    одного персонажа лежить в одній невеликій секції.
+    """
+    __tablename__ = 'character_events'
+    __table_args__ = (
+        # Вибірка подій за період для служби підтримки (наприклад, усі смерті за день).
+        Index('idx_character_events_created', 'created_at'),
+        {'postgresql_partition_by': 'HASH (character_id)'},
+    )
+
+    # Первинний ключ (персонаж, версія) не дає двом збереженням з однієї версії
+    # дописати журнал: друге отримує конфлікт.
+    character_id: Mapped[uuid.UUID] = mapped_column(UUID_TYPE, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Типи подій через кому (для фільтрації) та самі події.
+    event_types: Mapped[str] = mapped_column(String(200), nullable=False)
+    events: Mapped[list[dict[str, Any]]] = mapped_column(JSON_DOCUMENT, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+class CharacterSnapshotModel(Base):
+    """
+    Останній знімок стану персонажа для журналу подій.
+    Поточний стан = знімок + події журналу з версією, більшою за версію знімка.
+    """
+    __tablename__ = 'character_snapshots'
+
+    character_id: Mapped[uuid.UUID] = mapped_column(UUID_TYPE, primary_key=True)
+    telegram_user_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False, index=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    document: Mapped[dict[str, Any]] = mapped_column(JSON_DOCUMENT, nullable=False)
+    stats_cache: Mapped[dict[str, Any] | None] = mapped_column(JSON_DOCUMENT, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+class ShardBucketModel(Base):
+    """
+    Таблиця шардів: до якого шарду належить кожен кошик гравців
+    (telegram_user_id % SHARD_BUCKETS). Зберігається в першій базі (каталозі).
+    Використовується ShardRouter та інструментом перешардування.
+    """
+    __tablename__ = 'shard_buckets'
+
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    shard_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Кошик переноситься на інший шард: команди з записом чекають завершення.
+    moving: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+# Секції журналу подій створюються разом з таблицею (лише в PostgreSQL).
+for _remainder in range(CHARACTER_EVENT_PARTITIONS):
+    event.listen(
+        CharacterEventModel.__table__,
+        'after_create',
+        DDL(
+            f"CREATE TABLE character_events_p{_remainder} PARTITION OF character_events "
+            f"FOR VALUES WITH (MODULUS {CHARACTER_EVENT_PARTITIONS}, REMAINDER {_remainder})"
+        ).execute_if(dialect='postgresql')
+    )
@@ -0,0 +1,200 @@
+"""
+Маршрутизація запитів між основною базою та репліками.
+
+Команди, що лише читають дані (/stats, /inventory, /start, побудова
+клавіатури /travel), можуть виконуватися на репліках PostgreSQL і не
+навантажувати основну базу, яка обробляє записи.
+
+Репліка використовується, лише поки її відставання не перевищує
+max_lag_seconds: інакше (або якщо вона недоступна) читання йде в основну
+базу. Відставання вимірює фоновий потік раз на lag_check_interval_seconds,
+а вибір рушія лише читає останній результат і не виконує жодного запиту:
+недоступна репліка не затримує обробку оновлень. До відставання додається
+вік вимірювання, тож якщо потік давно не оновлював результат (наприклад,
+завис на з'єднанні з реплікою), репліка перестає вважатися актуальною.
+
+Сесії, відкриті на репліці, позначаються session.info['replica'] = True:
+прочитане з репліки може відставати і не має потрапляти в кеш персонажів.
+
+Змінні оточення (для get_engine_router):
+    DATABASE_REPLICA_URLS - адреси реплік через кому (за замовчуванням реплік немає).
+    REPLICA_MAX_LAG_SECONDS - максимальне відставання репліки для читання, с (2).
+    REPLICA_LAG_CHECK_SECONDS - як часто перевіряти відставання, с (1).
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# На основному сервері відставання немає; репліка, що відтворила весь отриманий
+# WAL, теж актуальна, навіть якщо записів давно не було.
+REPLICATION_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+def measure_replication_lag(engine: Engine) -> Optional[float]:
+    """
+    Повертає відставання репліки в секундах або None, якщо вона недоступна.
+    """
+    try:
+        with engine.connect() as connection:
+            return float(connection.execute(REPLICATION_LAG_SQL).scalar_one())
+    except SQLAlchemyError as e:
+        logger.warning(f"Репліка {engine.url.render_as_string(hide_password=True)} недоступна: {e}")
+        return None
+
+
+@dataclass
+class RoutingStats:
+    """Лічильники маршрутизації для моніторингу."""
+    writes: int = 0
+    replica_reads: int = 0
+    # Читання, відправлені в основну базу, бо жодна репліка не підійшла.
+    primary_fallbacks: int = 0
+    lag_checks: int = 0
+
+
+class EngineRouter:
+    """
+    Обирає рушій для сесії: запис - завжди основна база, читання -
+    одна з актуальних реплік по колу, або основна база, якщо таких немає.
+
+    :param primary: Рушій основної бази.
+    :param replicas: Рушії реплік.
+    :param lag_probe: Функція вимірювання відставання (None - репліка недоступна);
+        у тестах замінюється заглушкою.
+
+    Фонова перевірка запускається start(); без неї відставання оновлює лише
+    явний виклик refresh_lags(), а доти читання йдуть в основну базу.
+    """
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: Sequence[Engine] = (),
+        max_lag_seconds: float = 2.0,
+        lag_check_interval_seconds: float = 1.0,
+        lag_probe: Callable[[Engine], Optional[float]] = measure_replication_lag,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval_seconds = lag_check_interval_seconds
+        self.lag_probe = lag_probe
+        self.stats = RoutingStats()
+
+        # Останнє виміряне відставання кожної репліки: (відставання, час вимірювання).
+        self._lag: Dict[int, Tuple[Optional[float], float]] = {}
+        self._next_replica = itertools.count()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запускає фонове вимірювання відставання реплік."""
+        if not self.replicas or self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-lag-probe", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Зупиняє фонове вимірювання."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def refresh_lags(self) -> None:
+        """Вимірює відставання всіх реплік (з фонового потоку або вручну)."""
+        for index, replica in enumerate(self.replicas):
+            lag = self.lag_probe(replica)
+            with self._lock:
+                self._lag[index] = (lag, time.monotonic())
+                self.stats.lag_checks += 1
+
+    def engine_for(self, read_only: bool = False) -> Engine:
+        """Повертає рушій для нової сесії."""
+        if not read_only:
+            self.stats.writes += 1
+            return self.primary
+        if not self.replicas:
+            return self.primary
+
+        start = next(self._next_replica)
+        for offset in range(len(self.replicas)):
+            index = (start + offset) % len(self.replicas)
+            if self._is_fresh(index):
+                self.stats.replica_reads += 1
+                return self.replicas[index]
+
+        self.stats.primary_fallbacks += 1
+        return self.primary
+
+    def session_factory(self, read_only: bool = False) -> Callable[[], Session]:
+        """
+        Фабрика сесій для одиниці роботи. Рушій обирається для кожної нової
+        сесії, тож зміна відставання реплік враховується одразу.
+        """
+        def create_session() -> Session:
+            engine = self.engine_for(read_only)
+            return Session(bind=engine, autoflush=False, info={'replica': engine is not self.primary})
+        return create_session
+
+    def replica_lags(self) -> List[Optional[float]]:
+        """Останнє виміряне відставання кожної репліки (для логів та моніторингу)."""
+        with self._lock:
+            return [self._lag.get(index, (None, 0.0))[0] for index in range(len(self.replicas))]
+
+    def _is_fresh(self, index: int) -> bool:
+        """
+        Чи можна читати з репліки. Лише останній результат фонового
+        вимірювання: відставання плюс вік вимірювання не більше max_lag_seconds.
+        """
+        with self._lock:
+            lag, measured_at = self._lag.get(index, (None, 0.0))
+        if lag is None:
+            return False
+        return lag + (time.monotonic() - measured_at) <= self.max_lag_seconds
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.refresh_lags()
+            except Exception as e:
+                logger.error(f"Помилка вимірювання відставання реплік: {e}", exc_info=True)
+            self._stopped.wait(self.lag_check_interval_seconds)
+
+
+_engine_router: Optional[EngineRouter] = None
+
+
+def get_engine_router() -> EngineRouter:
+    """Повертає спільний маршрутизатор, налаштований змінними оточення."""
+    global _engine_router
+    if _engine_router is None:
+        from .engine import create_db_engine, engine
+
+        replica_urls = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+        _engine_router = EngineRouter(
+            primary=engine,
+            replicas=[create_db_engine(url) for url in replica_urls],
+            max_lag_seconds=float(os.getenv('REPLICA_MAX_LAG_SECONDS', '2')),
+            lag_check_interval_seconds=float(os.getenv('REPLICA_LAG_CHECK_SECONDS', '1')),
+        )
+        _engine_router.start()
+    return _engine_router
@@ -4,11 +4,12 @@
 Надає фабрику сесій та контекстний менеджер для забезпечення патерну Unit of Work.
 """
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Iterator, Optional
 from sqlalchemy.orm import sessionmaker, scoped_session, Session
 
 # Імпортуємо вже створений рушій з сусіднього модуля.
 from .engine import engine
+from .sharding import get_shard_router
 
 # Створюємо потоко-безпечну фабрику сесій.
 # scoped_session гарантує, що кожен потік працює з власним екземпляром сесії,
@@ -18,14 +19,23 @@ SessionLocal = scoped_session(
 )
 
 @contextmanager
-def get_session() -> Iterator[Session]:
+def get_session(telegram_user_id: Optional[int] = None) -> Iterator[Session]:
     """
     Контекстний менеджер, що надає сесію для виконання операцій.
 
     Забезпечує правильне закриття сесії та відкат транзакції в разі помилки.
     Рішення про коміт (commit) приймається ззовні, у коді бізнес-логіки.
+
+    Якщо увімкнено шардування (SHARD_DATABASE_URLS), повертає сесію, що
+    прив'язується до шарду гравця; telegram_user_id прив'язує її одразу.
     """
-    session = SessionLocal()
+    shard_router = get_shard_router()
+    if shard_router is None:
+        session = SessionLocal()
+    else:
+        session = shard_router.session_factory()()
+        if telegram_user_id is not None:
+            session.route_user(telegram_user_id)
     try:
         yield session
     except Exception:
@@ -0,0 +1,310 @@
+"""
+Горизонтальне шардування персонажів за telegram_user_id.
+
+Гравці розкладені на SHARD_BUCKETS кошиків (telegram_user_id % SHARD_BUCKETS),
+а таблиця shard_buckets у першій базі (каталозі) визначає, на якому шарді
+лежить кожен кошик. Перенесення гравців між шардами - це перенесення кошиків
+(див. infrastructure/persistence/resharding.py), тож формула кошика ніколи
+не змінюється. Поки таблиця порожня, кошик n належить шарду n % кількість шардів.
+
+Сесія ShardAwareSession прив'язується до шарду під час першого звернення
+репозиторію до даних гравця (route_session), тож одиниця роботи однієї
+команди працює з базою свого гравця без змін в обробниках.
+
+Змінні оточення (для get_shard_router):
+    SHARD_DATABASE_URLS - адреси баз шардів через кому; перша також зберігає
+        таблицю shard_buckets. Якщо не задано, шардування вимкнене.
+    SHARD_MAP_REFRESH_SECONDS - як часто перечитувати таблицю шардів, с (5).
+    SHARD_MOVE_WAIT_SECONDS - скільки команда з записом чекає завершення
+        перенесення кошика гравця (у lock_user_async одиниці роботи), с (2).
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from domain.exceptions import ShardMovedError, UserLockTimeoutError
+from .models import CharacterModel, ShardBucketModel
+
+logger = logging.getLogger(__name__)
+
+SHARD_BUCKETS = 1024
+
+
+def bucket_for(telegram_user_id: int) -> int:
+    """Кошик гравця. Формула стабільна: від неї залежить розміщення всіх персонажів."""
+    return telegram_user_id % SHARD_BUCKETS
+
+
+@dataclass
+class ShardRoutingStats:
+    """Лічильники шардування для моніторингу."""
+    map_refreshes: int = 0
+    # Команди з записом, що чекали завершення перенесення кошика.
+    move_waits: int = 0
+    # Читання, повторені на іншому шарді після перенесення кошика.
+    reroutes: int = 0
+    character_lookups: int = 0
+
+
+class ShardRouter:
+    """
+    Відповідає на питання "у якій базі лежить персонаж гравця".
+
+    Таблиця шардів кешується в пам'яті й перечитується не частіше ніж раз на
+    refresh_interval_seconds, тож вибір шарду зазвичай не коштує жодного запиту.
+
+    :param engines: Рушії шардів; engines[0] - каталог з таблицею shard_buckets.
+    """
+    def __init__(
+        self,
+        engines: Sequence[Engine],
+        refresh_interval_seconds: float = 5.0,
+        move_wait_seconds: float = 2.0,
+        poll_interval_seconds: float = 0.05,
+    ):
+        if not engines:
+            raise ValueError("Потрібен хоча б один шард")
+        self.engines = list(engines)
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.move_wait_seconds = move_wait_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.stats = ShardRoutingStats()
+
+        self._shards: List[int] = [bucket % len(self.engines) for bucket in range(SHARD_BUCKETS)]
+        self._moving: Set[int] = set()
+        self._refreshed_at = float('-inf')
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Engine:
+        """Рушій бази з таблицею шардів."""
+        return self.engines[0]
+
+    def shard_for_user(self, telegram_user_id: int, wait_for_move: bool = False) -> int:
+        """
+        Номер шарду гравця. Ніколи не чекає: виклик іде з обробників у циклі подій.
+
+        :param wait_for_move: Команда з записом. Якщо кошик гравця переноситься,
+            розміщення перечитується; читання під час перенесення йдуть на старий шард.
+        :raises UserLockTimeoutError: Якщо кошик команди з записом ще переноситься
+            (дочекатися завершення можна через wait_for_move_async).
+        """
+        self._refresh_if_stale()
+        bucket = bucket_for(telegram_user_id)
+        if not wait_for_move or bucket not in self._moving:
+            return self._shards[bucket]
+
+        shard_id, moving = self.reload_bucket(bucket)
+        if moving:
+            raise UserLockTimeoutError(telegram_user_id, 0)
+        return shard_id
+
+    async def wait_for_move_async(self, telegram_user_id: int) -> None:
+        """
+        Чекає, поки кошик гравця перестане переноситися, не блокуючи цикл подій.
+
+        :raises UserLockTimeoutError: Якщо перенесення не завершилось за move_wait_seconds.
+        """
+        self._refresh_if_stale()
+        bucket = bucket_for(telegram_user_id)
+        if bucket not in self._moving:
+            return
+
+        self.stats.move_waits += 1
+        deadline = time.monotonic() + self.move_wait_seconds
+        while True:
+            _, moving = self.reload_bucket(bucket)
+            if not moving:
+                return
+            if time.monotonic() >= deadline:
+                raise UserLockTimeoutError(telegram_user_id, self.move_wait_seconds)
+            await asyncio.sleep(self.poll_interval_seconds)
+
+    def reload_bucket(self, bucket: int) -> Tuple[int, bool]:
+        """Перечитує розміщення одного кошика з каталогу: (шард, чи переноситься)."""
+        with self.directory.connect() as connection:
+            row = connection.execute(
+                select(ShardBucketModel.shard_id, ShardBucketModel.moving)
+                .where(ShardBucketModel.bucket == bucket)
+            ).first()
+        with self._lock:
+            if row is not None:
+                self._shards[bucket] = row.shard_id
+                if row.moving:
+                    self._moving.add(bucket)
+                else:
+                    self._moving.discard(bucket)
+            return self._shards[bucket], bucket in self._moving
+
+    def refresh(self) -> None:
+        """Перечитує всю таблицю шардів з каталогу."""
+        with self.directory.connect() as connection:
+            rows = connection.execute(
+                select(ShardBucketModel.bucket, ShardBucketModel.shard_id, ShardBucketModel.moving)
+            ).all()
+        with self._lock:
+            for row in rows:
+                self._shards[row.bucket] = row.shard_id
+            self._moving = {row.bucket for row in rows if row.moving}
+            self._refreshed_at = time.monotonic()
+        self.stats.map_refreshes += 1
+
+    def shard_map(self) -> Dict[int, int]:
+        """Поточне розміщення кошиків: {кошик: шард}."""
+        self._refresh_if_stale()
+        with self._lock:
+            return dict(enumerate(self._shards))
+
+    def locate_character(self, character_id: str) -> Optional[Tuple[int, int]]:
+        """
+        Шукає персонажа за ID на всіх шардах: (шард, telegram_user_id) або None.
+        Потрібно лише коли сесія ще не знає гравця, тож звичайні команди його не викликають.
+        """
+        self.stats.character_lookups += 1
+        for shard_id, engine in enumerate(self.engines):
+            with engine.connect() as connection:
+                telegram_user_id = connection.execute(
+                    select(CharacterModel.telegram_user_id).where(CharacterModel.id == UUID(character_id))
+                ).scalar_one_or_none()
+            if telegram_user_id is not None:
+                return shard_id, telegram_user_id
+        return None
+
+    def session_factory(self, read_only: bool = False) -> Callable[[], 'ShardAwareSession']:
+        """Фабрика сесій для одиниці роботи."""
+        def create_session() -> ShardAwareSession:
+            return ShardAwareSession(self, read_only=read_only, autoflush=False)
+        return create_session
+
+    def _refresh_if_stale(self) -> None:
+        if time.monotonic() - self._refreshed_at >= self.refresh_interval_seconds:
+            self.refresh()
+
+
+class ShardAwareSession(Session):
+    """
+    Сесія, що прив'язується до шарду гравця під час першого звернення до його даних.
+    Одна сесія обслуговує одну команду, тож усі її запити йдуть на один шард.
+    """
+    def __init__(self, router: ShardRouter, read_only: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.router = router
+        self.read_only = read_only
+        self.shard_id: Optional[int] = None
+        self.telegram_user_id: Optional[int] = None
+
+    def route_user(self, telegram_user_id: int) -> None:
+        """Прив'язує сесію до шарду гравця (якщо ще не прив'язана)."""
+        if self.telegram_user_id == telegram_user_id:
+            return
+        shard_id = self.router.shard_for_user(telegram_user_id, wait_for_move=not self.read_only)
+        self._bind_shard(shard_id)
+        if self.telegram_user_id is None:
+            self.telegram_user_id = telegram_user_id
+
+    async def route_user_async(self, telegram_user_id: int) -> None:
+        """Як route_user, але спершу без блокування циклу подій чекає завершення перенесення кошика."""
+        if self.telegram_user_id == telegram_user_id:
+            return
+        if not self.read_only:
+            await self.router.wait_for_move_async(telegram_user_id)
+        self.route_user(telegram_user_id)
+
+    def route_character(self, character_id: str) -> None:
+        """Прив'язує сесію до шарду персонажа, якщо гравця ще не відомо."""
+        if self.shard_id is not None:
+            return
+        located = self.router.locate_character(character_id)
+        if located is None:
+            # Персонажа немає ніде: запит до каталогу так само нічого не знайде.
+            self._bind_shard(0)
+        else:
+            self.route_user(located[1])
+
+    def reroute_after_miss(self) -> bool:
+        """
+        Перевіряє, чи не перенесли кошик гравця, якщо персонажа не знайдено.
+
+        Сесія читання перемикається на новий шард (повертає True - запит слід
+        повторити). Сесія з записом може вже тримати блокування користувача на
+        старому шарді, тож для неї виникає ShardMovedError (різновид
+        ConcurrencyConflictError), і команда повторюється з новою сесією.
+        """
+        if self.telegram_user_id is None:
+            return False
+        shard_id, _ = self.router.reload_bucket(bucket_for(self.telegram_user_id))
+        if shard_id == self.shard_id:
+            return False
+        if not self.read_only:
+            raise ShardMovedError(self.telegram_user_id)
+        self.rollback()
+        self.shard_id = shard_id
+        self.router.stats.reroutes += 1
+        return True
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        if self.shard_id is None:
+            raise RuntimeError("Сесію не прив'язано до шарду: спочатку потрібен запит з telegram_user_id")
+        return self.router.engines[self.shard_id]
+
+    def _bind_shard(self, shard_id: int) -> None:
+        if self.shard_id is not None and self.shard_id != shard_id:
+            raise ValueError(f"Сесію вже прив'язано до шарду {self.shard_id}, а не {shard_id}")
+        self.shard_id = shard_id
+
+
+def route_session(session: Session, telegram_user_id: Optional[int] = None, character_id: Optional[str] = None) -> None:
+    """
+    Прив'язує сесію до шарду гравця або персонажа.
+    Для звичайних (не шардованих) сесій нічого не робить.
+    """
+    if not isinstance(session, ShardAwareSession):
+        return
+    if telegram_user_id is not None:
+        session.route_user(telegram_user_id)
+    elif character_id is not None:
+        session.route_character(character_id)
+
+
+async def route_session_async(session: Session, telegram_user_id: int) -> None:
+    """
+    Прив'язує сесію до шарду гравця, чекаючи завершення перенесення його кошика
+    через asyncio.sleep. Для звичайних (не шардованих) сесій нічого не робить.
+    """
+    if isinstance(session, ShardAwareSession):
+        await session.route_user_async(telegram_user_id)
+
+
+def reroute_after_miss(session: Session) -> bool:
+    """Див. ShardAwareSession.reroute_after_miss; для звичайних сесій - False."""
+    return isinstance(session, ShardAwareSession) and session.reroute_after_miss()
+
+
+_shard_router: Optional[ShardRouter] = None
+
+
+def get_shard_router() -> Optional[ShardRouter]:
+    """Повертає спільний маршрутизатор шардів або None, якщо шардування вимкнене."""
+    global _shard_router
+    urls = [url.strip() for url in os.getenv('SHARD_DATABASE_URLS', '').split(',') if url.strip()]
+    if not urls:
+        return None
+    if _shard_router is None:
+        from .engine import create_db_engine
+
+        _shard_router = ShardRouter(
+            [create_db_engine(url) for url in urls],
+            refresh_interval_seconds=float(os.getenv('SHARD_MAP_REFRESH_SECONDS', '5')),
+            move_wait_seconds=float(os.getenv('SHARD_MOVE_WAIT_SECONDS', '2')),
+        )
+        logger.info(f"Шардування персонажів: {len(urls)} баз")
+    return _shard_router
@@ -0,0 +1,92 @@
+"""
+Конвертер персонажів з реляційного сховища в документне.
+
+Читає персонажів з таблиць characters/character_* пакетами та записує їх
+у character_documents. Кожен пакет комітиться окремо, тож конвертацію можна
+перервати та продовжити з останнього ID (--after-id).
+
+Запуск:
+    python -m infrastructure.persistence.document_converter --batch-size 500
+"""
+import argparse
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from infrastructure.persistence.repositories.document_character_repository import DocumentCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+logger = logging.getLogger(__name__)
+
+
+def convert_relational_to_documents(
+    source: Session,
+    target: Session,
+    batch_size: int = 500,
+    after_id: Optional[str] = None,
+    on_batch: Optional[Callable[[int, str], None]] = None,
+) -> int:
+    """
+    Переносить усіх персонажів у документне сховище.
+
+    Повторний запуск безпечний: документи вже перенесених персонажів перезаписуються.
+
+    :param source: Сесія для читання реляційних таблиць.
+    :param target: Сесія для запису документів (комітиться після кожного пакета).
+    :param batch_size: Кількість персонажів в одному пакеті.
+    :param after_id: Продовжити після персонажа з цим ID.
+    :param on_batch: Викликається після кожного пакета з (кількість, останній ID).
+    :return: Кількість перенесених персонажів.
+    """
+    relational = PostgresCharacterRepository(source)
+    documents = DocumentCharacterRepository(target)
+
+    converted = 0
+    in_batch = 0
+    last_id = after_id
+    for character in relational.iter_characters(batch_size=batch_size, after_id=after_id):
+        documents.import_character(character)
+        converted += 1
+        in_batch += 1
+        last_id = character.id
+        if in_batch == batch_size:
+            target.commit()
+            in_batch = 0
+            if on_batch is not None:
+                on_batch(converted, last_id)
+
+    if in_batch:
+        target.commit()
+        if on_batch is not None:
+            on_batch(converted, last_id)
+    return converted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Перенесення персонажів у документне сховище")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--after-id', default=None, help="Продовжити після персонажа з цим ID")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from infrastructure.persistence.database.session import SessionLocal
+
+    source = SessionLocal.session_factory()
+    target = SessionLocal.session_factory()
+    try:
+        total = convert_relational_to_documents(
+            source,
+            target,
+            batch_size=args.batch_size,
+            after_id=args.after_id,
+            on_batch=lambda count, last_id: logger.info(f"Перенесено {count} персонажів (останній ID {last_id})"),
+        )
+        logger.info(f"Конвертацію завершено: {total} персонажів")
+    finally:
+        source.close()
+        target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Декоратор репозиторію персонажів з кешуванням на читання (read-through).
+"""
+import json
+import logging
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from domain.entities.character import Character
+from domain.repositories.character_repository import ICharacterRepository
+from infrastructure.cache.backends import ICacheBackend
+from infrastructure.persistence.character_serializer import character_from_list, serialize_character
+
+logger = logging.getLogger(__name__)
+
+# Маркер інвалідації: [INVALIDATED, версія]. Як і запис персонажа, закінчується версією.
+INVALIDATED = "invalidated"
+
+
+class CachedCharacterRepository(ICharacterRepository):
+    """
+    Кешує персонажів у зовнішньому сховищі за ID та за Telegram ID.
+
+    - При читанні спочатку перевіряється кеш, і лише при промаху - базовий репозиторій.
+    - Після збереження записи в кеші замінюються маркером з новою версією
+      персонажа. Промах записує персонажа лише поверх запису чи маркера з
+      не новішою версією (set_if), тож читання, яке завантажило рядок до
+      паралельного коміту, не поверне в кеш старий стан.
+    - Якщо збереження не вдалося (наприклад, ConcurrencyConflictError через
+      застарілий запис у кеші) або персонажа видалено, записи видаляються:
+      повтор команди прочитає персонажа з бази.
+    - Якщо передано сесію, маркери записуються ще раз після коміту, а після
+      відкату записи видаляються: незафіксований стан не лишається в кеші.
+    - З populate=False промахи читаються з базового репозиторію, але в кеш не
+      записуються: так працюють сесії на репліках, що можуть відставати.
+    - Кеш характеристик (stats_cache) не кешується додатково і передається напряму.
+    """
+    def __init__(self, inner: ICharacterRepository, backend: ICacheBackend,
+                 ttl_seconds: int = 300, key_prefix: str = "character",
+                 session: Optional[Session] = None, populate: bool = True):
+        self.inner = inner
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self.session = session
+        self.populate = populate
+        # Ключі персонажів, змінених у поточній транзакції сесії -> нова версія.
+        self._pending_keys: Dict[str, int] = {}
+        if session is not None:
+            event.listen(session, 'after_commit', self._on_commit)
+            event.listen(session, 'after_rollback', self._on_rollback)
+
+    def _id_key(self, character_id: str) -> str:
+        return f"{self.key_prefix}:id:{character_id}"
+
+    def _telegram_key(self, telegram_user_id: int) -> str:
+        return f"{self.key_prefix}:tg:{telegram_user_id}"
+
+    def save(self, character: Character) -> None:
+        try:
+            self.inner.save(character)
+        except Exception:
+            self._invalidate(character.id, character.telegram_user_id)
+            raise
+        keys = [self._id_key(character.id), self._telegram_key(character.telegram_user_id)]
+        if self.session is not None:
+            self._pending_keys.update(dict.fromkeys(keys, character.version))
+        self._mark_invalidated(keys, character.version)
+
+    def get(self, character_id: str) -> Optional[Character]:
+        cached = self._read(self._id_key(character_id))
+        if cached is not None:
+            return cached
+
+        character = self.inner.get(character_id)
+        if character is not None:
+            self._store(character)
+        return character
+
+    def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
+        cached = self._read(self._telegram_key(telegram_user_id))
+        if cached is not None:
+            return cached
+
+        character = self.inner.get_by_telegram_user_id(telegram_user_id)
+        if character is not None:
+            self._store(character)
+        return character
+
+    def delete(self, character_id: str) -> None:
+        cached = self._read(self._id_key(character_id))
+        try:
+            self.inner.delete(character_id)
+        finally:
+            self._invalidate(character_id, cached.telegram_user_id if cached else None)
+
+    def save_stats_cache(self, character_id: str, stats: Dict[str, Any], equipment_items: List[str]) -> None:
+        self.inner.save_stats_cache(character_id, stats, equipment_items)
+
+    def get_stats_cache(self, character_id: str, equipment_items: List[str]) -> Optional[Dict[str, Any]]:
+        return self.inner.get_stats_cache(character_id, equipment_items)
+
+    def _read(self, key: str) -> Optional[Character]:
+        """Читає персонажа з кешу. Маркер, недоступний або пошкоджений кеш вважаються промахом."""
+        try:
+            data = self.backend.get(key)
+            if data is None:
+                return None
+            values = json.loads(data)
+            return character_from_list(values) if values[0] != INVALIDATED else None
+        except Exception as e:
+            logger.warning(f"Не вдалося прочитати персонажа з кешу ({key}): {e}")
+            return None
+
+    def _store(self, character: Character) -> None:
+        """Записує персонажа в кеш під обома ключами, якщо там немає новішої версії."""
+        if not self.populate:
+            return
+        try:
+            data = serialize_character(character)
+            for key in (self._id_key(character.id), self._telegram_key(character.telegram_user_id)):
+                self.backend.set_if(key, data, self.ttl_seconds,
+                                    lambda current: _cached_version(current) <= character.version)
+        except Exception as e:
+            logger.warning(f"Не вдалося записати персонажа {character.id} в кеш: {e}")
+
+    def _mark_invalidated(self, keys: List[str], version: int) -> None:
+        """Замінює старіші записи маркером версії, щойно записаної в базу."""
+        data = json.dumps([INVALIDATED, version]).encode()
+        try:
+            for key in keys:
+                self.backend.set_if(key, data, self.ttl_seconds,
+                                    lambda current: _cached_version(current) < version)
+        except Exception as e:
+            logger.warning(f"Не вдалося інвалідувати кеш персонажів ({keys}): {e}")
+
+    def _invalidate(self, character_id: str, telegram_user_id: Optional[int]) -> None:
+        keys = [self._id_key(character_id)]
+        if telegram_user_id is not None:
+            keys.append(self._telegram_key(telegram_user_id))
+        self._delete(keys)
+
+    def _on_commit(self, session: Session) -> None:
+        """Повторна інвалідація змінених персонажів, коли зміни вже в базі."""
+        pending, self._pending_keys = self._pending_keys, {}
+        for key, version in pending.items():
+            self._mark_invalidated([key], version)
+
+    def _on_rollback(self, session: Session) -> None:
+        """Після відкату видаляє записи, які могли кешувати незафіксований стан."""
+        if self._pending_keys:
+            keys, self._pending_keys = list(self._pending_keys), {}
+            self._delete(keys)
+
+    def _delete(self, keys: List[str]) -> None:
+        try:
+            self.backend.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Не вдалося інвалідувати кеш персонажів ({keys}): {e}")
+
+
+def _cached_version(data: Optional[bytes]) -> int:
+    """
+    Версія персонажа в записі чи маркері кешу (останній елемент).
+    Відсутній або пошкоджений запис має версію -1, тож його можна перезаписати.
+    """
+    if data is None:
+        return -1
+    try:
+        return int(json.loads(data)[-1])
+    except (ValueError, TypeError, IndexError, KeyError):
+        return -1
@@ -0,0 +1,209 @@
+"""
+Фабрика репозиторію персонажів.
+
+Обирає реалізацію ICharacterRepository на основі змінних оточення, щоб
+обробники не залежали від конкретного способу зберігання персонажів.
+
+Змінні оточення:
+    CHARACTER_REPOSITORY_BACKEND - сховище персонажів: 'postgres' (реляційні таблиці, за замовчуванням),
+        'document' (один JSONB-документ на персонажа), 'event_sourced' (журнал подій зі знімками стану),
+        'sqlite' (реляційні таблиці у файлі SQLite, DATABASE_URL=sqlite:///...)
+        або 'memory' (у пам'яті процесу, без бази даних).
+    CHARACTER_SNAPSHOT_EVERY - для 'event_sourced': знімок стану кожні N збережень персонажа (50).
+    CHARACTER_WRITE_BEHIND - 'true', щоб увімкнути відкладений запис (за замовчуванням вимкнено).
+    WRITE_BEHIND_FLUSH_INTERVAL_MS - максимальна затримка запису змін, мс (500).
+    WRITE_BEHIND_MAX_PENDING - кількість змінених персонажів, що викликає негайний запис (200).
+    WRITE_BEHIND_MAX_ENTRIES - кількість персонажів, що тримаються в пам'яті (10000).
+    CHARACTER_CACHE_BACKEND - кеш персонажів на читання: 'none' (за замовчуванням), 'memory' або 'redis'.
+    CHARACTER_CACHE_TTL_SECONDS - час життя запису в кеші, с (300).
+    COMBAT_SESSION_STORE - де тримати живий стан бою: 'none' (у базі, за замовчуванням), 'memory' або 'redis'.
+    COMBAT_SESSION_TTL_SECONDS - час життя бойової сесії без активності, с (3600).
+    COMBAT_CHECKPOINT_TURNS - запис стану бою в базу кожні N ходів (5).
+    COMBAT_CHECKPOINT_SECONDS - або не рідше, ніж раз на стільки секунд (30).
+    USER_LOCK_PROVIDER - блокування команд користувача в одиниці роботи: 'memory' (в межах процесу,
+        за замовчуванням), 'postgres' (advisory-блокування, для кількох екземплярів бота) або 'none'.
+    USER_LOCK_TIMEOUT_SECONDS - скільки чекати на блокування користувача, с (2).
+    SHARD_DATABASE_URLS - бази шардів через кому (див. database/sharding.py); підтримують
+        сховища 'postgres' та 'sqlite' без відкладеного запису.
+    REDIS_URL - адреса Redis для бекендів 'redis' (redis://localhost:6379/0).
+"""
+import os
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from domain.repositories.character_repository import ICharacterRepository
+from infrastructure.cache.backends import ICacheBackend, InMemoryCacheBackend, RedisCacheBackend
+from infrastructure.cache.combat_session_store import CombatSessionStore
+from infrastructure.persistence.database.sharding import get_shard_router
+from infrastructure.persistence.repositories.cached_character_repository import CachedCharacterRepository
+from infrastructure.persistence.repositories.combat_session_character_repository import CombatSessionCharacterRepository
+from infrastructure.persistence.repositories.document_character_repository import DocumentCharacterRepository
+from infrastructure.persistence.repositories.event_sourced_character_repository import EventSourcedCharacterRepository
+from infrastructure.persistence.repositories.identity_map_character_repository import IdentityMapCharacterRepository
+from infrastructure.persistence.repositories.in_memory_character_repository import InMemoryCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.repositories.sqlite_character_repository import SqliteCharacterRepository
+from infrastructure.persistence.repositories.write_behind_character_repository import WriteBehindCharacterRepository
+from infrastructure.persistence.user_locks import (
+    IUserLockProvider, InProcessUserLockProvider, PostgresAdvisoryLockProvider
+)
+
+_write_behind_repository: Optional[WriteBehindCharacterRepository] = None
+_memory_repository: Optional[InMemoryCharacterRepository] = None
+_cache_backend: Optional[ICacheBackend] = None
+_combat_session_store: Optional[CombatSessionStore] = None
+_user_lock_provider: Optional[IUserLockProvider] = None
+
+
+def get_repository_backend() -> str:
+    """Назва обраного сховища персонажів (CHARACTER_REPOSITORY_BACKEND)."""
+    return os.getenv('CHARACTER_REPOSITORY_BACKEND', 'postgres').lower()
+
+
+def create_storage_repository(session: Session) -> ICharacterRepository:
+    """Створює репозиторій обраного сховища (CHARACTER_REPOSITORY_BACKEND) без обгорток."""
+    global _memory_repository
+    backend_name = get_repository_backend()
+    if get_shard_router() is not None and backend_name not in ('postgres', 'sqlite'):
+        raise ValueError(f"Сховище '{backend_name}' не підтримує шардування")
+    if backend_name == 'postgres':
+        return PostgresCharacterRepository(session)
+    if backend_name == 'document':
+        return DocumentCharacterRepository(session)
+    if backend_name == 'event_sourced':
+        return EventSourcedCharacterRepository(
+            session, snapshot_every=int(os.getenv('CHARACTER_SNAPSHOT_EVERY', '50'))
+        )
+    if backend_name == 'sqlite':
+        return SqliteCharacterRepository(session)
+    if backend_name == 'memory':
+        # Сховище в пам'яті спільне для всіх команд; сесія йому не потрібна.
+        if _memory_repository is None:
+            _memory_repository = InMemoryCharacterRepository()
+        return _memory_repository
+    raise ValueError(f"Невідоме сховище персонажів: {backend_name}")
+
+
+def is_write_behind_enabled() -> bool:
+    """Перевіряє, чи увімкнено відкладений запис персонажів."""
+    return os.getenv('CHARACTER_WRITE_BEHIND', 'false').lower() == 'true'
+
+
+def get_write_behind_repository() -> WriteBehindCharacterRepository:
+    """Повертає (і за потреби створює та запускає) спільний write-behind репозиторій."""
+    global _write_behind_repository
+    if _write_behind_repository is None:
+        from infrastructure.persistence.database.session import SessionLocal
+
+        _write_behind_repository = WriteBehindCharacterRepository(
+            session_factory=SessionLocal.session_factory,
+            repository_factory=create_storage_repository,
+            flush_interval_ms=int(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL_MS', '500')),
+            max_pending=int(os.getenv('WRITE_BEHIND_MAX_PENDING', '200')),
+            max_entries=int(os.getenv('WRITE_BEHIND_MAX_ENTRIES', '10000')),
+        )
+        _write_behind_repository.start()
+    return _write_behind_repository
+
+
+def get_cache_backend() -> Optional[ICacheBackend]:
+    """Повертає спільний бекенд кешу персонажів або None, якщо кеш вимкнено."""
+    global _cache_backend
+    backend_name = os.getenv('CHARACTER_CACHE_BACKEND', 'none').lower()
+    if backend_name == 'none':
+        return None
+    if _cache_backend is None:
+        if backend_name == 'memory':
+            _cache_backend = InMemoryCacheBackend()
+        elif backend_name == 'redis':
+            _cache_backend = RedisCacheBackend.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        else:
+            raise ValueError(f"Невідомий бекенд кешу персонажів: {backend_name}")
+    return _cache_backend
+
+
+def get_combat_session_store() -> Optional[CombatSessionStore]:
+    """Повертає спільне сховище бойових сесій або None, якщо стан бою зберігається в базі."""
+    global _combat_session_store
+    backend_name = os.getenv('COMBAT_SESSION_STORE', 'none').lower()
+    if backend_name == 'none':
+        return None
+    if _combat_session_store is None:
+        if backend_name == 'memory':
+            backend: ICacheBackend = InMemoryCacheBackend()
+        elif backend_name == 'redis':
+            backend = RedisCacheBackend.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        else:
+            raise ValueError(f"Невідоме сховище бойових сесій: {backend_name}")
+        _combat_session_store = CombatSessionStore(
+            backend,
+            ttl_seconds=int(os.getenv('COMBAT_SESSION_TTL_SECONDS', '3600')),
+        )
+    return _combat_session_store
+
+
+def get_user_lock_provider() -> Optional[IUserLockProvider]:
+    """Повертає спільний провайдер блокувань користувачів або None, якщо блокування вимкнено."""
+    global _user_lock_provider
+    provider_name = os.getenv('USER_LOCK_PROVIDER', 'memory').lower()
+    if provider_name == 'none':
+        return None
+    if _user_lock_provider is None:
+        timeout_seconds = float(os.getenv('USER_LOCK_TIMEOUT_SECONDS', '2'))
+        if provider_name == 'memory':
+            _user_lock_provider = InProcessUserLockProvider(timeout_seconds)
+        elif provider_name == 'postgres':
+            _user_lock_provider = PostgresAdvisoryLockProvider(timeout_seconds)
+        else:
+            raise ValueError(f"Невідомий провайдер блокувань користувачів: {provider_name}")
+    return _user_lock_provider
+
+
+def create_character_repository(session: Session) -> ICharacterRepository:
+    """
+    Створює репозиторій персонажів для обробки одного оновлення.
+
+    Результат обгорнутий картою ідентичності, тож обробник і всі use case,
+    яким він передає цей репозиторій, працюють з одним екземпляром персонажа.
+
+    :param session: Сесія поточного запиту.
+    """
+    repository: ICharacterRepository
+    if is_write_behind_enabled():
+        if get_shard_router() is not None:
+            # Пакет відкладеного запису містить гравців різних шардів, а сесія - один шард.
+            raise ValueError("Відкладений запис не підтримує шардування")
+        repository = get_write_behind_repository()
+    else:
+        repository = create_storage_repository(session)
+
+    combat_session_store = get_combat_session_store()
+    if combat_session_store is not None:
+        repository = CombatSessionCharacterRepository(
+            repository,
+            combat_session_store,
+            checkpoint_every_turns=int(os.getenv('COMBAT_CHECKPOINT_TURNS', '5')),
+            checkpoint_interval_seconds=float(os.getenv('COMBAT_CHECKPOINT_SECONDS', '30')),
+            session=session,
+        )
+
+    cache_backend = get_cache_backend()
+    if cache_backend is not None:
+        repository = CachedCharacterRepository(
+            repository,
+            cache_backend,
+            ttl_seconds=int(os.getenv('CHARACTER_CACHE_TTL_SECONDS', '300')),
+            session=session,
+            # Рядки з репліки можуть відставати від основної бази
+            populate=not session.info.get('replica', False),
+        )
+    return IdentityMapCharacterRepository(repository)
+
+
+def shutdown_character_repositories() -> None:
+    """Записує всі відкладені зміни. Викликається при зупинці бота."""
+    global _write_behind_repository
+    if _write_behind_repository is not None:
+        _write_behind_repository.stop()
+        _write_behind_repository = None
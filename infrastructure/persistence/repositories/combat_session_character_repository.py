@@ -0,0 +1,209 @@
+"""
+Декоратор репозиторію персонажів, що тримає живий стан бою поза базою даних.
+"""
+import logging
+import time
+from dataclasses import replace
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
+from domain.repositories.character_repository import ICharacterRepository
+from infrastructure.cache.combat_session_store import CombatSession, CombatSessionStore, StaleCombatTurnError
+
+logger = logging.getLogger(__name__)
+
+
+class CombatSessionCharacterRepository(ICharacterRepository):
+    """
+    Зберігає поточний стан бою в CombatSessionStore, а в базовий репозиторій
+    записує лише контрольні точки:
+
+    - на початку бою (щоб бій пережив втрату сховища сесій);
+    - кожні checkpoint_every_turns ходів або checkpoint_interval_seconds секунд;
+    - в кінці бою (стан бою видаляється).
+
+    Решта змін персонажа (здоров'я, досвід, здобич) зберігаються як звичайно.
+    При завантаженні стан бою з бази замінюється живим станом із сесії.
+    Якщо сесії немає (перезапуск процесу, минув TTL), бій продовжується
+    з останньої контрольної точки.
+
+    Сесія в сховищі змінюється разом із базою, тож перед першою зміною в
+    транзакції запам'ятовується її попередній стан. Якщо збереження впало
+    або транзакцію сесії session відкочено (конфлікт, повтор команди),
+    сховище повертається до цього стану і не випереджає базу.
+    """
+    def __init__(
+        self,
+        inner: ICharacterRepository,
+        store: CombatSessionStore,
+        checkpoint_every_turns: int = 5,
+        checkpoint_interval_seconds: float = 30.0,
+        session: Optional[Session] = None,
+    ):
+        self.inner = inner
+        self.store = store
+        self.checkpoint_every_turns = checkpoint_every_turns
+        self.checkpoint_interval_seconds = checkpoint_interval_seconds
+        self.session = session
+        # Стан сесій до змін у поточній транзакції (None - сесії не було).
+        self._originals: Dict[str, Optional[CombatSession]] = {}
+        if session is not None:
+            event.listen(session, 'after_commit', self._on_commit)
+            event.listen(session, 'after_rollback', self._on_rollback)
+
+        # --- Метрики ---
+        self.checkpoints = 0
+        self.deferred_turns = 0
+        self.restored_sessions = 0
+        self.stale_turns = 0
+
+    def save(self, character: Character) -> None:
+        try:
+            self._save(character)
+        except Exception:
+            self._restore(character.id)
+            raise
+        if self.session is None:
+            # Без транзакції збереження вже остаточне.
+            self._originals.clear()
+
+    def _save(self, character: Character) -> None:
+        if character.is_new() or 'combat_state' not in character.get_changed_fields():
+            self.inner.save(character)
+            return
+
+        if character.combat_state is None:
+            # Бій завершився: базовий репозиторій видалить контрольну точку.
+            self.inner.save(character)
+            self._remember(character.id)
+            self.store.delete(character.id)
+            return
+
+        turn = character.combat_state.get('turn', 0)
+        session = self.store.get(character.id) if turn > 0 else None
+        if turn > 0:
+            self._originals.setdefault(character.id, session)
+        previous = session if session is not None and self._is_same_combat(session, character.combat_state) else None
+        if previous is not None and previous.turn >= turn:
+            # Хід обчислено із застарілого стану: паралельний хід уже записав новіший.
+            self._reject_stale_turn(character)
+
+        if previous is not None \
+                and not previous.is_checkpoint_due(turn, self.checkpoint_every_turns, self.checkpoint_interval_seconds):
+            if self._advance(character, replace(previous, state=dict(character.combat_state)), previous):
+                # Стан бою вже збережено в сесії - базовий репозиторій його не записує.
+                character.mark_combat_state_persisted()
+                self.deferred_turns += 1
+                self.inner.save(character)
+                return
+
+        # Початок бою (хід 0), настала контрольна точка або сесія недоступна.
+        self.inner.save(character)
+        self._remember(character.id)
+        checkpoint = CombatSession(
+            character_id=character.id,
+            state=dict(character.combat_state),
+            checkpoint_turn=turn,
+            checkpointed_at=time.time(),
+        )
+        if previous is None:
+            self.store.set(checkpoint)
+        else:
+            self._advance(character, checkpoint, previous)
+        self.checkpoints += 1
+
+    def get(self, character_id: str) -> Optional[Character]:
+        return self._attach_session(self.inner.get(character_id))
+
+    def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
+        return self._attach_session(self.inner.get_by_telegram_user_id(telegram_user_id))
+
+    def get_for_combat(self, telegram_user_id: int) -> Optional[Character]:
+        return self._attach_session(self.inner.get_for_combat(telegram_user_id))
+
+    def get_for_inventory(self, telegram_user_id: int) -> Optional[Character]:
+        # Стан бою не завантажується, тож сесія не потрібна.
+        return self.inner.get_for_inventory(telegram_user_id)
+
+    def get_summary(self, telegram_user_id: int) -> Optional[Character]:
+        return self.inner.get_summary(telegram_user_id)
+
+    def delete(self, character_id: str) -> None:
+        self.inner.delete(character_id)
+        self._remember(character_id)
+        self.store.delete(character_id)
+
+    def save_stats_cache(self, character_id: str, stats: Dict[str, Any], equipment_items: List[str]) -> None:
+        self.inner.save_stats_cache(character_id, stats, equipment_items)
+
+    def get_stats_cache(self, character_id: str, equipment_items: List[str]) -> Optional[Dict[str, Any]]:
+        return self.inner.get_stats_cache(character_id, equipment_items)
+
+    def _attach_session(self, character: Optional[Character]) -> Optional[Character]:
+        """
+        Замінює стан бою з контрольної точки живим станом із сесії.
+        Сесія застосовується лише до того самого бою і лише якщо вона не старша за точку.
+        """
+        if character is None or character.combat_state is None:
+            return character
+
+        session = self.store.get(character.id)
+        if session is None or not self._is_same_combat(session, character.combat_state):
+            return character
+        if session.turn < character.combat_state.get('turn', 0):
+            logger.warning(f"Бойова сесія {character.id} старша за контрольну точку, використовується база")
+            return character
+
+        character.combat_state = {**character.combat_state, **session.state}
+        character.mark_combat_state_persisted()
+        return character
+
+    def _advance(self, character: Character, session: CombatSession, previous: CombatSession) -> bool:
+        """Записує хід у сесію лише поверх previous (див. CombatSessionStore.advance)."""
+        try:
+            return self.store.advance(session, previous)
+        except StaleCombatTurnError:
+            self._reject_stale_turn(character)
+
+    def _reject_stale_turn(self, character: Character) -> None:
+        """
+        Відхиляє хід, обчислений із застарілого стану бою. Сесію цей хід не змінив,
+        тож відновлювати її не треба; команда повториться з новим станом.
+        """
+        self._originals.pop(character.id, None)
+        self.stale_turns += 1
+        raise ConcurrencyConflictError(character.id, character.version)
+
+    def _remember(self, character_id: str) -> None:
+        """Запам'ятовує сесію персонажа до першої зміни в поточній транзакції."""
+        if character_id not in self._originals:
+            self._originals[character_id] = self.store.get(character_id)
+
+    def _restore(self, character_id: str) -> None:
+        """Повертає сесію персонажа до стану на початку транзакції."""
+        if character_id not in self._originals:
+            return
+        original = self._originals.pop(character_id)
+        if original is None:
+            self.store.delete(character_id)
+        else:
+            self.store.set(original)
+        self.restored_sessions += 1
+
+    def _on_commit(self, session: Session) -> None:
+        self._originals.clear()
+
+    def _on_rollback(self, session: Session) -> None:
+        for character_id in list(self._originals):
+            self._restore(character_id)
+
+    @staticmethod
+    def _is_same_combat(session: CombatSession, combat_state: Dict[str, Any]) -> bool:
+        return (
+            session.state.get('enemy_id') == combat_state.get('enemy_id')
+            and session.state.get('enemy_max_health') == combat_state.get('enemy_max_health')
+        )
@@ -0,0 +1,136 @@
+"""
+Документна реалізація репозиторію персонажів.
+
+Весь агрегат персонажа (характеристики, екіпіровка, інвентар, стан бою)
+зберігається одним JSONB-документом у таблиці character_documents.
+Завантаження - це один SELECT одного рядка, збереження - один upsert,
+незалежно від розміру інвентаря.
+"""
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any
+from uuid import UUID
+
+from sqlalchemy import Select, bindparam, select, delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
+from domain.repositories.character_repository import ICharacterRepository
+from infrastructure.persistence.character_serializer import (
+    DOCUMENT_SCHEMA_VERSION, character_to_document, character_from_document
+)
+from infrastructure.persistence.database.models import CharacterDocumentModel
+from infrastructure.persistence.repositories.postgres_character_repository import calculate_equipment_hash
+
+# Гарячі запити будуються один раз; значення передаються через bindparam.
+_SELECT_DOCUMENT = select(
+    CharacterDocumentModel.schema_version, CharacterDocumentModel.version, CharacterDocumentModel.document
+)
+SELECT_DOCUMENT_BY_ID = _SELECT_DOCUMENT.where(CharacterDocumentModel.id == bindparam('character_id'))
+SELECT_DOCUMENT_BY_TELEGRAM_ID = _SELECT_DOCUMENT.where(
+    CharacterDocumentModel.telegram_user_id == bindparam('telegram_user_id')
+)
+
+
+class DocumentCharacterRepository(ICharacterRepository):
+    """
+    Репозиторій, що зберігає персонажа як один документ.
+
+    На відміну від PostgresCharacterRepository, зміна будь-якого поля
+    переписує документ повністю, тож вартість запису залежить від розміру
+    агрегату, а не від кількості змінених полів.
+    """
+    def __init__(self, session: Session):
+        self.session = session
+
+    def save(self, character: Character) -> None:
+        """
+        Записує документ персонажа одним запитом (якщо є зміни).
+        Існуючий документ оновлюється лише за версії, з якою його завантажили.
+        """
+        if character.is_new():
+            self.import_character(character)
+            return
+        if not character.get_changed_fields():
+            return
+
+        result = self.session.execute(
+            update(CharacterDocumentModel)
+            .where(
+                CharacterDocumentModel.id == UUID(character.id),
+                CharacterDocumentModel.version == character.version
+            )
+            .values(version=CharacterDocumentModel.version + 1, **self._document_values(character))
+        )
+        if result.rowcount != 1:
+            raise ConcurrencyConflictError(character.id, character.version)
+        character.version += 1
+        character.mark_persisted()
+
+    def import_character(self, character: Character) -> None:
+        """
+        Безумовно записує документ персонажа (без перевірки версії).
+        Використовується для нових персонажів та конвертером з реляційного сховища.
+        """
+        now = datetime.now(timezone.utc)
+        values = self._document_values(character)
+        stmt = insert(CharacterDocumentModel).values(
+            id=UUID(character.id), version=1, created_at=now, **values
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CharacterDocumentModel.id],
+            set_={**values, 'version': CharacterDocumentModel.version + 1}
+        ).returning(CharacterDocumentModel.version)
+        character.version = self.session.execute(stmt).scalar_one()
+        character.mark_persisted()
+
+    def get(self, character_id: str) -> Optional[Character]:
+        """Отримання персонажа за ID."""
+        return self._load(SELECT_DOCUMENT_BY_ID, {'character_id': UUID(character_id)})
+
+    def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
+        """Отримання персонажа за Telegram ID."""
+        return self._load(SELECT_DOCUMENT_BY_TELEGRAM_ID, {'telegram_user_id': telegram_user_id})
+
+    def delete(self, character_id: str) -> None:
+        """Видаляє персонажа."""
+        self.session.execute(
+            delete(CharacterDocumentModel).where(CharacterDocumentModel.id == UUID(character_id))
+        )
+
+    def save_stats_cache(self, character_id: str, stats: Dict[str, Any], equipment_items: List[str]) -> None:
+        """Зберігає кеш характеристик разом з хешем екіпіровки в тому ж рядку."""
+        self.session.execute(
+            update(CharacterDocumentModel)
+            .where(CharacterDocumentModel.id == UUID(character_id))
+            .values(stats_cache={
+                'equipment_hash': calculate_equipment_hash(equipment_items),
+                'stats': stats,
+            })
+        )
+
+    def get_stats_cache(self, character_id: str, equipment_items: List[str]) -> Optional[Dict[str, Any]]:
+        """Отримання кешу характеристик, якщо екіпіровка не змінилась."""
+        cache = self.session.execute(
+            select(CharacterDocumentModel.stats_cache)
+            .where(CharacterDocumentModel.id == UUID(character_id))
+        ).scalar_one_or_none()
+
+        if cache is None or cache['equipment_hash'] != calculate_equipment_hash(equipment_items):
+            return None
+        return cache['stats']
+
+    def _document_values(self, character: Character) -> Dict[str, Any]:
+        return {
+            'telegram_user_id': character.telegram_user_id,
+            'schema_version': DOCUMENT_SCHEMA_VERSION,
+            'document': character_to_document(character),
+            'updated_at': datetime.now(timezone.utc),
+        }
+
+    def _load(self, statement: Select, params: Dict[str, Any]) -> Optional[Character]:
+        row = self.session.execute(statement, params).first()
+        if row is None:
+            return None
+        return character_from_document(row.document, row.schema_version, row.version)
@@ -0,0 +1,230 @@
+"""
+Реалізація репозиторію персонажів на журналі подій.
+
+Кожне збереження дописує в журнал character_events один рядок з подіями,
+які описують зміни персонажа (отримано досвід, здобич, смерть, хід бою...).
+Журнал лише доповнюється, тож повна історія персонажа доступна для
+служби підтримки та аналітики.
+
+Щоб не переглядати всю історію при кожному завантаженні, раз на
+snapshot_every версій зберігається знімок стану (character_snapshots).
+Поточний стан = останній знімок + короткий хвіст подій після нього.
+"""
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any
+from uuid import UUID
+
+from sqlalchemy import Select, bindparam, select, delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
+from domain.repositories.character_repository import ICharacterRepository
+from infrastructure.persistence.character_events import DELETED, PROFILE_CHANGED, apply_events, character_events
+from infrastructure.persistence.character_serializer import character_to_document, character_from_document
+from infrastructure.persistence.database.models import CharacterEventModel, CharacterSnapshotModel
+from infrastructure.persistence.repositories.postgres_character_repository import calculate_equipment_hash
+
+# Гарячі запити будуються один раз; значення передаються через bindparam.
+_SELECT_SNAPSHOT = select(CharacterSnapshotModel.version, CharacterSnapshotModel.document)
+SELECT_SNAPSHOT_BY_ID = _SELECT_SNAPSHOT.where(CharacterSnapshotModel.character_id == bindparam('character_id'))
+SELECT_SNAPSHOT_BY_TELEGRAM_ID = _SELECT_SNAPSHOT.where(
+    CharacterSnapshotModel.telegram_user_id == bindparam('telegram_user_id')
+)
+SELECT_EVENTS_TAIL = (
+    select(CharacterEventModel.version, CharacterEventModel.events)
+    .where(
+        CharacterEventModel.character_id == bindparam('character_id'),
+        CharacterEventModel.version > bindparam('after_version'),
+    )
+    .order_by(CharacterEventModel.version)
+)
+
+
+class EventSourcedCharacterRepository(ICharacterRepository):
+    """
+    Репозиторій, що зберігає персонажа як журнал подій зі знімками.
+
+    Версія персонажа - номер останнього рядка журналу. Збереження зі
+    застарілої версії отримує конфлікт первинного ключа (персонаж, версія)
+    і завершується ConcurrencyConflictError, як і в інших сховищах.
+
+    :param session: Сесія поточного запиту.
+    :param snapshot_every: Знімок стану записується, коли версія кратна цьому числу.
+    """
+    def __init__(self, session: Session, snapshot_every: int = 50):
+        if snapshot_every < 1:
+            raise ValueError("snapshot_every має бути додатним")
+        self.session = session
+        self.snapshot_every = snapshot_every
+
+    def save(self, character: Character) -> None:
+        """
+        Дописує події змін персонажа в журнал (якщо є зміни)
+        і за потреби оновлює знімок стану.
+        """
+        events = character_events(character)
+        if not events:
+            return
+
+        new_version = 1 if character.is_new() else character.version + 1
+        self._append(UUID(character.id), new_version, events)
+
+        character.version = new_version
+        character.mark_persisted()
+        # Знімок містить telegram_user_id для пошуку, тож зміна профілю теж його оновлює.
+        if (new_version == 1 or new_version % self.snapshot_every == 0
+                or any(event['type'] == PROFILE_CHANGED for event in events)):
+            self._write_snapshot(character)
+
+    def get(self, character_id: str) -> Optional[Character]:
+        """Отримання персонажа за ID."""
+        return self._load(SELECT_SNAPSHOT_BY_ID, {'character_id': UUID(character_id)})
+
+    def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
+        """Отримання персонажа за Telegram ID."""
+        return self._load(SELECT_SNAPSHOT_BY_TELEGRAM_ID, {'telegram_user_id': telegram_user_id})
+
+    def delete(self, character_id: str) -> None:
+        """
+        Видаляє персонажа: дописує подію 'deleted' і прибирає знімок.
+        Історія персонажа лишається в журналі.
+        """
+        character_uuid = UUID(character_id)
+        last_version = self.session.execute(
+            select(CharacterSnapshotModel.version).where(CharacterSnapshotModel.character_id == character_uuid)
+        ).scalar_one_or_none()
+        if last_version is None:
+            return
+
+        tail = self.session.execute(
+            SELECT_EVENTS_TAIL, {'character_id': character_uuid, 'after_version': last_version}
+        ).all()
+        if tail:
+            last_version = tail[-1].version
+        self._append(character_uuid, last_version + 1, [{'type': DELETED}])
+        self.session.execute(
+            delete(CharacterSnapshotModel).where(CharacterSnapshotModel.character_id == character_uuid)
+        )
+
+    def save_stats_cache(self, character_id: str, stats: Dict[str, Any], equipment_items: List[str]) -> None:
+        """Зберігає кеш характеристик разом з хешем екіпіровки в рядку знімка."""
+        self.session.execute(
+            update(CharacterSnapshotModel)
+            .where(CharacterSnapshotModel.character_id == UUID(character_id))
+            .values(stats_cache={
+                'equipment_hash': calculate_equipment_hash(equipment_items),
+                'stats': stats,
+            })
+        )
+
+    def get_stats_cache(self, character_id: str, equipment_items: List[str]) -> Optional[Dict[str, Any]]:
+        """Отримання кешу характеристик, якщо екіпіровка не змінилась."""
+        cache = self.session.execute(
+            select(CharacterSnapshotModel.stats_cache)
+            .where(CharacterSnapshotModel.character_id == UUID(character_id))
+        ).scalar_one_or_none()
+
+        if cache is None or cache['equipment_hash'] != calculate_equipment_hash(equipment_items):
+            return None
+        return cache['stats']
+
+    # --- Історія персонажа ---
+
+    def history(self, character_id: str, event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Повертає події персонажа в порядку збереження.
+        Кожна подія доповнена версією та часом запису.
+
+        :param event_type: Повернути лише події цього типу (наприклад, 'died').
+        """
+        query = (
+            select(CharacterEventModel)
+            .where(CharacterEventModel.character_id == UUID(character_id))
+            .order_by(CharacterEventModel.version)
+        )
+        if event_type is not None:
+            query = query.where(CharacterEventModel.event_types.contains(event_type))
+
+        history = []
+        for row in self.session.scalars(query):
+            for event in row.events:
+                if event_type is None or event['type'] == event_type:
+                    history.append({**event, 'version': row.version, 'created_at': row.created_at})
+        return history
+
+    def rebuild(self, character_id: str, up_to_version: Optional[int] = None) -> Optional[Character]:
+        """
+        Відновлює стан персонажа з журналу без знімка.
+        Дозволяє подивитися, яким персонаж був на певній версії,
+        і перевірити, що знімок відповідає журналу.
+        """
+        query = (
+            select(CharacterEventModel.version, CharacterEventModel.events)
+            .where(CharacterEventModel.character_id == UUID(character_id))
+            .order_by(CharacterEventModel.version)
+        )
+        if up_to_version is not None:
+            query = query.where(CharacterEventModel.version <= up_to_version)
+
+        document: Dict[str, Any] = {}
+        version = 0
+        for row in self.session.execute(query):
+            if any(event['type'] == DELETED for event in row.events):
+                return None
+            apply_events(document, row.events)
+            version = row.version
+        if not document:
+            return None
+        return character_from_document(document, version=version)
+
+    # --- Внутрішні методи ---
+
+    def _append(self, character_id: UUID, version: int, events: List[Dict[str, Any]]) -> None:
+        """Дописує рядок журналу; зайнята версія означає, що персонажа вже змінили."""
+        result = self.session.execute(
+            insert(CharacterEventModel)
+            .values(
+                character_id=character_id,
+                version=version,
+                event_types=','.join(sorted({event['type'] for event in events})),
+                events=events,
+                created_at=datetime.now(timezone.utc),
+            )
+            .on_conflict_do_nothing(index_elements=[CharacterEventModel.character_id, CharacterEventModel.version])
+        )
+        if result.rowcount != 1:
+            raise ConcurrencyConflictError(str(character_id), version - 1)
+
+    def _write_snapshot(self, character: Character) -> None:
+        values = {
+            'telegram_user_id': character.telegram_user_id,
+            'version': character.version,
+            'document': character_to_document(character),
+            'created_at': datetime.now(timezone.utc),
+        }
+        stmt = insert(CharacterSnapshotModel).values(character_id=UUID(character.id), **values)
+        # Кеш характеристик у рядку знімка не чіпаємо: він залежить лише від екіпіровки.
+        self.session.execute(stmt.on_conflict_do_update(
+            index_elements=[CharacterSnapshotModel.character_id],
+            set_=values,
+            where=CharacterSnapshotModel.version < character.version,
+        ))
+
+    def _load(self, statement: Select, params: Dict[str, Any]) -> Optional[Character]:
+        snapshot = self.session.execute(statement, params).first()
+        if snapshot is None:
+            return None
+
+        document = snapshot.document
+        version = snapshot.version
+        tail = self.session.execute(
+            SELECT_EVENTS_TAIL, {'character_id': UUID(document['id']), 'after_version': version}
+        ).all()
+        for row in tail:
+            if any(event['type'] == DELETED for event in row.events):
+                return None
+            apply_events(document, row.events)
+            version = row.version
+        return character_from_document(document, version=version)
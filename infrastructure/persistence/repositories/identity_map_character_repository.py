@@ -0,0 +1,89 @@
+"""
+Репозиторій персонажів з картою ідентичності (Identity Map) на час обробки одного оновлення.
+"""
+from typing import Callable, Optional, List, Dict, Any, Set
+
+from domain.entities.character import Character
+from domain.repositories.character_repository import ICharacterRepository
+
+
+class IdentityMapCharacterRepository(ICharacterRepository):
+    """
+    Гарантує, що в межах однієї команди кожен персонаж завантажується лише один раз.
+
+    Обробник та всі use case, які він викликає, отримують той самий екземпляр
+    персонажа, тож зміни, зроблені use case, одразу видно обробнику.
+    Екземпляр створюється на одне оновлення Telegram і не повинен жити довше.
+    """
+    def __init__(self, inner: ICharacterRepository):
+        self.inner = inner
+        self._by_id: Dict[str, Character] = {}
+        self._by_telegram_id: Dict[int, str] = {}
+        # Telegram ID, для яких вже відомо, що персонажа немає.
+        self._missing_telegram_ids: Set[int] = set()
+
+    def save(self, character: Character) -> None:
+        self.inner.save(character)
+        self._remember(character)
+
+    def get(self, character_id: str) -> Optional[Character]:
+        if character_id in self._by_id:
+            return self._by_id[character_id]
+
+        character = self.inner.get(character_id)
+        if character is not None:
+            self._remember(character)
+        return character
+
+    def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
+        return self._get_by_telegram(telegram_user_id, self.inner.get_by_telegram_user_id)
+
+    def get_for_combat(self, telegram_user_id: int) -> Optional[Character]:
+        return self._get_by_telegram(telegram_user_id, self.inner.get_for_combat)
+
+    def get_for_inventory(self, telegram_user_id: int) -> Optional[Character]:
+        return self._get_by_telegram(telegram_user_id, self.inner.get_for_inventory)
+
+    def get_summary(self, telegram_user_id: int) -> Optional[Character]:
+        return self._get_by_telegram(telegram_user_id, self.inner.get_summary)
+
+    def delete(self, character_id: str) -> None:
+        self.inner.delete(character_id)
+        character = self._by_id.pop(character_id, None)
+        if character is not None:
+            self._by_telegram_id.pop(character.telegram_user_id, None)
+
+    def save_stats_cache(self, character_id: str, stats: Dict[str, Any], equipment_items: List[str]) -> None:
+        self.inner.save_stats_cache(character_id, stats, equipment_items)
+
+    def get_stats_cache(self, character_id: str, equipment_items: List[str]) -> Optional[Dict[str, Any]]:
+        return self.inner.get_stats_cache(character_id, equipment_items)
+
+    def _get_by_telegram(
+        self,
+        telegram_user_id: int,
+        loader: Callable[[int], Optional[Character]]
+    ) -> Optional[Character]:
+        """
+        Повертає вже завантаженого персонажа або завантажує його вказаним способом.
+
+        Команда використовує один спосіб завантаження, тому наступні звернення
+        в межах оновлення отримують той самий (можливо, частковий) екземпляр.
+        """
+        character_id = self._by_telegram_id.get(telegram_user_id)
+        if character_id is not None:
+            return self._by_id[character_id]
+        if telegram_user_id in self._missing_telegram_ids:
+            return None
+
+        character = loader(telegram_user_id)
+        if character is None:
+            self._missing_telegram_ids.add(telegram_user_id)
+        else:
+            self._remember(character)
+        return character
+
+    def _remember(self, character: Character) -> None:
+        self._by_id[character.id] = character
+        self._by_telegram_id[character.telegram_user_id] = character.id
+        self._missing_telegram_ids.discard(character.telegram_user_id)
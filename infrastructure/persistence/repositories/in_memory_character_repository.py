@@ -0,0 +1,100 @@
+"""
+Реалізація репозиторію персонажів у пам'яті процесу.
+
+Не потребує бази даних: підходить для тестів, локальної розробки та
+розгортань з одним екземпляром бота, де втрата персонажів при перезапуску
+прийнятна. Поведінка (версії, конфлікти, кеш характеристик) відповідає
+PostgresCharacterRepository і перевіряється тим самим контрактним набором тестів.
+"""
+import copy
+import threading
+from typing import Optional, List, Dict, Any
+
+from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
+from domain.repositories.character_repository import ICharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import calculate_equipment_hash
+
+
+class InMemoryCharacterRepository(ICharacterRepository):
+    """
+    Репозиторій, що зберігає копії персонажів у словнику.
+
+    Збереження та завантаження працюють з глибокими копіями, тож зміни
+    персонажа не потрапляють у сховище без виклику save(). Один екземпляр
+    спільний для всіх команд процесу і захищений блокуванням.
+    """
+    def __init__(self) -> None:
+        self._characters: Dict[str, Character] = {}
+        self._by_telegram_id: Dict[int, str] = {}
+        self._stats_cache: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, character: Character) -> None:
+        """
+        Зберігає копію персонажа (якщо є зміни).
+        Існуючий персонаж оновлюється лише за версії, з якою його завантажили.
+        """
+        if not character.is_new() and not character.get_changed_fields():
+            return
+
+        with self._lock:
+            stored = self._characters.get(character.id)
+            if character.is_new():
+                if character.telegram_user_id in self._by_telegram_id:
+                    raise ValueError(f"Персонаж для користувача {character.telegram_user_id} вже існує")
+                new_version = 1
+            elif stored is None or stored.version != character.version:
+                raise ConcurrencyConflictError(character.id, character.version)
+            else:
+                new_version = character.version + 1
+                if stored.telegram_user_id != character.telegram_user_id:
+                    del self._by_telegram_id[stored.telegram_user_id]
+
+            character.version = new_version
+            character.mark_persisted()
+            self._characters[character.id] = copy.deepcopy(character)
+            self._by_telegram_id[character.telegram_user_id] = character.id
+
+    def get(self, character_id: str) -> Optional[Character]:
+        """Отримання персонажа за ID."""
+        with self._lock:
+            stored = self._characters.get(character_id)
+            return self._copy(stored)
+
+    def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
+        """Отримання персонажа за Telegram ID."""
+        with self._lock:
+            character_id = self._by_telegram_id.get(telegram_user_id)
+            return self._copy(self._characters.get(character_id)) if character_id else None
+
+    def delete(self, character_id: str) -> None:
+        """Видаляє персонажа разом з кешем характеристик."""
+        with self._lock:
+            stored = self._characters.pop(character_id, None)
+            if stored is not None:
+                self._by_telegram_id.pop(stored.telegram_user_id, None)
+            self._stats_cache.pop(character_id, None)
+
+    def save_stats_cache(self, character_id: str, stats: Dict[str, Any], equipment_items: List[str]) -> None:
+        """Зберігає кеш характеристик разом з хешем екіпіровки."""
+        with self._lock:
+            self._stats_cache[character_id] = {
+                'equipment_hash': calculate_equipment_hash(equipment_items),
+                'stats': dict(stats),
+            }
+
+    def get_stats_cache(self, character_id: str, equipment_items: List[str]) -> Optional[Dict[str, Any]]:
+        """Отримання кешу характеристик, якщо екіпіровка не змінилась."""
+        with self._lock:
+            cache = self._stats_cache.get(character_id)
+        if cache is None or cache['equipment_hash'] != calculate_equipment_hash(equipment_items):
+            return None
+        return dict(cache['stats'])
+
+    def _copy(self, stored: Optional[Character]) -> Optional[Character]:
+        if stored is None:
+            return None
+        character = copy.deepcopy(stored)
+        character.mark_persisted()
+        return character
@@ -1,6 +1,7 @@
 """
 Реалізація репозиторію для завантаження ворогів з JSON-файлів.
 """
+import copy
 import json
 import os
 from typing import Optional, List, Dict
@@ -111,8 +112,13 @@ class JsonEnemyRepository(IEnemyRepository):
                 return None
 
     def get_by_id(self, enemy_id: str) -> Optional[Enemy]:
-        """Публічний метод, що викликає кешовану реалізацію."""
-        return self._get_by_id_cached(enemy_id)
+        """
+        Публічний метод, що викликає кешовану реалізацію.
+        Повертає копію: сценарії бою змінюють current_health ворога,
+        а репозиторій спільний для всіх оновлень.
+        """
+        enemy = self._get_by_id_cached(enemy_id)
+        return copy.copy(enemy) if enemy is not None else None
 
     def get_by_location(self, location_id: str) -> List[Enemy]:
         """
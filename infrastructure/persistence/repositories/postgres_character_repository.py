@@ -1,96 +1,208 @@
 """
 Виправлена реалізація репозиторію персонажів з правильною обробкою combat_state.
 """
-from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session, joinedload
-from uuid import UUID
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Set
+from collections import Counter
+from sqlalchemy import ColumnElement, Select, bindparam, select, update, delete
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, joinedload, selectinload, load_only
+from uuid import UUID, uuid4
 from datetime import datetime, timezone
 from decimal import Decimal
 import hashlib
 
-from domain.entities.character import Character
+from domain.entities.character import Character, TRACKED_FIELDS
+from domain.exceptions import ConcurrencyConflictError
 from domain.repositories.character_repository import ICharacterRepository
 from infrastructure.persistence.database.models import (
     CharacterModel, EquipmentModel, InventoryModel, StatsCacheModel, CombatStateModel
 )
+from infrastructure.persistence.database.sharding import reroute_after_miss, route_session
 from domain.value_objects.stats import BaseStats
 
+# Слоти екіпіровки, для яких є стовпці в таблиці character_equipment.
+EQUIPMENT_SLOTS = ('weapon', 'armor', 'helmet', 'boots', 'gloves', 'ring_1', 'ring_2', 'amulet')
+
+# Стовпці characters, потрібні для побудови доменної сутності (без службових часових міток).
+DOMAIN_COLUMNS = (
+    CharacterModel.id, CharacterModel.telegram_user_id, CharacterModel.name,
+    CharacterModel.level, CharacterModel.experience,
+    CharacterModel.strength, CharacterModel.dexterity, CharacterModel.intelligence,
+    CharacterModel.base_health, CharacterModel.base_mana,
+    CharacterModel.current_health, CharacterModel.current_mana, CharacterModel.location_id,
+    CharacterModel.version,
+)
+
+
+
+def _character_select(*options: Any) -> Select:
+    """
+    Запит персонажа лише з доменними стовпцями та вказаними стратегіями завантаження.
+    Зв'язки, для яких не вказано стратегію, не завантажуються.
+    """
+    return select(CharacterModel).options(
+        load_only(*DOMAIN_COLUMNS), *options
+    ).execution_options(populate_existing=True)
+
+
+# --- Гарячі запити ---
+# Будуються один раз при імпорті модуля, а значення передаються через bindparam,
+# тож на кожне оновлення не створюється новий об'єкт запиту, а скомпільований
+# SQL береться з кешу компіляції рушія.
+
+_BY_ID = CharacterModel.id == bindparam('character_id')
+_BY_TELEGRAM_ID = CharacterModel.telegram_user_id == bindparam('telegram_user_id')
+
+# Повний агрегат: зв'язки один-до-одного - тим самим запитом, інвентар - окремим,
+# щоб кількість рядків не множилась на його розмір.
+_FULL_OPTIONS = (
+    joinedload(CharacterModel.equipment),
+    joinedload(CharacterModel.combat_state),
+    selectinload(CharacterModel.inventory),
+)
+SELECT_FULL_BY_ID = _character_select(*_FULL_OPTIONS).where(_BY_ID)
+SELECT_FULL_BY_TELEGRAM_ID = _character_select(*_FULL_OPTIONS).where(_BY_TELEGRAM_ID)
+SELECT_FOR_COMBAT = _character_select(
+    joinedload(CharacterModel.equipment),
+    joinedload(CharacterModel.combat_state),
+).where(_BY_TELEGRAM_ID)
+SELECT_FOR_INVENTORY = _character_select(
+    joinedload(CharacterModel.equipment),
+    selectinload(CharacterModel.inventory),
+).where(_BY_TELEGRAM_ID)
+SELECT_SUMMARY = _character_select(
+    joinedload(CharacterModel.equipment),
+).where(_BY_TELEGRAM_ID)
+
+
+def calculate_equipment_hash(equipment_items: List[str]) -> str:
+    """Розрахунок хешу екіпіровки, незалежного від порядку предметів."""
+    equipment_str = ','.join(sorted(equipment_items))
+    return hashlib.sha256(equipment_str.encode()).hexdigest()
+
 
 class PostgresCharacterRepository(ICharacterRepository):
     """
     Репозиторій для персонажів з правильною обробкою всіх зв'язків.
+
+    Працює і з шардованою сесією (ShardAwareSession): кожен метод спершу
+    прив'язує сесію до шарду гравця, для звичайної сесії це нічого не коштує.
     """
+    # INSERT ... ON CONFLICT діалекту бази; SQLite-реалізація підставляє свій.
+    insert = staticmethod(postgresql.insert)
+
     def __init__(self, session: Session):
         self.session = session
 
     def save(self, character: Character) -> None:
-        """Зберігає або оновлює повний стан персонажа в базі даних."""
-        # 1. Основна модель персонажа
-        db_character = self.session.query(CharacterModel).filter_by(
-            id=UUID(character.id)
-        ).first()
+        """
+        Зберігає персонажа, виконуючи лише мінімально необхідні запити.
+
+        Новий персонаж вставляється повністю. Для завантаженого персонажа
+        оновлюються лише ті поля та колекції, що змінилися з моменту завантаження.
+        Якщо змін немає, жодного запиту не виконується.
+
+        Будь-яка зміна збільшує версію персонажа. Рядок оновлюється лише за
+        версії, з якою персонажа завантажили, інакше виникає ConcurrencyConflictError
+        і пов'язані таблиці не змінюються.
+        """
+        route_session(self.session, telegram_user_id=character.telegram_user_id)
+        if character.is_new():
+            self._insert_character(character)
+        else:
+            changed = character.get_changed_fields()
+            if not changed:
+                return
 
-        if db_character is None:
-            db_character = CharacterModel(id=UUID(character.id))
-            self.session.add(db_character)
-
-        # 2. Оновлення полів
-        db_character.telegram_user_id = character.telegram_user_id
-        db_character.name = character.name
-        db_character.level = character.level
-        db_character.experience = character.experience
-        db_character.strength = character.base_stats.strength
-        db_character.dexterity = character.base_stats.dexterity
-        db_character.intelligence = character.base_stats.intelligence
-        db_character.base_health = character.base_stats.base_health
-        db_character.base_mana = character.base_stats.base_mana
-        db_character.current_health = character.current_health
-        db_character.current_mana = character.current_mana
-        db_character.location_id = character.location_id
-        db_character.updated_at = datetime.now(timezone.utc)
-        db_character.last_activity_at = datetime.now(timezone.utc)
-
-        # 3. Збереження пов'язаних даних
-        self._save_equipment(character, db_character)
-        self._save_inventory(character)
-        self._save_combat_state(character, db_character)
+            self._update_character(character, changed.intersection(TRACKED_FIELDS))
+            if 'equipped_items' in changed:
+                self._save_equipment(character)
+            if 'inventory' in changed:
+                self._save_inventory(character)
+            if 'combat_state' in changed:
+                self._save_combat_state(character)
+
+        character.mark_persisted()
 
     def get(self, character_id: str) -> Optional[Character]:
         """Завантажує персонажа за ID."""
-        db_character = self.session.query(CharacterModel).options(
-            joinedload(CharacterModel.equipment),
-            joinedload(CharacterModel.inventory),
-            joinedload(CharacterModel.stats_cache),
-            joinedload(CharacterModel.combat_state)
-        ).filter_by(id=UUID(character_id)).first()
-
-        if db_character is None:
-            return None
-
-        return self._to_domain(db_character)
+        route_session(self.session, character_id=character_id)
+        return self._load(SELECT_FULL_BY_ID, {'character_id': UUID(character_id)})
 
     def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
         """Отримання персонажа за Telegram ID."""
-        db_character = self.session.query(CharacterModel).options(
-            joinedload(CharacterModel.equipment),
-            joinedload(CharacterModel.inventory),
-            joinedload(CharacterModel.stats_cache),
-            joinedload(CharacterModel.combat_state)
-        ).filter_by(telegram_user_id=telegram_user_id).first()
+        route_session(self.session, telegram_user_id=telegram_user_id)
+        return self._load(SELECT_FULL_BY_TELEGRAM_ID, {'telegram_user_id': telegram_user_id})
+
+    def get_for_combat(self, telegram_user_id: int) -> Optional[Character]:
+        """Основні поля, екіпіровка та стан бою одним запитом (зв'язки один-до-одного)."""
+        route_session(self.session, telegram_user_id=telegram_user_id)
+        return self._load(
+            SELECT_FOR_COMBAT, {'telegram_user_id': telegram_user_id},
+            with_inventory=False
+        )
 
-        if db_character is None:
-            return None
+    def get_for_inventory(self, telegram_user_id: int) -> Optional[Character]:
+        """Основні поля та екіпіровка одним запитом, інвентар - окремим."""
+        route_session(self.session, telegram_user_id=telegram_user_id)
+        return self._load(
+            SELECT_FOR_INVENTORY, {'telegram_user_id': telegram_user_id},
+            with_combat_state=False
+        )
 
-        return self._to_domain(db_character)
+    def get_summary(self, telegram_user_id: int) -> Optional[Character]:
+        """Основні поля та екіпіровка одним запитом."""
+        route_session(self.session, telegram_user_id=telegram_user_id)
+        return self._load(
+            SELECT_SUMMARY, {'telegram_user_id': telegram_user_id},
+            with_inventory=False, with_combat_state=False
+        )
+
+    def iter_characters(
+        self,
+        batch_size: int = 500,
+        after_id: Optional[str] = None,
+        where: Optional[ColumnElement[bool]] = None,
+    ) -> Iterator[Character]:
+        """
+        Послідовно повертає всіх персонажів, завантажуючи їх пакетами.
+
+        Використовує пагінацію за ключем (id > останній id пакета) та selectinload,
+        тож кожен пакет - це фіксована кількість запитів без декартового добутку.
+        Призначено для службових інструментів (конвертація, перенесення даних).
+
+        :param batch_size: Кількість персонажів в одному пакеті.
+        :param after_id: Продовжити після персонажа з цим ID.
+        :param where: Додаткова умова відбору (наприклад, кошики шарду).
+        """
+        last_id = UUID(after_id) if after_id else None
+        while True:
+            query = self.session.query(CharacterModel).options(
+                selectinload(CharacterModel.equipment),
+                selectinload(CharacterModel.inventory),
+                selectinload(CharacterModel.combat_state)
+            ).order_by(CharacterModel.id)
+            if where is not None:
+                query = query.filter(where)
+            if last_id is not None:
+                query = query.filter(CharacterModel.id > last_id)
+            batch = query.limit(batch_size).all()
+            if not batch:
+                return
+            for db_character in batch:
+                yield self._to_domain(db_character)
+            last_id = batch[-1].id
 
     def delete(self, character_id: str) -> None:
         """Видаляє персонажа."""
+        route_session(self.session, character_id=character_id)
         self.session.query(CharacterModel).filter_by(
             id=UUID(character_id)
         ).delete()
 
     def save_stats_cache(self, character_id: str, stats: Dict[str, Any], equipment_items: List[str]) -> None:
         """Зберігає кеш характеристик."""
+        route_session(self.session, character_id=character_id)
         equipment_hash = self._calculate_equipment_hash(equipment_items)
         char_uuid = UUID(character_id)
 
@@ -118,6 +230,7 @@ class PostgresCharacterRepository(ICharacterRepository):
 
     def get_stats_cache(self, character_id: str, equipment_items: List[str]) -> Optional[Dict[str, Any]]:
         """Отримання кешу характеристик."""
+        route_session(self.session, character_id=character_id)
         cache = self.session.query(StatsCacheModel).filter_by(
             character_id=UUID(character_id)
         ).first()
@@ -143,74 +256,201 @@ class PostgresCharacterRepository(ICharacterRepository):
             'attack_speed': float(cache.attack_speed)
         }
 
-    def _save_equipment(self, character: Character, db_character: CharacterModel) -> None:
-        """Зберігає екіпіровку."""
-        equipment = db_character.equipment
-        if equipment is None:
-            equipment = EquipmentModel(character_id=UUID(character.id))
-            self.session.add(equipment)
-
-        equipment.weapon = character.equipped_items.get('weapon')
-        equipment.armor = character.equipped_items.get('armor')
-        equipment.helmet = character.equipped_items.get('helmet')
-        equipment.boots = character.equipped_items.get('boots')
-        equipment.gloves = character.equipped_items.get('gloves')
-        equipment.ring_1 = character.equipped_items.get('ring_1')
-        equipment.ring_2 = character.equipped_items.get('ring_2')
-        equipment.amulet = character.equipped_items.get('amulet')
-        equipment.updated_at = datetime.now(timezone.utc)
+    def _load(self, statement: Select, params: Dict[str, Any], **parts: bool) -> Optional[Character]:
+        """Виконує заздалегідь побудований запит персонажа та конвертує результат."""
+        db_character = self.session.execute(statement, params).scalar_one_or_none()
+        if db_character is None and reroute_after_miss(self.session):
+            # Кошик гравця перенесли на інший шард: повторюємо запит там.
+            db_character = self.session.execute(statement, params).scalar_one_or_none()
+        if db_character is None:
+            return None
+        return self._to_domain(db_character, **parts)
+
+    def _insert_character(self, character: Character) -> None:
+        """Вставляє нового персонажа разом з усіма пов'язаними записами."""
+        char_uuid = UUID(character.id)
+        now = datetime.now(timezone.utc)
+
+        db_character = CharacterModel(
+            id=char_uuid,
+            created_at=now,
+            updated_at=now,
+            last_activity_at=now,
+            **self._character_values(character, TRACKED_FIELDS)
+        )
+        db_character.equipment = EquipmentModel(
+            character_id=char_uuid,
+            updated_at=now,
+            **{slot: character.equipped_items.get(slot) for slot in EQUIPMENT_SLOTS}
+        )
+        db_character.inventory = [
+            InventoryModel(character_id=char_uuid, item_id=item_id, quantity=quantity, acquired_at=now)
+            for item_id, quantity in Counter(character.inventory).items()
+        ]
+        if character.combat_state is not None:
+            db_character.combat_state = CombatStateModel(
+                character_id=char_uuid,
+                **self._combat_state_values(character.combat_state)
+            )
+        self.session.add(db_character)
+        # Сесії працюють з autoflush=False: без цього повторне збереження в тій самій
+        # транзакції виконало б UPDATE ще до INSERT і отримало б хибний конфлікт версій.
+        self.session.flush()
+        character.version = 1
+
+    def _update_character(self, character: Character, fields: Set[str]) -> None:
+        """
+        Оновлює в таблиці персонажів лише змінені стовпці та збільшує версію.
+        Оновлення виконується лише за очікуваної версії рядка.
+        """
+        now = datetime.now(timezone.utc)
+        values = self._character_values(character, fields)
+        values['updated_at'] = now
+        values['last_activity_at'] = now
+        values['version'] = CharacterModel.version + 1
+
+        result = self.session.execute(
+            update(CharacterModel)
+            .where(CharacterModel.id == UUID(character.id), CharacterModel.version == character.version)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise ConcurrencyConflictError(character.id, character.version)
+        character.version += 1
+
+    def _character_values(self, character: Character, fields: Iterable[str]) -> Dict[str, Any]:
+        """Перетворює поля доменної сутності на значення стовпців таблиці персонажів."""
+        values: Dict[str, Any] = {}
+        for field in fields:
+            if field == 'base_stats':
+                values.update(
+                    strength=character.base_stats.strength,
+                    dexterity=character.base_stats.dexterity,
+                    intelligence=character.base_stats.intelligence,
+                    base_health=character.base_stats.base_health,
+                    base_mana=character.base_stats.base_mana,
+                )
+            else:
+                values[field] = getattr(character, field)
+        return values
+
+    def _save_equipment(self, character: Character) -> None:
+        """Зберігає змінені слоти екіпіровки одним upsert-запитом."""
+        changed_slots = {
+            slot: item_id
+            for slot, item_id in character.get_changed_equipment_slots().items()
+            if slot in EQUIPMENT_SLOTS
+        }
+        if not changed_slots:
+            return
+
+        now = datetime.now(timezone.utc)
+        stmt = self.insert(EquipmentModel).values(
+            character_id=UUID(character.id),
+            updated_at=now,
+            **{slot: character.equipped_items.get(slot) for slot in EQUIPMENT_SLOTS}
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EquipmentModel.character_id],
+            set_={**changed_slots, 'updated_at': now}
+        )
+        self.session.execute(stmt)
 
     def _save_inventory(self, character: Character) -> None:
-        """Зберігає інвентар."""
-        # Видаляємо старий інвентар
-        self.session.query(InventoryModel).filter_by(
-            character_id=UUID(character.id)
-        ).delete()
+        """
+        Зберігає лише зміни інвентаря з моменту завантаження.
+
+        Нові предмети та збільшення кількості записуються одним
+        INSERT ... ON CONFLICT (character_id, item_id) DO UPDATE, що спирається
+        на обмеження uq_character_item. Кількість збільшується на різницю,
+        а не перезаписується, тому acquired_at існуючих записів зберігається.
+        Предмети, яких більше немає, видаляються одним цільовим DELETE.
+        """
+        changes = character.get_inventory_changes()
+        if not changes:
+            return
+
+        char_uuid = UUID(character.id)
+        remaining = Counter(character.inventory)
+        added = {item_id: delta for item_id, delta in changes.items() if delta > 0}
+        removed = [item_id for item_id, delta in changes.items() if delta < 0 and remaining[item_id] == 0]
+        decreased = {
+            item_id: -delta
+            for item_id, delta in changes.items()
+            if delta < 0 and remaining[item_id] > 0
+        }
 
-        # Підраховуємо кількість предметів
-        item_counts = {}
-        for item_id in character.inventory:
-            item_counts[item_id] = item_counts.get(item_id, 0) + 1
-
-        # Створюємо нові записи
-        for item_id, quantity in item_counts.items():
-            inventory_item = InventoryModel(
-                character_id=UUID(character.id),
-                item_id=item_id,
-                quantity=quantity,
-                acquired_at=datetime.now(timezone.utc)
+        if added:
+            now = datetime.now(timezone.utc)
+            stmt = self.insert(InventoryModel).values([
+                {'character_id': char_uuid, 'item_id': item_id, 'quantity': delta, 'acquired_at': now}
+                for item_id, delta in added.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[InventoryModel.character_id, InventoryModel.item_id],
+                set_={'quantity': InventoryModel.quantity + stmt.excluded.quantity}
             )
-            self.session.add(inventory_item)
+            self.session.execute(stmt)
 
-    def _save_combat_state(self, character: Character, db_character: CharacterModel) -> None:
-        """Зберігає стан бою. ВИПРАВЛЕНА ВЕРСІЯ."""
-        # Спочатку видаляємо старий combat_state якщо він є
-        existing_combat = self.session.query(CombatStateModel).filter_by(
-            character_id=UUID(character.id)
-        ).first()
+        for item_id, amount in decreased.items():
+            self.session.execute(
+                update(InventoryModel)
+                .where(InventoryModel.character_id == char_uuid, InventoryModel.item_id == item_id)
+                .values(quantity=InventoryModel.quantity - amount)
+            )
+
+        if removed:
+            self.session.execute(
+                delete(InventoryModel).where(
+                    InventoryModel.character_id == char_uuid,
+                    InventoryModel.item_id.in_(removed)
+                )
+            )
 
+    def _save_combat_state(self, character: Character) -> None:
+        """
+        Зберігає стан бою: видаляє запис, якщо бій завершився,
+        інакше створює або оновлює його одним upsert-запитом.
+        """
+        char_uuid = UUID(character.id)
         if character.combat_state is None:
-            # Якщо бою немає, видаляємо запис
-            if existing_combat:
-                self.session.delete(existing_combat)
-        else:
-            # Якщо бій є, створюємо або оновлюємо
-            if existing_combat is None:
-                existing_combat = CombatStateModel(character_id=UUID(character.id))
-                self.session.add(existing_combat)
-
-            # Оновлюємо дані бою
-            existing_combat.enemy_id = character.combat_state['enemy_id']
-            existing_combat.enemy_level = character.combat_state.get('enemy_level', 1)
-            existing_combat.enemy_current_health = character.combat_state['enemy_current_health']
-            existing_combat.enemy_max_health = character.combat_state.get(
-                'enemy_max_health',
-                character.combat_state['enemy_current_health']
+            self.session.execute(
+                delete(CombatStateModel).where(CombatStateModel.character_id == char_uuid)
             )
-            existing_combat.turn_number = character.combat_state.get('turn', 0)
+            return
+
+        values = self._combat_state_values(character.combat_state)
+        stmt = self.insert(CombatStateModel).values(id=uuid4(), character_id=char_uuid, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CombatStateModel.character_id],
+            set_=values
+        )
+        self.session.execute(stmt)
+
+    def _combat_state_values(self, combat_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Перетворює словник стану бою на значення стовпців таблиці combat_states."""
+        return {
+            'enemy_id': combat_state['enemy_id'],
+            'enemy_level': combat_state.get('enemy_level', 1),
+            'enemy_current_health': combat_state['enemy_current_health'],
+            'enemy_max_health': combat_state.get(
+                'enemy_max_health',
+                combat_state['enemy_current_health']
+            ),
+            'turn_number': combat_state.get('turn', 0),
+        }
 
-    def _to_domain(self, db_character: CharacterModel) -> Character:
-        """Конвертує модель БД в доменну сутність."""
+    def _to_domain(
+        self,
+        db_character: CharacterModel,
+        with_inventory: bool = True,
+        with_combat_state: bool = True
+    ) -> Character:
+        """
+        Конвертує модель БД в доменну сутність.
+        Незавантажені частини агрегату залишаються порожніми.
+        """
         base_stats = BaseStats(
             strength=db_character.strength,
             dexterity=db_character.dexterity,
@@ -233,12 +473,12 @@ class PostgresCharacterRepository(ICharacterRepository):
             }
 
         inventory = []
-        if db_character.inventory:
+        if with_inventory and db_character.inventory:
             for inv_item in db_character.inventory:
                 inventory.extend([inv_item.item_id] * inv_item.quantity)
 
         combat_state = None
-        if db_character.combat_state is not None:
+        if with_combat_state and db_character.combat_state is not None:
             combat_state = {
                 'combat_id': f"combat_{db_character.id}_{db_character.combat_state.enemy_id}",
                 'enemy_id': db_character.combat_state.enemy_id,
@@ -248,7 +488,7 @@ class PostgresCharacterRepository(ICharacterRepository):
                 'turn': db_character.combat_state.turn_number
             }
 
-        return Character(
+        character = Character(
             id=str(db_character.id),
             telegram_user_id=db_character.telegram_user_id,
             name=db_character.name,
@@ -260,10 +500,12 @@ class PostgresCharacterRepository(ICharacterRepository):
             equipped_items=equipped_items,
             inventory=inventory,
             location_id=db_character.location_id,
-            combat_state=combat_state
+            combat_state=combat_state,
+            version=db_character.version
         )
+        character.mark_persisted()
+        return character
 
     def _calculate_equipment_hash(self, equipment_items: List[str]) -> str:
         """Розрахунок хешу екіпіровки."""
-        equipment_str = ','.join(sorted(equipment_items))
-        return hashlib.sha256(equipment_str.encode()).hexdigest()
+        return calculate_equipment_hash(equipment_items)
@@ -0,0 +1,22 @@
+"""
+Реалізація репозиторію персонажів на SQLite.
+
+Використовує ту саму реляційну схему та ті самі запити, що й
+PostgresCharacterRepository; відрізняється лише діалектом
+INSERT ... ON CONFLICT, який SQLite підтримує з версії 3.24.
+Призначена для розгортань з одним екземпляром бота та для швидких тестів
+без сервера бази даних.
+"""
+from sqlalchemy.dialects import sqlite
+
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+
+class SqliteCharacterRepository(PostgresCharacterRepository):
+    """
+    Репозиторій персонажів у файлі SQLite (DATABASE_URL=sqlite:///rpg_game.db).
+
+    Каскадне видалення пов'язаних записів потребує PRAGMA foreign_keys=ON,
+    який вмикає create_db_engine для SQLite.
+    """
+    insert = staticmethod(sqlite.insert)
@@ -0,0 +1,416 @@
+"""
+Репозиторій персонажів з відкладеним записом (write-behind).
+
+Тримає "гарячих" персонажів у пам'яті, об'єднує їхні зміни та періодично
+записує всі змінені агрегати в базу даних однією транзакцією (group commit).
+
+Кожне збереження в пам'яті збільшує ревізію персонажа, тож save з
+застарілою версією викидає ConcurrencyConflictError і команда повторюється
+з новим станом, як і з репозиторієм без буфера.
+
+Якщо пакет відхилено через один агрегат, персонажі записуються по одному.
+Персонажа, якого змінили в обхід буфера (конфлікт версій), буде перечитано
+з бази, а незаписані зміни застосовано поверх нового стану; запис
+повториться наступного разу. Зміни агрегату, який база не приймає
+(порушення обмежень), відкидаються (dead_letters) - інакше він зривав би
+кожен наступний запис.
+"""
+import copy
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Any
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from domain.entities.character import TRACKED_FIELDS, Character
+from domain.exceptions import ConcurrencyConflictError
+from domain.repositories.character_repository import ICharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+logger = logging.getLogger(__name__)
+
+# Помилки, спричинені самим агрегатом: пакет записується по одному.
+AGGREGATE_ERRORS = (ConcurrencyConflictError, IntegrityError, DataError)
+# Поля-лічильники: при повторному застосуванні змін переноситься різниця, а не значення.
+COUNTER_FIELDS = ('level', 'experience', 'current_health', 'current_mana')
+
+
+class WriteBehindCharacterRepository(ICharacterRepository):
+    """
+    Декоратор над репозиторієм персонажів, що відкладає запис у базу.
+
+    - get/get_by_telegram_user_id повертають копію персонажа з пам'яті,
+      звертаючись до бази лише при першому завантаженні.
+    - save лише оновлює копію в пам'яті та позначає її зміненою,
+      тож кілька збережень одного персонажа об'єднуються в один запис.
+      Версія повернутих копій - ревізія в пам'яті: save приймає лише
+      останню ревізію, інакше викидає ConcurrencyConflictError.
+    - flush записує всі змінені агрегати в одній транзакції; примусовий
+      запис при max_pending виконує фоновий потік, а не той, що викликав save.
+
+    Межі втрати даних при аварійному завершенні процесу задаються параметрами:
+    flush_interval_ms - як довго зміна може чекати на запис;
+    max_pending - скільки змінених персонажів може накопичитись до примусового запису.
+    """
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        repository_factory: Callable[[Session], ICharacterRepository] = PostgresCharacterRepository,
+        flush_interval_ms: int = 500,
+        max_pending: int = 200,
+        max_entries: int = 10_000,
+        max_dead_letters: int = 1000,
+    ):
+        self.session_factory = session_factory
+        self.repository_factory = repository_factory
+        self.flush_interval_ms = flush_interval_ms
+        self.max_pending = max_pending
+        self.max_entries = max_entries
+        self.max_dead_letters = max_dead_letters
+
+        # Кеш гарячих персонажів (LRU) та індекс за Telegram ID.
+        self._entries: "OrderedDict[str, Character]" = OrderedDict()
+        self._by_telegram_id: Dict[int, str] = {}
+        # Ревізії персонажів у пам'яті (версія в базі зростає лише при flush).
+        self._revisions: Dict[str, int] = {}
+        # ID змінених персонажів -> час першої незаписаної зміни.
+        self._dirty: Dict[str, float] = {}
+
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # Будить фоновий потік раніше за flush_interval_ms (max_pending, зупинка).
+        self._wake_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        # Останні відкинуті агрегати: ID персонажа -> причина.
+        self.dead_letters: "OrderedDict[str, str]" = OrderedDict()
+
+        # --- Метрики ---
+        self.flush_count = 0
+        self.flushed_characters = 0
+        self.failed_flushes = 0
+        self.dropped_characters = 0
+        self.rebased_characters = 0
+        self.last_flush_ms = 0.0
+
+    # --- Життєвий цикл ---
+
+    def start(self) -> None:
+        """Запускає фоновий потік, що записує зміни кожні flush_interval_ms."""
+        if self._worker is not None:
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="character-write-behind", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Зупиняє фоновий потік та записує всі незбережені зміни."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            self._wake_event.wait(self.flush_interval_ms / 1000)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Помилка фонового запису персонажів: {e}", exc_info=True)
+
+    # --- ICharacterRepository ---
+
+    def save(self, character: Character) -> None:
+        """
+        Оновлює персонажа в пам'яті; запис у базу відбудеться під час flush.
+
+        :raises ConcurrencyConflictError: Якщо персонажа вже зберегли з тієї ж ревізії.
+        """
+        entry = copy.deepcopy(character)
+        with self._lock:
+            existing = self._entries.get(character.id)
+            if existing is not None:
+                if character.version != self._revisions.get(character.id, existing.version):
+                    raise ConcurrencyConflictError(character.id, character.version)
+                # Зміни рахуються відносно останнього записаного в базу стану.
+                entry.inherit_persisted_state(existing)
+            self._remember(entry)
+            character.version += 1
+            self._revisions[character.id] = character.version
+            self._dirty.setdefault(character.id, time.monotonic())
+            pending = len(self._dirty)
+
+        if pending >= self.max_pending:
+            if self._worker is not None:
+                # save викликається з обробників: запис у базу - справа фонового потоку
+                self._wake_event.set()
+            else:
+                self.flush()
+
+    def get(self, character_id: str) -> Optional[Character]:
+        with self._lock:
+            entry = self._entries.get(character_id)
+            if entry is not None:
+                self._entries.move_to_end(character_id)
+                return self._copy_out(entry)
+
+        with self._repository() as (repo, _):
+            character = repo.get(character_id)
+        return self._cache_loaded(character)
+
+    def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
+        with self._lock:
+            character_id = self._by_telegram_id.get(telegram_user_id)
+        if character_id is not None:
+            return self.get(character_id)
+
+        with self._repository() as (repo, _):
+            character = repo.get_by_telegram_user_id(telegram_user_id)
+        return self._cache_loaded(character)
+
+    def delete(self, character_id: str) -> None:
+        """Видаляє персонажа з пам'яті та одразу з бази даних."""
+        with self._lock:
+            self._forget(character_id)
+
+        with self._repository() as (repo, session):
+            repo.delete(character_id)
+            session.commit()
+
+    def save_stats_cache(self, character_id: str, stats: Dict[str, Any], equipment_items: List[str]) -> None:
+        # Кеш характеристик записується одразу: персонаж має вже існувати в базі.
+        self.flush()
+        with self._repository() as (repo, session):
+            repo.save_stats_cache(character_id, stats, equipment_items)
+            session.commit()
+
+    def get_stats_cache(self, character_id: str, equipment_items: List[str]) -> Optional[Dict[str, Any]]:
+        with self._repository() as (repo, _):
+            return repo.get_stats_cache(character_id, equipment_items)
+
+    # --- Запис змін ---
+
+    @property
+    def pending_count(self) -> int:
+        """Кількість персонажів з незаписаними змінами."""
+        with self._lock:
+            return len(self._dirty)
+
+    def flush(self) -> int:
+        """
+        Записує всі змінені агрегати однією транзакцією. Якщо пакет відхилено
+        через помилку агрегату, записує персонажів по одному: персонажів з
+        конфліктом версій перечитує і лишає в черзі, а ті, які база не
+        приймає, відкидає. Інші помилки (наприклад, недоступна база)
+        повертають усі зміни в чергу.
+
+        :return: Кількість записаних персонажів.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                dirty = self._dirty
+                self._dirty = {}
+                batch = {character_id: copy.deepcopy(self._entries[character_id]) for character_id in dirty}
+
+            start = time.perf_counter()
+            try:
+                saved = dict(zip(batch, self._write(list(batch.values()))))
+            except AGGREGATE_ERRORS as e:
+                logger.warning(f"Пакет з {len(batch)} персонажів відхилено ({e}), запис по одному")
+                saved = self._write_each(batch, dirty)
+            except Exception:
+                self._requeue(dirty)
+                raise
+
+            self._mark_saved(saved, start)
+            return len(saved)
+
+    def _write(self, characters: List[Character]) -> List[Character]:
+        """
+        Записує персонажів однією транзакцією. Зберігаються копії: після
+        відкату їхні версії та знімки стану не відповідали б базі.
+        """
+        copies = [copy.deepcopy(character) for character in characters]
+        with self._repository() as (repo, session):
+            for character in copies:
+                repo.save(character)
+            session.commit()
+        return copies
+
+    def _write_each(self, batch: Dict[str, Character], dirty: Dict[str, float]) -> Dict[str, Character]:
+        """
+        Записує персонажів окремими транзакціями. Персонажа з конфліктом версій
+        перечитує і лишає в черзі, агрегати, які база не приймає, відкидає.
+        """
+        saved: Dict[str, Character] = {}
+        handled = set()
+        for character_id, character in batch.items():
+            try:
+                try:
+                    saved[character_id] = self._write([character])[0]
+                except ConcurrencyConflictError:
+                    if not self._rebase(character_id, dirty[character_id]):
+                        raise
+                    handled.add(character_id)
+            except AGGREGATE_ERRORS as e:
+                self._dead_letter(character_id, e)
+                handled.add(character_id)
+            except Exception:
+                # База стала недоступна: записане фіксуємо, решту повертаємо в чергу
+                if saved:
+                    self._mark_saved(saved, time.perf_counter())
+                self._requeue({cid: since for cid, since in dirty.items() if cid not in saved and cid not in handled})
+                raise
+        return saved
+
+    def _rebase(self, character_id: str, since: float) -> bool:
+        """
+        Перечитує персонажа, якого змінили в обхід буфера, і застосовує незаписані
+        зміни поверх стану з бази (див. _apply_changes). Персонаж лишається в черзі.
+
+        :return: False, якщо персонажа в базі вже немає.
+        """
+        with self._repository() as (repo, _):
+            fresh = repo.get(character_id)
+        if fresh is None:
+            return False
+        with self._lock:
+            entry = self._entries.get(character_id)
+            if entry is None:
+                return True
+            _apply_changes(entry, fresh)
+            self._dirty[character_id] = min(since, self._dirty.get(character_id, since))
+            self.rebased_characters += 1
+        logger.warning(f"Персонажа {character_id} змінено в обхід буфера: зміни застосовано до стану з бази")
+        return True
+
+    def _mark_saved(self, saved: Dict[str, Character], start: float) -> None:
+        with self._lock:
+            for character_id, character in saved.items():
+                entry = self._entries.get(character_id)
+                if entry is not None:
+                    entry.inherit_persisted_state(character)
+            self.flush_count += 1
+            self.flushed_characters += len(saved)
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    def _requeue(self, dirty: Dict[str, float]) -> None:
+        """
+        Повертає зміни в чергу: знімки в пам'яті не оновлювались, тому
+        наступний запис врахує їх повністю.
+        """
+        with self._lock:
+            for character_id, since in dirty.items():
+                if character_id in self._entries:
+                    self._dirty[character_id] = min(since, self._dirty.get(character_id, since))
+            self.failed_flushes += 1
+
+    def _dead_letter(self, character_id: str, error: Exception) -> None:
+        """
+        Відкидає незаписані зміни персонажа: наступне читання завантажить
+        його з бази, а не повторить запис, який база не приймає.
+        """
+        logger.error(f"Зміни персонажа {character_id} відкинуто: база їх не приймає ({error})")
+        with self._lock:
+            self._forget(character_id)
+            self.dead_letters[character_id] = str(error)
+            self.dead_letters.move_to_end(character_id)
+            while len(self.dead_letters) > self.max_dead_letters:
+                self.dead_letters.popitem(last=False)
+            self.dropped_characters += 1
+
+    # --- Допоміжні методи ---
+
+    @contextmanager
+    def _repository(self) -> Iterator[tuple]:
+        """Відкриває окрему сесію для звернення до базового репозиторію."""
+        session = self.session_factory()
+        try:
+            yield self.repository_factory(session), session
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _cache_loaded(self, character: Optional[Character]) -> Optional[Character]:
+        """Кладе щойно завантаженого персонажа в пам'ять і повертає його копію."""
+        if character is None:
+            return None
+        with self._lock:
+            existing = self._entries.get(character.id)
+            if existing is not None:
+                # Поки ми читали з бази, персонаж міг бути змінений у пам'яті.
+                return self._copy_out(existing)
+            self._remember(character)
+            return self._copy_out(character)
+
+    def _copy_out(self, entry: Character) -> Character:
+        """Копія персонажа для викликача з ревізією в пам'яті як версією."""
+        character = copy.deepcopy(entry)
+        character.version = self._revisions.get(entry.id, entry.version)
+        return character
+
+    def _forget(self, character_id: str) -> None:
+        """Прибирає персонажа з пам'яті разом з незаписаними змінами."""
+        entry = self._entries.pop(character_id, None)
+        self._dirty.pop(character_id, None)
+        self._revisions.pop(character_id, None)
+        if entry is not None:
+            self._by_telegram_id.pop(entry.telegram_user_id, None)
+
+    def _remember(self, character: Character) -> None:
+        """Зберігає персонажа в LRU-кеші, витісняючи найстаріші незмінені записи."""
+        self._entries[character.id] = character
+        self._entries.move_to_end(character.id)
+        self._by_telegram_id[character.telegram_user_id] = character.id
+
+        overflow = len(self._entries) - self.max_entries
+        if overflow <= 0:
+            return
+        for character_id in list(self._entries):
+            if overflow <= 0:
+                break
+            if character_id in self._dirty:
+                continue
+            self._forget(character_id)
+            overflow -= 1
+
+
+def _apply_changes(entry: Character, fresh: Character) -> None:
+    """
+    Переносить незаписані зміни entry на стан fresh, щойно прочитаний з бази:
+    лічильники (досвід, здоров'я, кількість предметів) змінюються на ту ж
+    різницю, решта змінених полів і слотів беруть значення з entry,
+    незмінені - з бази. Після цього знімок entry відповідає fresh.
+    """
+    field_changes = entry.get_field_changes()
+    inventory_changes = entry.get_inventory_changes()
+    equipment_changes = entry.get_changed_equipment_slots()
+    combat_state_changed = 'combat_state' in entry.get_changed_fields()
+
+    for name in TRACKED_FIELDS:
+        if name not in field_changes:
+            setattr(entry, name, copy.deepcopy(getattr(fresh, name)))
+        elif name in COUNTER_FIELDS:
+            persisted, current = field_changes[name]
+            setattr(entry, name, max(0, getattr(fresh, name) + current - persisted))
+
+    inventory = Counter(fresh.inventory)
+    inventory.update(inventory_changes)
+    entry.inventory = list((+inventory).elements())
+    entry.equipped_items = {**fresh.equipped_items, **equipment_changes}
+    if not combat_state_changed:
+        entry.combat_state = copy.deepcopy(fresh.combat_state)
+    entry.inherit_persisted_state(fresh)
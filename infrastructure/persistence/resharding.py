@@ -0,0 +1,254 @@
+"""
+Перенесення персонажів між шардами без зупинки бота.
+
+Переносяться кошики гравців (див. database/sharding.py) групами по
+buckets_per_round. Для кожної групи:
+1. кошики позначаються в каталозі як 'moving' і інструмент чекає settle_seconds
+   (не менше SHARD_MAP_REFRESH_SECONDS), доки всі екземпляри бота перечитають
+   таблицю шардів: нові команди з записом для цих гравців чекають, читання
+   тривають зі старого шарду;
+2. рядки персонажів групи на старому шарді блокуються (SELECT ... FOR UPDATE),
+   щоб дочекатися команд, які почалися раніше;
+3. рядки персонажів і пов'язаних таблиць (екіпіровка, інвентар, стан бою, кеш
+   характеристик) копіюються на новий шард як є, пакетами по batch_size (кожен
+   пакет - окремий коміт), тож дати створення й активності не змінюються;
+   кошики перемикаються на новий шард, а старі рядки видаляються.
+
+Перенесення можна повторити після збою: перед копіюванням рядки групи на
+новому шарді видаляються, а вже перенесені кошики пропускаються.
+
+Запуск (рівномірно розподілити кошики, наприклад після додавання шарду):
+    SHARD_DATABASE_URLS=postgresql://...,postgresql://... \
+        python -m infrastructure.persistence.resharding --rebalance --buckets-per-round 16
+"""
+import argparse
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, Table, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from infrastructure.persistence.database.models import (
+    CharacterModel, CombatStateModel, EquipmentModel, InventoryModel, ShardBucketModel, StatsCacheModel
+)
+from infrastructure.persistence.database.sharding import SHARD_BUCKETS, ShardRouter
+
+logger = logging.getLogger(__name__)
+
+# Таблиці, що належать персонажу і переносяться разом з ним.
+CHILD_MODELS = (EquipmentModel, InventoryModel, CombatStateModel, StatsCacheModel)
+
+
+@dataclass
+class ReshardStats:
+    """Підсумок перенесення."""
+    buckets: int = 0
+    characters: int = 0
+    batches: int = 0
+
+
+def initialize_shard_map(router: ShardRouter) -> None:
+    """Записує в каталог початкове розміщення кошиків (n % кількість шардів), якщо таблиця порожня."""
+    with Session(router.directory) as session:
+        if session.scalar(select(ShardBucketModel.bucket).limit(1)) is not None:
+            return
+        now = datetime.now(timezone.utc)
+        session.add_all(
+            ShardBucketModel(bucket=bucket, shard_id=bucket % len(router.engines), moving=False, updated_at=now)
+            for bucket in range(SHARD_BUCKETS)
+        )
+        session.commit()
+    router.refresh()
+
+
+def plan_rebalance(shard_map: Dict[int, int], shard_count: int) -> Dict[int, List[int]]:
+    """
+    Обирає мінімум кошиків, які треба перенести, щоб шарди отримали
+    однакову (з точністю до одного) кількість кошиків.
+
+    :return: {шард призначення: [кошики]}.
+    """
+    owned: Dict[int, List[int]] = defaultdict(list)
+    for bucket, shard_id in sorted(shard_map.items()):
+        owned[shard_id].append(bucket)
+
+    base, extra = divmod(len(shard_map), shard_count)
+    quota = {shard_id: base + (1 if shard_id < extra else 0) for shard_id in range(shard_count)}
+
+    surplus = [bucket for shard_id in range(shard_count) for bucket in owned[shard_id][quota[shard_id]:]]
+    surplus += [bucket for shard_id, buckets in owned.items() if shard_id >= shard_count for bucket in buckets]
+
+    plan: Dict[int, List[int]] = {}
+    for shard_id in range(shard_count):
+        missing = quota[shard_id] - len(owned[shard_id])
+        if missing > 0:
+            plan[shard_id], surplus = surplus[:missing], surplus[missing:]
+    return plan
+
+
+def move_buckets(
+    router: ShardRouter,
+    buckets: Sequence[int],
+    target_shard: int,
+    batch_size: int = 500,
+    settle_seconds: Optional[float] = None,
+) -> ReshardStats:
+    """
+    Переносить кошики (з будь-яких шардів) на target_shard.
+
+    :param settle_seconds: Пауза після позначення кошиків, за яку всі екземпляри
+        бота мають перечитати таблицю шардів (за замовчуванням - інтервал оновлення + 1 с).
+    """
+    if settle_seconds is None:
+        settle_seconds = router.refresh_interval_seconds + 1
+    router.refresh()
+    shard_map = router.shard_map()
+    by_source: Dict[int, List[int]] = defaultdict(list)
+    for bucket in buckets:
+        if shard_map[bucket] != target_shard:
+            by_source[shard_map[bucket]].append(bucket)
+
+    stats = ReshardStats()
+    if not by_source:
+        return stats
+
+    moving = [bucket for source_buckets in by_source.values() for bucket in source_buckets]
+    _set_buckets(router, moving, moving=True)
+    time.sleep(settle_seconds)
+
+    for source_shard, source_buckets in by_source.items():
+        in_buckets = (CharacterModel.telegram_user_id % SHARD_BUCKETS).in_(source_buckets)
+        with Session(router.engines[source_shard], autoflush=False) as source, \
+                Session(router.engines[target_shard], autoflush=False) as target:
+            source.execute(select(CharacterModel.id).where(in_buckets).with_for_update())
+
+            # Залишки попередньої перерваної спроби.
+            target.execute(delete(CharacterModel).where(in_buckets))
+            for character_ids in _iter_character_ids(source, in_buckets, batch_size):
+                _copy_characters(source, target, character_ids)
+                target.commit()
+                stats.characters += len(character_ids)
+                stats.batches += 1
+            target.commit()
+
+            _set_buckets(router, source_buckets, moving=False, shard_id=target_shard)
+            source.execute(delete(CharacterModel).where(in_buckets))
+            source.commit()
+
+        stats.buckets += len(source_buckets)
+        logger.info(
+            f"Шард {source_shard} -> {target_shard}: кошиків {len(source_buckets)}, "
+            f"персонажів перенесено всього {stats.characters}"
+        )
+    router.refresh()
+    return stats
+
+
+def rebalance(
+    router: ShardRouter,
+    buckets_per_round: int = 16,
+    batch_size: int = 500,
+    settle_seconds: Optional[float] = None,
+) -> ReshardStats:
+    """Рівномірно розподіляє кошики між усіма шардами, переносячи їх групами."""
+    initialize_shard_map(router)
+    total = ReshardStats()
+    for target_shard, buckets in plan_rebalance(router.shard_map(), len(router.engines)).items():
+        for start in range(0, len(buckets), buckets_per_round):
+            stats = move_buckets(
+                router, buckets[start:start + buckets_per_round], target_shard, batch_size, settle_seconds
+            )
+            total.buckets += stats.buckets
+            total.characters += stats.characters
+            total.batches += stats.batches
+    return total
+
+
+def _iter_character_ids(source: Session, where: ColumnElement[bool], batch_size: int) -> Iterator[List[UUID]]:
+    """Пакети ID персонажів, що відповідають умові (пагінація за ключем)."""
+    last_id: Optional[UUID] = None
+    while True:
+        query = select(CharacterModel.id).where(where).order_by(CharacterModel.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(CharacterModel.id > last_id)
+        character_ids = list(source.scalars(query))
+        if not character_ids:
+            return
+        yield character_ids
+        last_id = character_ids[-1]
+
+
+def _copy_characters(source: Session, target: Session, character_ids: List[UUID]) -> None:
+    """
+    Копіює рядки персонажів і всіх пов'язаних таблиць як є, зберігаючи
+    дати створення та активності, версію і кеш характеристик.
+    """
+    _copy_rows(source, target, CharacterModel.__table__, CharacterModel.id.in_(character_ids))
+    for model in CHILD_MODELS:
+        _copy_rows(source, target, model.__table__, model.character_id.in_(character_ids))
+
+
+def _copy_rows(source: Session, target: Session, table: Table, where: ColumnElement[bool]) -> None:
+    # Автоінкрементні ключі (рядки інвентаря) призначає база шарду призначення.
+    columns = [column for column in table.columns if not (column.primary_key and column.autoincrement is True)]
+    rows = [dict(row._mapping) for row in source.execute(select(*columns).where(where))]
+    if rows:
+        target.execute(insert(table), rows)
+
+
+def _set_buckets(router: ShardRouter, buckets: Sequence[int], moving: bool, shard_id: Optional[int] = None) -> None:
+    values = {'moving': moving, 'updated_at': datetime.now(timezone.utc)}
+    if shard_id is not None:
+        values['shard_id'] = shard_id
+    with Session(router.directory) as session:
+        session.execute(update(ShardBucketModel).where(ShardBucketModel.bucket.in_(buckets)).values(**values))
+        session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Перенесення персонажів між шардами")
+    parser.add_argument('--rebalance', action='store_true', help="Рівномірно розподілити кошики між шардами")
+    parser.add_argument('--buckets', help="Кошики для перенесення, наприклад 0-127,512")
+    parser.add_argument('--to-shard', type=int, help="Шард призначення для --buckets")
+    parser.add_argument('--buckets-per-round', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from infrastructure.persistence.database.sharding import get_shard_router
+
+    router = get_shard_router()
+    if router is None:
+        parser.error("SHARD_DATABASE_URLS не задано")
+
+    if args.rebalance:
+        stats = rebalance(router, args.buckets_per_round, args.batch_size)
+    elif args.buckets and args.to_shard is not None:
+        initialize_shard_map(router)
+        buckets = _parse_buckets(args.buckets)
+        stats = ReshardStats()
+        for start in range(0, len(buckets), args.buckets_per_round):
+            part = move_buckets(router, buckets[start:start + args.buckets_per_round], args.to_shard, args.batch_size)
+            stats.buckets += part.buckets
+            stats.characters += part.characters
+            stats.batches += part.batches
+    else:
+        parser.error("Вкажіть --rebalance або --buckets разом з --to-shard")
+    logger.info(f"Перенесення завершено: кошиків {stats.buckets}, персонажів {stats.characters}")
+
+
+def _parse_buckets(spec: str) -> List[int]:
+    buckets: List[int] = []
+    for part in spec.split(','):
+        first, _, last = part.partition('-')
+        buckets.extend(range(int(first), int(last or first) + 1))
+    return buckets
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Реалізація одиниці роботи (Unit of Work) на основі сесії SQLAlchemy.
+
+Одна одиниця роботи відповідає одному оновленню Telegram: всі use case команди
+реєструють зміни, а запис у базу відбувається один раз у commit().
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from application.interfaces.unit_of_work import IUnitOfWork
+from domain.entities.character import Character
+from domain.repositories.character_repository import ICharacterRepository
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.database.sharding import route_session_async
+from infrastructure.persistence.repositories.character_repository_factory import (
+    create_character_repository, get_user_lock_provider
+)
+from infrastructure.persistence.user_locks import IUserLockProvider
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UnitOfWorkStats:
+    """Статистика виконання однієї команди."""
+    statements: int = 0
+    flushed_characters: int = 0
+    commit_ms: float = 0.0
+
+
+class _RegisteringCharacterRepository(ICharacterRepository):
+    """
+    Репозиторій, який видає одиниця роботи use case.
+    Читання передаються базовому репозиторію, а save() лише реєструє зміни.
+    """
+    def __init__(self, uow: 'SqlAlchemyUnitOfWork', inner: ICharacterRepository):
+        self.uow = uow
+        self.inner = inner
+
+    def save(self, character: Character) -> None:
+        self.uow.register(character)
+
+    def get(self, character_id: str) -> Optional[Character]:
+        return self.inner.get(character_id)
+
+    def get_by_telegram_user_id(self, telegram_user_id: int) -> Optional[Character]:
+        return self.inner.get_by_telegram_user_id(telegram_user_id)
+
+    def get_for_combat(self, telegram_user_id: int) -> Optional[Character]:
+        return self.inner.get_for_combat(telegram_user_id)
+
+    def get_for_inventory(self, telegram_user_id: int) -> Optional[Character]:
+        return self.inner.get_for_inventory(telegram_user_id)
+
+    def get_summary(self, telegram_user_id: int) -> Optional[Character]:
+        return self.inner.get_summary(telegram_user_id)
+
+    def delete(self, character_id: str) -> None:
+        self.uow.unregister(character_id)
+        self.inner.delete(character_id)
+
+    def save_stats_cache(self, character_id: str, stats: Dict[str, Any], equipment_items: List[str]) -> None:
+        self.inner.save_stats_cache(character_id, stats, equipment_items)
+
+    def get_stats_cache(self, character_id: str, equipment_items: List[str]) -> Optional[Dict[str, Any]]:
+        return self.inner.get_stats_cache(character_id, equipment_items)
+
+
+class SqlAlchemyUnitOfWork(IUnitOfWork):
+    """
+    Одиниця роботи, що відкриває сесію на час команди та записує всі
+    зареєстровані агрегати одним flush та одним комітом.
+
+    Приклад:
+        with SqlAlchemyUnitOfWork(name="explore") as uow:
+            await uow.lock_user_async(telegram_user_id)
+            use_case = StartCombatUseCase(uow.characters, ...)
+            use_case.execute(request)
+            uow.commit()
+
+    Команди, що лише читають дані, відкривають одиницю роботи з read_only=True:
+    її сесія може працювати з реплікою бази (див. database/routing.py),
+    а спроба записати зміни викидає RuntimeError.
+    """
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        repository_factory: Callable[[Session], ICharacterRepository] = create_character_repository,
+        name: str = "command",
+        lock_provider: Optional[IUserLockProvider] = None,
+        read_only: bool = False,
+    ):
+        if session_factory is None:
+            from infrastructure.persistence.database.sharding import get_shard_router
+            shard_router = get_shard_router()
+            if shard_router is not None:
+                # Шарди не мають реплік: читання й запис ідуть у базу шарду гравця.
+                session_factory = shard_router.session_factory(read_only=read_only)
+            elif read_only:
+                from infrastructure.persistence.database.routing import get_engine_router
+                session_factory = get_engine_router().session_factory(read_only=True)
+            else:
+                from infrastructure.persistence.database.session import SessionLocal
+                session_factory = SessionLocal.session_factory
+        self.session_factory = session_factory
+        self.read_only = read_only
+        self.repository_factory = repository_factory
+        self.name = name
+        self.lock_provider = lock_provider
+        self.stats = UnitOfWorkStats()
+
+        self.session: Optional[Session] = None
+        self._repository: Optional[ICharacterRepository] = None
+        self._registered: Dict[str, Character] = {}
+        self._counters: List[StatementCounter] = []
+        self._locked_user_id: Optional[int] = None
+
+    def __enter__(self) -> 'SqlAlchemyUnitOfWork':
+        self.session = self.session_factory()
+        event.listen(self.session, 'after_begin', self._on_begin)
+        self._repository = self.repository_factory(self.session)
+        self.characters = _RegisteringCharacterRepository(self, self._repository)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is not None or self._registered or self._locked_user_id is not None:
+                self.rollback()
+        finally:
+            self._detach_counters()
+            event.remove(self.session, 'after_begin', self._on_begin)
+            self.session.close()
+            logger.debug(
+                f"UoW '{self.name}': {self.stats.statements} SQL-запитів, "
+                f"записано персонажів: {self.stats.flushed_characters}, коміт {self.stats.commit_ms:.1f} мс"
+            )
+
+    def lock_user(self, telegram_user_id: int) -> None:
+        """
+        Бере блокування команд користувача до кінця поточної транзакції.
+        Викликається до завантаження персонажа, щоб інша команда того самого
+        гравця (зокрема в іншому екземплярі бота) не змінила його паралельно.
+        Чекає на зайняте блокування в поточному потоці; asyncio-обробники
+        викликають lock_user_async.
+
+        :raises UserLockTimeoutError: Якщо блокування не звільнилось вчасно.
+        """
+        provider = self._user_lock_provider()
+        if provider is None:
+            return
+        provider.acquire(self.session, telegram_user_id)
+        self._locked_user_id = telegram_user_id
+
+    async def lock_user_async(self, telegram_user_id: int) -> None:
+        """
+        Як lock_user, але очікування зайнятого блокування не блокує цикл подій.
+        Тут же сесія прив'язується до шарду гравця: якщо його кошик саме
+        переноситься, завершення перенесення теж чекається через asyncio.sleep.
+        """
+        await route_session_async(self.session, telegram_user_id)
+        provider = self._user_lock_provider()
+        if provider is None:
+            return
+        await provider.acquire_async(self.session, telegram_user_id)
+        self._locked_user_id = telegram_user_id
+
+    def _user_lock_provider(self) -> Optional[IUserLockProvider]:
+        """Провайдер блокувань або None, якщо блокування вимкнено чи вже взято."""
+        provider = self.lock_provider or get_user_lock_provider()
+        if provider is None or self._locked_user_id is not None:
+            return None
+        self.lock_provider = provider
+        return provider
+
+    def register(self, character: Character) -> None:
+        self._registered[character.id] = character
+
+    def unregister(self, character_id: str) -> None:
+        """Прибирає персонажа з реєстру змін (наприклад, якщо його видалено)."""
+        self._registered.pop(character_id, None)
+
+    def commit(self) -> None:
+        if self.read_only and self._registered:
+            raise RuntimeError(f"UoW '{self.name}' лише для читання, але містить змінених персонажів")
+        start = time.perf_counter()
+        for character in self._registered.values():
+            self._repository.save(character)
+        self.session.commit()
+
+        self.stats.flushed_characters += len(self._registered)
+        self.stats.commit_ms += (time.perf_counter() - start) * 1000
+        self.stats.statements = sum(counter.count for counter in self._counters)
+        self._registered.clear()
+        self._release_lock()
+
+    def rollback(self) -> None:
+        self._registered.clear()
+        self.session.rollback()
+        self._release_lock()
+
+    def _release_lock(self) -> None:
+        """Звільняє блокування користувача після завершення транзакції."""
+        if self._locked_user_id is None:
+            return
+        self.lock_provider.release(self.session, self._locked_user_id)
+        self._locked_user_id = None
+
+    def _on_begin(self, session, transaction, connection) -> None:
+        """Підключає лічильник запитів до з'єднання кожної нової транзакції сесії."""
+        if any(counter.bind is connection for counter in self._counters):
+            return
+        counter = StatementCounter(connection)
+        counter.__enter__()
+        self._counters.append(counter)
+
+    def _detach_counters(self) -> None:
+        self.stats.statements = sum(counter.count for counter in self._counters)
+        for counter in self._counters:
+            counter.__exit__(None, None, None)
+        self._counters.clear()
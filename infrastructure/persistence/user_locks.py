@@ -0,0 +1,185 @@
+"""
+Блокування команд одного користувача на час одиниці роботи.
+
+UserOrderingMiddleware впорядковує оновлення лише в межах процесу. Коли бот
+працює в кількох екземплярах, команди одного гравця можуть потрапити в різні
+процеси, тож одиниця роботи бере блокування користувача перед завантаженням
+персонажа і тримає його до коміту або відкату.
+
+Реалізації:
+- PostgresAdvisoryLockProvider - транзакційне advisory-блокування PostgreSQL,
+  спільне для всіх екземплярів; у звичайному випадку коштує один запит;
+- InProcessUserLockProvider - блокування в пам'яті для одного екземпляра.
+
+asyncio-обробники беруть блокування через acquire_async: поки воно зайняте,
+спроби повторюються через asyncio.sleep, тож очікування не блокує цикл
+подій. Синхронний acquire призначений для коду, що працює в окремих потоках.
+"""
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from domain.exceptions import UserLockTimeoutError
+from infrastructure.persistence.database.sharding import route_session
+
+
+@dataclass
+class UserLockStats:
+    """Лічильники блокувань для моніторингу."""
+    acquired: int = 0
+    # Скільки разів блокування було зайняте при першій спробі.
+    contended: int = 0
+    timeouts: int = 0
+    wait_ms: float = 0.0
+
+
+@dataclass
+class _LockEntry:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Потоки, що тримають або чекають на блокування.
+    holders: int = 0
+
+
+class IUserLockProvider(ABC):
+    """Інтерфейс блокування команд користувача в межах транзакції сесії."""
+
+    def __init__(self, timeout_seconds: float = 2.0, poll_interval_seconds: float = 0.02):
+        self.timeout_seconds = timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.stats = UserLockStats()
+
+    @abstractmethod
+    def try_acquire(self, session: Session, telegram_user_id: int) -> bool:
+        """Одна спроба взяти блокування без очікування."""
+        pass
+
+    @abstractmethod
+    def release(self, session: Session, telegram_user_id: int) -> None:
+        """Звільняє блокування. Викликається після коміту або відкату транзакції."""
+        pass
+
+    def acquire(self, session: Session, telegram_user_id: int) -> None:
+        """
+        Бере блокування користувача, чекаючи в поточному потоці. Викидає
+        UserLockTimeoutError, якщо його не вдалося отримати за timeout_seconds.
+        Не викликається з циклу подій - там є acquire_async.
+        """
+        started = time.perf_counter()
+        attempts = 0
+        while True:
+            attempts += 1
+            if self.try_acquire(session, telegram_user_id):
+                self._record(started, attempts)
+                return
+            self._check_deadline(started, telegram_user_id)
+            time.sleep(self.poll_interval_seconds)
+
+    async def acquire_async(self, session: Session, telegram_user_id: int) -> None:
+        """Як acquire, але між спробами віддає керування циклу подій."""
+        started = time.perf_counter()
+        attempts = 0
+        while True:
+            attempts += 1
+            if self.try_acquire(session, telegram_user_id):
+                self._record(started, attempts)
+                return
+            self._check_deadline(started, telegram_user_id)
+            await asyncio.sleep(self.poll_interval_seconds)
+
+    def _check_deadline(self, started: float, telegram_user_id: int) -> None:
+        if time.perf_counter() - started >= self.timeout_seconds:
+            self.stats.timeouts += 1
+            raise UserLockTimeoutError(telegram_user_id, self.timeout_seconds)
+
+    def _record(self, started: float, attempts: int) -> None:
+        self.stats.acquired += 1
+        if attempts > 1:
+            self.stats.contended += 1
+            self.stats.wait_ms += (time.perf_counter() - started) * 1000
+
+
+class PostgresAdvisoryLockProvider(IUserLockProvider):
+    """
+    Блокування через pg_try_advisory_xact_lock(telegram_user_id).
+
+    Блокування прив'язане до транзакції сесії і звільняється сервером
+    автоматично при коміті чи відкаті, навіть якщо процес аварійно завершився.
+    Якщо блокування зайняте, спроба повторюється кожні poll_interval_seconds
+    до завершення timeout_seconds.
+    """
+    def try_acquire(self, session: Session, telegram_user_id: int) -> bool:
+        # Блокування береться на шарді гравця, де лежить і його персонаж.
+        route_session(session, telegram_user_id=telegram_user_id)
+        return bool(session.execute(select(func.pg_try_advisory_xact_lock(telegram_user_id))).scalar_one())
+
+    def release(self, session: Session, telegram_user_id: int) -> None:
+        # Транзакційне блокування звільняє сам сервер при завершенні транзакції.
+        pass
+
+
+class InProcessUserLockProvider(IUserLockProvider):
+    """
+    Блокування в пам'яті процесу для розгортання з одним екземпляром бота.
+
+    Блокування користувача видаляється, коли його ніхто не тримає і не чекає.
+    Разом з ним працює UserOrderingMiddleware, який не допускає одночасних
+    команд одного користувача в процесі, тож зазвичай блокування вільне.
+    """
+    def __init__(self, timeout_seconds: float = 2.0, poll_interval_seconds: float = 0.02):
+        super().__init__(timeout_seconds, poll_interval_seconds)
+        self._guard = threading.Lock()
+        self._locks: Dict[int, _LockEntry] = {}
+
+    def try_acquire(self, session: Session, telegram_user_id: int) -> bool:
+        entry = self._enter(telegram_user_id)
+        if entry.lock.acquire(blocking=False):
+            return True
+        self._forget(telegram_user_id, entry)
+        return False
+
+    def acquire(self, session: Session, telegram_user_id: int) -> None:
+        # У потоці чекаємо на самому блокуванні, без опитування.
+        entry = self._enter(telegram_user_id)
+        started = time.perf_counter()
+        if entry.lock.acquire(blocking=False):
+            self._record(started, 1)
+            return
+        if entry.lock.acquire(timeout=self.timeout_seconds):
+            self._record(started, 2)
+            return
+
+        self._forget(telegram_user_id, entry)
+        self.stats.timeouts += 1
+        raise UserLockTimeoutError(telegram_user_id, self.timeout_seconds)
+
+    def release(self, session: Session, telegram_user_id: int) -> None:
+        with self._guard:
+            entry = self._locks.get(telegram_user_id)
+        if entry is None:
+            return
+        entry.lock.release()
+        self._forget(telegram_user_id, entry)
+
+    @property
+    def active_users(self) -> int:
+        """Кількість користувачів, чиє блокування зараз утримується або очікується."""
+        with self._guard:
+            return len(self._locks)
+
+    def _enter(self, telegram_user_id: int) -> _LockEntry:
+        with self._guard:
+            entry = self._locks.setdefault(telegram_user_id, _LockEntry())
+            entry.holders += 1
+        return entry
+
+    def _forget(self, telegram_user_id: int, entry: _LockEntry) -> None:
+        with self._guard:
+            entry.holders -= 1
+            if entry.holders == 0:
+                del self._locks[telegram_user_id]
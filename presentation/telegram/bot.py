@@ -1,14 +1,28 @@
 """
 Головний файл для запуску Telegram-бота.
+
+Змінні оточення:
+    BOT_TOKEN - токен бота.
+    BOT_MODE - polling (за замовчуванням) або webhook (див. webhook.py).
+    BOT_MAX_CONCURRENT_UPDATES - оновлень в обробці одночасно (100).
+    BOT_WORKERS - кількість процесів-обробників (1, див. workers.py).
+    OUTBOUND_* - обмеження частоти вихідних повідомлень (див. outbound.py).
+    FSM_STORAGE - сховище станів FSM: memory або redis (див. storage.py).
+    THROTTLE_* - обмеження частоти команд користувача (див. middlewares/throttling.py).
 """
 import os
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram import Bot
 
-# Імпортуємо роутер з обробниками
-from presentation.telegram.handlers import router as handlers_router
+from presentation.telegram.dispatcher import create_dispatcher
+from presentation.telegram.middlewares import ThrottlingMiddleware
+from presentation.telegram.outbound import OutboundRateLimitMiddleware, OutboundScheduler
+from presentation.telegram.webhook import WebhookSettings, run_webhook
+from presentation.telegram.workers import WorkerPool, create_receiver, used_update_types
+from infrastructure.persistence.repositories.character_repository_factory import (
+    get_repository_backend, shutdown_character_repositories
+)
 
 # Налаштування логування
 logging.basicConfig(
@@ -27,19 +41,74 @@ async def start_bot():
         logger.error("BOT_TOKEN не встановлено в змінних оточення!")
         raise ValueError("BOT_TOKEN не встановлено!")
 
+    mode = os.getenv("BOT_MODE", "polling")
+    if mode not in ("polling", "webhook"):
+        raise ValueError(f"Невідомий BOT_MODE: {mode} (очікується polling або webhook)")
+    workers = int(os.getenv("BOT_WORKERS", "1"))
+    max_concurrent_updates = int(os.getenv("BOT_MAX_CONCURRENT_UPDATES", "100"))
+
+    # SQLite не використовує міграції Alembic: таблиці створюються при запуску.
+    if get_repository_backend() == 'sqlite':
+        from infrastructure.persistence.database.engine import create_tables
+        create_tables()
+
     bot = Bot(token=bot_token)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    # Усі виклики Bot API з chat_id проходять через чергу з обмеженням частоти
+    outbound = OutboundScheduler.from_env()
+    bot.session.middleware(OutboundRateLimitMiddleware(outbound))
+    # Ліміти команд користувача перевіряються до черги та звернень до бази
+    throttling = ThrottlingMiddleware.from_env()
+    if workers > 1:
+        await _run_with_workers(bot, outbound, throttling, mode, workers, max_concurrent_updates)
+        return
 
-    # Реєстрація обробників з файлу handlers.py
-    dp.include_router(handlers_router)
+    dp, user_ordering = create_dispatcher(throttling=throttling)
 
-    logger.info("🚀 Запуск бота...")
+    logger.info(f"🚀 Запуск бота ({mode})...")
     try:
         # Починаємо обробку оновлень
-        await dp.start_polling(bot)
+        if mode == "webhook":
+            await run_webhook(dp, bot, WebhookSettings.from_env(),
+                              metrics=lambda: {**user_ordering.metrics(), 'outbound': outbound.metrics(),
+                                               'throttling': throttling.metrics()})
+        else:
+            # Зареєстрований webhook блокує getUpdates (наприклад, після роботи в режимі webhook)
+            await bot.delete_webhook()
+            await dp.start_polling(bot, tasks_concurrency_limit=max_concurrent_updates)
+    finally:
+        # Записуємо відкладені зміни персонажів та закриваємо сесію бота при зупинці
+        shutdown_character_repositories()
+        logger.info(f"Черги оновлень користувачів: {user_ordering.metrics()}")
+        logger.info(f"Обмеження частоти команд: {throttling.metrics()}")
+        await dp.storage.close()
+        await outbound.drain()
+        logger.info(f"Вихідні повідомлення: {outbound.metrics()}")
+        await bot.session.close()
+
+async def _run_with_workers(bot: Bot, outbound: OutboundScheduler, throttling: ThrottlingMiddleware,
+                            mode: str, workers: int, max_concurrent_updates: int):
+    """Приймач оновлень, що розподіляє їх між процесами-обробниками."""
+    pool = WorkerPool(bot, workers, max_concurrent_updates=max_concurrent_updates)
+    receiver = create_receiver(pool, throttling)
+    pool.start()
+
+    logger.info(f"🚀 Запуск бота ({mode}, обробників: {workers})...")
+    try:
+        if mode == "webhook":
+            await run_webhook(receiver, bot, WebhookSettings.from_env(),
+                              metrics=lambda: {**pool.metrics(), 'outbound': outbound.metrics(),
+                                               'throttling': throttling.metrics()},
+                              allowed_updates=used_update_types())
+        else:
+            await bot.delete_webhook()
+            await receiver.start_polling(bot, allowed_updates=used_update_types(), close_bot_session=False)
     finally:
-        # Закриваємо сесію бота при зупинці
+        # Обробники дописують відповіді через сесію приймача, тож вона закривається останньою
+        await pool.stop(float(os.getenv("BOT_WORKERS_SHUTDOWN_TIMEOUT_SECONDS", "30")))
+        logger.info(f"Процеси-обробники: {pool.metrics()}")
+        logger.info(f"Обмеження частоти команд: {throttling.metrics()}")
+        await outbound.drain()
+        logger.info(f"Вихідні повідомлення: {outbound.metrics()}")
         await bot.session.close()
 
 def main():
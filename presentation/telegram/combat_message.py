@@ -0,0 +1,147 @@
+"""
+Одне повідомлення бою, що оновлюється на місці.
+
+Кнопки клавіатури бою (attack:1/2/3, flee) редагують повідомлення, з якого
+їх натиснули, замість надсилати нове на кожен хід. Редагування
+відкладаються на debounce_seconds і об'єднуються: якщо гравець натискає
+кнопки швидше, ніж бот встигає оновити повідомлення, Telegram отримає лише
+останній стан. Одночасно для повідомлення виконується не більше одного
+редагування, тож старіший стан не може перезаписати новіший. Редагування,
+що не змінює текст і клавіатуру, не надсилається.
+
+Змінні оточення (CombatMessageEditor.from_env):
+    COMBAT_EDIT_DEBOUNCE_MS - затримка перед редагуванням повідомлення (300).
+"""
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup
+
+logger = logging.getLogger(__name__)
+
+MessageKey = Tuple[int, int]
+
+
+@dataclass
+class CombatMessageStats:
+    """Лічильники редагувань для моніторингу."""
+    # Запити на оновлення повідомлення (по одному на хід).
+    requested: int = 0
+    # Запити, замінені новішим станом до відправки.
+    coalesced: int = 0
+    # Редагування, надіслані в Telegram.
+    edited: int = 0
+    # Редагування без змін, які не надсилались.
+    unchanged: int = 0
+    failed: int = 0
+
+
+@dataclass
+class _PendingEdit:
+    bot: Bot
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup]
+    # Стан ще не взято на відправку.
+    dirty: bool = True
+
+
+class CombatMessageEditor:
+    """
+    Відкладене редагування повідомлень бою з об'єднанням проміжних станів.
+
+    :param debounce_seconds: Скільки чекати нових ходів перед редагуванням.
+    :param max_tracked_messages: Скільки останніх показаних станів пам'ятати,
+        щоб не надсилати редагування без змін.
+    """
+    def __init__(self, debounce_seconds: float = 0.3, max_tracked_messages: int = 10_000):
+        self.debounce_seconds = debounce_seconds
+        self.max_tracked_messages = max_tracked_messages
+        self.stats = CombatMessageStats()
+        self._pending: Dict[MessageKey, _PendingEdit] = {}
+        self._rendered: "OrderedDict[MessageKey, Tuple[str, Any]]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls) -> 'CombatMessageEditor':
+        return cls(debounce_seconds=int(os.getenv('COMBAT_EDIT_DEBOUNCE_MS', '300')) / 1000)
+
+    def schedule(
+        self,
+        bot: Bot,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+    ) -> None:
+        """Запам'ятовує новий стан повідомлення; редагування буде надіслано пізніше."""
+        self.stats.requested += 1
+        key = (chat_id, message_id)
+        pending = self._pending.get(key)
+        if pending is not None:
+            if pending.dirty:
+                self.stats.coalesced += 1
+            pending.bot, pending.text, pending.reply_markup, pending.dirty = bot, text, reply_markup, True
+            return
+        self._pending[key] = _PendingEdit(bot, text, reply_markup)
+        task = asyncio.create_task(self._deliver(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        """Чекає надсилання всіх відкладених редагувань (при зупинці бота)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {'pending': len(self._pending), **asdict(self.stats)}
+
+    async def _deliver(self, key: MessageKey) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.debounce_seconds)
+                pending = self._pending[key]
+                pending.dirty = False
+                await self._edit(key, pending)
+                # Поки йшло редагування, гравець міг зробити ще хід
+                if not pending.dirty:
+                    break
+        finally:
+            del self._pending[key]
+
+    async def _edit(self, key: MessageKey, pending: _PendingEdit) -> None:
+        rendered = (pending.text, pending.reply_markup)
+        if self._rendered.get(key) == rendered:
+            self.stats.unchanged += 1
+            return
+        chat_id, message_id = key
+        try:
+            await pending.bot.edit_message_text(
+                text=pending.text,
+                chat_id=chat_id,
+                message_id=message_id,
+                reply_markup=pending.reply_markup,
+                parse_mode="HTML",
+            )
+        except TelegramBadRequest as e:
+            if "message is not modified" in e.message:
+                self.stats.unchanged += 1
+            else:
+                self.stats.failed += 1
+                logger.warning(f"Не вдалося оновити повідомлення бою {key}: {e.message}")
+                return
+        except Exception as e:
+            self.stats.failed += 1
+            logger.error(f"Помилка оновлення повідомлення бою {key}: {e}", exc_info=True)
+            return
+        else:
+            self.stats.edited += 1
+        self._rendered[key] = rendered
+        self._rendered.move_to_end(key)
+        while len(self._rendered) > self.max_tracked_messages:
+            self._rendered.popitem(last=False)
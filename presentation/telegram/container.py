@@ -0,0 +1,100 @@
+"""
+Композиційний корінь Telegram-бота.
+
+Container створюється один раз у bot.py і тримає довгоживучі сервіси:
+репозиторії ігрового контенту (JSON-файли читаються лише при створенні,
+а їхні кеші прогріваються між оновленнями) та доменні калькулятори, які не
+мають стану. DependencyMiddleware передає контейнер в обробники аргументом
+container.
+
+Об'єкти з часом життя одного оновлення - одиниця роботи (сесія бази та
+репозиторій персонажів) і сценарії, прив'язані до її репозиторію, -
+створюються контейнером на вимогу: unit_of_work() та фабрики сценаріїв.
+Одиницю роботи обробник відкриває сам, бо retry_on_conflict повторює
+команду з новою сесією.
+
+combat_messages - відкладене редагування повідомлень бою (combat_message.py),
+спільне для всіх оновлень, щоб ходи одного бою об'єднувались.
+"""
+import os
+from typing import Callable, Optional
+
+from application.use_cases.character import CreateCharacterUseCase, GetCharacterStatsUseCase
+from application.use_cases.character.travel import TravelUseCase
+from application.use_cases.combat.perform_attack_use_case import PerformAttackUseCase
+from application.use_cases.combat.start_combat import StartCombatUseCase
+from application.use_cases.events.generate_event_use_case import GenerateEventUseCase
+from domain.repositories.character_repository import ICharacterRepository
+from domain.services.combat_calculator import CombatCalculator
+from domain.services.event_generator import EventGenerator
+from domain.services.loot_generator import LootGenerator
+from domain.services.stats_calculator import StatsCalculator
+from infrastructure.persistence.repositories.json_enemy_repository import JsonEnemyRepository
+from infrastructure.persistence.repositories.json_item_repository import JsonItemRepository
+from infrastructure.persistence.repositories.json_location_repository import JsonLocationRepository
+from infrastructure.persistence.unit_of_work import SqlAlchemyUnitOfWork
+from presentation.telegram.combat_message import CombatMessageEditor
+
+# Шлях до ігрових даних
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+
+
+class Container:
+    """
+    Залежності обробників команд.
+
+    :param data_path: Каталог з JSON-файлами ігрового контенту.
+    :param unit_of_work_factory: Фабрика одиниць роботи (name, read_only);
+        у тестах замінюється одиницею роботи над тестовою сесією.
+    :param combat_messages: Редактор повідомлень бою; за замовчуванням -
+        згідно з COMBAT_EDIT_DEBOUNCE_MS.
+    """
+    def __init__(
+        self,
+        data_path: str = DATA_PATH,
+        unit_of_work_factory: Callable[..., SqlAlchemyUnitOfWork] = SqlAlchemyUnitOfWork,
+        combat_messages: Optional[CombatMessageEditor] = None,
+    ):
+        # --- Одиночні сервіси ---
+        self.item_repository = JsonItemRepository(data_path)
+        self.enemy_repository = JsonEnemyRepository(data_path)
+        self.location_repository = JsonLocationRepository(data_path)
+        self.stats_calculator = StatsCalculator(self.item_repository)
+        self.combat_calculator = CombatCalculator()
+        self.loot_generator = LootGenerator()
+        self.event_generator = EventGenerator()
+        self.combat_messages = combat_messages or CombatMessageEditor.from_env()
+
+        self._unit_of_work_factory = unit_of_work_factory
+
+    # --- Об'єкти одного оновлення ---
+
+    def unit_of_work(self, name: str, read_only: bool = False) -> SqlAlchemyUnitOfWork:
+        """Нова одиниця роботи для команди."""
+        return self._unit_of_work_factory(name=name, read_only=read_only)
+
+    def create_character(self, character_repo: ICharacterRepository) -> CreateCharacterUseCase:
+        return CreateCharacterUseCase(character_repo)
+
+    def character_stats(self, character_repo: ICharacterRepository) -> GetCharacterStatsUseCase:
+        return GetCharacterStatsUseCase(character_repo, self.stats_calculator)
+
+    def generate_event(self, character_repo: ICharacterRepository) -> GenerateEventUseCase:
+        return GenerateEventUseCase(character_repo, self.location_repository, self.event_generator)
+
+    def start_combat(self, character_repo: ICharacterRepository) -> StartCombatUseCase:
+        return StartCombatUseCase(
+            character_repo, self.enemy_repository, self.stats_calculator, self.location_repository
+        )
+
+    def perform_attack(self, character_repo: ICharacterRepository) -> PerformAttackUseCase:
+        return PerformAttackUseCase(
+            character_repo,
+            self.enemy_repository,
+            self.stats_calculator,
+            self.combat_calculator,
+            self.loot_generator
+        )
+
+    def travel(self, character_repo: ICharacterRepository) -> TravelUseCase:
+        return TravelUseCase(character_repo, self.location_repository)
@@ -0,0 +1,54 @@
+"""
+Налаштування диспетчера обробників команд.
+
+Спільне для запуску в одному процесі (bot.py) та для процесів-обробників
+(workers.py), щоб обидва режими мали однакові middleware та обробники.
+"""
+from typing import Optional, Tuple
+
+from aiogram import Dispatcher
+from aiogram.fsm.storage.base import BaseStorage
+
+from presentation.telegram.container import Container
+from presentation.telegram.handlers import router as handlers_router
+from presentation.telegram.middlewares import DependencyMiddleware, ThrottlingMiddleware, UserOrderingMiddleware
+from presentation.telegram.storage import create_fsm_storage
+
+
+def create_dispatcher(
+    container: Optional[Container] = None,
+    storage: Optional[BaseStorage] = None,
+    throttling: Optional[ThrottlingMiddleware] = None,
+) -> Tuple[Dispatcher, UserOrderingMiddleware]:
+    """
+    Створює диспетчер з обробниками команд.
+
+    :param storage: Сховище FSM; за замовчуванням - згідно з FSM_STORAGE
+        (див. storage.py). Закривається викликом dp.storage.close().
+    :param throttling: Обмеження частоти команд; без нього команди не
+        обмежуються (з процесами-обробниками ліміти перевіряє приймач).
+    :return: Диспетчер та middleware черг користувачів (для метрик).
+    """
+    dp = Dispatcher(storage=storage or create_fsm_storage())
+
+    # Флуд командами відкидається до черги користувача та звернень до бази
+    if throttling is not None:
+        dp.update.outer_middleware(throttling)
+
+    # Оновлення одного користувача виконуються по черзі, різних - паралельно
+    user_ordering = UserOrderingMiddleware()
+    dp.update.outer_middleware(user_ordering)
+
+    # Композиційний корінь: сервіси створюються один раз і передаються в обробники
+    container = container or Container()
+    dp.update.outer_middleware(DependencyMiddleware(container))
+
+    async def flush_combat_messages():
+        # Відкладені редагування повідомлень бою надсилаються до закриття сесії бота
+        await container.combat_messages.flush()
+
+    dp.shutdown.register(flush_combat_messages)
+
+    # Реєстрація обробників з файлу handlers.py
+    dp.include_router(handlers_router)
+    return dp, user_ordering
@@ -36,8 +36,13 @@ def format_stats_response(response: GetCharacterStatsResponse) -> str:
     )
 
 
-def format_attack_response(response: PerformAttackResponse) -> str:
-    """Форматує текстову відповідь для результатів раунду бою."""
+def format_attack_response(response: PerformAttackResponse, with_commands: bool = True) -> str:
+    """
+    Форматує текстову відповідь для результатів раунду бою.
+
+    :param with_commands: Підказувати команди (/attack). Повідомлення бою,
+        що редагується кнопками, їх не містить.
+    """
     text = "⚔️ <b>РАУНД БОЮ</b>\n\n"
 
     # Атаки гравця
@@ -73,12 +78,12 @@ def format_attack_response(response: PerformAttackResponse) -> str:
 
         text += "\nВикористовуйте /explore щоб продовжити пригоди!"
     else:
-        # Показуємо здоров'я
+        # Показуємо здоров'я після останньої атаки раунду
         if response.enemy_attacks:
-            text += f"\n❤️ Ваше здоров'я: {response.enemy_attacks[0].defender_health_remaining}\n"
+            text += f"\n❤️ Ваше здоров'я: {response.enemy_attacks[-1].defender_health_remaining}\n"
         if response.player_attacks:
-            text += f"🧟 Здоров'я ворога: {response.player_attacks[0].defender_health_remaining}\n"
+            text += f"🧟 Здоров'я ворога: {response.player_attacks[-1].defender_health_remaining}\n"
 
-        text += "\nПродовжуйте битись: /attack"
+        text += "\nПродовжуйте битись: /attack" if with_commands else "\nПродовжуйте битись!"
 
     return text
\ No newline at end of file
@@ -1,52 +1,48 @@
 """
 Обробники команд та повідомлень для Telegram-бота.
+
+Залежності (репозиторії контенту, калькулятори, одиниці роботи та
+сценарії) обробники отримують з аргументу container - див. container.py.
+
+Бій ведеться кнопками під одним повідомленням: обробники attack:N та flee
+оновлюють його через container.combat_messages (див. combat_message.py).
 """
-import os
 import logging
-from aiogram import Router, F
+import random
+from typing import Optional, Tuple
+
+from aiogram import Bot, Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 
-from infrastructure.persistence.database.session import get_session
-from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
-from infrastructure.persistence.repositories.json_item_repository import JsonItemRepository
-from infrastructure.persistence.repositories.json_enemy_repository import JsonEnemyRepository
-from infrastructure.persistence.repositories.json_location_repository import JsonLocationRepository
-
-from domain.services.stats_calculator import StatsCalculator
-from domain.services.combat_calculator import CombatCalculator
-from domain.services.event_generator import EventGenerator
-from domain.services.loot_generator import LootGenerator
-
-from application.use_cases.character import CreateCharacterUseCase, GetCharacterStatsUseCase
-from application.use_cases.character.travel import TravelUseCase
-from application.use_cases.combat.start_combat import StartCombatUseCase
-from application.use_cases.combat.perform_attack_use_case import PerformAttackUseCase
-from application.use_cases.events.generate_event_use_case import GenerateEventUseCase
+from domain.exceptions import ConcurrencyConflictError, UserLockTimeoutError
+
+from application.use_cases.combat.start_combat import StartCombatRequest
+from application.use_cases.combat.perform_attack_use_case import PerformAttackRequest
+from application.use_cases.events.generate_event_use_case import GenerateEventRequest
 from application.dto.character_dto import CreateCharacterRequest, GetCharacterStatsRequest
 from application.dto.travel_dto import TravelRequest
 
+from .container import Container
 from .formatters import format_stats_response, format_attack_response
-from .keyboards import get_travel_keyboard
+from .keyboards import get_combat_keyboard, get_travel_keyboard
+from .retry import retry_on_conflict
 
 logger = logging.getLogger(__name__)
 router = Router()
 
-# Шлях до ігрових даних
-DATA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
-
 
 @router.message(Command("start"))
-async def cmd_start(message: Message):
+async def cmd_start(message: Message, container: Container):
     """Обробник команди /start."""
     if not message.from_user:
         logger.warning("Повідомлення без користувача в cmd_start.")
         return
     user_id = message.from_user.id
 
-    with get_session() as session:
-        character_repo = PostgresCharacterRepository(session)
-        existing = character_repo.get_by_telegram_user_id(user_id)
+    with container.unit_of_work(name="start", read_only=True) as uow:
+        character_repo = uow.characters
+        existing = character_repo.get_summary(user_id)
 
         if existing:
             await message.answer(
@@ -64,20 +60,16 @@ async def cmd_start(message: Message):
 
 
 @router.message(Command("stats"))
-async def cmd_stats(message: Message):
+async def cmd_stats(message: Message, container: Container):
     """Обробник команди /stats."""
     if not message.from_user:
         logger.warning("Повідомлення без користувача в cmd_stats.")
         return
     user_id = message.from_user.id
 
-    with get_session() as session:
+    with container.unit_of_work(name="stats", read_only=True) as uow:
         try:
-            character_repo = PostgresCharacterRepository(session)
-            item_repo = JsonItemRepository(DATA_PATH)
-            stats_calculator = StatsCalculator(item_repo)
-
-            use_case = GetCharacterStatsUseCase(character_repo, stats_calculator)
+            use_case = container.character_stats(uow.characters)
             request = GetCharacterStatsRequest(telegram_user_id=user_id)
             response = use_case.execute(request)
 
@@ -89,17 +81,19 @@ async def cmd_stats(message: Message):
 
 
 @router.message(Command("explore"))
-async def cmd_explore(message: Message):
+@retry_on_conflict()
+async def cmd_explore(message: Message, container: Container):
     """Обробник команди /explore."""
     if not message.from_user:
         logger.warning("Повідомлення без користувача в cmd_explore.")
         return
     user_id = message.from_user.id
 
-    with get_session() as session:
+    with container.unit_of_work(name="explore") as uow:
         try:
-            character_repo = PostgresCharacterRepository(session)
-            character = character_repo.get_by_telegram_user_id(user_id)
+            character_repo = uow.characters
+            await uow.lock_user_async(user_id)
+            character = character_repo.get_for_combat(user_id)
 
             if not character:
                 await message.answer("❌ Спочатку створіть персонажа: /start")
@@ -109,32 +103,23 @@ async def cmd_explore(message: Message):
                 await message.answer("⚔️ Ви вже в бою! Використовуйте /attack")
                 return
 
-            event_generator = EventGenerator()
-            location_repo = JsonLocationRepository(DATA_PATH)
-            use_case = GenerateEventUseCase(character_repo, location_repo, event_generator)
-            from application.use_cases.events.generate_event_use_case import GenerateEventRequest
+            use_case = container.generate_event(character_repo)
             request = GenerateEventRequest(character_id=character.id)
             response = use_case.execute(request)
 
             if response.event_type == "combat":
-                enemy_repo = JsonEnemyRepository(DATA_PATH)
-                item_repo = JsonItemRepository(DATA_PATH)
-                stats_calculator = StatsCalculator(item_repo)
-                location_repo = JsonLocationRepository(DATA_PATH) # Потрібен для вибору ворога
-                start_combat_uc = StartCombatUseCase(
-                    character_repo, enemy_repo, stats_calculator, location_repo
-                )
-                from application.use_cases.combat.start_combat import StartCombatRequest
+                start_combat_uc = container.start_combat(character_repo)
                 combat_response = start_combat_uc.execute(
                     StartCombatRequest(character_id=character.id)
                 )
-                session.commit()
+                uow.commit()
                 await message.answer(
                     f"⚔️ <b>БІЙ!</b>\n\n"
                     f"{combat_response.message}\n\n"
                     f"🧟 Ворог: {combat_response.enemy_name}\n"
                     f"❤️ Здоров'я ворога: {combat_response.enemy_health}\n\n"
-                    f"Використовуйте /attack щоб атакувати!",
+                    f"Атакуйте кнопками нижче або командою /attack!",
+                    reply_markup=get_combat_keyboard(),
                     parse_mode="HTML"
                 )
             else:
@@ -143,23 +128,27 @@ async def cmd_explore(message: Message):
                     f"Продовжуйте дослідження: /explore"
                 )
 
+        except (ConcurrencyConflictError, UserLockTimeoutError):
+            raise
         except Exception as e:
             logger.error(f"Помилка в cmd_explore: {e}", exc_info=True)
             await message.answer(f"❌ Помилка: {str(e)}")
 
 
 @router.message(Command("attack"))
-async def cmd_attack(message: Message):
+@retry_on_conflict()
+async def cmd_attack(message: Message, container: Container):
     """Обробник команди /attack."""
     if not message.from_user:
         logger.warning("Повідомлення без користувача в cmd_attack.")
         return
     user_id = message.from_user.id
 
-    with get_session() as session:
+    with container.unit_of_work(name="attack") as uow:
         try:
-            character_repo = PostgresCharacterRepository(session)
-            character = character_repo.get_by_telegram_user_id(user_id)
+            character_repo = uow.characters
+            await uow.lock_user_async(user_id)
+            character = character_repo.get_for_combat(user_id)
 
             if not character:
                 await message.answer("❌ Спочатку створіть персонажа: /start")
@@ -172,46 +161,125 @@ async def cmd_attack(message: Message):
                 )
                 return
 
-            enemy_repo = JsonEnemyRepository(DATA_PATH)
-            item_repo = JsonItemRepository(DATA_PATH)
-            stats_calculator = StatsCalculator(item_repo)
-            combat_calculator = CombatCalculator()
-            loot_generator = LootGenerator()
-            use_case = PerformAttackUseCase(
-                character_repo,
-                enemy_repo,
-                stats_calculator,
-                combat_calculator,
-                loot_generator
-            )
-
-            from application.use_cases.combat.perform_attack_use_case import PerformAttackRequest
+            use_case = container.perform_attack(character_repo)
             request = PerformAttackRequest(character_id=character.id, number_of_attacks=1)
             response = use_case.execute(request)
-            session.commit()
+            uow.commit()
 
             text = format_attack_response(response)
-            await message.answer(text, parse_mode="HTML")
+            # Нове повідомлення бою: наступні ходи можна робити кнопками під ним
+            keyboard = None if response.combat_ended else get_combat_keyboard()
+            await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
 
         except ValueError as e:
             await message.answer(f"❌ {str(e)}")
+        except (ConcurrencyConflictError, UserLockTimeoutError):
+            raise
         except Exception as e:
             logger.error(f"Помилка в cmd_attack: {e}", exc_info=True)
             await message.answer(f"❌ Помилка: {str(e)}")
 
 
+@router.callback_query(F.data.startswith("attack:"))
+@retry_on_conflict()
+async def on_attack_callback(callback: CallbackQuery, bot: Bot, container: Container):
+    """Обробник кнопок атаки: хід бою оновлює повідомлення, з якого натиснули кнопку."""
+    if not callback.from_user or not callback.message:
+        return
+    user_id = callback.from_user.id
+    try:
+        number_of_attacks = int(callback.data.split(':')[1])
+    except ValueError:
+        number_of_attacks = 0
+    if not 1 <= number_of_attacks <= 3:
+        await callback.answer("Невідома дія.")
+        return
+
+    with container.unit_of_work(name="attack_callback") as uow:
+        try:
+            character_repo = uow.characters
+            await uow.lock_user_async(user_id)
+            character = character_repo.get_for_combat(user_id)
+            if not character:
+                await callback.answer("Персонаж не знайдений.", show_alert=True)
+                return
+            if not character.combat_state:
+                await callback.answer("Бій уже завершено. /explore")
+                return
+
+            use_case = container.perform_attack(character_repo)
+            request = PerformAttackRequest(character_id=character.id, number_of_attacks=number_of_attacks)
+            response = use_case.execute(request)
+            uow.commit()
+
+        except ValueError as e:
+            await callback.answer(f"❌ {str(e)}", show_alert=True)
+            return
+        except (ConcurrencyConflictError, UserLockTimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Помилка в on_attack_callback: {e}", exc_info=True)
+            await callback.answer(f"Помилка: {str(e)}", show_alert=True)
+            return
+
+    keyboard = None if response.combat_ended else get_combat_keyboard()
+    container.combat_messages.schedule(
+        bot, callback.message.chat.id, callback.message.message_id,
+        format_attack_response(response, with_commands=False), keyboard,
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "flee")
+@retry_on_conflict()
+async def on_flee_callback(callback: CallbackQuery, bot: Bot, container: Container):
+    """Обробник кнопки втечі: результат показується в повідомленні бою."""
+    if not callback.from_user or not callback.message:
+        return
+    user_id = callback.from_user.id
+
+    with container.unit_of_work(name="flee_callback") as uow:
+        try:
+            character_repo = uow.characters
+            await uow.lock_user_async(user_id)
+            character = character_repo.get_for_combat(user_id)
+            if not character:
+                await callback.answer("Персонаж не знайдений.", show_alert=True)
+                return
+            if not character.combat_state:
+                await callback.answer("Бій уже завершено. /explore")
+                return
+
+            result = _attempt_flee(character, character_repo, uow, container, with_commands=False)
+
+        except (ConcurrencyConflictError, UserLockTimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Помилка в on_flee_callback: {e}", exc_info=True)
+            await callback.answer(f"Помилка: {str(e)}", show_alert=True)
+            return
+
+    if result is not None:
+        text, in_combat = result
+        container.combat_messages.schedule(
+            bot, callback.message.chat.id, callback.message.message_id,
+            text, get_combat_keyboard() if in_combat else None,
+        )
+    await callback.answer()
+
+
 @router.message(Command("travel"))
-async def cmd_travel(message: Message):
+async def cmd_travel(message: Message, container: Container):
     """Обробник команди /travel."""
     if not message.from_user:
         logger.warning("Повідомлення без користувача в cmd_travel.")
         return
     user_id = message.from_user.id
 
-    with get_session() as session:
+    with container.unit_of_work(name="travel", read_only=True) as uow:
         try:
-            character_repo = PostgresCharacterRepository(session)
-            character = character_repo.get_by_telegram_user_id(user_id)
+            character_repo = uow.characters
+            character = character_repo.get_for_combat(user_id)
 
             if not character:
                 await message.answer("❌ Спочатку створіть персонажа: /start")
@@ -221,7 +289,7 @@ async def cmd_travel(message: Message):
                 await message.answer("⚔️ Ви не можете подорожувати під час бою!")
                 return
 
-            location_repo = JsonLocationRepository(DATA_PATH)
+            location_repo = container.location_repository
             current_location = location_repo.get(character.location_id)
 
             if not current_location or not current_location.connected_locations:
@@ -251,7 +319,8 @@ async def cmd_travel(message: Message):
 
 
 @router.callback_query(F.data.startswith("travel_to:"))
-async def on_travel_callback(callback: CallbackQuery):
+@retry_on_conflict()
+async def on_travel_callback(callback: CallbackQuery, container: Container):
     """Обробник для кнопок подорожі."""
     if not callback.from_user:
         return
@@ -259,19 +328,19 @@ async def on_travel_callback(callback: CallbackQuery):
     user_id = callback.from_user.id
     destination_id = callback.data.split(':')[1]
 
-    with get_session() as session:
+    with container.unit_of_work(name="travel_callback") as uow:
         try:
-            character_repo = PostgresCharacterRepository(session)
-            character = character_repo.get_by_telegram_user_id(user_id)
+            character_repo = uow.characters
+            await uow.lock_user_async(user_id)
+            character = character_repo.get_for_combat(user_id)
             if not character:
                 await callback.answer("Персонаж не знайдений.", show_alert=True)
                 return
 
-            location_repo = JsonLocationRepository(DATA_PATH)
-            use_case = TravelUseCase(character_repo, location_repo)
+            use_case = container.travel(character_repo)
             request = TravelRequest(character_id=character.id, destination_id=destination_id)
             response = use_case.execute(request)
-            session.commit()
+            uow.commit()
 
             if response.success:
                 await callback.message.edit_text(
@@ -281,6 +350,8 @@ async def on_travel_callback(callback: CallbackQuery):
             else:
                 await callback.message.edit_text(f"❌ {response.message}")
 
+        except (ConcurrencyConflictError, UserLockTimeoutError):
+            raise
         except Exception as e:
             logger.error(f"Помилка в on_travel_callback: {e}", exc_info=True)
             await callback.answer(f"Помилка: {str(e)}", show_alert=True)
@@ -313,16 +384,16 @@ async def cmd_help(message: Message):
 
 
 @router.message(Command("inventory"))
-async def cmd_inventory(message: Message):
+async def cmd_inventory(message: Message, container: Container):
     """Обробник команди /inventory - показ інвентаря"""
     if not message.from_user:
         return
     user_id = message.from_user.id
 
-    with get_session() as session:
+    with container.unit_of_work(name="inventory", read_only=True) as uow:
         try:
-            character_repo = PostgresCharacterRepository(session)
-            character = character_repo.get_by_telegram_user_id(user_id)
+            character_repo = uow.characters
+            character = character_repo.get_for_inventory(user_id)
 
             if not character:
                 await message.answer("❌ Спочатку створіть персонажа: /start")
@@ -333,7 +404,7 @@ async def cmd_inventory(message: Message):
                 return
 
             # Завантажуємо предмети
-            item_repo = JsonItemRepository(DATA_PATH)
+            item_repo = container.item_repository
             # items = item_repo.get_many_by_ids(character.inventory)
 
             # Рахуємо кількість кожного предмета
@@ -371,24 +442,25 @@ async def cmd_inventory(message: Message):
 
 
 @router.message(Command("rest"))
-async def cmd_rest(message: Message):
+@retry_on_conflict()
+async def cmd_rest(message: Message, container: Container):
     """Обробник команди /rest - відпочинок в місті"""
     if not message.from_user:
         return
     user_id = message.from_user.id
 
-    with get_session() as session:
+    with container.unit_of_work(name="rest") as uow:
         try:
-            character_repo = PostgresCharacterRepository(session)
-            character = character_repo.get_by_telegram_user_id(user_id)
+            character_repo = uow.characters
+            await uow.lock_user_async(user_id)
+            character = character_repo.get_for_combat(user_id)
 
             if not character:
                 await message.answer("❌ Спочатку створіть персонажа: /start")
                 return
 
             # Перевіряємо чи персонаж в місті
-            location_repo = JsonLocationRepository(DATA_PATH)
-            location = location_repo.get(character.location_id)
+            location = container.location_repository.get(character.location_id)
 
             if not location or location.type != "town":
                 await message.answer(
@@ -403,9 +475,7 @@ async def cmd_rest(message: Message):
                 return
 
             # Розраховуємо максимальні значення
-            item_repo = JsonItemRepository(DATA_PATH)
-            stats_calculator = StatsCalculator(item_repo)
-            stats = stats_calculator.calculate_total_stats(character)
+            stats = container.stats_calculator.calculate_total_stats(character)
 
             # Відновлюємо здоров'я та ману
             health_restored = stats.max_health - character.current_health
@@ -415,7 +485,7 @@ async def cmd_rest(message: Message):
             character.current_mana = stats.max_mana
 
             character_repo.save(character)
-            session.commit()
+            uow.commit()
 
             await message.answer(
                 f"😴 <b>Ви відпочили в таверні!</b>\n\n"
@@ -425,22 +495,88 @@ async def cmd_rest(message: Message):
                 parse_mode="HTML"
             )
 
+        except (ConcurrencyConflictError, UserLockTimeoutError):
+            raise
         except Exception as e:
             logger.error(f"Помилка в cmd_rest: {e}", exc_info=True)
             await message.answer(f"❌ Помилка: {str(e)}")
 
 
+def _attempt_flee(
+    character, character_repo, uow, container: Container, with_commands: bool = True
+) -> Optional[Tuple[str, bool]]:
+    """
+    Спроба втечі з бою; зміни персонажа фіксуються в uow.
+
+    :param with_commands: Підказувати команди бою (/attack, /flee); для
+        повідомлення, що редагується кнопками, - False.
+
+    :return: Текст відповіді та чи триває бій, або None, якщо ворога не знайдено.
+    """
+    # Шанс на втечу залежить від спритності
+    flee_chance = min(0.5 + (character.base_stats.dexterity * 0.02), 0.9)
+
+    if random.random() < flee_chance:
+        # Успішна втеча
+        character.combat_state = None
+        character_repo.save(character)
+        uow.commit()
+        return (
+            "🏃 <b>Ви успішно втекли з бою!</b>\n\n"
+            "Можливо варто повернутись в місто та відпочити? /travel",
+            False,
+        )
+
+    # Невдала втеча - ворог атакує
+    enemy = container.enemy_repository.get_by_id(character.combat_state['enemy_id'])
+    if not enemy:
+        return None
+    enemy.current_health = character.combat_state['enemy_current_health']
+
+    player_stats = container.stats_calculator.calculate_total_stats(character)
+    enemy_stats = enemy.stats
+
+    # Ворог атакує один раз
+    is_hit, is_crit, damage = container.combat_calculator.perform_single_attack(
+        enemy_stats, player_stats
+    )
+
+    if not is_hit:
+        return (
+            "❌ Втеча не вдалась, але ворог промахнувся!\n\n"
+            + ("Спробуйте ще раз: /flee або атакуйте: /attack" if with_commands
+               else "Спробуйте ще раз або атакуйте!"),
+            True,
+        )
+
+    character.take_damage(damage)
+    character_repo.save(character)
+    uow.commit()
+
+    crit_text = "💥 КРИТИЧНИЙ УДАР! " if is_crit else ""
+    return (
+        f"❌ <b>Втеча не вдалась!</b>\n\n"
+        f"Ворог встиг вас вдарити:\n"
+        f"{crit_text}Урон: {damage}\n\n"
+        f"❤️ Ваше здоров'я: {character.current_health}\n\n"
+        + ("Продовжуйте битись: /attack" if with_commands else "Продовжуйте битись!"),
+        True,
+    )
+
+
 @router.message(Command("flee"))
-async def cmd_flee(message: Message):
+@retry_on_conflict()
+async def cmd_flee(message: Message, container: Container):
     """Обробник команди /flee - втеча з бою"""
     if not message.from_user:
         return
     user_id = message.from_user.id
 
-    with get_session() as session:
+    with container.unit_of_work(name="flee") as uow:
         try:
-            character_repo = PostgresCharacterRepository(session)
-            character = character_repo.get_by_telegram_user_id(user_id)
+            character_repo = uow.characters
+            await uow.lock_user_async(user_id)
+            character = character_repo.get_for_combat(user_id)
 
             if not character:
                 await message.answer("❌ Спочатку створіть персонажа: /start")
@@ -450,68 +586,21 @@ async def cmd_flee(message: Message):
                 await message.answer("❌ Ви не в бою!")
                 return
 
-            # Шанс на втечу залежить від спритності
-            import random
-            flee_chance = min(0.5 + (character.base_stats.dexterity * 0.02), 0.9)
-
-            if random.random() < flee_chance:
-                # Успішна втеча
-                character.combat_state = None
-                character_repo.save(character)
-                session.commit()
-
-                await message.answer(
-                    "🏃 <b>Ви успішно втекли з бою!</b>\n\n"
-                    "Можливо варто повернутись в місто та відпочити? /travel",
-                    parse_mode="HTML"
-                )
-            else:
-                # Невдала втеча - ворог атакує
-                enemy_repo = JsonEnemyRepository(DATA_PATH)
-                enemy = enemy_repo.get_by_id(character.combat_state['enemy_id'])
-
-                if enemy:
-                    enemy.current_health = character.combat_state['enemy_current_health']
-
-                    item_repo = JsonItemRepository(DATA_PATH)
-                    stats_calculator = StatsCalculator(item_repo)
-                    combat_calculator = CombatCalculator()
-
-                    player_stats = stats_calculator.calculate_total_stats(character)
-                    enemy_stats = enemy.stats
-
-                    # Ворог атакує один раз
-                    is_hit, is_crit, damage = combat_calculator.perform_single_attack(
-                        enemy_stats, player_stats
-                    )
-
-                    if is_hit:
-                        character.take_damage(damage)
-                        character_repo.save(character)
-                        session.commit()
-
-                        crit_text = "💥 КРИТИЧНИЙ УДАР! " if is_crit else ""
-                        await message.answer(
-                            f"❌ <b>Втеча не вдалась!</b>\n\n"
-                            f"Ворог встиг вас вдарити:\n"
-                            f"{crit_text}Урон: {damage}\n\n"
-                            f"❤️ Ваше здоров'я: {character.current_health}\n\n"
-                            f"Продовжуйте битись: /attack",
-                            parse_mode="HTML"
-                        )
-                    else:
-                        await message.answer(
-                            "❌ Втеча не вдалась, але ворог промахнувся!\n\n"
-                            "Спробуйте ще раз: /flee або атакуйте: /attack"
-                        )
+            result = _attempt_flee(character, character_repo, uow, container)
+            if result is not None:
+                text, _ = result
+                await message.answer(text, parse_mode="HTML")
 
+        except (ConcurrencyConflictError, UserLockTimeoutError):
+            raise
         except Exception as e:
             logger.error(f"Помилка в cmd_flee: {e}", exc_info=True)
             await message.answer(f"❌ Помилка: {str(e)}")
 
 
 @router.message()
-async def handle_text(message: Message):
+@retry_on_conflict()
+async def handle_text(message: Message, container: Container):
     """Обробка текстових повідомлень для створення персонажа."""
     if not message.from_user:
         logger.warning("Повідомлення без користувача в handle_text.")
@@ -524,9 +613,10 @@ async def handle_text(message: Message):
     user_id = message.from_user.id
     character_name = message.text.strip()
 
-    with get_session() as session:
-        character_repo = PostgresCharacterRepository(session)
-        existing = character_repo.get_by_telegram_user_id(user_id)
+    with container.unit_of_work(name="handle_text") as uow:
+        character_repo = uow.characters
+        await uow.lock_user_async(user_id)
+        existing = character_repo.get_summary(user_id)
 
         if existing:
             await message.answer(
@@ -535,13 +625,13 @@ async def handle_text(message: Message):
             return
 
         try:
-            use_case = CreateCharacterUseCase(character_repo)
+            use_case = container.create_character(character_repo)
             request = CreateCharacterRequest(
                 telegram_user_id=user_id,
                 character_name=character_name
             )
             response = use_case.execute(request)
-            session.commit()
+            uow.commit()
 
             await message.answer(
                 f"✅ {response.message}\n\n"
@@ -552,6 +642,8 @@ async def handle_text(message: Message):
             )
         except ValueError as e:
             await message.answer(f"❌ {str(e)}")
+        except (ConcurrencyConflictError, UserLockTimeoutError):
+            raise
         except Exception as e:
             logger.error(f"Помилка створення персонажа: {e}", exc_info=True)
             await message.answer(f"❌ Помилка: {str(e)}")
@@ -0,0 +1,8 @@
+"""
+Middleware диспетчера Telegram-бота.
+"""
+from .dependencies import DependencyMiddleware
+from .throttling import RateLimit, ThrottlingMiddleware
+from .user_ordering import KeyedLock, UserOrderingMiddleware
+
+__all__ = ["DependencyMiddleware", "KeyedLock", "RateLimit", "ThrottlingMiddleware", "UserOrderingMiddleware"]
@@ -0,0 +1,29 @@
+"""
+Передача залежностей в обробники команд.
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from presentation.telegram.container import Container
+
+
+class DependencyMiddleware(BaseMiddleware):
+    """
+    Зовнішній middleware оновлень, що кладе композиційний корінь у
+    data['container']: aiogram передає його обробникам, які мають
+    аргумент container. Сервіси створюються один раз при запуску бота,
+    а не в кожному оновленні.
+    """
+    def __init__(self, container: Container):
+        self.container = container
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        data['container'] = self.container
+        return await handler(event, data)
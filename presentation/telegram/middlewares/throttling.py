@@ -0,0 +1,205 @@
+"""
+Обмеження частоти команд кожного користувача.
+
+Гравець, що затиснув кнопку або надсилає /attack десятки разів на секунду,
+інакше ставив би кожну команду в свою чергу (UserOrderingMiddleware), і кожна
+відкривала б транзакцію в базі. Middleware рахує оновлення користувача в
+ковзному вікні окремо для кожної команди і відкидає зайві ще до черги
+користувача та залежностей обробника - без жодного звернення до бази.
+
+Команда визначається за текстом повідомлення (/attack@bot -> attack) або за
+префіксом даних кнопки до двокрапки (attack:2 -> attack, travel_to:forest ->
+travel_to); команди без власного ліміту рахуються разом під ліміт "*",
+тож /a1, /a2, ... не обходять його і не створюють нових лічильників. На
+відкинуте оновлення користувач отримує відповідь з часом очікування, але не
+частіше, ніж раз на cooldown_reply_seconds, тож сам флуд не перетворюється
+на потік вихідних повідомлень. Натискання кнопки відповідається завжди
+(порожній answerCallbackQuery - не повідомлення в чат), інакше Telegram
+показує індикатор завантаження до тайм-ауту.
+
+Змінні оточення (ThrottlingMiddleware.from_env):
+    THROTTLE_LIMITS - ліміти через кому у форматі команда=кількість/секунди
+        (attack=5/1,explore=3/1,flee=3/1,travel_to=3/1,rest=2/5,*=10/1);
+        порожній рядок вимикає обмеження.
+    THROTTLE_COOLDOWN_REPLY_SECONDS - як часто відповідати користувачу
+        про перевищення ліміту (5).
+"""
+import logging
+import math
+import os
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject, Update, User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = "attack=5/1,explore=3/1,flee=3/1,travel_to=3/1,rest=2/5,*=10/1"
+DEFAULT_COMMAND = "*"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Не більше max_updates оновлень за будь-які window_seconds секунд."""
+    max_updates: int
+    window_seconds: float
+
+
+def parse_limits(value: str) -> Dict[str, RateLimit]:
+    """Розбирає THROTTLE_LIMITS: "attack=5/1,*=10/1" -> {команда: RateLimit}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        try:
+            command, rate = item.split("=")
+            max_updates, window_seconds = rate.split("/")
+            limit = RateLimit(int(max_updates), float(window_seconds))
+        except ValueError:
+            raise ValueError(f"Некоректний ліміт THROTTLE_LIMITS: {item!r} (очікується команда=кількість/секунди)")
+        if limit.max_updates < 1 or limit.window_seconds <= 0:
+            raise ValueError(f"Некоректний ліміт THROTTLE_LIMITS: {item!r}")
+        limits[command.strip().lstrip("/").lower()] = limit
+    return limits
+
+
+def command_of(event: TelegramObject) -> str:
+    """Назва команди оновлення: /attack -> attack, кнопка attack:2 -> attack."""
+    if isinstance(event, Update):
+        event = event.event
+    if isinstance(event, Message) and event.text and event.text.startswith("/"):
+        return event.text.split(maxsplit=1)[0][1:].split("@")[0].lower()
+    if isinstance(event, CallbackQuery) and event.data:
+        return event.data.split(":", 1)[0]
+    return DEFAULT_COMMAND
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Зовнішній middleware оновлень з ковзним вікном на користувача та команду.
+
+    Реєструється на dp.update першим з власних middleware (до
+    UserOrderingMiddleware та DependencyMiddleware). Оновлення без
+    користувача не обмежуються.
+
+    :param limits: Ліміти за назвою команди; ключ "*" - для решти команд.
+        Команди без ліміту (і без "*") не обмежуються.
+    :param cooldown_reply_seconds: Мінімальний інтервал між відповідями
+        одному користувачу про перевищення ліміту.
+    :param max_tracked_users: Після скількох вікон видаляти застарілі.
+    :param clock: Джерело часу в секундах (для тестів).
+    """
+    def __init__(
+        self,
+        limits: Dict[str, RateLimit],
+        cooldown_reply_seconds: float = 5.0,
+        max_tracked_users: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = limits
+        self.cooldown_reply_seconds = cooldown_reply_seconds
+        self.max_tracked_users = max_tracked_users
+        self.clock = clock
+        # Час оновлень у поточному вікні для кожної пари (користувач, команда).
+        self._windows: Dict[Tuple[int, str], Deque[float]] = {}
+        # Коли користувач востаннє отримав відповідь про перевищення ліміту.
+        self._replied_at: Dict[int, float] = {}
+        self._longest_window = max((limit.window_seconds for limit in limits.values()), default=0.0)
+
+        # --- Метрики ---
+        self.allowed: Counter = Counter()
+        self.dropped: Counter = Counter()
+        self.cooldown_replies = 0
+
+    @classmethod
+    def from_env(cls) -> 'ThrottlingMiddleware':
+        return cls(
+            limits=parse_limits(os.getenv('THROTTLE_LIMITS', DEFAULT_LIMITS)),
+            cooldown_reply_seconds=float(os.getenv('THROTTLE_COOLDOWN_REPLY_SECONDS', '5')),
+        )
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        if user is None or not self.limits:
+            return await handler(event, data)
+
+        command = self.limit_key(command_of(event))
+        retry_after = self.check(user.id, command)
+        if retry_after is None:
+            self.allowed[command] += 1
+            return await handler(event, data)
+
+        self.dropped[command] += 1
+        await self._reply_cooldown(event, user.id, retry_after)
+        return None
+
+    def check(self, telegram_user_id: int, command: str) -> Optional[float]:
+        """
+        Рахує оновлення у вікні команди.
+
+        :return: None, якщо оновлення дозволено, інакше через скільки секунд
+            звільниться місце у вікні.
+        """
+        command = self.limit_key(command)
+        limit = self.limits.get(command)
+        if limit is None:
+            return None
+        now = self.clock()
+        key = (telegram_user_id, command)
+        window = self._windows.get(key)
+        if window is None:
+            if len(self._windows) >= self.max_tracked_users:
+                self._prune(now)
+            window = self._windows[key] = deque()
+        while window and window[0] <= now - limit.window_seconds:
+            window.popleft()
+        if len(window) >= limit.max_updates:
+            return window[0] + limit.window_seconds - now
+        window.append(now)
+        return None
+
+    def limit_key(self, command: str) -> str:
+        """Ключ вікна та лічильників: команда з власним лімітом, інакше "*"."""
+        return command if command in self.limits else DEFAULT_COMMAND
+
+    def metrics(self) -> Dict[str, Any]:
+        """Метрики для моніторингу: дозволені та відкинуті оновлення за командами."""
+        return {
+            'allowed_updates': sum(self.allowed.values()),
+            'dropped_updates': sum(self.dropped.values()),
+            'dropped_by_command': dict(self.dropped),
+            'cooldown_replies': self.cooldown_replies,
+            'tracked_windows': len(self._windows),
+        }
+
+    async def _reply_cooldown(self, event: TelegramObject, telegram_user_id: int, retry_after: float) -> None:
+        if isinstance(event, Update):
+            event = event.event
+        now = self.clock()
+        replied_at = self._replied_at.get(telegram_user_id)
+        text: Optional[str] = None
+        if replied_at is None or now - replied_at >= self.cooldown_reply_seconds:
+            self._replied_at[telegram_user_id] = now
+            self.cooldown_replies += 1
+            text = f"⏳ Не так швидко! Спробуйте через {max(1, math.ceil(retry_after))} с."
+
+        try:
+            if isinstance(event, CallbackQuery):
+                # Кнопку відповідаємо завжди, текст - лише раз на cooldown_reply_seconds
+                await event.answer(text)
+            elif isinstance(event, Message) and text is not None:
+                await event.answer(text)
+        except Exception as e:
+            logger.warning(f"Не вдалося відповісти користувачу {telegram_user_id} про ліміт: {e}")
+
+    def _prune(self, now: float) -> None:
+        """Видаляє вікна та відповіді, старші за найдовше вікно."""
+        horizon = now - max(self._longest_window, self.cooldown_reply_seconds)
+        self._windows = {key: window for key, window in self._windows.items() if window and window[-1] > horizon}
+        self._replied_at = {key: at for key, at in self._replied_at.items() if at > horizon}
@@ -0,0 +1,124 @@
+"""
+Послідовна обробка оновлень одного користувача.
+
+aiogram обробляє кожне оновлення в окремій задачі, тож дві швидкі команди
+одного гравця можуть одночасно читати та змінювати його персонажа.
+Middleware впорядковує оновлення кожного користувача через окремий
+asyncio.Lock, а оновлення різних користувачів і далі виконуються паралельно.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _KeyEntry:
+    lock: asyncio.Lock
+    # Оновлення, що виконуються або чекають на цей ключ.
+    pending: int = 0
+
+
+class KeyedLock:
+    """
+    Набір асинхронних блокувань за ключем.
+
+    Блокування створюється при першому зверненні до ключа і видаляється,
+    щойно не лишається жодного оновлення, що його тримає або чекає,
+    тож кількість записів не росте з кількістю користувачів бота.
+    asyncio.Lock будить очікувачів у порядку надходження, що зберігає
+    порядок команд одного користувача.
+    """
+    def __init__(self) -> None:
+        self._entries: Dict[Hashable, _KeyEntry] = {}
+
+        # --- Метрики ---
+        self.acquired = 0
+        self.waited = 0
+        self.max_depth = 0
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _KeyEntry(asyncio.Lock())
+        entry.pending += 1
+        self.max_depth = max(self.max_depth, entry.pending)
+        if entry.lock.locked():
+            self.waited += 1
+
+        try:
+            async with entry.lock:
+                self.acquired += 1
+                yield
+        finally:
+            entry.pending -= 1
+            if entry.pending == 0:
+                del self._entries[key]
+
+    def depth(self, key: Hashable) -> int:
+        """Кількість оновлень ключа: те, що виконується, плюс черга."""
+        entry = self._entries.get(key)
+        return entry.pending if entry is not None else 0
+
+    @property
+    def active_keys(self) -> int:
+        """Кількість ключів, для яких зараз є оновлення."""
+        return len(self._entries)
+
+    def queue_depths(self) -> Dict[Hashable, int]:
+        """Знімок глибини черг усіх активних ключів."""
+        return {key: entry.pending for key, entry in self._entries.items()}
+
+
+class UserOrderingMiddleware(BaseMiddleware):
+    """
+    Зовнішній middleware оновлень, що виконує оновлення одного користувача
+    строго по черзі.
+
+    Реєструється на dp.update після вбудованого UserContextMiddleware,
+    який кладе користувача в data['event_from_user']. Оновлення без
+    користувача (наприклад, зміни статусу каналу) не блокуються.
+    """
+    def __init__(self, locks: Optional[KeyedLock] = None, slow_queue_depth: int = 5):
+        self.locks = locks or KeyedLock()
+        self.slow_queue_depth = slow_queue_depth
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        depth = self.locks.depth(user.id) + 1
+        if depth >= self.slow_queue_depth:
+            logger.warning(f"Користувач {user.id}: у черзі {depth} оновлень")
+
+        async with self.locks.hold(user.id):
+            return await handler(event, data)
+
+    def queue_depth(self, telegram_user_id: int) -> int:
+        """Кількість оновлень користувача, що виконуються або чекають."""
+        return self.locks.depth(telegram_user_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Метрики для моніторингу: активні користувачі, черги та очікування."""
+        depths = self.locks.queue_depths()
+        return {
+            'active_users': len(depths),
+            'queued_updates': sum(depth - 1 for depth in depths.values()),
+            'deepest_queue': max(depths.values(), default=0),
+            'max_queue_depth': self.locks.max_depth,
+            'waited_updates': self.locks.waited,
+            'processed_updates': self.locks.acquired,
+        }
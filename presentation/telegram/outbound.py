@@ -0,0 +1,334 @@
+"""
+Планувальник вихідних викликів Bot API з обмеженням частоти та пріоритетами.
+
+Telegram обмежує бота приблизно 30 повідомленнями на секунду загалом,
+одним на секунду в приватний чат і 20 на хвилину в групу, а при
+перевищенні повертає 429 з retry_after. Планувальник ставить у чергу кожен
+виклик з chat_id (sendMessage, editMessageText тощо) і відправляє його, коли
+дозволяють кошики токенів - загальний та кошик чату:
+- у межах чату виклики йдуть строго по черзі, наступний - лише після
+  відповіді на попередній;
+- між чатами спершу відправляються відповіді на команди (INTERACTIVE),
+  потім сповіщення (NOTIFICATION, див. as_notification);
+- на 429 чат призупиняється на retry_after, а виклик повторюється
+  (не більше max_retries разів).
+
+Обробники нічого не змінюють: планувальник підключається як middleware
+сесії Bot (OutboundRateLimitMiddleware). Виклики без chat_id
+(answerCallbackQuery, getMe, setWebhook) відправляються одразу.
+
+Змінні оточення (OutboundScheduler.from_env):
+    OUTBOUND_GLOBAL_RATE - викликів на секунду загалом (30).
+    OUTBOUND_CHAT_RATE - викликів на секунду в приватний чат (1).
+    OUTBOUND_CHAT_BURST - скільки викликів у чат можна відправити поспіль (3).
+    OUTBOUND_GROUP_RATE_PER_MINUTE - викликів на хвилину в групу (20).
+    OUTBOUND_MAX_RETRIES - повторів після 429 (3).
+"""
+import asyncio
+import contextvars
+import itertools
+import logging
+import os
+import statistics
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Set
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Пріоритет вихідного виклику: менше значення відправляється раніше."""
+    INTERACTIVE = 0
+    NOTIFICATION = 1
+
+
+current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    'outbound_priority', default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def as_notification() -> Iterator[None]:
+    """Виклики Bot API всередині блоку відправляються як сповіщення (після відповідей на команди)."""
+    token = current_priority.set(Priority.NOTIFICATION)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Кошик токенів: rate токенів на секунду, не більше capacity.
+
+    :param clock: Джерело часу в секундах; у тестах замінюється.
+    """
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self._updated = clock()
+        self._paused_until = float('-inf')
+
+    def delay(self) -> float:
+        """Скільки секунд чекати до наступного токена (0 - можна відправляти)."""
+        now = self._refill()
+        if now < self._paused_until:
+            return self._paused_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Забирає токени на seconds (наприклад, після 429 з retry_after); потім доступний один виклик."""
+        now = self._refill()
+        self.tokens = min(1.0, self.capacity)
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._updated = self._paused_until
+
+    def is_full(self) -> bool:
+        now = self._refill()
+        return self.tokens >= self.capacity and now >= self._paused_until
+
+    def _refill(self) -> float:
+        now = self.clock()
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+        return now
+
+
+@dataclass
+class _OutboundCall:
+    priority: Priority
+    sequence: int
+    chat_id: Any
+    call: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float
+    attempts: int = 0
+
+
+@dataclass
+class OutboundStats:
+    """Лічильники планувальника для моніторингу."""
+    sent: int = 0
+    # Відповіді 429, після яких виклик повторено.
+    retried: int = 0
+    failed: int = 0
+    max_queue_depth: int = 0
+    # Час очікування в черзі (мс) останніх викликів кожного пріоритету.
+    waits: Dict[Priority, Deque[float]] = field(
+        default_factory=lambda: {priority: deque(maxlen=1000) for priority in Priority}
+    )
+
+
+class OutboundScheduler:
+    """
+    Черга вихідних викликів з загальним обмеженням частоти та обмеженням для кожного чату.
+    Задача відправки запускається при першому виклику submit().
+    """
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        group_rate_per_minute: float = 20.0,
+        max_retries: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate_per_minute = group_rate_per_minute
+        self.max_retries = max_retries
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, global_rate, clock)
+        self.stats = OutboundStats()
+
+        self._queues: Dict[Any, Deque[_OutboundCall]] = {}
+        self._chat_buckets: Dict[Any, TokenBucket] = {}
+        # Чати, виклик яких уже відправлено й чекає відповіді.
+        self._in_flight: Set[Any] = set()
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls) -> 'OutboundScheduler':
+        return cls(
+            global_rate=float(os.getenv('OUTBOUND_GLOBAL_RATE', '30')),
+            chat_rate=float(os.getenv('OUTBOUND_CHAT_RATE', '1')),
+            chat_burst=float(os.getenv('OUTBOUND_CHAT_BURST', '3')),
+            group_rate_per_minute=float(os.getenv('OUTBOUND_GROUP_RATE_PER_MINUTE', '20')),
+            max_retries=int(os.getenv('OUTBOUND_MAX_RETRIES', '3')),
+        )
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def submit(self, chat_id: Any, call: Callable[[], Awaitable[Any]],
+                     priority: Priority = Priority.INTERACTIVE) -> Any:
+        """Ставить виклик у чергу чату і повертає його результат."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        item = _OutboundCall(priority, next(self._sequence), chat_id, call,
+                             asyncio.get_running_loop().create_future(), self.clock())
+        self._queues.setdefault(chat_id, deque()).append(item)
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.queued)
+        self._wakeup.set()
+        return await item.future
+
+    async def drain(self, timeout: float = 10.0) -> bool:
+        """Чекає відправки всіх викликів у черзі, потім зупиняє задачу відправки."""
+        deadline = self.clock() + timeout
+        while (self._queues or self._in_flight) and self.clock() < deadline:
+            await asyncio.sleep(0.05)
+        finished = not self._queues and not self._in_flight
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for queue in self._queues.values():
+            for item in queue:
+                item.future.cancel()
+        self._queues.clear()
+        return finished
+
+    def metrics(self) -> Dict[str, Any]:
+        """Метрики для моніторингу: черга, відправлені, 429 та час очікування в черзі."""
+        result: Dict[str, Any] = {
+            'queued': self.queued,
+            'in_flight': len(self._in_flight),
+            'sent': self.stats.sent,
+            'retried': self.stats.retried,
+            'failed': self.stats.failed,
+            'max_queue_depth': self.stats.max_queue_depth,
+        }
+        for priority, waits in self.stats.waits.items():
+            name = priority.name.lower()
+            ordered = sorted(waits)
+            result[f'{name}_wait_p50_ms'] = round(statistics.median(ordered), 2) if ordered else 0.0
+            result[f'{name}_wait_p95_ms'] = round(ordered[int(0.95 * (len(ordered) - 1))], 2) if ordered else 0.0
+        return result
+
+    def _chat_bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            # Від'ємні chat_id - групи та канали, для них ліміт на хвилину.
+            if isinstance(chat_id, int) and chat_id < 0:
+                bucket = TokenBucket(self.group_rate_per_minute / 60, 1, self.clock)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst, self.clock)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queues:
+                await self._wait(None)
+                continue
+            global_delay = self.global_bucket.delay()
+            if global_delay > 0:
+                await asyncio.sleep(global_delay)
+                continue
+
+            ready: List[tuple] = []
+            next_delay = float('inf')
+            for chat_id, queue in self._queues.items():
+                if chat_id in self._in_flight:
+                    continue
+                delay = self._chat_bucket(chat_id).delay()
+                if delay > 0:
+                    next_delay = min(next_delay, delay)
+                else:
+                    ready.append((queue[0].priority, queue[0].sequence, chat_id))
+            if not ready:
+                await self._wait(None if next_delay == float('inf') else next_delay)
+                continue
+
+            _, _, chat_id = min(ready)
+            self._dispatch(chat_id)
+
+    def _dispatch(self, chat_id: Any) -> None:
+        queue = self._queues[chat_id]
+        item = queue.popleft()
+        if not queue:
+            del self._queues[chat_id]
+        self.global_bucket.take()
+        self._chat_bucket(chat_id).take()
+        if item.attempts == 0:
+            self.stats.waits[item.priority].append((self.clock() - item.enqueued_at) * 1000)
+        self._in_flight.add(chat_id)
+        task = asyncio.create_task(self._send(item))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, item: _OutboundCall) -> None:
+        try:
+            result = await item.call()
+        except TelegramRetryAfter as e:
+            item.attempts += 1
+            if item.attempts > self.max_retries:
+                self.stats.failed += 1
+                item.future.set_exception(e)
+            else:
+                self.stats.retried += 1
+                logger.warning(f"429 для чату {item.chat_id}: пауза {e.retry_after} с")
+                self._chat_bucket(item.chat_id).pause(e.retry_after)
+                # Виклик повертається на початок черги свого чату, щоб не порушити порядок.
+                self._queues.setdefault(item.chat_id, deque()).appendleft(item)
+        except Exception as e:
+            self.stats.failed += 1
+            if not item.future.done():
+                item.future.set_exception(e)
+        else:
+            self.stats.sent += 1
+            if not item.future.done():
+                item.future.set_result(result)
+        finally:
+            self._in_flight.discard(item.chat_id)
+            self._prune_buckets()
+            self._wakeup.set()
+
+    def _prune_buckets(self) -> None:
+        # Кошики неактивних чатів видаляються, щоб словник не ріс з кількістю гравців.
+        if len(self._chat_buckets) > 10_000:
+            for idle in [c for c, b in self._chat_buckets.items()
+                         if c not in self._queues and c not in self._in_flight and b.is_full()]:
+                del self._chat_buckets[idle]
+
+    async def _wait(self, timeout: Optional[float]) -> None:
+        """Чекає нового виклику або звільнення чату, але не довше timeout."""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class OutboundRateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сесії Bot, що пропускає виклики з chat_id через планувальник.
+    Реєструється так: bot.session.middleware(OutboundRateLimitMiddleware(scheduler)).
+    """
+    def __init__(self, scheduler: OutboundScheduler):
+        self.scheduler = scheduler
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod[Any]) -> Any:
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await make_request(bot, method)
+        return await self.scheduler.submit(chat_id, lambda: make_request(bot, method), current_priority.get())
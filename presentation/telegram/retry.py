@@ -0,0 +1,93 @@
+"""
+Повторне виконання обробників при конфлікті паралельних змін персонажа.
+
+Якщо дві команди одного гравця (наприклад, два швидкі натискання /attack)
+завантажили персонажа одночасно, збереження другої відхиляється через
+перевірку версії. Обробник виконується повторно з обмеженою кількістю спроб
+та експоненційною затримкою з випадковим розкидом.
+
+ShardMovedError (кошик гравця перенесли на інший шард) повторюється так само,
+але рахується окремо від конфліктів версій.
+
+Якщо не вдалося отримати блокування користувача (UserLockTimeoutError),
+обробник не повторюється: очікування на блокування вже тривало весь таймаут.
+"""
+import asyncio
+import functools
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from aiogram.types import CallbackQuery, Message
+
+from domain.exceptions import ConcurrencyConflictError, ShardMovedError, UserLockTimeoutError
+
+logger = logging.getLogger(__name__)
+
+BUSY_TEXT = "⏳ Забагато одночасних дій. Спробуйте ще раз."
+
+
+@dataclass
+class ConflictRetryStats:
+    """Лічильники конфліктів для моніторингу."""
+    conflicts: int = 0
+    retries: int = 0
+    exhausted: int = 0
+    lock_timeouts: int = 0
+    # Повтори через перенесення кошика гравця на інший шард (не конфлікти версій).
+    shard_moves: int = 0
+
+
+conflict_stats = ConflictRetryStats()
+
+
+def retry_on_conflict(
+    attempts: int = 3,
+    base_delay: float = 0.05,
+    max_delay: float = 0.5,
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Декоратор обробника, що повторює його при ConcurrencyConflictError.
+
+    Обробник має надсилати відповідь користувачу лише після коміту, інакше
+    повтор продублює повідомлення. Якщо всі спроби вичерпано, користувач
+    отримує прохання повторити дію.
+
+    :param attempts: Максимальна кількість виконань обробника.
+    :param base_delay: Затримка перед першим повтором, с (подвоюється з кожною спробою).
+    :param max_delay: Верхня межа затримки, с.
+    """
+    def decorator(handler: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(handler)
+        async def wrapper(event: Any, *args: Any, **kwargs: Any) -> Any:
+            for attempt in range(1, attempts + 1):
+                try:
+                    return await handler(event, *args, **kwargs)
+                except UserLockTimeoutError as e:
+                    conflict_stats.lock_timeouts += 1
+                    logger.warning(f"{handler.__name__}: {e}")
+                    await _reply_busy(event)
+                    return None
+                except ConcurrencyConflictError as e:
+                    if isinstance(e, ShardMovedError):
+                        conflict_stats.shard_moves += 1
+                    else:
+                        conflict_stats.conflicts += 1
+                    if attempt == attempts:
+                        conflict_stats.exhausted += 1
+                        logger.warning(f"{handler.__name__}: конфлікт не вирішено за {attempts} спроб: {e}")
+                        await _reply_busy(event)
+                        return None
+                    conflict_stats.retries += 1
+                    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        return wrapper
+    return decorator
+
+
+async def _reply_busy(event: Any) -> None:
+    if isinstance(event, CallbackQuery):
+        await event.answer(BUSY_TEXT, show_alert=True)
+    elif isinstance(event, Message):
+        await event.answer(BUSY_TEXT)
@@ -0,0 +1,78 @@
+"""
+Сховище станів FSM (aiogram) для диспетчера.
+
+MemoryStorage тримає стани в пам'яті процесу: вони губляться при
+перезапуску, а інший екземпляр бота їх не бачить. RedisStorage зберігає
+стан і дані FSM у Redis, тож кілька екземплярів бота (наприклад, за
+балансувальником у режимі webhook) та процеси-обробники бачать однаковий
+стан гравця. З'єднання беруться зі спільного пулу redis.asyncio з
+обмеженням розміру: при навантаженні запити чекають вільного з'єднання,
+а не відкривають нові.
+
+Змінні оточення (create_fsm_storage):
+    FSM_STORAGE - memory (за замовчуванням) або redis.
+    FSM_REDIS_URL - адреса Redis (REDIS_URL або redis://localhost:6379/0).
+    FSM_REDIS_MAX_CONNECTIONS - розмір пулу з'єднань (50).
+    FSM_REDIS_POOL_TIMEOUT_SECONDS - скільки чекати вільного з'єднання (5).
+    FSM_KEY_PREFIX - префікс ключів у Redis (fsm).
+    FSM_STATE_TTL_SECONDS, FSM_DATA_TTL_SECONDS - час життя стану та даних
+        (без обмеження, якщо не задано).
+"""
+import os
+from typing import Any, Optional
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+
+
+def _optional_seconds(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def create_redis_storage(
+    url: str,
+    max_connections: int = 50,
+    pool_timeout_seconds: float = 5.0,
+    key_prefix: str = "fsm",
+    state_ttl: Optional[int] = None,
+    data_ttl: Optional[int] = None,
+    client: Optional[Any] = None,
+) -> RedisStorage:
+    """
+    Створює RedisStorage з обмеженим пулом з'єднань.
+
+    :param client: Готовий клієнт redis.asyncio (наприклад, fakeredis для
+        тестів); якщо задано, url та параметри пулу не використовуються.
+    """
+    if client is None:
+        from redis.asyncio import BlockingConnectionPool, Redis
+
+        # BlockingConnectionPool чекає вільного з'єднання замість помилки
+        # "Too many connections", коли всі з'єднання пулу зайняті.
+        pool = BlockingConnectionPool.from_url(url, max_connections=max_connections, timeout=pool_timeout_seconds)
+        client = Redis(connection_pool=pool)
+    return RedisStorage(
+        client,
+        key_builder=DefaultKeyBuilder(prefix=key_prefix),
+        state_ttl=state_ttl,
+        data_ttl=data_ttl,
+    )
+
+
+def create_fsm_storage() -> BaseStorage:
+    """Створює сховище FSM згідно з FSM_STORAGE."""
+    backend_name = os.getenv('FSM_STORAGE', 'memory').lower()
+    if backend_name == 'memory':
+        return MemoryStorage()
+    if backend_name == 'redis':
+        return create_redis_storage(
+            url=os.getenv('FSM_REDIS_URL') or os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+            max_connections=int(os.getenv('FSM_REDIS_MAX_CONNECTIONS', '50')),
+            pool_timeout_seconds=float(os.getenv('FSM_REDIS_POOL_TIMEOUT_SECONDS', '5')),
+            key_prefix=os.getenv('FSM_KEY_PREFIX', 'fsm'),
+            state_ttl=_optional_seconds('FSM_STATE_TTL_SECONDS'),
+            data_ttl=_optional_seconds('FSM_DATA_TTL_SECONDS'),
+        )
+    raise ValueError(f"Невідоме сховище FSM: {backend_name}")
@@ -0,0 +1,262 @@
+"""
+Режим webhook: Telegram надсилає оновлення POST-запитами на aiohttp-сервер бота.
+
+На відміну від long polling, оновлення приходять одразу і сервер можна
+поставити за балансувальником. Відповідь Telegram надсилається одразу після
+прийому оновлення, а обробка йде у фоні з обмеженням паралельності:
+- не більше max_concurrent_updates оновлень обробляються одночасно;
+- якщо прийнятих, але не оброблених оновлень уже max_pending_updates,
+  нові отримують 503, і Telegram надішле їх повторно пізніше.
+
+GET {health_path} повертає стан сервера та лічильники (503 під час зупинки).
+При зупинці (SIGTERM/SIGINT) сервер перестає приймати оновлення і чекає
+завершення вже прийнятих не довше shutdown_timeout_seconds.
+
+Для навантажувального тестування локально достатньо не задавати
+WEBHOOK_BASE_URL (webhook у Telegram не реєструється) і надсилати синтетичні
+оновлення на WEBHOOK_PATH, див. benchmarks/bench_webhook.py.
+
+Змінні оточення (WebhookSettings.from_env):
+    WEBHOOK_HOST, WEBHOOK_PORT - адреса сервера (0.0.0.0:8080).
+    WEBHOOK_PATH - шлях для оновлень (/webhook).
+    WEBHOOK_HEALTH_PATH - шлях перевірки стану (/health).
+    WEBHOOK_BASE_URL - публічна адреса бота; якщо задано, webhook
+        реєструється в Telegram при запуску.
+    WEBHOOK_SECRET - секрет заголовка X-Telegram-Bot-Api-Secret-Token.
+    WEBHOOK_MAX_CONNECTIONS - скільки паралельних з'єднань відкриває Telegram (40).
+    BOT_MAX_CONCURRENT_UPDATES - оновлень в обробці одночасно (100).
+    WEBHOOK_MAX_PENDING_UPDATES - прийнятих, але не оброблених оновлень (1000).
+    WEBHOOK_SHUTDOWN_TIMEOUT_SECONDS - очікування обробки при зупинці, с (10).
+"""
+import asyncio
+import logging
+import os
+import signal
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WebhookSettings:
+    """Налаштування webhook-сервера."""
+    host: str = "0.0.0.0"
+    port: int = 8080
+    path: str = "/webhook"
+    health_path: str = "/health"
+    base_url: Optional[str] = None
+    secret_token: Optional[str] = None
+    max_connections: int = 40
+    max_concurrent_updates: int = 100
+    max_pending_updates: int = 1000
+    shutdown_timeout_seconds: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> 'WebhookSettings':
+        return cls(
+            host=os.getenv('WEBHOOK_HOST', cls.host),
+            port=int(os.getenv('WEBHOOK_PORT', str(cls.port))),
+            path=os.getenv('WEBHOOK_PATH', cls.path),
+            health_path=os.getenv('WEBHOOK_HEALTH_PATH', cls.health_path),
+            base_url=os.getenv('WEBHOOK_BASE_URL') or None,
+            secret_token=os.getenv('WEBHOOK_SECRET') or None,
+            max_connections=int(os.getenv('WEBHOOK_MAX_CONNECTIONS', str(cls.max_connections))),
+            max_concurrent_updates=int(os.getenv('BOT_MAX_CONCURRENT_UPDATES', str(cls.max_concurrent_updates))),
+            max_pending_updates=int(os.getenv('WEBHOOK_MAX_PENDING_UPDATES', str(cls.max_pending_updates))),
+            shutdown_timeout_seconds=float(
+                os.getenv('WEBHOOK_SHUTDOWN_TIMEOUT_SECONDS', str(cls.shutdown_timeout_seconds))
+            ),
+        )
+
+
+@dataclass
+class WebhookStats:
+    """Лічильники webhook-сервера для моніторингу."""
+    received: int = 0
+    # Оновлення, відхилені з 503 через переповнену чергу або зупинку.
+    rejected: int = 0
+    processed: int = 0
+    failed: int = 0
+    max_pending: int = 0
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Обробник запитів aiogram з обмеженням паралельності та плавною зупинкою.
+
+    Фонова обробка реалізована тут, а не режимом handle_in_background aiogram:
+    задачі оновлень відстежуються у власній множині, тож обробник спирається
+    лише на публічний API aiogram (resolve_bot, verify_secret, feed_raw_update).
+
+    Сесію бота не закриває: нею керує той, хто створив бота (bot.py).
+    """
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        max_concurrent_updates: int = 100,
+        max_pending_updates: int = 1000,
+        secret_token: Optional[str] = None,
+        **data: Any,
+    ):
+        super().__init__(dispatcher, bot, handle_in_background=False, secret_token=secret_token, **data)
+        self.max_pending_updates = max_pending_updates
+        self.stats = WebhookStats()
+        self.closing = False
+        self._semaphore = asyncio.Semaphore(max_concurrent_updates)
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Прийняті оновлення, що обробляються або чекають своєї черги."""
+        return len(self._tasks)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.stats.received += 1
+        if self.closing or self.pending >= self.max_pending_updates:
+            self.stats.rejected += 1
+            return web.Response(status=503, text="Busy")
+        bot = await self.resolve_bot(request)
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), bot):
+            return web.Response(body="Unauthorized", status=401)
+
+        update = await request.json(loads=bot.session.json_loads)
+        task = asyncio.create_task(self._process_update(bot, update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.stats.max_pending = max(self.stats.max_pending, self.pending)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    __call__ = handle
+
+    async def _process_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            try:
+                result = await self.dispatcher.feed_raw_update(bot, update, **self.data)
+                # Відповідь обробника (метод API) надсилається окремим запитом,
+                # бо відповідь на webhook уже відправлена.
+                if isinstance(result, TelegramMethod):
+                    await self.dispatcher.silent_call_request(bot=bot, result=result)
+                self.stats.processed += 1
+            except Exception as e:
+                self.stats.failed += 1
+                logger.error(f"Помилка обробки оновлення {update.get('update_id')}: {e}", exc_info=True)
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Перестає приймати оновлення і чекає завершення прийнятих.
+
+        :return: False, якщо за timeout обробка не завершилась (решту задач скасовано).
+        """
+        self.closing = True
+        tasks = set(self._tasks)
+        if not tasks:
+            return True
+        logger.info(f"Очікування обробки {len(tasks)} оновлень...")
+        _, unfinished = await asyncio.wait(tasks, timeout=timeout)
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            logger.warning(f"Скасовано {len(unfinished)} необроблених оновлень")
+        return not unfinished
+
+    async def close(self) -> None:
+        pass
+
+
+REQUEST_HANDLER_KEY = web.AppKey("request_handler", BoundedRequestHandler)
+
+
+def create_webhook_app(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    settings: WebhookSettings,
+    metrics: Optional[Callable[[], Dict[str, Any]]] = None,
+) -> web.Application:
+    """
+    Створює aiohttp-застосунок з маршрутами оновлень та перевірки стану.
+
+    :param metrics: Додаткові метрики для відповіді перевірки стану
+        (наприклад, черги UserOrderingMiddleware).
+    """
+    app = web.Application()
+    request_handler = BoundedRequestHandler(
+        dispatcher, bot,
+        max_concurrent_updates=settings.max_concurrent_updates,
+        max_pending_updates=settings.max_pending_updates,
+        secret_token=settings.secret_token,
+    )
+    request_handler.register(app, path=settings.path)
+    app[REQUEST_HANDLER_KEY] = request_handler
+
+    async def health(request: web.Request) -> web.Response:
+        body = {
+            'status': 'shutting_down' if request_handler.closing else 'ok',
+            'pending': request_handler.pending,
+            **asdict(request_handler.stats),
+        }
+        if metrics is not None:
+            body.update(metrics())
+        return web.json_response(body, status=503 if request_handler.closing else 200)
+
+    app.router.add_get(settings.health_path, health)
+
+    async def on_shutdown(app: web.Application) -> None:
+        await request_handler.drain(settings.shutdown_timeout_seconds)
+
+    # Обробники on_shutdown виконуються по черзі: спершу дочікуємось оновлень,
+    # потім aiogram викликає shutdown диспетчера.
+    app.on_shutdown.append(on_shutdown)
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+async def run_webhook(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    settings: WebhookSettings,
+    metrics: Optional[Callable[[], Dict[str, Any]]] = None,
+    allowed_updates: Optional[List[str]] = None,
+) -> None:
+    """
+    Запускає webhook-сервер і працює до SIGTERM/SIGINT.
+
+    :param allowed_updates: Типи оновлень для setWebhook (за замовчуванням -
+        ті, що обробляє dispatcher).
+    """
+    app = create_webhook_app(dispatcher, bot, settings, metrics)
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.host, settings.port)
+    await site.start()
+    logger.info(f"Webhook-сервер слухає {settings.host}:{settings.port}{settings.path}")
+
+    if settings.base_url:
+        await bot.set_webhook(
+            url=settings.base_url.rstrip('/') + settings.path,
+            secret_token=settings.secret_token,
+            max_connections=settings.max_connections,
+            allowed_updates=allowed_updates if allowed_updates is not None
+            else dispatcher.resolve_used_update_types(),
+        )
+        logger.info(f"Webhook зареєстровано: {settings.base_url}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+        logger.info("Зупинка webhook-сервера...")
+        # Webhook у Telegram не видаляється: під час перезапуску оновлення
+        # накопичуються на боці Telegram і будуть доставлені новому процесу.
+        await runner.cleanup()
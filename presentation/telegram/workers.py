@@ -0,0 +1,385 @@
+"""
+Обробка оновлень у кількох процесах.
+
+Один процес asyncio використовує одне ядро, а розрахунки бою та
+характеристик - чистий Python. З BOT_WORKERS > 1 бот працює так:
+
+- процес-приймач отримує оновлення (polling або webhook) і пересилає кожне
+  через чергу multiprocessing одному з процесів-обробників, обраному за
+  hash(telegram_user_id) % BOT_WORKERS. Усі оновлення гравця потрапляють в
+  один процес, тож порядок команд гравця (UserOrderingMiddleware), стан FSM
+  та кеші персонажів у пам'яті лишаються коректними;
+- процеси-обробники виконують звичайний диспетчер (dispatcher.py), але їхній
+  Bot замість HTTP-запитів надсилає виклики Bot API в спільну чергу (QueueSession);
+- OutboundSender у приймачі виконує ці виклики справжнім Bot і повертає
+  відповідь Telegram процесу-обробнику. Помилки Bot API (TelegramBadRequest,
+  TelegramRetryAfter тощо) відтворюються в обробнику тими самими винятками.
+
+Змінні оточення:
+    BOT_WORKERS - кількість процесів-обробників (1 - усе в одному процесі).
+    BOT_WORKERS_SHUTDOWN_TIMEOUT_SECONDS - очікування обробників при зупинці, с (30).
+"""
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import signal
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiogram.methods
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramConflictError,
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramMigrateToChat,
+    TelegramNetworkError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramServerError,
+    TelegramUnauthorizedError,
+)
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject, Update
+from pydantic_core import to_jsonable_python
+
+from infrastructure.persistence.repositories.character_repository_factory import shutdown_character_repositories
+from presentation.telegram.dispatcher import create_dispatcher
+from presentation.telegram.handlers import router as handlers_router
+from presentation.telegram.middlewares import ThrottlingMiddleware
+from presentation.telegram.outbound import Priority, current_priority
+
+logger = logging.getLogger(__name__)
+
+# Виклик Bot API з обробника: (номер обробника, номер запиту, назва методу, поля методу, пріоритет).
+OutboundRequest = Tuple[int, int, str, Dict[str, Any], Priority]
+# Відповідь Telegram: (номер запиту, (HTTP-статус, тіло відповіді)); статус 0 - помилка мережі.
+OutboundReply = Tuple[int, Tuple[int, str]]
+
+# Винятки Bot API та статуси, з якими check_response відтворить їх в обробнику.
+_ERROR_STATUSES = (
+    (TelegramRetryAfter, HTTPStatus.TOO_MANY_REQUESTS),
+    (TelegramMigrateToChat, HTTPStatus.BAD_REQUEST),
+    (TelegramBadRequest, HTTPStatus.BAD_REQUEST),
+    (TelegramNotFound, HTTPStatus.NOT_FOUND),
+    (TelegramConflictError, HTTPStatus.CONFLICT),
+    (TelegramUnauthorizedError, HTTPStatus.UNAUTHORIZED),
+    (TelegramForbiddenError, HTTPStatus.FORBIDDEN),
+    (TelegramEntityTooLarge, HTTPStatus.REQUEST_ENTITY_TOO_LARGE),
+    (TelegramServerError, HTTPStatus.INTERNAL_SERVER_ERROR),
+)
+# Статус без окремого винятку: check_response підніме загальний TelegramAPIError.
+_UNKNOWN_ERROR_STATUS = HTTPStatus.IM_A_TEAPOT
+
+
+def worker_for(telegram_user_id: int, workers: int) -> int:
+    """Процес-обробник гравця. hash() цілого числа однаковий у всіх процесах."""
+    return hash(telegram_user_id) % workers
+
+
+class ForwardingMiddleware(BaseMiddleware):
+    """
+    Зовнішній middleware оновлень процесу-приймача: пересилає оновлення
+    процесу-обробнику гравця замість обробки.
+
+    Реєструється на dp.update після вбудованого UserContextMiddleware.
+    Оновлення без користувача розподіляються за чатом.
+    """
+    def __init__(self, queues: Sequence[Any]):
+        self.queues = list(queues)
+        self.forwarded = [0] * len(self.queues)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        chat = data.get("event_chat")
+        key = user.id if user is not None else chat.id if chat is not None else 0
+        index = worker_for(key, len(self.queues))
+        self.queues[index].put(event.model_dump(mode="json", exclude_unset=True, by_alias=True))
+        self.forwarded[index] += 1
+
+
+class QueueSession(BaseSession):
+    """
+    Сесія Bot процесу-обробника: виклики Bot API надсилаються в спільну
+    чергу приймача, а відповіді читаються з власної черги обробника.
+    """
+    def __init__(self, worker_index: int, outbound: Any, responses: Any, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.worker_index = worker_index
+        self.outbound = outbound
+        self.responses = responses
+        self._request_ids = itertools.count()
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None) -> Any:
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read_replies())
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self.outbound.put((
+            self.worker_index, request_id, type(method).__name__, method.model_dump(exclude_unset=True),
+            current_priority.get(),
+        ))
+
+        status, content = await future
+        if status == 0:
+            raise TelegramNetworkError(method=method, message=content)
+        return self.check_response(bot=bot, method=method, status_code=status, content=content).result
+
+    async def stream_content(self, url: str, headers: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True):
+        raise NotImplementedError("Завантаження файлів недоступне в процесі-обробнику")
+        yield b""  # pragma: no cover
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            # Зупиняємо читача: черга відповідей належить лише цьому обробнику.
+            self.responses.put(None)
+            await self._reader
+            self._reader = None
+
+    async def _read_replies(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            reply: Optional[OutboundReply] = await loop.run_in_executor(None, self.responses.get)
+            if reply is None:
+                break
+            request_id, result = reply
+            future = self._waiting.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_result(result)
+
+
+@dataclass
+class OutboundStats:
+    """Лічильники викликів Bot API від процесів-обробників."""
+    sent: int = 0
+    failed: int = 0
+
+
+class OutboundSender:
+    """
+    Виконує виклики Bot API процесів-обробників справжнім Bot приймача.
+    Запускається задачею run() у циклі подій приймача; stop() завершує її
+    після відправки вже отриманих викликів.
+    """
+    def __init__(self, bot: Bot, outbound: Any, responses: Sequence[Any]):
+        self.bot = bot
+        self.outbound = outbound
+        self.responses = list(responses)
+        self.stats = OutboundStats()
+        self._tasks: set = set()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            request: Optional[OutboundRequest] = await loop.run_in_executor(None, self.outbound.get)
+            if request is None:
+                break
+            task = asyncio.create_task(self._send(*request))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+    def stop(self) -> None:
+        self.outbound.put(None)
+
+    async def _send(self, worker_index: int, request_id: int, method_name: str, fields: Dict[str, Any],
+                    priority: Priority) -> None:
+        # Пріоритет обробника (див. outbound.as_notification) діє на планувальник Bot приймача.
+        current_priority.set(priority)
+        try:
+            method = getattr(aiogram.methods, method_name).model_validate(fields)
+            result = await self.bot(method)
+            reply = (HTTPStatus.OK, json.dumps({
+                'ok': True, 'result': to_jsonable_python(result, by_alias=True, exclude_none=True),
+            }))
+            self.stats.sent += 1
+        except TelegramNetworkError as e:
+            reply = (0, e.message)
+            self.stats.failed += 1
+        except TelegramAPIError as e:
+            reply = _error_reply(e)
+            self.stats.failed += 1
+        except Exception as e:
+            logger.error(f"Помилка виклику {method_name} для обробника {worker_index}: {e}", exc_info=True)
+            reply = (0, f"{type(e).__name__}: {e}")
+            self.stats.failed += 1
+        self.responses[worker_index].put((request_id, reply))
+
+
+def _error_reply(error: TelegramAPIError) -> Tuple[int, str]:
+    status = next((status for cls, status in _ERROR_STATUSES if isinstance(error, cls)), _UNKNOWN_ERROR_STATUS)
+    parameters = {}
+    if isinstance(error, TelegramRetryAfter):
+        parameters['retry_after'] = error.retry_after
+    if isinstance(error, TelegramMigrateToChat):
+        parameters['migrate_to_chat_id'] = error.migrate_to_chat_id
+    body = {'ok': False, 'error_code': int(status), 'description': error.message}
+    if parameters:
+        body['parameters'] = parameters
+    return int(status), json.dumps(body)
+
+
+def worker_main(
+    worker_index: int,
+    token: str,
+    inbound: Any,
+    outbound: Any,
+    responses: Any,
+    max_concurrent_updates: int = 100,
+    dispatcher_factory: Callable[[], Tuple[Dispatcher, Any]] = create_dispatcher,
+) -> None:
+    """Точка входу процесу-обробника."""
+    # Зупинкою керує приймач: Ctrl+C у терміналі не повинен обривати обробку.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(_run_worker(worker_index, token, inbound, outbound, responses,
+                            max_concurrent_updates, dispatcher_factory))
+
+
+async def _run_worker(
+    worker_index: int,
+    token: str,
+    inbound: Any,
+    outbound: Any,
+    responses: Any,
+    max_concurrent_updates: int,
+    dispatcher_factory: Callable[[], Tuple[Dispatcher, Any]],
+) -> None:
+    dp, user_ordering = dispatcher_factory()
+    bot = Bot(token=token, session=QueueSession(worker_index, outbound, responses))
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrent_updates)
+    tasks: set = set()
+
+    async def feed(data: Dict[str, Any]) -> None:
+        try:
+            await dp.feed_update(bot, Update.model_validate(data, context={"bot": bot}))
+        except Exception as e:
+            logger.error(f"Помилка обробки оновлення {data.get('update_id')}: {e}", exc_info=True)
+        finally:
+            semaphore.release()
+
+    logger.info(f"Обробник {worker_index} запущено")
+    try:
+        while True:
+            data = await loop.run_in_executor(None, inbound.get)
+            if data is None:
+                break
+            await semaphore.acquire()
+            task = asyncio.create_task(feed(data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(set(tasks))
+    finally:
+        shutdown_character_repositories()
+        if user_ordering is not None:
+            logger.info(f"Обробник {worker_index}, черги оновлень: {user_ordering.metrics()}")
+        await dp.emit_shutdown(bot=bot)
+        await dp.storage.close()
+        await bot.session.close()
+
+
+class WorkerPool:
+    """
+    Процеси-обробники разом з чергами та OutboundSender приймача.
+
+    :param dispatcher_factory: Створює диспетчер у процесі-обробнику; має
+        імпортуватися за іменем (процеси запускаються методом spawn).
+    """
+    def __init__(
+        self,
+        bot: Bot,
+        workers: int,
+        max_concurrent_updates: int = 100,
+        dispatcher_factory: Callable[[], Tuple[Dispatcher, Any]] = create_dispatcher,
+    ):
+        if workers < 1:
+            raise ValueError("Потрібен хоча б один процес-обробник")
+        context = multiprocessing.get_context("spawn")
+        self.inbound = [context.Queue() for _ in range(workers)]
+        self.responses = [context.Queue() for _ in range(workers)]
+        self.outbound = context.Queue()
+        self.processes = [
+            context.Process(
+                target=worker_main,
+                args=(index, bot.token, self.inbound[index], self.outbound, self.responses[index],
+                      max_concurrent_updates, dispatcher_factory),
+                name=f"bot-worker-{index}",
+                daemon=True,
+            )
+            for index in range(workers)
+        ]
+        self.forwarding = ForwardingMiddleware(self.inbound)
+        self.sender = OutboundSender(bot, self.outbound, self.responses)
+        self._sender_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        for process in self.processes:
+            process.start()
+        self._sender_task = asyncio.create_task(self.sender.run())
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """
+        Дочікується обробки вже пересланих оновлень і зупиняє обробників.
+        Відправник працює до кінця, бо обробники ще надсилають відповіді.
+        """
+        loop = asyncio.get_running_loop()
+        for queue in self.inbound:
+            queue.put(None)
+        for process in self.processes:
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"{process.name} не завершився за {timeout} с, зупиняємо примусово")
+                process.terminate()
+        self.sender.stop()
+        if self._sender_task is not None:
+            await self._sender_task
+
+    def metrics(self) -> Dict[str, Any]:
+        """Метрики для моніторингу: пересилання, живі процеси, виклики Bot API."""
+        return {
+            'workers': len(self.processes),
+            'alive_workers': sum(process.is_alive() for process in self.processes),
+            'forwarded_updates': list(self.forwarding.forwarded),
+            'outbound_sent': self.sender.stats.sent,
+            'outbound_failed': self.sender.stats.failed,
+        }
+
+
+def create_receiver(pool: WorkerPool, throttling: Optional[ThrottlingMiddleware] = None) -> Dispatcher:
+    """
+    Диспетчер процесу-приймача: без обробників, лише пересилання.
+
+    :param throttling: Обмеження частоти команд; відкинуті оновлення не
+        пересилаються в процеси-обробники.
+    """
+    receiver = Dispatcher()
+    if throttling is not None:
+        receiver.update.outer_middleware(throttling)
+    receiver.update.outer_middleware(pool.forwarding)
+    return receiver
+
+
+def used_update_types() -> List[str]:
+    """Типи оновлень, які обробляють обробники команд (для getUpdates та setWebhook)."""
+    return handlers_router.resolve_used_update_types()
@@ -9,7 +9,10 @@ from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
 from infrastructure.persistence.database import Base
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
 
 
 @pytest.fixture(scope="session")
@@ -55,3 +58,51 @@ def db_session(db_engine):
     session.close()
     transaction.rollback()
     connection.close()
+
+
+@pytest.fixture(scope="function")
+def session_factory(db_session):
+    """
+    Фабрика додаткових сесій, що працюють у транзакції тестової сесії.
+    Їхні commit/rollback виконуються через точки збереження (SAVEPOINT),
+    тож не впливають на зовнішню транзакцію тесту.
+    """
+    return sessionmaker(
+        autocommit=False, autoflush=False, bind=db_session.get_bind(),
+        join_transaction_mode="create_savepoint"
+    )
+
+
+@pytest.fixture(scope="session")
+def data_path():
+    """Каталог з JSON-даними гри (локації, предмети, вороги)."""
+    return os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+@pytest.fixture
+def make_character():
+    """
+    Фабрика персонажів, ще не збережених у сховищі.
+    Будь-яке поле Character можна перевизначити іменованим аргументом.
+    """
+
+    def factory(telegram_user_id: int, **overrides) -> Character:
+        values = dict(
+            telegram_user_id=telegram_user_id, name=f"Hero_{telegram_user_id}",
+            base_stats=BaseStats(10, 10, 10, 100, 50), location_id="forest_dark",
+        )
+        values.update(overrides)
+        return Character(**values)
+    return factory
+
+
+@pytest.fixture
+def create_character(db_session, make_character):
+    """Фабрика персонажів, збережених у тестовій сесії та зафіксованих (commit)."""
+
+    def factory(telegram_user_id: int, **overrides) -> Character:
+        character = make_character(telegram_user_id, **overrides)
+        PostgresCharacterRepository(db_session).save(character)
+        db_session.commit()
+        return character
+    return factory
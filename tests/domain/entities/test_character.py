@@ -71,3 +71,71 @@ class TestCharacterLogic:
         initial_health = character.current_health
         character.take_damage(-20)
         assert character.current_health == initial_health
+
+
+class TestCharacterDirtyTracking:
+    """Групує юніт-тести для відстеження змін персонажа."""
+
+    def test_new_character_reports_all_fields(self, character: Character):
+        """Новий (незбережений) персонаж вважається повністю зміненим."""
+        assert character.is_new() is True
+        changed = character.get_changed_fields()
+        assert {'name', 'current_health', 'inventory', 'combat_state'} <= changed
+
+    def test_no_changes_after_mark_persisted(self, character: Character):
+        """Після фіксації стану змін немає."""
+        character.mark_persisted()
+        assert character.is_new() is False
+        assert character.get_changed_fields() == set()
+
+    def test_scalar_field_change_is_tracked(self, character: Character):
+        """Зміна здоров'я позначає лише поле current_health."""
+        character.mark_persisted()
+        character.take_damage(10)
+        assert character.get_changed_fields() == {'current_health'}
+
+    def test_level_up_tracks_base_stats(self, character: Character):
+        """Підвищення рівня змінює рівень, досвід, базові характеристики та ресурси."""
+        character.mark_persisted()
+        character.current_health = 50
+        character.level_up()
+        assert {'level', 'base_stats', 'current_health'} <= character.get_changed_fields()
+
+    def test_in_place_combat_state_mutation_is_tracked(self, character: Character):
+        """Зміна словника стану бою на місці також відстежується."""
+        character.combat_state = {'enemy_id': 'goblin_01', 'enemy_current_health': 80, 'turn': 0}
+        character.mark_persisted()
+        character.combat_state['turn'] += 1
+        assert character.get_changed_fields() == {'combat_state'}
+
+    def test_inventory_and_equipment_changes(self, character: Character):
+        """Додавання предмета та екіпірування позначають відповідні колекції."""
+        character.mark_persisted()
+        character.add_item('potion_1')
+        assert character.get_changed_fields() == {'inventory'}
+
+        character.equip_item('sword_1', 'weapon')
+        assert character.get_changed_fields() == {'inventory', 'equipped_items'}
+        assert character.get_changed_equipment_slots() == {'weapon': 'sword_1'}
+
+    def test_inventory_changes_are_deltas(self, character: Character):
+        """Зміни інвентаря повертаються як різниця кількості кожного предмета."""
+        character.inventory = ['potion', 'potion', 'scroll']
+        character.mark_persisted()
+
+        character.remove_item('potion')
+        character.remove_item('scroll')
+        character.add_item('apple')
+
+        assert character.get_inventory_changes() == {'potion': -1, 'scroll': -1, 'apple': 1}
+
+    def test_mark_combat_state_persisted_keeps_other_changes(self, character: Character):
+        """Фіксація лише стану бою не приховує інших змін."""
+        character.combat_state = {'enemy_id': 'goblin_01', 'enemy_current_health': 80, 'turn': 0}
+        character.mark_persisted()
+
+        character.combat_state['turn'] = 1
+        character.take_damage(5)
+        character.mark_combat_state_persisted()
+
+        assert character.get_changed_fields() == {'current_health'}
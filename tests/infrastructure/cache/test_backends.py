@@ -0,0 +1,60 @@
+# tests/infrastructure/cache/test_backends.py
+"""
+Тести для бекендів кешу. Redis-бекенд перевіряється через fakeredis.
+"""
+import time
+import pytest
+
+from infrastructure.cache.backends import InMemoryCacheBackend, RedisCacheBackend
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    """Повертає кожен з бекендів кешу по черзі."""
+    if request.param == "memory":
+        return InMemoryCacheBackend()
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisCacheBackend(fakeredis.FakeRedis())
+
+
+class TestCacheBackends:
+    """Спільний контракт для всіх бекендів кешу."""
+
+    def test_set_get_delete(self, backend):
+        backend.set("key", b"value", ttl_seconds=60)
+        assert backend.get("key") == b"value"
+
+        backend.delete("key", "missing")
+        assert backend.get("key") is None
+
+    def test_missing_key_returns_none(self, backend):
+        assert backend.get("nope") is None
+
+    def test_set_if_checks_current_value(self, backend):
+        assert backend.set_if("key", b"1", 60, lambda current: current is None)
+        assert not backend.set_if("key", b"2", 60, lambda current: current is None)
+        assert backend.get("key") == b"1"
+
+        assert backend.set_if("key", b"2", 60, lambda current: current == b"1")
+        assert backend.get("key") == b"2"
+
+
+class TestInMemoryCacheBackend:
+    """Тести, специфічні для кешу в пам'яті."""
+
+    def test_expired_entry_is_not_returned(self):
+        backend = InMemoryCacheBackend()
+        backend.set("key", b"value", ttl_seconds=0)
+        time.sleep(0.01)
+        assert backend.get("key") is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        backend = InMemoryCacheBackend(max_entries=2)
+        backend.set("a", b"1", 60)
+        backend.set("b", b"2", 60)
+        backend.get("a")
+        backend.set("c", b"3", 60)
+
+        assert backend.get("a") == b"1"
+        assert backend.get("b") is None
+        assert backend.get("c") == b"3"
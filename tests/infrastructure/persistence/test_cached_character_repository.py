@@ -0,0 +1,179 @@
+# tests/infrastructure/persistence/test_cached_character_repository.py
+"""
+Інтеграційні тести для CachedCharacterRepository.
+"""
+import pytest
+
+from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
+from domain.value_objects.stats import BaseStats
+from infrastructure.cache.backends import InMemoryCacheBackend, RedisCacheBackend
+from infrastructure.persistence.character_serializer import serialize_character, deserialize_character
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.repositories.cached_character_repository import CachedCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache_backend(request):
+    if request.param == "memory":
+        return InMemoryCacheBackend()
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisCacheBackend(fakeredis.FakeRedis())
+
+
+@pytest.fixture
+def saved_character(db_session):
+    character = Character(
+        telegram_user_id=84001, name="Cached", base_stats=BaseStats(11, 12, 13, 110, 55),
+        equipped_items={'weapon': 'sword_1'}, inventory=['potion', 'potion', 'apple'],
+        combat_state={'enemy_id': 'goblin_01', 'enemy_current_health': 40, 'turn': 2}
+    )
+    PostgresCharacterRepository(db_session).save(character)
+    db_session.commit()
+    return character
+
+
+class TestCharacterSerializer:
+    """Тести компактної серіалізації персонажа."""
+
+    def test_round_trip(self, saved_character):
+        restored = deserialize_character(serialize_character(saved_character))
+
+        assert restored.id == saved_character.id
+        assert restored.base_stats == saved_character.base_stats
+        assert sorted(restored.inventory) == sorted(saved_character.inventory)
+        assert restored.equipped_items == saved_character.equipped_items
+        assert restored.combat_state == saved_character.combat_state
+        assert restored.is_new() is False
+        assert restored.get_changed_fields() == set()
+
+
+class TestCachedCharacterRepository:
+    """Групує тести для кешуючого репозиторію."""
+
+    def test_second_read_is_served_from_cache(self, db_session, cache_backend, saved_character):
+        repo = CachedCharacterRepository(PostgresCharacterRepository(db_session), cache_backend)
+        assert repo.get_by_telegram_user_id(84001) is not None
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            by_telegram = repo.get_by_telegram_user_id(84001)
+            by_id = repo.get(saved_character.id)
+
+        assert counter.count == 0
+        assert by_telegram.name == "Cached"
+        assert by_id.inventory.count('potion') == 2
+
+    def test_save_invalidates_cache(self, db_session, cache_backend, saved_character):
+        repo = CachedCharacterRepository(PostgresCharacterRepository(db_session), cache_backend)
+        character = repo.get(saved_character.id)
+        repo.get_by_telegram_user_id(84001)
+
+        character.take_damage(25)
+        repo.save(character)
+        db_session.commit()
+
+        assert repo.get(saved_character.id).current_health == 85
+        assert repo.get_by_telegram_user_id(84001).current_health == 85
+
+    def test_cached_character_saves_only_changes(self, db_session, cache_backend, saved_character):
+        repo = CachedCharacterRepository(PostgresCharacterRepository(db_session), cache_backend)
+        repo.get(saved_character.id)
+        character = repo.get(saved_character.id)
+
+        character.add_item('apple')
+        with StatementCounter(db_session.get_bind()) as counter:
+            repo.save(character)
+            db_session.flush()
+        assert counter.count == 2  # UPDATE версії + upsert інвентаря
+
+    def test_delete_invalidates_cache(self, db_session, cache_backend, saved_character):
+        repo = CachedCharacterRepository(PostgresCharacterRepository(db_session), cache_backend)
+        repo.get_by_telegram_user_id(84001)
+
+        repo.delete(saved_character.id)
+        db_session.commit()
+
+        assert repo.get(saved_character.id) is None
+        assert repo.get_by_telegram_user_id(84001) is None
+
+    def test_missing_character_is_not_cached(self, db_session, cache_backend):
+        repo = CachedCharacterRepository(PostgresCharacterRepository(db_session), cache_backend)
+        assert repo.get_by_telegram_user_id(84999) is None
+        assert cache_backend.get("character:tg:84999") is None
+
+    def test_failed_save_invalidates_stale_entry(self, session_factory, cache_backend, saved_character):
+        def cached_repo(session):
+            return CachedCharacterRepository(PostgresCharacterRepository(session), cache_backend)
+
+        with session_factory() as session:
+            cached_repo(session).get(saved_character.id)
+        # Інша команда змінила персонажа в обхід кешу
+        with session_factory() as session:
+            other = PostgresCharacterRepository(session)
+            fresh = other.get(saved_character.id)
+            fresh.take_damage(10)
+            other.save(fresh)
+            session.commit()
+
+        with session_factory() as session:
+            stale = cached_repo(session).get(saved_character.id)
+            stale.take_damage(25)
+            with pytest.raises(ConcurrencyConflictError):
+                cached_repo(session).save(stale)
+
+        # Повтор команди читає актуальну версію з бази
+        with session_factory() as session:
+            retried = cached_repo(session).get(saved_character.id)
+        assert retried.version == fresh.version
+        assert retried.current_health == 100
+
+    def test_entries_are_invalidated_when_transaction_ends(self, session_factory, cache_backend, saved_character):
+        with session_factory() as session:
+            repo = CachedCharacterRepository(PostgresCharacterRepository(session), cache_backend, session=session)
+            character = repo.get(saved_character.id)
+            character.take_damage(25)
+            repo.save(character)
+            # Читання до коміту кешує ще не зафіксований стан
+            repo.get_by_telegram_user_id(84001)
+            session.rollback()
+
+            assert cache_backend.get("character:tg:84001") is None
+            assert repo.get_by_telegram_user_id(84001).current_health == 110
+
+            character = repo.get(saved_character.id)
+            character.take_damage(30)
+            repo.save(character)
+            repo.get(saved_character.id)
+            session.commit()
+
+            cached = deserialize_character(cache_backend.get(f"character:id:{saved_character.id}"))
+            assert cached.version == character.version
+            assert repo.get(saved_character.id).current_health == 80
+
+    def test_read_miss_does_not_cache_row_older_than_commit(self, session_factory, cache_backend, saved_character):
+        """Рядок, прочитаний до паралельного коміту, не потрапляє в кеш після інвалідації."""
+        def save_damage():
+            with session_factory() as session:
+                writer = CachedCharacterRepository(PostgresCharacterRepository(session), cache_backend,
+                                                   session=session)
+                character = writer.get(saved_character.id)
+                character.take_damage(25)
+                writer.save(character)
+                session.commit()
+
+        class ReadBeforeCommit(PostgresCharacterRepository):
+            def get(self, character_id):
+                character = super().get(character_id)
+                # Інша команда зберігає персонажа, поки прочитаний рядок ще не в кеші
+                save_damage()
+                return character
+
+        with session_factory() as session:
+            reader = CachedCharacterRepository(ReadBeforeCommit(session), cache_backend, session=session)
+            assert reader.get(saved_character.id).current_health == 110
+
+        with session_factory() as session:
+            repo = CachedCharacterRepository(PostgresCharacterRepository(session), cache_backend, session=session)
+            assert repo.get(saved_character.id).current_health == 85
+            assert repo.get_by_telegram_user_id(84001).current_health == 85
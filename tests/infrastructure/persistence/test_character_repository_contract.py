@@ -0,0 +1,241 @@
+# tests/infrastructure/persistence/test_character_repository_contract.py
+"""
+Контрактні тести ICharacterRepository.
+
+Один набір тестів виконується для кожної реалізації сховища персонажів:
+PostgreSQL та журнал подій (потребують тестової бази, див. conftest.py),
+SQLite у пам'яті та сховища в пам'яті процесу. Для швидкого запуску без PostgreSQL:
+    pytest tests/infrastructure/persistence/test_character_repository_contract.py -k "sqlite or memory"
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
+from domain.repositories.character_repository import ICharacterRepository
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database import Base
+from infrastructure.persistence.database.engine import enable_sqlite_foreign_keys
+from infrastructure.persistence.repositories.event_sourced_character_repository import (
+    EventSourcedCharacterRepository
+)
+from infrastructure.persistence.repositories.in_memory_character_repository import InMemoryCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.repositories.sqlite_character_repository import SqliteCharacterRepository
+
+STATS = {
+    'max_health': 120, 'max_mana': 60, 'armor': 5, 'evasion': 3, 'energy_shield': 0,
+    'damage_min': 4, 'damage_max': 9, 'accuracy': 80,
+    'critical_chance': 5.0, 'critical_multiplier': 1.5, 'attack_speed': 1.2,
+}
+
+
+@dataclass
+class Backend:
+    """Репозиторій разом зі способом зафіксувати його зміни."""
+    repo: ICharacterRepository
+    commit: Callable[[], None]
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://")
+    enable_sqlite_foreign_keys(engine)
+    Base.metadata.create_all(engine)
+    session = Session(engine, autoflush=False)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture(params=["postgres", "event_sourced", "sqlite", "memory"])
+def backend(request) -> Backend:
+    if request.param == "postgres":
+        session = request.getfixturevalue("db_session")
+        return Backend(PostgresCharacterRepository(session), session.commit)
+    if request.param == "event_sourced":
+        # Частий знімок, щоб тести проходили і через знімок, і через хвіст подій.
+        session = request.getfixturevalue("db_session")
+        return Backend(EventSourcedCharacterRepository(session, snapshot_every=2), session.commit)
+    if request.param == "sqlite":
+        session = request.getfixturevalue("sqlite_session")
+        return Backend(SqliteCharacterRepository(session), session.commit)
+    return Backend(InMemoryCharacterRepository(), lambda: None)
+
+
+@pytest.fixture
+def make_character(make_character):
+    """Персонаж з екіпіруванням та інвентарем для перевірки всіх частин агрегату."""
+
+    def factory(telegram_user_id: int = 83001, **overrides) -> Character:
+        values = dict(
+            name="Contract",
+            base_stats=BaseStats(strength=12, dexterity=11, intelligence=9, base_health=110, base_mana=55),
+            equipped_items={'weapon': 'sword_01'}, inventory=['potion', 'potion', 'apple'],
+        )
+        values.update(overrides)
+        return make_character(telegram_user_id, **values)
+    return factory
+
+
+def save(backend: Backend, character: Character) -> Character:
+    backend.repo.save(character)
+    backend.commit()
+    return character
+
+
+class TestCharacterRepositoryContract:
+    """Поведінка, однакова для всіх сховищ персонажів."""
+
+    def test_save_and_get(self, backend, make_character):
+        created = save(backend, make_character())
+
+        loaded = backend.repo.get(created.id)
+
+        assert loaded is not created
+        assert loaded.id == created.id
+        assert loaded.name == "Contract"
+        assert loaded.base_stats == created.base_stats
+        assert loaded.current_health == 110
+        assert loaded.location_id == 'forest_dark'
+        assert loaded.equipped_items.get('weapon') == 'sword_01'
+        assert sorted(loaded.inventory) == ['apple', 'potion', 'potion']
+        assert loaded.combat_state is None
+        assert loaded.version == 1
+
+    def test_get_missing(self, backend, make_character):
+        assert backend.repo.get(make_character().id) is None
+        assert backend.repo.get_by_telegram_user_id(83999) is None
+
+    def test_get_by_telegram_user_id(self, backend, make_character):
+        created = save(backend, make_character(83002))
+
+        assert backend.repo.get_by_telegram_user_id(83002).id == created.id
+
+    def test_partial_loaders_return_requested_parts(self, backend, make_character):
+        save(backend, make_character(83003, combat_state={
+            'enemy_id': 'goblin_01', 'enemy_level': 1, 'enemy_current_health': 20,
+            'enemy_max_health': 30, 'turn': 2,
+        }))
+
+        combat = backend.repo.get_for_combat(83003)
+        inventory = backend.repo.get_for_inventory(83003)
+        summary = backend.repo.get_summary(83003)
+
+        assert combat.combat_state['enemy_current_health'] == 20
+        assert combat.equipped_items.get('weapon') == 'sword_01'
+        assert sorted(inventory.inventory) == ['apple', 'potion', 'potion']
+        assert summary.name == "Contract"
+        assert backend.repo.get_for_combat(83998) is None
+
+    def test_update_scalar_fields(self, backend, make_character):
+        created = save(backend, make_character(83004))
+
+        character = backend.repo.get(created.id)
+        character.current_health = 40
+        character.gain_experience(25)
+        character.location_id = 'town_main'
+        save(backend, character)
+
+        loaded = backend.repo.get(created.id)
+        assert loaded.current_health == 40
+        assert loaded.experience == 25
+        assert loaded.location_id == 'town_main'
+        assert loaded.version == 2
+
+    def test_inventory_and_equipment_changes(self, backend, make_character):
+        created = save(backend, make_character(83005))
+
+        character = backend.repo.get(created.id)
+        character.remove_item('potion')
+        character.remove_item('apple')
+        character.add_item('goblin_ear')
+        character.equip_item('leather_armor', 'armor')
+        save(backend, character)
+
+        loaded = backend.repo.get(created.id)
+        assert sorted(loaded.inventory) == ['goblin_ear', 'potion']
+        assert loaded.equipped_items.get('armor') == 'leather_armor'
+        assert loaded.equipped_items.get('weapon') == 'sword_01'
+
+    def test_combat_state_lifecycle(self, backend, make_character):
+        created = save(backend, make_character(83006))
+
+        character = backend.repo.get_for_combat(83006)
+        character.combat_state = {'enemy_id': 'goblin_01', 'enemy_level': 1,
+                                  'enemy_current_health': 30, 'enemy_max_health': 30, 'turn': 0}
+        save(backend, character)
+        character = backend.repo.get_for_combat(83006)
+        character.combat_state['enemy_current_health'] = 10
+        character.combat_state['turn'] = 1
+        save(backend, character)
+
+        assert backend.repo.get(created.id).combat_state['enemy_current_health'] == 10
+        assert backend.repo.get(created.id).combat_state['turn'] == 1
+
+        character = backend.repo.get_for_combat(83006)
+        character.combat_state = None
+        character.add_item('goblin_ear')
+        save(backend, character)
+
+        loaded = backend.repo.get(created.id)
+        assert loaded.combat_state is None
+        assert 'goblin_ear' in loaded.inventory
+        assert loaded.inventory.count('potion') == 2
+
+    def test_new_character_saved_twice_in_one_transaction(self, backend, make_character):
+        character = make_character(83011)
+        backend.repo.save(character)
+        character.current_health = 70
+        character.add_item('goblin_ear')
+        backend.repo.save(character)
+        backend.commit()
+
+        loaded = backend.repo.get(character.id)
+        assert loaded.current_health == 70
+        assert sorted(loaded.inventory) == ['apple', 'goblin_ear', 'potion', 'potion']
+        assert loaded.version == 2
+
+    def test_unchanged_save_keeps_version(self, backend, make_character):
+        created = save(backend, make_character(83007))
+
+        character = backend.repo.get(created.id)
+        save(backend, character)
+
+        assert backend.repo.get(created.id).version == 1
+
+    def test_stale_save_raises_conflict(self, backend, make_character):
+        created = save(backend, make_character(83008))
+        first = backend.repo.get(created.id)
+        second = backend.repo.get(created.id)
+
+        first.current_health = 50
+        save(backend, first)
+        second.current_health = 1
+        with pytest.raises(ConcurrencyConflictError):
+            backend.repo.save(second)
+
+        assert backend.repo.get(created.id).current_health == 50
+
+    def test_delete(self, backend, make_character):
+        created = save(backend, make_character(83009))
+
+        backend.repo.delete(created.id)
+        backend.commit()
+
+        assert backend.repo.get(created.id) is None
+        assert backend.repo.get_by_telegram_user_id(83009) is None
+
+    def test_stats_cache(self, backend, make_character):
+        created = save(backend, make_character(83010))
+
+        assert backend.repo.get_stats_cache(created.id, ['sword_01']) is None
+        backend.repo.save_stats_cache(created.id, STATS, ['sword_01'])
+        backend.commit()
+
+        assert backend.repo.get_stats_cache(created.id, ['sword_01']) == STATS
+        assert backend.repo.get_stats_cache(created.id, ['sword_01', 'leather_armor']) is None
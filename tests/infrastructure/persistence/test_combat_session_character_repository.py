@@ -0,0 +1,255 @@
+# tests/infrastructure/persistence/test_combat_session_character_repository.py
+"""
+Інтеграційні тести для CombatSessionCharacterRepository та CombatSessionStore.
+"""
+import pytest
+
+from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
+from infrastructure.cache.backends import InMemoryCacheBackend, RedisCacheBackend
+from infrastructure.cache.combat_session_store import CombatSession, CombatSessionStore, StaleCombatTurnError
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.repositories.combat_session_character_repository import CombatSessionCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return CombatSessionStore(InMemoryCacheBackend(), ttl_seconds=60)
+    fakeredis = pytest.importorskip("fakeredis")
+    return CombatSessionStore(RedisCacheBackend(fakeredis.FakeRedis()), ttl_seconds=60)
+
+
+def start_combat(repo, character_id: str) -> None:
+    character = repo.get(character_id)
+    character.combat_state = {'enemy_id': 'goblin_01', 'enemy_level': 1,
+                              'enemy_current_health': 100, 'enemy_max_health': 100, 'turn': 0}
+    repo.save(character)
+
+
+def play_turn(repo, character_id: str, damage: int = 10) -> Character:
+    character = repo.get(character_id)
+    character.combat_state['enemy_current_health'] -= damage
+    character.combat_state['turn'] += 1
+    repo.save(character)
+    return character
+
+
+def stored_combat_state(db_session, character_id: str):
+    return PostgresCharacterRepository(db_session).get(character_id).combat_state
+
+
+class TestCombatSessionCharacterRepository:
+    """Групує тести для зберігання живого стану бою поза базою."""
+
+    def test_turns_between_checkpoints_do_not_write(self, db_session, store, create_character):
+        """Проміжні ходи не записують combat_states, а читання бачить живий стан."""
+        created = create_character(88001)
+        repo = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session), store,
+                                                checkpoint_every_turns=5)
+        start_combat(repo, created.id)
+        db_session.flush()
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            for _ in range(4):
+                play_turn(repo, created.id)
+            db_session.flush()
+
+        assert counter.count_of('INSERT') == 0
+        assert counter.count_of('UPDATE') == 0
+        assert repo.get(created.id).combat_state['enemy_current_health'] == 60
+        # У базі залишилась контрольна точка початку бою
+        assert stored_combat_state(db_session, created.id)['turn'] == 0
+        assert repo.deferred_turns == 4
+
+    def test_checkpoint_every_n_turns(self, db_session, store, create_character):
+        created = create_character(88002)
+        repo = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session), store,
+                                                checkpoint_every_turns=3)
+        start_combat(repo, created.id)
+        for _ in range(3):
+            play_turn(repo, created.id)
+        db_session.flush()
+
+        assert stored_combat_state(db_session, created.id)['turn'] == 3
+        assert stored_combat_state(db_session, created.id)['enemy_current_health'] == 70
+        assert repo.checkpoints == 2
+
+    def test_checkpoint_by_time(self, db_session, store, create_character):
+        created = create_character(88003)
+        repo = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session), store,
+                                                checkpoint_every_turns=100, checkpoint_interval_seconds=0)
+        start_combat(repo, created.id)
+        play_turn(repo, created.id)
+        db_session.flush()
+
+        assert stored_combat_state(db_session, created.id)['turn'] == 1
+
+    def test_combat_end_removes_session_and_checkpoint(self, db_session, store, create_character):
+        created = create_character(88004)
+        repo = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session), store)
+        start_combat(repo, created.id)
+        play_turn(repo, created.id)
+
+        character = repo.get(created.id)
+        character.combat_state = None
+        character.add_item('goblin_ear')
+        repo.save(character)
+        db_session.flush()
+
+        assert store.get(created.id) is None
+        stored = PostgresCharacterRepository(db_session).get(created.id)
+        assert stored.combat_state is None
+        assert stored.inventory == ['goblin_ear']
+
+    def test_recovers_from_checkpoint_after_restart(self, db_session, create_character):
+        """Після втрати сесій (перезапуск процесу) бій продовжується з контрольної точки."""
+        created = create_character(88005)
+        repo = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session),
+                                                CombatSessionStore(InMemoryCacheBackend()),
+                                                checkpoint_every_turns=2)
+        start_combat(repo, created.id)
+        for _ in range(3):
+            play_turn(repo, created.id)
+        db_session.flush()
+
+        restarted = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session),
+                                                     CombatSessionStore(InMemoryCacheBackend()),
+                                                     checkpoint_every_turns=2)
+        character = restarted.get(created.id)
+        assert character.combat_state['turn'] == 2
+        assert character.combat_state['enemy_current_health'] == 80
+
+        # Наступний хід відновлює сесію з новою контрольною точкою
+        play_turn(restarted, created.id)
+        db_session.flush()
+        assert stored_combat_state(db_session, created.id)['turn'] == 3
+        assert restarted.store.get(created.id).checkpoint_turn == 3
+
+    def test_stale_session_from_other_combat_is_ignored(self, db_session, store, create_character):
+        created = create_character(88006)
+        repo = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session), store)
+        start_combat(repo, created.id)
+        db_session.flush()
+        store.set(CombatSession(created.id, {'enemy_id': 'skeleton_01', 'enemy_max_health': 50,
+                                             'enemy_current_health': 5, 'turn': 9}, 9, 0.0))
+
+        assert repo.get(created.id).combat_state['enemy_id'] == 'goblin_01'
+
+    def test_summary_load_does_not_touch_session(self, db_session, store, create_character):
+        """Збереження персонажа без завантаженого стану бою не завершує бій."""
+        created = create_character(88007)
+        repo = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session), store)
+        start_combat(repo, created.id)
+        db_session.flush()
+
+        summary = repo.get_summary(88007)
+        summary.current_health = 90
+        repo.save(summary)
+        db_session.flush()
+
+        assert store.get(created.id) is not None
+        assert stored_combat_state(db_session, created.id) is not None
+
+    def test_rolled_back_turn_does_not_advance_session(self, session_factory, store, create_character):
+        """Відкочена транзакція повертає сесію до стану на її початку."""
+        created = create_character(88008)
+        with session_factory() as session:
+            repo = CombatSessionCharacterRepository(PostgresCharacterRepository(session), store, session=session)
+            start_combat(repo, created.id)
+            play_turn(repo, created.id)
+            session.commit()
+
+        with session_factory() as session:
+            repo = CombatSessionCharacterRepository(PostgresCharacterRepository(session), store, session=session)
+            play_turn(repo, created.id)
+            assert store.get(created.id).turn == 2
+            session.rollback()
+
+        assert store.get(created.id).turn == 1
+        assert store.get(created.id).state['enemy_current_health'] == 90
+
+    def test_rolled_back_combat_start_removes_session(self, session_factory, store, create_character):
+        created = create_character(88009)
+        with session_factory() as session:
+            repo = CombatSessionCharacterRepository(PostgresCharacterRepository(session), store, session=session)
+            start_combat(repo, created.id)
+            session.rollback()
+
+        assert store.get(created.id) is None
+
+    def test_failed_save_restores_session(self, db_session, store, create_character):
+        """Помилка базового репозиторію після запису сесії не лишає її попереду бази."""
+        created = create_character(88010)
+        inner = PostgresCharacterRepository(db_session)
+        repo = CombatSessionCharacterRepository(inner, store)
+        start_combat(repo, created.id)
+        play_turn(repo, created.id)
+        db_session.flush()
+
+        def failing_save(character):
+            raise RuntimeError("database unavailable")
+        inner.save = failing_save
+        with pytest.raises(RuntimeError):
+            play_turn(repo, created.id)
+
+        assert store.get(created.id).turn == 1
+        assert repo.restored_sessions == 1
+
+    def test_stale_turn_is_rejected(self, db_session, store, create_character):
+        """Хід, обчислений зі старого стану, не перезаписує паралельний новіший хід."""
+        created = create_character(88011)
+        repo = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session), store)
+        start_combat(repo, created.id)
+        play_turn(repo, created.id)
+        first = repo.get(created.id)
+        second = repo.get(created.id)
+
+        first.combat_state['enemy_current_health'] -= 10
+        first.combat_state['turn'] += 1
+        repo.save(first)
+        second.combat_state['enemy_current_health'] -= 30
+        second.combat_state['turn'] += 1
+        with pytest.raises(ConcurrencyConflictError):
+            repo.save(second)
+
+        assert store.get(created.id).state['enemy_current_health'] == 80
+        assert repo.stale_turns == 1
+        assert repo.restored_sessions == 0
+
+    def test_turn_is_rejected_after_parallel_checkpoint(self, db_session, store, create_character):
+        """Паралельний хід записав контрольну точку: хід зі старого стану відхиляється."""
+        created = create_character(88012)
+        repo = CombatSessionCharacterRepository(PostgresCharacterRepository(db_session), store,
+                                                checkpoint_every_turns=2)
+        start_combat(repo, created.id)
+        play_turn(repo, created.id)
+        stale = repo.get(created.id)
+        play_turn(repo, created.id)
+        db_session.flush()
+
+        stale.combat_state['enemy_current_health'] -= 30
+        stale.combat_state['turn'] += 1
+        with pytest.raises(ConcurrencyConflictError):
+            repo.save(stale)
+
+        assert store.get(created.id).checkpoint_turn == 2
+        assert store.get(created.id).state['enemy_current_health'] == 80
+        assert stored_combat_state(db_session, created.id)['enemy_current_health'] == 80
+
+    def test_store_advance_requires_older_turn(self):
+        store = CombatSessionStore(InMemoryCacheBackend())
+        previous = CombatSession("c1", {'turn': 1}, 0, 1.0)
+        store.set(previous)
+
+        assert store.advance(CombatSession("c1", {'turn': 2}, 0, 1.0), previous)
+        with pytest.raises(StaleCombatTurnError):
+            store.advance(CombatSession("c1", {'turn': 2}, 0, 1.0), previous)
+        assert store.get("c1").turn == 2
+
+    def test_store_expires_sessions(self):
+        store = CombatSessionStore(InMemoryCacheBackend(), ttl_seconds=0)
+        store.set(CombatSession("c1", {'turn': 1}, 0, 0.0))
+
+        assert store.get("c1") is None
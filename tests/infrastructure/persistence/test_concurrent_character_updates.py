@@ -0,0 +1,93 @@
+# tests/infrastructure/persistence/test_concurrent_character_updates.py
+"""
+Навантажувальні тести оптимістичного блокування персонажів.
+
+На відміну від решти інтеграційних тестів, потоки працюють з окремими
+з'єднаннями та справжніми комітами, тому таблиці створюються поза
+транзакцією тесту, а створені рядки видаляються після нього.
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import delete, inspect
+from sqlalchemy.orm import sessionmaker
+
+from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database import Base
+from infrastructure.persistence.database.models import CharacterModel
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+TELEGRAM_USER_ID = 85001
+WORKERS = 8
+UPDATES_PER_WORKER = 15
+
+
+@pytest.fixture
+def committed_session_factory(db_engine):
+    """Фабрика сесій з реальними комітами; прибирає за собою таблиці та дані."""
+    created_tables = not inspect(db_engine).has_table(CharacterModel.__tablename__)
+    Base.metadata.create_all(db_engine)
+    factory = sessionmaker(bind=db_engine, autoflush=False)
+    yield factory
+
+    with factory() as session:
+        session.execute(delete(CharacterModel).where(CharacterModel.telegram_user_id == TELEGRAM_USER_ID))
+        session.commit()
+    if created_tables:
+        Base.metadata.drop_all(db_engine)
+
+
+def add_experience_with_retry(session_factory, character_id: str, stats: dict) -> None:
+    """Одна команда: завантажити, змінити, зберегти; при конфлікті - повторити."""
+    while True:
+        with session_factory() as session:
+            repo = PostgresCharacterRepository(session)
+            character = repo.get(character_id)
+            character.experience += 1
+            try:
+                repo.save(character)
+                session.commit()
+                return
+            except ConcurrencyConflictError:
+                session.rollback()
+                stats['conflicts'] += 1
+                time.sleep(0.001)
+
+
+def test_concurrent_updates_are_not_lost(committed_session_factory):
+    with committed_session_factory() as session:
+        character = Character(telegram_user_id=TELEGRAM_USER_ID, name="Contended",
+                              base_stats=BaseStats(10, 10, 10, 100, 50))
+        PostgresCharacterRepository(session).save(character)
+        session.commit()
+
+    stats = {'conflicts': 0}
+    lock = threading.Lock()
+    errors = []
+
+    def worker():
+        local = {'conflicts': 0}
+        try:
+            for _ in range(UPDATES_PER_WORKER):
+                add_experience_with_retry(committed_session_factory, character.id, local)
+        except Exception as e:
+            errors.append(e)
+        with lock:
+            stats['conflicts'] += local['conflicts']
+
+    threads = [threading.Thread(target=worker) for _ in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with committed_session_factory() as session:
+        stored = PostgresCharacterRepository(session).get(character.id)
+    total = WORKERS * UPDATES_PER_WORKER
+    assert stored.experience == total
+    # Кожне збереження - рівно одна нова версія, повтори не створюють зайвих.
+    assert stored.version == total + 1
@@ -0,0 +1,158 @@
+# tests/infrastructure/persistence/test_document_character_repository.py
+"""
+Інтеграційні тести для DocumentCharacterRepository та конвертера з реляційного сховища.
+"""
+from uuid import UUID
+
+import pytest
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.database.models import CharacterDocumentModel
+from infrastructure.persistence.document_converter import convert_relational_to_documents
+from infrastructure.persistence.repositories.document_character_repository import DocumentCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+
+
+@pytest.fixture
+def make_character(make_character):
+    """Персонаж, у якого всі поля документа відрізняються від значень за замовчуванням."""
+
+    def factory(telegram_user_id: int = 4242, **overrides) -> Character:
+        values = dict(
+            name="Doc_Hero", level=3, experience=250,
+            base_stats=BaseStats(strength=12, dexterity=11, intelligence=9, base_health=110, base_mana=40),
+            current_health=95, current_mana=30,
+            equipped_items={'weapon': 'sword_01'}, inventory=['potion_1', 'potion_1', 'herb_1'],
+        )
+        values.update(overrides)
+        return make_character(telegram_user_id, **values)
+    return factory
+
+
+class TestDocumentCharacterRepository:
+    """Групує тести документного репозиторію."""
+
+    def test_save_and_get_character(self, db_session, make_character):
+        """Персонаж зберігається та відновлюється з документа без втрат."""
+        repo = DocumentCharacterRepository(db_session)
+        character = make_character(combat_state={
+            'enemy_id': 'goblin_01', 'enemy_level': 1,
+            'enemy_current_health': 20, 'enemy_max_health': 30, 'turn': 2
+        })
+        repo.save(character)
+        db_session.commit()
+
+        loaded = repo.get(character.id)
+
+        assert loaded is not None
+        assert loaded.name == "Doc_Hero"
+        assert loaded.base_stats.strength == 12
+        assert loaded.equipped_items == {'weapon': 'sword_01'}
+        assert sorted(loaded.inventory) == ['herb_1', 'potion_1', 'potion_1']
+        assert loaded.combat_state['enemy_current_health'] == 20
+        assert loaded.get_changed_fields() == set()
+
+    def test_get_by_telegram_user_id_is_single_query(self, db_session, make_character):
+        """Завантаження персонажа з великим інвентарем - один SELECT."""
+        repo = DocumentCharacterRepository(db_session)
+        character = make_character(inventory=[f"item_{i}" for i in range(500)])
+        repo.save(character)
+        db_session.flush()
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            loaded = repo.get_by_telegram_user_id(4242)
+
+        assert counter.count == 1
+        assert len(loaded.inventory) == 500
+        assert repo.get_by_telegram_user_id(999_999) is None
+
+    def test_update_rewrites_document_and_bumps_version(self, db_session, make_character):
+        """Зміна персонажа записується одним upsert та збільшує версію документа."""
+        repo = DocumentCharacterRepository(db_session)
+        character = make_character()
+        repo.save(character)
+        db_session.flush()
+
+        loaded = repo.get(character.id)
+        loaded.current_health = 40
+        loaded.add_item('gem_1')
+        with StatementCounter(db_session.get_bind()) as counter:
+            repo.save(loaded)
+        db_session.flush()
+
+        assert counter.count == 1
+        row = db_session.get(CharacterDocumentModel, UUID(character.id), populate_existing=True)
+        assert row.version == 2
+        assert row.document['current_health'] == 40
+        assert row.document['inventory']['gem_1'] == 1
+
+    def test_save_without_changes_does_nothing(self, db_session, make_character):
+        """Збереження незміненого персонажа не виконує запитів."""
+        repo = DocumentCharacterRepository(db_session)
+        repo.save(make_character())
+        db_session.flush()
+
+        loaded = repo.get_by_telegram_user_id(4242)
+        with StatementCounter(db_session.get_bind()) as counter:
+            repo.save(loaded)
+
+        assert counter.count == 0
+
+    def test_delete(self, db_session, make_character):
+        repo = DocumentCharacterRepository(db_session)
+        character = make_character()
+        repo.save(character)
+        db_session.flush()
+
+        repo.delete(character.id)
+
+        assert repo.get(character.id) is None
+
+    def test_stats_cache_is_invalidated_by_equipment(self, db_session, make_character):
+        """Кеш характеристик повертається лише для тієї ж екіпіровки."""
+        repo = DocumentCharacterRepository(db_session)
+        character = make_character()
+        repo.save(character)
+        db_session.flush()
+
+        stats = {'max_health': 150, 'max_mana': 60, 'critical_chance': 0.05}
+        repo.save_stats_cache(character.id, stats, ['sword_01'])
+
+        assert repo.get_stats_cache(character.id, ['sword_01']) == stats
+        assert repo.get_stats_cache(character.id, ['sword_01', 'helmet_01']) is None
+
+
+class TestDocumentConverter:
+    """Тести перенесення персонажів з реляційних таблиць у документи."""
+
+    def test_converts_all_characters_in_batches(self, db_session, make_character):
+        relational = PostgresCharacterRepository(db_session)
+        characters = [make_character(telegram_user_id=7000 + i, name=f"Hero_{i}") for i in range(5)]
+        for character in characters:
+            relational.save(character)
+        db_session.flush()
+
+        batches = []
+        converted = convert_relational_to_documents(
+            db_session, db_session, batch_size=2,
+            on_batch=lambda count, last_id: batches.append(count)
+        )
+
+        assert converted == 5
+        assert batches == [2, 4, 5]
+        documents = DocumentCharacterRepository(db_session)
+        for character in characters:
+            loaded = documents.get_by_telegram_user_id(character.telegram_user_id)
+            assert loaded.id == character.id
+            assert loaded.name == character.name
+            assert sorted(loaded.inventory) == sorted(character.inventory)
+
+    def test_conversion_can_be_repeated(self, db_session, make_character):
+        """Повторний запуск перезаписує документи без помилок."""
+        PostgresCharacterRepository(db_session).save(make_character())
+        db_session.flush()
+
+        assert convert_relational_to_documents(db_session, db_session) == 1
+        assert convert_relational_to_documents(db_session, db_session) == 1
@@ -0,0 +1,200 @@
+# tests/infrastructure/persistence/test_engine_routing.py
+"""
+Тести маршрутизації сесій між основною базою та репліками.
+
+Замість реплік PostgreSQL використовуються окремі бази SQLite у пам'яті,
+а відставання задається заглушкою lag_probe. Вимірювання відставання
+перевіряється на тестовій базі PostgreSQL (для основного сервера воно нульове).
+"""
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.database import Base
+from infrastructure.cache.backends import InMemoryCacheBackend
+from infrastructure.persistence.database.routing import EngineRouter, measure_replication_lag
+from infrastructure.persistence.repositories.cached_character_repository import CachedCharacterRepository
+from infrastructure.persistence.repositories.sqlite_character_repository import SqliteCharacterRepository
+from infrastructure.persistence.unit_of_work import SqlAlchemyUnitOfWork
+
+
+def stand_in_engine():
+    """База SQLite у пам'яті, спільна для всіх з'єднань рушія."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+class FakeLag:
+    """Заглушка вимірювання відставання з лічильником викликів."""
+    def __init__(self, lags):
+        self.lags = lags
+        self.calls = 0
+
+    def __call__(self, engine):
+        self.calls += 1
+        return self.lags[engine]
+
+
+@pytest.fixture
+def engines():
+    primary, first, second = stand_in_engine(), stand_in_engine(), stand_in_engine()
+    yield primary, first, second
+    for engine in (primary, first, second):
+        engine.dispose()
+
+
+class TestEngineRouter:
+    """Вибір рушія для сесій читання та запису."""
+
+    def test_writes_go_to_primary(self, engines):
+        primary, first, second = engines
+        router = EngineRouter(primary, [first, second], lag_probe=FakeLag({first: 0.0, second: 0.0}))
+
+        assert router.engine_for(read_only=False) is primary
+        assert router.stats.writes == 1
+
+    def test_reads_without_replicas_go_to_primary(self, engines):
+        primary, _, _ = engines
+
+        assert EngineRouter(primary).engine_for(read_only=True) is primary
+
+    def test_reads_rotate_between_fresh_replicas(self, engines):
+        primary, first, second = engines
+        router = EngineRouter(primary, [first, second], lag_probe=FakeLag({first: 0.1, second: 0.5}))
+        router.refresh_lags()
+
+        chosen = [router.engine_for(read_only=True) for _ in range(4)]
+
+        assert chosen == [first, second, first, second]
+        assert router.stats.replica_reads == 4
+
+    def test_lagging_replica_is_skipped(self, engines):
+        primary, first, second = engines
+        router = EngineRouter(primary, [first, second], max_lag_seconds=2,
+                              lag_probe=FakeLag({first: 30.0, second: 0.0}))
+        router.refresh_lags()
+
+        assert {router.engine_for(read_only=True) for _ in range(4)} == {second}
+
+    def test_falls_back_to_primary(self, engines):
+        primary, first, second = engines
+        router = EngineRouter(primary, [first, second], max_lag_seconds=2,
+                              lag_probe=FakeLag({first: 30.0, second: None}))
+        router.refresh_lags()
+
+        assert router.engine_for(read_only=True) is primary
+        assert router.stats.primary_fallbacks == 1
+        assert router.replica_lags() == [30.0, None]
+
+    def test_engine_choice_never_probes_replicas(self, engines):
+        primary, first, _ = engines
+        probe = FakeLag({first: 0.0})
+        router = EngineRouter(primary, [first], lag_probe=probe)
+
+        # До першого вимірювання репліка вважається невідомою
+        assert router.engine_for(read_only=True) is primary
+        router.refresh_lags()
+        for _ in range(10):
+            assert router.engine_for(read_only=True) is first
+        assert probe.calls == 1
+
+        probe.lags[first] = 10.0
+        router.refresh_lags()
+        assert router.engine_for(read_only=True) is primary
+
+    def test_old_measurement_counts_as_lag(self, engines):
+        primary, first, _ = engines
+        router = EngineRouter(primary, [first], max_lag_seconds=0.05, lag_probe=FakeLag({first: 0.0}))
+        router.refresh_lags()
+        assert router.engine_for(read_only=True) is first
+
+        # Фоновий потік давно не оновлював результат: репліка могла відстати
+        time.sleep(0.1)
+        assert router.engine_for(read_only=True) is primary
+
+    def test_background_thread_measures_lag(self, engines):
+        primary, first, _ = engines
+        probe = FakeLag({first: 0.0})
+        router = EngineRouter(primary, [first], lag_check_interval_seconds=0.01, lag_probe=probe)
+        router.start()
+        try:
+            deadline = time.monotonic() + 5
+            while probe.calls < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            router.stop()
+
+        assert probe.calls >= 3
+        assert router.engine_for(read_only=True) is first
+
+    def test_measure_replication_lag(self, db_engine):
+        unreachable = create_engine(db_engine.url.set(port=1, host='127.0.0.1'))
+
+        assert measure_replication_lag(db_engine) == 0.0
+        assert measure_replication_lag(unreachable) is None
+        unreachable.dispose()
+
+
+class TestReadOnlyUnitOfWork:
+    """Одиниця роботи для команд, що лише читають дані."""
+
+    def test_read_only_uow_reads_from_replica(self, engines):
+        primary, replica, _ = engines
+        router = EngineRouter(primary, [replica], lag_probe=FakeLag({replica: 0.0}))
+        router.refresh_lags()
+        with SqlAlchemyUnitOfWork(
+            session_factory=router.session_factory(read_only=False),
+            repository_factory=SqliteCharacterRepository,
+        ) as uow:
+            uow.characters.save(Character(telegram_user_id=87001, name="Primary",
+                                          base_stats=BaseStats(10, 10, 10, 100, 50)))
+            uow.commit()
+        with Session(replica) as session:
+            SqliteCharacterRepository(session).save(Character(telegram_user_id=87001, name="Replica",
+                                                              base_stats=BaseStats(10, 10, 10, 100, 50)))
+            session.commit()
+
+        with SqlAlchemyUnitOfWork(
+            session_factory=router.session_factory(read_only=True),
+            repository_factory=SqliteCharacterRepository,
+            read_only=True,
+        ) as uow:
+            assert uow.characters.get_summary(87001).name == "Replica"
+
+    def test_read_only_uow_rejects_writes(self, engines):
+        primary, _, _ = engines
+        with SqlAlchemyUnitOfWork(
+            session_factory=EngineRouter(primary).session_factory(read_only=True),
+            repository_factory=SqliteCharacterRepository,
+            read_only=True,
+        ) as uow:
+            uow.characters.save(Character(telegram_user_id=87002, name="Reader",
+                                          base_stats=BaseStats(10, 10, 10, 100, 50)))
+            with pytest.raises(RuntimeError):
+                uow.commit()
+
+    def test_replica_reads_do_not_populate_cache(self, engines):
+        primary, replica, _ = engines
+        router = EngineRouter(primary, [replica], lag_probe=FakeLag({replica: 0.0}))
+        router.refresh_lags()
+        with Session(replica) as session:
+            SqliteCharacterRepository(session).save(Character(telegram_user_id=87003, name="Lagged",
+                                                              base_stats=BaseStats(10, 10, 10, 100, 50)))
+            session.commit()
+        backend = InMemoryCacheBackend()
+
+        with router.session_factory(read_only=True)() as session:
+            assert session.info['replica'] is True
+            repository = CachedCharacterRepository(SqliteCharacterRepository(session), backend,
+                                                   session=session, populate=not session.info['replica'])
+            assert repository.get_by_telegram_user_id(87003).name == "Lagged"
+
+        assert backend.get("character:tg:87003") is None
+        with router.session_factory(read_only=False)() as session:
+            assert session.info['replica'] is False
@@ -0,0 +1,184 @@
+# tests/infrastructure/persistence/test_event_sourced_character_repository.py
+"""
+Тести журналу подій персонажа: виведення подій зі змін, історія,
+відновлення стану зі знімка та хвоста подій, секціонування журналу.
+Загальна поведінка сховища перевіряється контрактним набором тестів.
+"""
+from uuid import UUID
+
+import pytest
+from sqlalchemy import func, select, text
+
+from domain.entities.character import Character
+from infrastructure.persistence.character_events import apply_events, character_events
+from infrastructure.persistence.character_serializer import character_to_document
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.database.models import (
+    CHARACTER_EVENT_PARTITIONS, CharacterEventModel, CharacterSnapshotModel
+)
+from infrastructure.persistence.repositories.event_sourced_character_repository import (
+    EventSourcedCharacterRepository
+)
+
+
+@pytest.fixture
+def make_character(make_character):
+    """Персонаж з екіпіруванням та інвентарем у стартовій локації."""
+
+    def factory(telegram_user_id: int = 5151, **overrides) -> Character:
+        values = dict(
+            name="Event_Hero", location_id='town_main',
+            equipped_items={'weapon': 'sword_01'}, inventory=['potion', 'potion'],
+        )
+        values.update(overrides)
+        return make_character(telegram_user_id, **values)
+    return factory
+
+
+class TestCharacterEvents:
+    """Виведення подій зі змін персонажа без бази даних."""
+
+    def test_new_character_is_created_event(self, make_character):
+        character = make_character()
+
+        events = character_events(character)
+
+        assert events == [{'type': 'created', 'state': character_to_document(character)}]
+
+    def test_unchanged_character_has_no_events(self, make_character):
+        character = make_character()
+        character.mark_persisted()
+
+        assert character_events(character) == []
+
+    def test_events_describe_changes(self, make_character):
+        character = make_character()
+        character.mark_persisted()
+
+        character.gain_experience(30)
+        character.take_damage(100)
+        character.travel_to('forest_dark')
+        character.remove_item('potion')
+        character.add_item('goblin_ear')
+        character.equip_item('leather_armor', 'armor')
+
+        events = {event['type']: event for event in character_events(character)}
+
+        assert events['experience_gained']['amount'] == 30
+        assert events['died']['current_health'] == 0
+        assert events['travelled'] == {'type': 'travelled', 'from': 'town_main', 'to': 'forest_dark'}
+        assert events['items_changed']['delta'] == {'potion': -1, 'goblin_ear': 1}
+        assert events['equipment_changed']['slots'] == {'armor': 'leather_armor'}
+
+    def test_apply_events_reproduces_state(self, make_character):
+        character = make_character()
+        document = apply_events({}, character_events(character))
+        character.mark_persisted()
+
+        character.gain_experience(500)
+        character.combat_state = {'enemy_id': 'goblin_01', 'turn': 0}
+        character.add_item('goblin_ear')
+        apply_events(document, character_events(character))
+
+        assert document == character_to_document(character)
+
+
+class TestEventSourcedCharacterRepository:
+    """Інтеграційні тести сховища на журналі подій."""
+
+    def test_every_save_appends_one_row(self, db_session, make_character):
+        repo = EventSourcedCharacterRepository(db_session, snapshot_every=10)
+        character = make_character()
+        repo.save(character)
+        for _ in range(3):
+            character.take_damage(5)
+            repo.save(character)
+        db_session.commit()
+
+        versions = db_session.scalars(
+            select(CharacterEventModel.version)
+            .where(CharacterEventModel.character_id == UUID(character.id))
+            .order_by(CharacterEventModel.version)
+        ).all()
+        assert versions == [1, 2, 3, 4]
+        assert character.version == 4
+
+    def test_load_uses_snapshot_and_tail(self, db_session, make_character):
+        repo = EventSourcedCharacterRepository(db_session, snapshot_every=5)
+        character = make_character()
+        repo.save(character)
+        for _ in range(7):
+            character.take_damage(1)
+            repo.save(character)
+        db_session.commit()
+
+        snapshot_version = db_session.scalar(
+            select(CharacterSnapshotModel.version).where(CharacterSnapshotModel.character_id == UUID(character.id))
+        )
+        with StatementCounter(db_session.get_bind()) as counter:
+            loaded = repo.get_by_telegram_user_id(5151)
+
+        assert snapshot_version == 5
+        assert len(counter.statements) == 2
+        assert loaded.version == 8
+        assert loaded.current_health == 93
+
+    def test_history_filters_by_type(self, db_session, make_character):
+        repo = EventSourcedCharacterRepository(db_session)
+        character = make_character()
+        repo.save(character)
+        character.take_damage(500)
+        repo.save(character)
+        character.heal(100)
+        character.travel_to('forest_dark')
+        repo.save(character)
+        db_session.commit()
+
+        history = repo.history(character.id)
+        deaths = repo.history(character.id, event_type='died')
+
+        assert [event['type'] for event in history] == ['created', 'died', 'vitals_changed', 'travelled']
+        assert len(deaths) == 1
+        assert deaths[0]['version'] == 2
+
+    def test_rebuild_to_past_version(self, db_session, make_character):
+        repo = EventSourcedCharacterRepository(db_session, snapshot_every=2)
+        character = make_character()
+        repo.save(character)
+        character.travel_to('forest_dark')
+        repo.save(character)
+        character.travel_to('cave_entrance')
+        repo.save(character)
+        db_session.commit()
+
+        assert repo.rebuild(character.id, up_to_version=2).location_id == 'forest_dark'
+        rebuilt = repo.rebuild(character.id)
+        assert character_to_document(rebuilt) == character_to_document(repo.get(character.id))
+        assert rebuilt.version == 3
+
+    def test_delete_keeps_history(self, db_session, make_character):
+        repo = EventSourcedCharacterRepository(db_session)
+        character = make_character()
+        repo.save(character)
+        repo.delete(character.id)
+        db_session.commit()
+
+        assert repo.get(character.id) is None
+        assert repo.rebuild(character.id) is None
+        assert [event['type'] for event in repo.history(character.id)] == ['created', 'deleted']
+
+    def test_events_table_is_hash_partitioned(self, db_session, make_character):
+        partitions = db_session.execute(text(
+            "SELECT count(*) FROM pg_inherits "
+            "WHERE inhparent = 'character_events'::regclass"
+        )).scalar_one()
+        repo = EventSourcedCharacterRepository(db_session)
+        for telegram_user_id in range(6000, 6040):
+            repo.save(make_character(telegram_user_id))
+        db_session.commit()
+
+        used = db_session.scalar(
+            select(func.count(func.distinct(text("tableoid")))).select_from(CharacterEventModel)
+        )
+        assert partitions == CHARACTER_EVENT_PARTITIONS
+        assert used > 1
@@ -0,0 +1,72 @@
+# tests/infrastructure/persistence/test_identity_map_character_repository.py
+"""
+Тести для IdentityMapCharacterRepository: одна команда - одне завантаження персонажа.
+"""
+from domain.services.event_generator import EventGenerator
+from domain.services.stats_calculator import StatsCalculator
+from application.dto.travel_dto import TravelRequest
+from application.use_cases.character.travel import TravelUseCase
+from application.use_cases.combat.start_combat import StartCombatUseCase, StartCombatRequest
+from application.use_cases.events.generate_event_use_case import GenerateEventUseCase, GenerateEventRequest
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.repositories.identity_map_character_repository import IdentityMapCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.repositories.json_enemy_repository import JsonEnemyRepository
+from infrastructure.persistence.repositories.json_item_repository import JsonItemRepository
+from infrastructure.persistence.repositories.json_location_repository import JsonLocationRepository
+
+
+class TestIdentityMapCharacterRepository:
+    """Групує тести для карти ідентичності персонажів."""
+
+    def test_same_instance_is_returned(self, db_session, create_character):
+        created = create_character(85001, location_id="town_main")
+        repo = IdentityMapCharacterRepository(PostgresCharacterRepository(db_session))
+
+        by_telegram = repo.get_by_telegram_user_id(85001)
+        by_id = repo.get(created.id)
+        assert by_telegram is by_id
+
+    def test_explore_command_loads_character_once(self, db_session, create_character, data_path):
+        """Обробник /explore разом з use case бою завантажує персонажа одним SELECT."""
+        create_character(85002, location_id="forest_dark")
+        repo = IdentityMapCharacterRepository(PostgresCharacterRepository(db_session))
+        location_repo = JsonLocationRepository(data_path)
+        stats_calculator = StatsCalculator(JsonItemRepository(data_path))
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            character = repo.get_for_combat(85002)
+            GenerateEventUseCase(repo, location_repo, EventGenerator()).execute(
+                GenerateEventRequest(character_id=character.id)
+            )
+            StartCombatUseCase(repo, JsonEnemyRepository(data_path), stats_calculator, location_repo).execute(
+                StartCombatRequest(character_id=character.id)
+            )
+            db_session.flush()
+
+        assert counter.count_of('SELECT') == 1
+        # Обробник бачить зміни, зроблені use case
+        assert character.combat_state is not None
+
+    def test_travel_command_loads_character_once(self, db_session, create_character, data_path):
+        """Обробник подорожі та TravelUseCase завантажують персонажа одним SELECT."""
+        create_character(85003, location_id="town_main")
+        repo = IdentityMapCharacterRepository(PostgresCharacterRepository(db_session))
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            character = repo.get_for_combat(85003)
+            response = TravelUseCase(repo, JsonLocationRepository(data_path)).execute(
+                TravelRequest(character_id=character.id, destination_id="forest_dark")
+            )
+            db_session.flush()
+
+        assert response.success is True
+        assert counter.count_of('SELECT') == 1
+
+    def test_missing_character_is_looked_up_once(self, db_session):
+        repo = IdentityMapCharacterRepository(PostgresCharacterRepository(db_session))
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            assert repo.get_by_telegram_user_id(85999) is None
+            assert repo.get_by_telegram_user_id(85999) is None
+        assert counter.count_of('SELECT') == 1
@@ -2,11 +2,17 @@
 """
 Інтеграційні тести для PostgresCharacterRepository.
 """
-from uuid import uuid4
+from uuid import uuid4, UUID
+
+import pytest
+
+from infrastructure.persistence.database.models import InventoryModel
 
 from domain.entities.character import Character
+from domain.exceptions import ConcurrencyConflictError
 from domain.value_objects.stats import BaseStats
 from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.database.instrumentation import StatementCounter
 
 
 class TestPostgresCharacterRepository:
@@ -186,7 +192,7 @@ class TestPostgresCharacterRepository:
         assert retrieved_cache is None
 
     def test_inventory_update(self, db_session):
-        """Перевіряє, що оновлення інвентаря працює коректно (стратегія delete-insert)."""
+        """Перевіряє, що оновлення інвентаря працює коректно (збереження змін як дельт)."""
         # 1. Підготовка: Створюємо персонажа з початковим інвентарем
         repo = PostgresCharacterRepository(db_session)
         character_id = str(uuid4())
@@ -441,3 +447,289 @@ class TestPostgresCharacterRepository:
 
         # Кеш не існує, має повертати None
         assert cached_stats is None
+
+    def test_save_without_changes_issues_no_statements(self, db_session):
+        """Перевіряє, що збереження незміненого персонажа не виконує жодного запиту."""
+        repo = PostgresCharacterRepository(db_session)
+        character_id = str(uuid4())
+        repo.save(Character(id=character_id, telegram_user_id=81001, name="Idle",
+                            base_stats=BaseStats(10, 10, 10, 100, 50), inventory=['apple']))
+        db_session.commit()
+
+        loaded = repo.get(character_id)
+        with StatementCounter(db_session.get_bind()) as counter:
+            repo.save(loaded)
+            db_session.flush()
+
+        assert counter.count == 0
+
+    def test_health_change_issues_single_update(self, db_session):
+        """Перевіряє, що зміна лише здоров'я виконує один UPDATE без SELECT та DELETE."""
+        repo = PostgresCharacterRepository(db_session)
+        character_id = str(uuid4())
+        repo.save(Character(id=character_id, telegram_user_id=81002, name="Fighter",
+                            base_stats=BaseStats(10, 10, 10, 100, 50), inventory=['apple', 'cheese']))
+        db_session.commit()
+
+        loaded = repo.get(character_id)
+        loaded.take_damage(15)
+        with StatementCounter(db_session.get_bind()) as counter:
+            repo.save(loaded)
+            db_session.flush()
+
+        assert counter.count == 1
+        assert counter.count_of('UPDATE') == 1
+        db_session.commit()
+        assert repo.get(character_id).current_health == 85
+
+    def test_combat_turn_updates_only_combat_state(self, db_session):
+        """Перевіряє, що хід бою оновлює тільки стан бою та здоров'я."""
+        repo = PostgresCharacterRepository(db_session)
+        character_id = str(uuid4())
+        character = Character(id=character_id, telegram_user_id=81003, name="Brawler",
+                              base_stats=BaseStats(10, 10, 10, 100, 50))
+        character.combat_state = {'enemy_id': 'goblin_01', 'enemy_level': 2,
+                                  'enemy_current_health': 80, 'enemy_max_health': 80, 'turn': 0}
+        repo.save(character)
+        db_session.commit()
+
+        loaded = repo.get(character_id)
+        loaded.combat_state['enemy_current_health'] = 60
+        loaded.combat_state['turn'] += 1
+        loaded.take_damage(5)
+        with StatementCounter(db_session.get_bind()) as counter:
+            repo.save(loaded)
+            db_session.flush()
+
+        assert counter.count == 2
+        assert counter.count_of('SELECT') == 0
+        assert counter.count_of('DELETE') == 0
+        db_session.commit()
+
+        reloaded = repo.get(character_id)
+        assert reloaded.combat_state['enemy_current_health'] == 60
+        assert reloaded.combat_state['turn'] == 1
+
+        # Завершення бою видаляє запис стану бою
+        reloaded.combat_state = None
+        repo.save(reloaded)
+        db_session.commit()
+        assert repo.get(character_id).combat_state is None
+
+    def test_inventory_delta_preserves_existing_rows(self, db_session):
+        """Перевіряє, що додавання предмета не перезаписує інші записи інвентаря."""
+        repo = PostgresCharacterRepository(db_session)
+        character_id = str(uuid4())
+        repo.save(Character(id=character_id, telegram_user_id=82001, name="Hoarder",
+                            base_stats=BaseStats(10, 10, 10, 100, 50),
+                            inventory=[f"item_{i}" for i in range(100)]))
+        db_session.commit()
+        acquired_before = {
+            row.item_id: row.acquired_at
+            for row in db_session.query(InventoryModel).filter_by(character_id=UUID(character_id))
+        }
+
+        loaded = repo.get(character_id)
+        loaded.add_item('item_1')
+        loaded.add_item('new_item')
+        with StatementCounter(db_session.get_bind()) as counter:
+            repo.save(loaded)
+            db_session.flush()
+        db_session.commit()
+
+        # Оновлення версії та один upsert для обох предметів, без DELETE
+        assert counter.count == 2
+        assert counter.count_of('UPDATE') == 1
+        assert counter.count_of('INSERT') == 1
+        rows = {row.item_id: row for row in db_session.query(InventoryModel).filter_by(character_id=UUID(character_id))}
+        assert rows['item_1'].quantity == 2
+        assert rows['new_item'].quantity == 1
+        assert rows['item_1'].acquired_at == acquired_before['item_1']
+        assert len(rows) == 101
+
+    def test_inventory_delta_decrement_and_delete(self, db_session):
+        """Перевіряє зменшення кількості та видалення предметів, яких більше немає."""
+        repo = PostgresCharacterRepository(db_session)
+        character_id = str(uuid4())
+        repo.save(Character(id=character_id, telegram_user_id=82002, name="Consumer",
+                            base_stats=BaseStats(10, 10, 10, 100, 50),
+                            inventory=['potion', 'potion', 'potion', 'scroll', 'apple']))
+        db_session.commit()
+
+        loaded = repo.get(character_id)
+        loaded.remove_item('potion')
+        loaded.remove_item('scroll')
+        repo.save(loaded)
+        db_session.commit()
+
+        final_character = repo.get(character_id)
+        assert sorted(final_character.inventory) == ['apple', 'potion', 'potion']
+
+
+class TestPartialLoading:
+    """Тести часткових завантажень персонажа для окремих команд."""
+
+    def _create(self, db_session, telegram_user_id: int) -> Character:
+        character = Character(
+            telegram_user_id=telegram_user_id, name="Partial",
+            base_stats=BaseStats(10, 10, 10, 100, 50),
+            equipped_items={'weapon': 'sword_1'},
+            inventory=[f"item_{i}" for i in range(50)],
+            combat_state={'enemy_id': 'goblin_01', 'enemy_level': 1,
+                          'enemy_current_health': 30, 'enemy_max_health': 30, 'turn': 0}
+        )
+        PostgresCharacterRepository(db_session).save(character)
+        db_session.commit()
+        return character
+
+    def test_full_load_does_not_multiply_rows(self, db_session):
+        """Повне завантаження - запит персонажа та окремий запит інвентаря."""
+        self._create(db_session, 87001)
+        repo = PostgresCharacterRepository(db_session)
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            character = repo.get_by_telegram_user_id(87001)
+
+        assert counter.count_of('SELECT') == 2
+        assert len(character.inventory) == 50
+        assert character.combat_state is not None
+        assert character.equipped_items['weapon'] == 'sword_1'
+
+    def test_get_for_combat(self, db_session):
+        """Бойове завантаження - один запит без інвентаря."""
+        self._create(db_session, 87002)
+        repo = PostgresCharacterRepository(db_session)
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            character = repo.get_for_combat(87002)
+
+        assert counter.count_of('SELECT') == 1
+        assert character.inventory == []
+        assert character.combat_state['enemy_current_health'] == 30
+        assert character.equipped_items['weapon'] == 'sword_1'
+
+    def test_loot_after_combat_load_keeps_inventory(self, db_session):
+        """Здобич, додана до частково завантаженого персонажа, не стирає інвентар."""
+        created = self._create(db_session, 87003)
+        repo = PostgresCharacterRepository(db_session)
+
+        character = repo.get_for_combat(87003)
+        character.add_item('item_0')
+        character.add_item('gem_1')
+        character.combat_state = None
+        repo.save(character)
+        db_session.commit()
+
+        reloaded = repo.get(created.id)
+        assert len(reloaded.inventory) == 52
+        assert reloaded.inventory.count('item_0') == 2
+        assert reloaded.combat_state is None
+
+    def test_get_for_inventory(self, db_session):
+        self._create(db_session, 87004)
+        repo = PostgresCharacterRepository(db_session)
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            character = repo.get_for_inventory(87004)
+
+        assert counter.count_of('SELECT') == 2
+        assert len(character.inventory) == 50
+        assert character.combat_state is None
+        assert character.equipped_items['weapon'] == 'sword_1'
+
+    def test_get_summary(self, db_session):
+        self._create(db_session, 87005)
+        repo = PostgresCharacterRepository(db_session)
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            character = repo.get_summary(87005)
+
+        assert counter.count_of('SELECT') == 1
+        assert character.name == "Partial"
+        assert character.inventory == []
+        assert character.combat_state is None
+        assert repo.get_summary(87999) is None
+
+    def test_saving_unchanged_summary_writes_nothing(self, db_session):
+        """Незавантажені частини не вважаються зміненими."""
+        self._create(db_session, 87006)
+        repo = PostgresCharacterRepository(db_session)
+
+        character = repo.get_summary(87006)
+        with StatementCounter(db_session.get_bind()) as counter:
+            repo.save(character)
+
+        assert counter.count == 0
+
+
+class TestOptimisticConcurrency:
+    """Тести перевірки версії при збереженні персонажа."""
+
+    def _create(self, db_session, telegram_user_id: int) -> Character:
+        character = Character(telegram_user_id=telegram_user_id, name="Versioned",
+                              base_stats=BaseStats(10, 10, 10, 100, 50))
+        PostgresCharacterRepository(db_session).save(character)
+        db_session.commit()
+        return character
+
+    def test_version_increments_on_each_save(self, db_session):
+        created = self._create(db_session, 86001)
+        repo = PostgresCharacterRepository(db_session)
+        assert created.version == 1
+
+        character = repo.get(created.id)
+        character.current_health = 90
+        repo.save(character)
+        character.current_health = 80
+        repo.save(character)
+        db_session.commit()
+
+        assert character.version == 3
+        assert repo.get(created.id).version == 3
+
+    def test_stale_save_raises_conflict(self, session_factory, db_session):
+        """Друге збереження з однієї версії відхиляється і нічого не перезаписує."""
+        created = self._create(db_session, 86002)
+        first = PostgresCharacterRepository(db_session).get(created.id)
+        second = PostgresCharacterRepository(db_session).get(created.id)
+
+        first.gain_experience(10)
+        PostgresCharacterRepository(db_session).save(first)
+        db_session.commit()
+
+        second.current_health = 1
+        stale_session = session_factory()
+        with pytest.raises(ConcurrencyConflictError) as exc_info:
+            PostgresCharacterRepository(stale_session).save(second)
+        stale_session.rollback()
+
+        assert exc_info.value.entity_id == created.id
+        assert exc_info.value.expected_version == 1
+        stored = PostgresCharacterRepository(db_session).get(created.id)
+        assert stored.experience == 10
+        assert stored.current_health == 100
+        assert stored.version == 2
+
+    def test_retry_after_conflict_succeeds(self, session_factory, db_session):
+        created = self._create(db_session, 86003)
+        repo = PostgresCharacterRepository(db_session)
+        stale = repo.get(created.id)
+
+        fresh = repo.get(created.id)
+        fresh.gain_experience(5)
+        repo.save(fresh)
+        db_session.commit()
+
+        retry_session = session_factory()
+        retry_repo = PostgresCharacterRepository(retry_session)
+        stale.gain_experience(5)
+        with pytest.raises(ConcurrencyConflictError):
+            retry_repo.save(stale)
+        retry_session.rollback()
+
+        reloaded = retry_repo.get(created.id)
+        reloaded.gain_experience(5)
+        retry_repo.save(reloaded)
+        retry_session.commit()
+
+        assert repo.get(created.id).experience == 10
@@ -0,0 +1,271 @@
+# tests/infrastructure/persistence/test_sharding.py
+"""
+Тести шардування персонажів та перенесення кошиків між шардами.
+
+Шарди - окремі бази rpg_game_test_shard_N на тому ж сервері, що й тестова
+база (створюються при першому запуску, потрібне право CREATEDB). Інструмент
+перешардування працює зі справжніми комітами, тож після кожного тесту
+таблиці шардів очищаються.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, delete, func, select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from domain.entities.character import Character
+from domain.exceptions import ShardMovedError, UserLockTimeoutError
+from infrastructure.persistence.database import Base
+from infrastructure.persistence.database.models import CharacterModel, ShardBucketModel
+from infrastructure.persistence.database.sharding import SHARD_BUCKETS, ShardRouter, bucket_for
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.resharding import initialize_shard_map, move_buckets, plan_rebalance, rebalance
+from infrastructure.persistence.unit_of_work import SqlAlchemyUnitOfWork
+
+SHARDS = 3
+
+
+@pytest.fixture(scope="session")
+def shard_engines(db_engine):
+    names = [f"{db_engine.url.database}_shard_{index}" for index in range(SHARDS)]
+    try:
+        with db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            existing = set(connection.execute(text("SELECT datname FROM pg_database")).scalars())
+            for name in names:
+                if name not in existing:
+                    connection.execute(text(f'CREATE DATABASE "{name}"'))
+    except SQLAlchemyError as e:
+        pytest.skip(f"Не вдалося створити бази шардів: {e}")
+
+    engines = [create_engine(db_engine.url.set(database=name)) for name in names]
+    for engine in engines:
+        Base.metadata.create_all(engine)
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def router(shard_engines):
+    yield ShardRouter(shard_engines, move_wait_seconds=0.2, poll_interval_seconds=0.01)
+    for engine in shard_engines:
+        with engine.begin() as connection:
+            connection.execute(delete(CharacterModel))
+            connection.execute(delete(ShardBucketModel))
+
+
+@pytest.fixture
+def create_sharded_character(router, make_character):
+    """Фабрика персонажів, збережених через одиницю роботи маршрутизатора шардів."""
+
+    def factory(telegram_user_id: int, **overrides) -> Character:
+        character = make_character(telegram_user_id, **overrides)
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(),
+                                  repository_factory=PostgresCharacterRepository) as uow:
+            uow.characters.save(character)
+            uow.commit()
+        return character
+    return factory
+
+
+def count_on(engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(CharacterModel)).scalar_one()
+
+
+class TestShardRouter:
+    """Розміщення гравців за шардами."""
+
+    def test_default_layout_without_map(self, router):
+        assert bucket_for(SHARD_BUCKETS + 5) == 5
+        assert router.shard_for_user(5) == 5 % SHARDS
+        assert router.shard_for_user(SHARD_BUCKETS + 5) == 5 % SHARDS
+
+    def test_characters_are_stored_on_their_shard(self, router, shard_engines, create_sharded_character):
+        for telegram_user_id in (3000, 3001, 3002, 3003):
+            create_sharded_character(telegram_user_id)
+
+        # Кошики 952..955 (telegram_user_id % 1024) лежать на шардах 1, 2, 0, 1.
+        assert [count_on(engine) for engine in shard_engines] == [1, 2, 1]
+
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(read_only=True),
+                                  repository_factory=PostgresCharacterRepository, read_only=True) as uow:
+            assert uow.characters.get_summary(3001).name == "Hero_3001"
+
+    def test_get_by_id_locates_shard(self, router, create_sharded_character):
+        character = create_sharded_character(3004)
+
+        session = router.session_factory()()
+        try:
+            loaded = PostgresCharacterRepository(session).get(character.id)
+        finally:
+            session.close()
+
+        assert loaded.telegram_user_id == 3004
+        assert session.shard_id == router.shard_for_user(3004)
+        assert router.stats.character_lookups == 1
+
+    def test_session_serves_one_shard(self, router):
+        session = router.session_factory()()
+        repo = PostgresCharacterRepository(session)
+        try:
+            repo.get_summary(3000)
+            with pytest.raises(ValueError):
+                repo.get_summary(3001)
+        finally:
+            session.close()
+
+
+class TestResharding:
+    """Перенесення кошиків між шардами."""
+
+    def test_move_bucket_keeps_character(self, router, shard_engines, create_sharded_character):
+        character = create_sharded_character(3005, inventory=['potion', 'potion'])
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(),
+                                  repository_factory=PostgresCharacterRepository) as uow:
+            loaded = uow.characters.get_for_inventory(3005)
+            loaded.add_item('goblin_ear')
+            uow.characters.save(loaded)
+            uow.commit()
+        initialize_shard_map(router)
+        source = router.shard_for_user(3005)
+        target = (source + 1) % SHARDS
+
+        stats = move_buckets(router, [bucket_for(3005)], target, batch_size=10, settle_seconds=0)
+
+        assert stats.buckets == 1 and stats.characters == 1
+        assert router.shard_for_user(3005) == target
+        assert count_on(shard_engines[source]) == 0
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(),
+                                  repository_factory=PostgresCharacterRepository) as uow:
+            moved = uow.characters.get(character.id)
+        assert sorted(moved.inventory) == ['goblin_ear', 'potion', 'potion']
+        assert moved.version == 2
+
+    def test_move_bucket_keeps_timestamps_and_stats_cache(self, router, shard_engines, create_sharded_character):
+        character = create_sharded_character(3009)
+        stats = {'max_health': 150, 'max_mana': 60, 'armor': 5, 'evasion': 3, 'energy_shield': 0,
+                 'damage_min': 4, 'damage_max': 8, 'accuracy': 90, 'critical_chance': 0.05,
+                 'critical_multiplier': 1.5, 'attack_speed': 1.2}
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(),
+                                  repository_factory=PostgresCharacterRepository) as uow:
+            uow.characters.save_stats_cache(character.id, stats, [])
+            uow.commit()
+        initialize_shard_map(router)
+        source = router.shard_for_user(3009)
+        with shard_engines[source].connect() as connection:
+            before = connection.execute(
+                select(CharacterModel.created_at, CharacterModel.last_activity_at)
+                .where(CharacterModel.telegram_user_id == 3009)
+            ).one()
+
+        move_buckets(router, [bucket_for(3009)], (source + 1) % SHARDS, settle_seconds=0)
+
+        with shard_engines[router.shard_for_user(3009)].connect() as connection:
+            after = connection.execute(
+                select(CharacterModel.created_at, CharacterModel.last_activity_at)
+                .where(CharacterModel.telegram_user_id == 3009)
+            ).one()
+        assert after == before
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(read_only=True),
+                                  repository_factory=PostgresCharacterRepository, read_only=True) as uow:
+            assert uow.characters.get_stats_cache(character.id, []) == stats
+
+    def test_writes_wait_for_moving_bucket(self, router):
+        initialize_shard_map(router)
+        with router.directory.begin() as connection:
+            connection.execute(ShardBucketModel.__table__.update()
+                               .where(ShardBucketModel.bucket == bucket_for(3006)).values(moving=True))
+        router.refresh()
+
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(),
+                                  repository_factory=PostgresCharacterRepository) as uow:
+            with pytest.raises(UserLockTimeoutError):
+                asyncio.run(uow.lock_user_async(3006))
+        assert router.stats.move_waits == 1
+        # Синхронний шлях не чекає, а відразу відмовляє.
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(),
+                                  repository_factory=PostgresCharacterRepository) as uow:
+            with pytest.raises(UserLockTimeoutError):
+                uow.characters.get_for_combat(3006)
+        # Читання під час перенесення продовжуються зі старого шарду.
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(read_only=True),
+                                  repository_factory=PostgresCharacterRepository, read_only=True) as uow:
+            assert uow.characters.get_summary(3006) is None
+
+    def test_write_waits_for_move_without_blocking_loop(self, router):
+        initialize_shard_map(router)
+        bucket = bucket_for(3008)
+        with router.directory.begin() as connection:
+            connection.execute(ShardBucketModel.__table__.update()
+                               .where(ShardBucketModel.bucket == bucket).values(moving=True))
+        router.refresh()
+
+        async def finish_move():
+            await asyncio.sleep(0.05)
+            with router.directory.begin() as connection:
+                connection.execute(ShardBucketModel.__table__.update()
+                                   .where(ShardBucketModel.bucket == bucket).values(moving=False))
+
+        async def scenario(uow):
+            # Перенесення завершує інша задача того самого циклу подій.
+            await asyncio.gather(uow.lock_user_async(3008), finish_move())
+
+        with SqlAlchemyUnitOfWork(session_factory=router.session_factory(),
+                                  repository_factory=PostgresCharacterRepository) as uow:
+            asyncio.run(scenario(uow))
+            assert uow.session.shard_id == router.shard_for_user(3008)
+
+    def test_stale_router_follows_moved_bucket(self, router, shard_engines, create_sharded_character):
+        create_sharded_character(3007)
+        initialize_shard_map(router)
+        stale = ShardRouter(shard_engines, refresh_interval_seconds=3600)
+        stale.refresh()
+        target = (router.shard_for_user(3007) + 1) % SHARDS
+        move_buckets(router, [bucket_for(3007)], target, settle_seconds=0)
+
+        with SqlAlchemyUnitOfWork(session_factory=stale.session_factory(read_only=True),
+                                  repository_factory=PostgresCharacterRepository, read_only=True) as uow:
+            assert uow.characters.get_summary(3007).name == "Hero_3007"
+        assert stale.stats.reroutes == 1
+        # Ще одна застаріла копія: команда з записом повторюється з новою сесією.
+        stale = ShardRouter(shard_engines, refresh_interval_seconds=3600)
+        stale._shards[bucket_for(3007)] = (target + 1) % SHARDS
+        stale._refreshed_at = float('inf')
+        with SqlAlchemyUnitOfWork(session_factory=stale.session_factory(),
+                                  repository_factory=PostgresCharacterRepository) as uow:
+            with pytest.raises(ShardMovedError) as error:
+                uow.characters.get_for_combat(3007)
+        assert error.value.telegram_user_id == 3007
+
+    def test_plan_rebalance_moves_minimum(self):
+        shard_map = {bucket: bucket % 2 for bucket in range(SHARD_BUCKETS)}
+
+        plan = plan_rebalance(shard_map, 3)
+
+        assert list(plan) == [2]
+        assert len(plan[2]) == SHARD_BUCKETS // 3
+        assert set(plan[2]) <= set(shard_map)
+
+    def test_rebalance(self, router, shard_engines, create_sharded_character):
+        # Усі кошики на першому шарді, як до додавання нових баз.
+        with router.directory.begin() as connection:
+            connection.execute(ShardBucketModel.__table__.insert(), [
+                {'bucket': bucket, 'shard_id': 0, 'moving': False, 'updated_at': datetime.now(timezone.utc)}
+                for bucket in range(SHARD_BUCKETS)
+            ])
+        router.refresh()
+        for telegram_user_id in range(4000, 4030):
+            create_sharded_character(telegram_user_id)
+
+        stats = rebalance(router, buckets_per_round=128, batch_size=4, settle_seconds=0)
+
+        owners = list(router.shard_map().values())
+        assert [owners.count(shard_id) for shard_id in range(SHARDS)] == [342, 341, 341]
+        assert stats.characters == count_on(shard_engines[1]) + count_on(shard_engines[2])
+        assert sum(count_on(engine) for engine in shard_engines) == 30
+        for telegram_user_id in range(4000, 4030):
+            with SqlAlchemyUnitOfWork(session_factory=router.session_factory(read_only=True),
+                                      repository_factory=PostgresCharacterRepository, read_only=True) as uow:
+                assert uow.characters.get_summary(telegram_user_id) is not None
@@ -0,0 +1,105 @@
+# tests/infrastructure/persistence/test_unit_of_work.py
+"""
+Інтеграційні тести для SqlAlchemyUnitOfWork.
+"""
+import pytest
+
+from domain.services.event_generator import EventGenerator
+from domain.services.stats_calculator import StatsCalculator
+from application.use_cases.combat.start_combat import StartCombatUseCase, StartCombatRequest
+from application.use_cases.events.generate_event_use_case import GenerateEventUseCase, GenerateEventRequest
+from infrastructure.persistence.repositories.identity_map_character_repository import IdentityMapCharacterRepository
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.repositories.json_enemy_repository import JsonEnemyRepository
+from infrastructure.persistence.repositories.json_item_repository import JsonItemRepository
+from infrastructure.persistence.repositories.json_location_repository import JsonLocationRepository
+from infrastructure.persistence.unit_of_work import SqlAlchemyUnitOfWork
+
+
+@pytest.fixture
+def make_uow(session_factory):
+    """Фабрика одиниць роботи, що працюють у транзакції тестової сесії."""
+
+    def factory(name: str = "test") -> SqlAlchemyUnitOfWork:
+        return SqlAlchemyUnitOfWork(
+            session_factory=session_factory,
+            repository_factory=lambda session: IdentityMapCharacterRepository(PostgresCharacterRepository(session)),
+            name=name,
+        )
+    return factory
+
+
+class TestSqlAlchemyUnitOfWork:
+    """Групує тести для одиниці роботи."""
+
+    def test_explore_command_flushes_once(self, db_session, make_uow, create_character, data_path):
+        """Команда /explore завантажує персонажа один раз і записує зміни одним запитом."""
+        create_character(86001)
+        location_repo = JsonLocationRepository(data_path)
+
+        with make_uow("explore") as uow:
+            character = uow.characters.get_for_combat(86001)
+            GenerateEventUseCase(uow.characters, location_repo, EventGenerator()).execute(
+                GenerateEventRequest(character_id=character.id)
+            )
+            StartCombatUseCase(
+                uow.characters, JsonEnemyRepository(data_path),
+                StatsCalculator(JsonItemRepository(data_path)), location_repo
+            ).execute(StartCombatRequest(character_id=character.id))
+            uow.commit()
+
+        # Один SELECT, оновлення версії персонажа та upsert стану бою
+        assert uow.stats.statements == 3
+        assert uow.stats.flushed_characters == 1
+        assert uow.stats.commit_ms > 0
+        assert PostgresCharacterRepository(db_session).get(character.id).combat_state is not None
+
+    def test_repeated_saves_are_written_once(self, db_session, make_uow, create_character):
+        """Кілька save() одного персонажа записуються одним flush."""
+        created = create_character(86002)
+
+        with make_uow() as uow:
+            character = uow.characters.get(created.id)
+            for _ in range(3):
+                character.take_damage(10)
+                uow.characters.save(character)
+            uow.commit()
+
+        assert uow.stats.flushed_characters == 1
+        assert uow.stats.statements == 3  # SELECT персонажа + SELECT інвентаря + UPDATE
+        assert PostgresCharacterRepository(db_session).get(created.id).current_health == 70
+
+    def test_exit_without_commit_discards_changes(self, db_session, make_uow, create_character):
+        """Зареєстровані, але не зафіксовані зміни не потрапляють у базу."""
+        created = create_character(86003)
+
+        with make_uow() as uow:
+            character = uow.characters.get(created.id)
+            character.take_damage(50)
+            uow.characters.save(character)
+
+        assert PostgresCharacterRepository(db_session).get(created.id).current_health == 100
+
+    def test_exception_rolls_back(self, db_session, make_uow, create_character):
+        """Виняток всередині одиниці роботи відкочує зміни."""
+        created = create_character(86004)
+
+        with pytest.raises(RuntimeError):
+            with make_uow() as uow:
+                character = uow.characters.get(created.id)
+                character.travel_to("town_main")
+                uow.characters.save(character)
+                raise RuntimeError("Помилка обробника")
+
+        assert PostgresCharacterRepository(db_session).get(created.id).location_id == "forest_dark"
+
+    def test_read_only_command_writes_nothing(self, make_uow, create_character):
+        """Команда лише для читання виконує один SELECT і нічого не записує."""
+        create_character(86005)
+
+        with make_uow("stats") as uow:
+            uow.characters.get_summary(86005)
+            uow.commit()
+
+        assert uow.stats.statements == 1
+        assert uow.stats.flushed_characters == 0
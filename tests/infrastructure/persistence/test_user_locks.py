@@ -0,0 +1,204 @@
+# tests/infrastructure/persistence/test_user_locks.py
+"""
+Тести провайдерів блокувань користувачів та їх використання в одиниці роботи.
+
+Advisory-блокування PostgreSQL належать з'єднанню, тому тести, що імітують
+два екземпляри бота, відкривають окремі з'єднання замість savepoint-сесій.
+"""
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy.orm import Session
+
+from domain.exceptions import UserLockTimeoutError
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.unit_of_work import SqlAlchemyUnitOfWork
+from infrastructure.persistence.user_locks import InProcessUserLockProvider, PostgresAdvisoryLockProvider
+
+
+@pytest.fixture
+def two_sessions(db_engine):
+    """Дві сесії на окремих з'єднаннях - як у двох екземплярів бота."""
+    sessions = [Session(bind=db_engine), Session(bind=db_engine)]
+    yield sessions
+    for session in sessions:
+        session.rollback()
+        session.close()
+
+
+class TestPostgresAdvisoryLockProvider:
+
+    def test_lock_is_exclusive_until_transaction_ends(self, two_sessions):
+        first, second = two_sessions
+        first_provider = PostgresAdvisoryLockProvider(timeout_seconds=1)
+        second_provider = PostgresAdvisoryLockProvider(timeout_seconds=0.05, poll_interval_seconds=0.01)
+
+        first_provider.acquire(first, 84001)
+        with pytest.raises(UserLockTimeoutError) as exc_info:
+            second_provider.acquire(second, 84001)
+        second.rollback()
+
+        assert exc_info.value.telegram_user_id == 84001
+        assert second_provider.stats.timeouts == 1
+
+        # Інший користувач не блокується
+        second_provider.acquire(second, 84002)
+        second.rollback()
+
+        # Коміт транзакції звільняє блокування
+        first.commit()
+        second_provider.acquire(second, 84001)
+        assert second_provider.stats.acquired == 2
+
+    def test_waits_for_lock_release(self, two_sessions):
+        first, second = two_sessions
+        provider = PostgresAdvisoryLockProvider(timeout_seconds=2, poll_interval_seconds=0.01)
+        provider.acquire(first, 84003)
+
+        timer = threading.Timer(0.1, first.commit)
+        timer.start()
+        provider.acquire(second, 84003)
+        timer.join()
+
+        assert provider.stats.contended == 1
+        assert provider.stats.wait_ms >= 50
+
+    def test_async_wait_does_not_block_event_loop(self, two_sessions):
+        first, second = two_sessions
+        provider = PostgresAdvisoryLockProvider(timeout_seconds=2, poll_interval_seconds=0.01)
+        provider.acquire(first, 84005)
+        ticks = []
+
+        async def release_later():
+            # Цикл подій працює, поки друга сесія чекає на блокування
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks.append(1)
+            first.commit()
+
+        async def scenario():
+            await asyncio.gather(provider.acquire_async(second, 84005), release_later())
+
+        asyncio.run(scenario())
+
+        assert len(ticks) == 5
+        assert provider.stats.contended == 1
+
+    def test_uncontended_lock_costs_one_statement(self, db_session):
+        provider = PostgresAdvisoryLockProvider()
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            provider.acquire(db_session, 84004)
+
+        assert counter.count == 1
+
+
+class TestInProcessUserLockProvider:
+
+    def test_lock_is_exclusive_and_cleaned_up(self):
+        provider = InProcessUserLockProvider(timeout_seconds=0.05)
+        provider.acquire(None, 1)
+
+        errors = []
+        thread = threading.Thread(target=lambda: self._try_acquire(provider, 1, errors))
+        thread.start()
+        thread.join()
+
+        assert len(errors) == 1
+        assert provider.stats.timeouts == 1
+        provider.release(None, 1)
+        assert provider.active_users == 0
+
+    def test_waiter_gets_lock_after_release(self):
+        provider = InProcessUserLockProvider(timeout_seconds=2)
+        provider.acquire(None, 2)
+        acquired = threading.Event()
+
+        def waiter():
+            provider.acquire(None, 2)
+            acquired.set()
+            provider.release(None, 2)
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        assert not acquired.wait(0.05)
+        provider.release(None, 2)
+        thread.join()
+
+        assert acquired.is_set()
+        assert provider.stats.contended == 1
+        assert provider.active_users == 0
+
+    def test_async_acquire_times_out_without_blocking(self):
+        provider = InProcessUserLockProvider(timeout_seconds=0.05, poll_interval_seconds=0.01)
+        provider.acquire(None, 3)
+        ticks = []
+
+        async def ticker():
+            for _ in range(3):
+                await asyncio.sleep(0.01)
+                ticks.append(1)
+
+        async def scenario():
+            results = await asyncio.gather(provider.acquire_async(None, 3), ticker(), return_exceptions=True)
+            return results[0]
+
+        error = asyncio.run(scenario())
+
+        assert isinstance(error, UserLockTimeoutError)
+        assert len(ticks) == 3
+        provider.release(None, 3)
+        assert provider.active_users == 0
+
+    @staticmethod
+    def _try_acquire(provider, telegram_user_id, errors):
+        try:
+            provider.acquire(None, telegram_user_id)
+        except UserLockTimeoutError as e:
+            errors.append(e)
+
+
+class TestUnitOfWorkUserLock:
+
+    def test_lock_held_until_commit(self, session_factory):
+        provider = InProcessUserLockProvider(timeout_seconds=0.05)
+        with SqlAlchemyUnitOfWork(session_factory, PostgresCharacterRepository, lock_provider=provider) as uow:
+            uow.lock_user(84010)
+            assert provider.active_users == 1
+            uow.commit()
+            assert provider.active_users == 0
+
+    def test_lock_released_on_error(self, session_factory):
+        provider = InProcessUserLockProvider(timeout_seconds=0.05)
+        with pytest.raises(RuntimeError):
+            with SqlAlchemyUnitOfWork(session_factory, PostgresCharacterRepository, lock_provider=provider) as uow:
+                uow.lock_user(84011)
+                raise RuntimeError("boom")
+
+        assert provider.active_users == 0
+
+    def test_async_lock_held_until_commit(self, session_factory):
+        provider = InProcessUserLockProvider(timeout_seconds=0.05)
+
+        async def scenario():
+            with SqlAlchemyUnitOfWork(session_factory, PostgresCharacterRepository, lock_provider=provider) as uow:
+                await uow.lock_user_async(84013)
+                assert provider.active_users == 1
+                uow.commit()
+
+        asyncio.run(scenario())
+        assert provider.active_users == 0
+
+    def test_second_unit_of_work_times_out(self, session_factory):
+        provider = InProcessUserLockProvider(timeout_seconds=0.05)
+        with SqlAlchemyUnitOfWork(session_factory, PostgresCharacterRepository, lock_provider=provider) as uow:
+            uow.lock_user(84012)
+            errors = []
+            thread = threading.Thread(target=lambda: TestInProcessUserLockProvider._try_acquire(provider, 84012, errors))
+            thread.start()
+            thread.join()
+
+        assert len(errors) == 1
+        assert provider.active_users == 0
@@ -0,0 +1,212 @@
+# tests/infrastructure/persistence/test_write_behind_character_repository.py
+"""
+Інтеграційні тести для WriteBehindCharacterRepository.
+"""
+import threading
+import time
+
+import pytest
+
+from domain.exceptions import ConcurrencyConflictError
+from infrastructure.persistence.database.instrumentation import StatementCounter
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.repositories.write_behind_character_repository import WriteBehindCharacterRepository
+
+
+@pytest.fixture
+def write_behind_repo(session_factory):
+    """Write-behind репозиторій, що працює в транзакції тестової сесії."""
+    return WriteBehindCharacterRepository(session_factory, flush_interval_ms=10_000, max_pending=100)
+
+
+class TestWriteBehindCharacterRepository:
+    """Групує тести для репозиторію з відкладеним записом."""
+
+    def test_save_is_deferred_until_flush(self, db_session, write_behind_repo, make_character):
+        """Збереження не потрапляє в базу до виклику flush."""
+        character = make_character(83001)
+        write_behind_repo.save(character)
+
+        direct_repo = PostgresCharacterRepository(db_session)
+        assert direct_repo.get(character.id) is None
+        # Але репозиторій вже повертає персонажа з пам'яті
+        assert write_behind_repo.get_by_telegram_user_id(83001).name == "Hero_83001"
+
+        assert write_behind_repo.flush() == 1
+        assert direct_repo.get(character.id) is not None
+
+    def test_mutations_are_coalesced(self, db_session, write_behind_repo, make_character):
+        """Кілька збережень одного персонажа записуються одним UPDATE."""
+        character = make_character(83002)
+        write_behind_repo.save(character)
+        write_behind_repo.flush()
+
+        for _ in range(5):
+            loaded = write_behind_repo.get(character.id)
+            loaded.take_damage(10)
+            loaded.add_item('potion')
+            write_behind_repo.save(loaded)
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            assert write_behind_repo.flush() == 1
+
+        assert counter.count_of('UPDATE') == 1
+        assert counter.count_of('INSERT') == 1
+        stored = PostgresCharacterRepository(db_session).get(character.id)
+        assert stored.current_health == 50
+        assert stored.inventory.count('potion') == 5
+
+    def test_get_is_served_from_memory(self, db_session, write_behind_repo, make_character):
+        """Повторне завантаження не звертається до бази."""
+        character = make_character(83003)
+        write_behind_repo.save(character)
+        write_behind_repo.flush()
+
+        with StatementCounter(db_session.get_bind()) as counter:
+            write_behind_repo.get(character.id)
+            write_behind_repo.get_by_telegram_user_id(83003)
+        assert counter.count == 0
+
+    def test_returned_copy_is_isolated(self, write_behind_repo, make_character):
+        """Зміни повернутого персонажа не впливають на кеш без save."""
+        character = make_character(83004)
+        write_behind_repo.save(character)
+
+        loaded = write_behind_repo.get(character.id)
+        loaded.take_damage(30)
+        assert write_behind_repo.get(character.id).current_health == 100
+
+    def test_max_pending_triggers_flush(self, session_factory, make_character):
+        """Досягнення max_pending записує зміни негайно."""
+        repo = WriteBehindCharacterRepository(session_factory, flush_interval_ms=10_000, max_pending=3)
+
+        for telegram_user_id in (83010, 83011, 83012):
+            repo.save(make_character(telegram_user_id))
+
+        assert repo.pending_count == 0
+        assert repo.flush_count == 1
+        assert repo.flushed_characters == 3
+
+    def test_stop_flushes_pending_changes(self, db_session, write_behind_repo, make_character):
+        """Зупинка репозиторію записує всі незбережені зміни."""
+        write_behind_repo.start()
+        character = make_character(83005)
+        write_behind_repo.save(character)
+        write_behind_repo.stop()
+
+        assert PostgresCharacterRepository(db_session).get(character.id) is not None
+
+    def test_failed_flush_keeps_changes_pending(self, db_session, session_factory, make_character):
+        """Якщо запис не вдався, зміни залишаються в черзі та записуються наступного разу."""
+        calls = {'count': 0}
+
+        def flaky_repository(session):
+            calls['count'] += 1
+            if calls['count'] == 1:
+                raise RuntimeError("База недоступна")
+            return PostgresCharacterRepository(session)
+
+        repo = WriteBehindCharacterRepository(session_factory, repository_factory=flaky_repository)
+        character = make_character(83006)
+        repo.save(character)
+
+        with pytest.raises(RuntimeError):
+            repo.flush()
+        assert repo.pending_count == 1
+        assert repo.failed_flushes == 1
+
+        assert repo.flush() == 1
+        assert PostgresCharacterRepository(db_session).get(character.id) is not None
+
+    def test_stale_save_raises_conflict(self, write_behind_repo, make_character):
+        """Збереження зі застарілої ревізії відхиляється ще в пам'яті."""
+        character = make_character(83009)
+        write_behind_repo.save(character)
+        first = write_behind_repo.get(character.id)
+        second = write_behind_repo.get(character.id)
+
+        first.take_damage(10)
+        write_behind_repo.save(first)
+        second.take_damage(40)
+        with pytest.raises(ConcurrencyConflictError):
+            write_behind_repo.save(second)
+
+        assert write_behind_repo.get(character.id).current_health == 90
+        # Повторне збереження того ж екземпляра приймається
+        first.take_damage(10)
+        write_behind_repo.save(first)
+        assert write_behind_repo.get(character.id).current_health == 80
+
+    def test_conflict_at_flush_reapplies_changes(self, db_session, session_factory, write_behind_repo, make_character):
+        """Персонажа, зміненого в обхід буфера, перечитано, а незаписані зміни застосовано повторно."""
+        stale = make_character(83007, inventory=['apple'])
+        write_behind_repo.save(stale)
+        write_behind_repo.flush()
+        # Персонажа змінили в обхід write-behind: версія в пам'яті застаріла
+        with session_factory() as session:
+            direct = PostgresCharacterRepository(session)
+            changed = direct.get(stale.id)
+            changed.take_damage(5)
+            changed.add_item('potion')
+            direct.save(changed)
+            session.commit()
+
+        loaded = write_behind_repo.get(stale.id)
+        loaded.take_damage(50)
+        loaded.add_item('goblin_ear')
+        write_behind_repo.save(loaded)
+        other = make_character(83008)
+        write_behind_repo.save(other)
+
+        assert write_behind_repo.flush() == 1
+        assert write_behind_repo.rebased_characters == 1
+        assert write_behind_repo.dropped_characters == 0
+        assert write_behind_repo.pending_count == 1
+
+        assert write_behind_repo.flush() == 1
+        direct_repo = PostgresCharacterRepository(db_session)
+        assert direct_repo.get(other.id) is not None
+        stored = direct_repo.get(stale.id)
+        assert stored.current_health == 45
+        assert sorted(stored.inventory) == ['apple', 'goblin_ear', 'potion']
+
+    def test_rejected_aggregate_does_not_block_other_changes(self, db_session, write_behind_repo, make_character):
+        """Агрегат, який база не приймає, відкидається, а решта пакета записується."""
+        PostgresCharacterRepository(db_session).save(make_character(83015))
+        db_session.commit()
+
+        duplicate = make_character(83015)
+        write_behind_repo.save(duplicate)
+        other = make_character(83016)
+        write_behind_repo.save(other)
+
+        assert write_behind_repo.flush() == 1
+        assert write_behind_repo.pending_count == 0
+        assert write_behind_repo.dropped_characters == 1
+        assert duplicate.id in write_behind_repo.dead_letters
+        assert PostgresCharacterRepository(db_session).get(other.id) is not None
+        assert write_behind_repo.flush() == 0
+
+    def test_max_pending_wakes_background_flush(self, session_factory, make_character):
+        """Запущений репозиторій записує пакет у фоновому потоці, а не в потоці save."""
+        repo = WriteBehindCharacterRepository(session_factory, flush_interval_ms=10_000, max_pending=2)
+        threads = []
+        flush = repo.flush
+
+        def recording_flush():
+            threads.append(threading.current_thread().name)
+            return flush()
+
+        repo.flush = recording_flush
+        repo.start()
+        try:
+            repo.save(make_character(83013))
+            repo.save(make_character(83014))
+            deadline = time.monotonic() + 5
+            while repo.flushed_characters < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            repo.stop()
+
+        assert repo.flushed_characters == 2
+        assert threads[0] == "character-write-behind"
@@ -0,0 +1,204 @@
+# tests/presentation/telegram/test_combat_message.py
+"""
+Тести повідомлення бою, що оновлюється кнопками: об'єднання редагувань та
+обробники attack:N / flee.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText
+from aiogram.types import CallbackQuery, Chat, User
+
+from application.use_cases.combat.start_combat import StartCombatRequest
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.unit_of_work import SqlAlchemyUnitOfWork
+from presentation.telegram import handlers
+from presentation.telegram.combat_message import CombatMessageEditor
+from presentation.telegram.container import Container
+from presentation.telegram.keyboards import get_combat_keyboard
+
+
+class FakeBot:
+    """Бот-заглушка: записує редагування та перевіряє, що вони не перетинаються."""
+    def __init__(self, delay: float = 0.0, error: str = ""):
+        self.edits = []
+        self.delay = delay
+        self.error = error
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def edit_message_text(self, text, chat_id, message_id, reply_markup=None, parse_mode=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise TelegramBadRequest(method=EditMessageText(text=text), message=self.error)
+            self.edits.append((chat_id, message_id, text, reply_markup))
+        finally:
+            self.in_flight -= 1
+
+
+def make_callback(user_id: int, data: str, message_id: int = 500):
+    callback = MagicMock(spec=CallbackQuery)
+    callback.from_user = User(id=user_id, is_bot=False, first_name="Player")
+    callback.data = data
+    callback.message = MagicMock()
+    callback.message.chat = Chat(id=user_id, type="private")
+    callback.message.message_id = message_id
+    callback.answer = AsyncMock()
+    return callback
+
+
+class TestCombatMessageEditor:
+    """Відкладені та об'єднані редагування."""
+
+    def test_rapid_turns_are_coalesced_into_one_edit(self):
+        editor = CombatMessageEditor(debounce_seconds=0.05)
+        bot = FakeBot()
+
+        async def scenario():
+            for turn in range(5):
+                editor.schedule(bot, 1, 10, f"turn {turn}", get_combat_keyboard())
+            await editor.flush()
+
+        asyncio.run(scenario())
+
+        assert [text for _, _, text, _ in bot.edits] == ["turn 4"]
+        assert editor.metrics() == {'pending': 0, 'requested': 5, 'coalesced': 4,
+                                    'edited': 1, 'unchanged': 0, 'failed': 0}
+
+    def test_turn_during_edit_is_sent_after_it(self):
+        editor = CombatMessageEditor(debounce_seconds=0.01)
+        bot = FakeBot(delay=0.05)
+
+        async def scenario():
+            editor.schedule(bot, 1, 10, "turn 1")
+            await asyncio.sleep(0.03)
+            editor.schedule(bot, 1, 10, "turn 2")
+            editor.schedule(bot, 2, 20, "other chat")
+            await editor.flush()
+
+        asyncio.run(scenario())
+
+        assert [(chat_id, text) for chat_id, _, text, _ in bot.edits] == [
+            (1, "turn 1"), (2, "other chat"), (1, "turn 2"),
+        ]
+        # Редагування різних повідомлень паралельні, одного - ні
+        assert bot.max_in_flight == 2
+
+    def test_unchanged_state_is_not_sent(self):
+        editor = CombatMessageEditor(debounce_seconds=0)
+        bot = FakeBot()
+
+        async def scenario():
+            editor.schedule(bot, 1, 10, "same")
+            await editor.flush()
+            editor.schedule(bot, 1, 10, "same")
+            await editor.flush()
+
+        asyncio.run(scenario())
+
+        assert len(bot.edits) == 1
+        assert editor.stats.unchanged == 1
+
+    def test_not_modified_error_is_ignored(self):
+        editor = CombatMessageEditor(debounce_seconds=0)
+        bot = FakeBot(error="Bad Request: message is not modified")
+
+        async def scenario():
+            editor.schedule(bot, 1, 10, "text")
+            await editor.flush()
+
+        asyncio.run(scenario())
+
+        assert (editor.stats.unchanged, editor.stats.failed) == (1, 0)
+
+
+class TestCombatCallbacks:
+    """Обробники кнопок бою з базою даних."""
+
+    @pytest.fixture
+    def container(self, session_factory):
+        return Container(
+            unit_of_work_factory=lambda name, read_only: SqlAlchemyUnitOfWork(
+                session_factory=session_factory, repository_factory=PostgresCharacterRepository,
+                name=name, read_only=read_only,
+            ),
+            combat_messages=CombatMessageEditor(debounce_seconds=0.05),
+        )
+
+    def start_fight(self, db_session, container, user_id: int) -> Character:
+        character = Character(telegram_user_id=user_id, name="Fighter",
+                              base_stats=BaseStats(10, 10, 10, 100, 50), location_id='town_main')
+        repo = PostgresCharacterRepository(db_session)
+        repo.save(character)
+        db_session.commit()
+        enemy_id = next(iter(container.enemy_repository._enemy_paths))
+        container.start_combat(repo).execute(StartCombatRequest(character_id=character.id, enemy_id=enemy_id))
+        db_session.commit()
+        return repo.get(character.id)
+
+    def test_attack_buttons_edit_one_message(self, db_session, container):
+        character = self.start_fight(db_session, container, 88101)
+        enemy_health = character.combat_state['enemy_current_health']
+        bot = FakeBot()
+        callbacks = [make_callback(88101, f"attack:{n}") for n in (1, 2)]
+
+        async def scenario():
+            for callback in callbacks:
+                await HandlerObject(handlers.on_attack_callback).call(callback, bot=bot, container=container)
+            await container.combat_messages.flush()
+
+        asyncio.run(scenario())
+
+        for callback in callbacks:
+            callback.answer.assert_awaited()
+        assert len(bot.edits) == 1
+        chat_id, message_id, text, keyboard = bot.edits[0]
+        assert (chat_id, message_id) == (88101, 500)
+        assert "РАУНД БОЮ" in text
+        # Хід роблять кнопки: текстові команди бою не підказуються
+        assert "/attack" not in text
+        restored = PostgresCharacterRepository(db_session).get(character.id)
+        if restored.combat_state:
+            assert keyboard == get_combat_keyboard()
+            assert restored.combat_state['enemy_current_health'] <= enemy_health
+        else:
+            assert keyboard is None
+
+    def test_flee_button_updates_combat_message(self, db_session, container):
+        self.start_fight(db_session, container, 88102)
+        bot = FakeBot()
+        callback = make_callback(88102, "flee")
+
+        async def scenario():
+            await HandlerObject(handlers.on_flee_callback).call(callback, bot=bot, container=container)
+            await container.combat_messages.flush()
+
+        asyncio.run(scenario())
+
+        callback.answer.assert_awaited_once_with()
+        assert len(bot.edits) == 1
+        _, _, text, keyboard = bot.edits[0]
+        assert "Втеча не вдалась" in text or "втекли" in text
+        assert "/attack" not in text and "/flee" not in text
+        assert (keyboard is None) == ("втекли" in text)
+
+    def test_buttons_after_combat_only_answer(self, db_session, container):
+        character = Character(telegram_user_id=88103, name="Idle",
+                              base_stats=BaseStats(10, 10, 10, 100, 50), location_id='town_main')
+        PostgresCharacterRepository(db_session).save(character)
+        db_session.commit()
+        bot = FakeBot()
+        callback = make_callback(88103, "attack:3")
+
+        asyncio.run(HandlerObject(handlers.on_attack_callback).call(callback, bot=bot, container=container))
+
+        assert "Бій уже завершено" in callback.answer.await_args.args[0]
+        assert bot.edits == [] and container.combat_messages.stats.requested == 0
@@ -0,0 +1,107 @@
+# tests/presentation/telegram/test_container.py
+"""
+Тести композиційного кореня та передачі залежностей в обробники.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import Message, User
+
+from domain.entities.character import Character
+from domain.value_objects.stats import BaseStats
+from infrastructure.persistence.repositories.postgres_character_repository import PostgresCharacterRepository
+from infrastructure.persistence.unit_of_work import SqlAlchemyUnitOfWork
+from presentation.telegram import handlers
+from presentation.telegram.container import Container
+from presentation.telegram.middlewares import DependencyMiddleware
+
+
+@pytest.fixture(scope="module")
+def container():
+    return Container()
+
+
+def make_message(user_id: int):
+    message = MagicMock(spec=Message)
+    message.from_user = User(id=user_id, is_bot=False, first_name="Player")
+    message.answer = AsyncMock()
+    return message
+
+
+class TestContainer:
+    """Одиночні сервіси та об'єкти одного оновлення."""
+
+    def test_use_cases_share_singletons(self, container):
+        repo = MagicMock()
+
+        attack = container.perform_attack(repo)
+        combat = container.start_combat(repo)
+
+        assert attack.character_repo is repo
+        assert attack.stats_calculator is combat.stats_calculator is container.stats_calculator
+        assert attack.enemy_repo is combat.enemy_repo is container.enemy_repository
+        assert container.stats_calculator.item_repository is container.item_repository
+        assert container.perform_attack(repo) is not attack
+
+    def test_enemy_repository_returns_copies(self, container):
+        enemy_id = next(iter(container.enemy_repository._enemy_paths))
+        first = container.enemy_repository.get_by_id(enemy_id)
+        first.take_damage(first.current_health)
+
+        second = container.enemy_repository.get_by_id(enemy_id)
+
+        assert second is not first
+        assert second.current_health == second.stats.max_health
+
+    def test_unit_of_work_factory(self):
+        created = []
+
+        def factory(name, read_only):
+            created.append((name, read_only))
+            return MagicMock()
+
+        container = Container(unit_of_work_factory=factory)
+        container.unit_of_work("stats", read_only=True)
+        container.unit_of_work("attack")
+
+        assert created == [("stats", True), ("attack", False)]
+
+
+class TestDependencyMiddleware:
+    """Передача контейнера в обробники."""
+
+    def test_container_is_put_into_data(self, container):
+        middleware = DependencyMiddleware(container)
+        seen = {}
+
+        async def handler(event, data):
+            seen.update(data)
+
+        asyncio.run(middleware(handler, None, {'event_from_user': None}))
+
+        assert seen['container'] is container
+
+    def test_aiogram_passes_container_through_retry_wrapper(self, container):
+        """Обробник з retry_on_conflict отримує container за сигнатурою оригінальної функції."""
+        assert 'container' in HandlerObject(handlers.cmd_attack).params
+        assert 'container' in HandlerObject(handlers.cmd_stats).params
+
+    def test_rest_command_uses_injected_services(self, db_session, session_factory):
+        character = Character(telegram_user_id=88001, name="Rester",
+                              base_stats=BaseStats(10, 10, 10, 100, 50), location_id='town_main')
+        character.take_damage(40)
+        PostgresCharacterRepository(db_session).save(character)
+        db_session.commit()
+        container = Container(unit_of_work_factory=lambda name, read_only: SqlAlchemyUnitOfWork(
+            session_factory=session_factory, repository_factory=PostgresCharacterRepository,
+            name=name, read_only=read_only,
+        ))
+        message = make_message(88001)
+
+        asyncio.run(HandlerObject(handlers.cmd_rest).call(message, container=container, bot=None))
+
+        assert "Ви відпочили" in message.answer.await_args.args[0]
+        restored = PostgresCharacterRepository(db_session).get(character.id)
+        assert restored.current_health == container.stats_calculator.calculate_total_stats(restored).max_health
@@ -0,0 +1,191 @@
+# tests/presentation/telegram/test_outbound.py
+"""
+Тести планувальника вихідних повідомлень: кошики токенів, порядок у чаті,
+пріоритети та повтори після 429.
+"""
+import asyncio
+import queue
+import time
+from typing import Any, Dict, List, Optional
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message
+
+from presentation.telegram.outbound import (
+    OutboundRateLimitMiddleware, OutboundScheduler, Priority, TokenBucket, as_notification,
+)
+from presentation.telegram.workers import OutboundSender, QueueSession
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeSession(BaseSession):
+    """
+    Сесія-заглушка Bot API: записує виклики з часом відправки.
+    Для чатів з flood_chats перші виклики отримують 429.
+    """
+    def __init__(self, flood_chats: Optional[Dict[int, int]] = None):
+        super().__init__()
+        self.sent: List[tuple] = []
+        self.flood_chats = dict(flood_chats or {})
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None) -> Any:
+        chat_id = getattr(method, 'chat_id', None)
+        if self.flood_chats.get(chat_id, 0) > 0:
+            self.flood_chats[chat_id] -= 1
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1)
+        self.sent.append((time.monotonic(), chat_id, getattr(method, 'text', None)))
+        if chat_id is None:
+            return True
+        return Message(message_id=len(self.sent), date=0, text=method.text,
+                       chat=Chat(id=chat_id, type="private"))
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def limited_bot(scheduler: OutboundScheduler, session: FakeSession) -> Bot:
+    bot = Bot(token="42:TEST", session=session)
+    bot.session.middleware(OutboundRateLimitMiddleware(scheduler))
+    return bot
+
+
+def test_token_bucket_refills_and_pauses():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=3, clock=clock)
+    for _ in range(3):
+        assert bucket.delay() == 0
+        bucket.take()
+    assert bucket.delay() == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert bucket.delay() == pytest.approx(0.5)
+
+    bucket.pause(5)
+    assert bucket.delay() == pytest.approx(5.0)
+    clock.now += 5
+    assert bucket.delay() == 0 and not bucket.is_full()
+    clock.now += 3
+    assert bucket.is_full()
+
+
+def test_chat_is_rate_limited_without_blocking_other_chats():
+    scheduler = OutboundScheduler(global_rate=100, chat_rate=20, chat_burst=1)
+    session = FakeSession()
+    bot = limited_bot(scheduler, session)
+
+    async def scenario():
+        await asyncio.gather(*(bot.send_message(chat_id=1, text=f"m{i}") for i in range(3)),
+                             bot.send_message(chat_id=2, text="other"))
+        await scheduler.drain()
+
+    asyncio.run(scenario())
+
+    first_chat = [(sent_at, text) for sent_at, chat_id, text in session.sent if chat_id == 1]
+    assert [text for _, text in first_chat] == ["m0", "m1", "m2"]
+    gaps = [b[0] - a[0] for a, b in zip(first_chat, first_chat[1:])]
+    assert min(gaps) >= 0.04
+    # Другий чат не чекає, поки перший вичерпає свою чергу
+    assert [chat_id for _, chat_id, _ in session.sent].index(2) <= 1
+    assert scheduler.stats.sent == 4
+
+
+def test_interactive_replies_go_before_notifications():
+    scheduler = OutboundScheduler()
+    session = FakeSession()
+    bot = limited_bot(scheduler, session)
+
+    async def notify(chat_id: int):
+        with as_notification():
+            await bot.send_message(chat_id=chat_id, text="notification")
+
+    async def scenario():
+        await asyncio.gather(*(notify(chat_id) for chat_id in (1, 2, 3)),
+                             *(bot.send_message(chat_id=chat_id, text="reply") for chat_id in (4, 5, 6)))
+        await scheduler.drain()
+
+    asyncio.run(scenario())
+
+    assert [text for _, _, text in session.sent] == ["reply"] * 3 + ["notification"] * 3
+    metrics = scheduler.metrics()
+    assert {'queued', 'in_flight', 'sent', 'retried', 'failed', 'max_queue_depth',
+            'interactive_wait_p50_ms', 'interactive_wait_p95_ms',
+            'notification_wait_p50_ms', 'notification_wait_p95_ms'} <= set(metrics)
+    assert metrics['max_queue_depth'] == 6 and metrics['queued'] == 0
+
+
+def test_retry_after_pauses_chat_and_keeps_order():
+    scheduler = OutboundScheduler(chat_rate=100, chat_burst=5)
+    session = FakeSession(flood_chats={7: 1})
+    bot = limited_bot(scheduler, session)
+
+    async def scenario():
+        started = time.monotonic()
+        first, second = await asyncio.gather(bot.send_message(chat_id=7, text="first"),
+                                             bot.send_message(chat_id=7, text="second"))
+        await scheduler.drain()
+        return first, second, started
+
+    first, second, started = asyncio.run(scenario())
+
+    assert (first.text, second.text) == ("first", "second")
+    assert [text for _, _, text in session.sent] == ["first", "second"]
+    assert session.sent[0][0] - started >= 0.95
+    assert (scheduler.stats.retried, scheduler.stats.sent) == (1, 2)
+
+
+def test_retry_after_is_raised_when_retries_are_exhausted():
+    scheduler = OutboundScheduler(max_retries=0)
+    bot = limited_bot(scheduler, FakeSession(flood_chats={7: 1}))
+
+    async def scenario():
+        with pytest.raises(TelegramRetryAfter):
+            await bot.send_message(chat_id=7, text="flood")
+        # Виклики без chat_id не стають у чергу
+        assert await bot.get_updates() is True
+        await scheduler.drain()
+
+    asyncio.run(scenario())
+
+    assert scheduler.stats.failed == 1 and scheduler.stats.sent == 0
+
+
+def test_priority_is_forwarded_from_worker_processes():
+    scheduler = OutboundScheduler()
+    session = FakeSession()
+    outbound, responses = queue.Queue(), [queue.Queue()]
+    sender = OutboundSender(limited_bot(scheduler, session), outbound, responses)
+    worker_bot = Bot(token="42:TEST", session=QueueSession(0, outbound, responses[0]))
+
+    async def scenario():
+        sender_task = asyncio.create_task(sender.run())
+        try:
+            await worker_bot.send_message(chat_id=1, text="reply")
+            with as_notification():
+                await worker_bot.send_message(chat_id=1, text="notification")
+        finally:
+            await worker_bot.session.close()
+            sender.stop()
+            await sender_task
+            await scheduler.drain()
+
+    asyncio.run(scenario())
+
+    assert [text for _, _, text in session.sent] == ["reply", "notification"]
+    assert {priority: len(waits) for priority, waits in scheduler.stats.waits.items()} == {
+        Priority.INTERACTIVE: 1, Priority.NOTIFICATION: 1,
+    }
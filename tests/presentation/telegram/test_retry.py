@@ -0,0 +1,89 @@
+# tests/presentation/telegram/test_retry.py
+"""
+Тести повторного виконання обробників при конфлікті версій.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.types import Message
+
+from domain.exceptions import ConcurrencyConflictError, ShardMovedError, UserLockTimeoutError
+from presentation.telegram import retry
+from presentation.telegram.retry import BUSY_TEXT, retry_on_conflict
+
+
+def make_message():
+    message = MagicMock(spec=Message)
+    message.answer = AsyncMock()
+    return message
+
+
+def test_handler_is_retried_until_success():
+    calls = []
+
+    @retry_on_conflict(attempts=3, base_delay=0)
+    async def handler(message):
+        calls.append(message)
+        if len(calls) < 3:
+            raise ConcurrencyConflictError("c1", len(calls))
+        return "done"
+
+    message = make_message()
+    assert asyncio.run(handler(message)) == "done"
+    assert len(calls) == 3
+    message.answer.assert_not_called()
+
+
+def test_user_is_told_when_attempts_exhausted():
+    before = retry.conflict_stats.exhausted
+
+    @retry_on_conflict(attempts=2, base_delay=0)
+    async def handler(message):
+        raise ConcurrencyConflictError("c1", 1)
+
+    message = make_message()
+    assert asyncio.run(handler(message)) is None
+    message.answer.assert_awaited_once_with(BUSY_TEXT)
+    assert retry.conflict_stats.exhausted == before + 1
+
+
+def test_wrapper_keeps_handler_signature_for_aiogram():
+    """aiogram підбирає аргументи обробника за сигнатурою оригінальної функції."""
+    async def cmd_attack(message: Message):
+        return None
+
+    wrapped = retry_on_conflict()(cmd_attack)
+    assert wrapped.__wrapped__ is cmd_attack
+    assert wrapped.__name__ == "cmd_attack"
+
+
+def test_lock_timeout_is_not_retried():
+    calls = []
+
+    @retry_on_conflict(attempts=3, base_delay=0)
+    async def handler(message):
+        calls.append(message)
+        raise UserLockTimeoutError(42, 2.0)
+
+    message = make_message()
+    assert asyncio.run(handler(message)) is None
+    assert len(calls) == 1
+    message.answer.assert_awaited_once_with(BUSY_TEXT)
+
+
+def test_shard_move_is_retried_but_not_counted_as_conflict():
+    calls = []
+    conflicts = retry.conflict_stats.conflicts
+    shard_moves = retry.conflict_stats.shard_moves
+
+    @retry_on_conflict(attempts=3, base_delay=0)
+    async def handler(message):
+        calls.append(message)
+        if len(calls) == 1:
+            raise ShardMovedError(42)
+        return "done"
+
+    assert asyncio.run(handler(make_message())) == "done"
+    assert len(calls) == 2
+    assert retry.conflict_stats.conflicts == conflicts
+    assert retry.conflict_stats.shard_moves == shard_moves + 1
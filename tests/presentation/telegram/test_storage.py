@@ -0,0 +1,132 @@
+# tests/presentation/telegram/test_storage.py
+"""
+Тести вибору сховища FSM. Redis-сховище перевіряється через fakeredis.
+"""
+import asyncio
+from typing import List
+
+import pytest
+from aiogram import Bot, Dispatcher, F
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import Message, Update
+
+from presentation.telegram.storage import create_fsm_storage, create_redis_storage
+
+
+class NameForm(StatesGroup):
+    waiting_name = State()
+
+
+@pytest.fixture
+def fake_server():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeServer()
+
+
+def fake_client(server):
+    from fakeredis import aioredis
+
+    return aioredis.FakeRedis(server=server)
+
+
+def instance_dispatcher(storage: RedisStorage, names: List[str]) -> Dispatcher:
+    """Окремий екземпляр бота: /name чекає ім'я, наступне повідомлення його зберігає."""
+    dp = Dispatcher(storage=storage)
+
+    @dp.message(Command("name"))
+    async def ask_name(message: Message, state: FSMContext):
+        await state.set_state(NameForm.waiting_name)
+        await state.update_data(asked_by="/name")
+
+    @dp.message(NameForm.waiting_name, F.text)
+    async def save_name(message: Message, state: FSMContext):
+        data = await state.get_data()
+        names.append(f"{data['asked_by']}:{message.text}")
+        await state.clear()
+
+    return dp
+
+
+def message_update(update_id: int, user_id: int, text: str) -> Update:
+    return Update.model_validate({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 0, 'text': text,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Player'},
+        },
+    })
+
+
+def test_memory_storage_by_default(monkeypatch):
+    monkeypatch.delenv("FSM_STORAGE", raising=False)
+    assert isinstance(create_fsm_storage(), MemoryStorage)
+
+
+def test_redis_storage_uses_bounded_pool(monkeypatch):
+    monkeypatch.setenv("FSM_STORAGE", "redis")
+    monkeypatch.setenv("FSM_REDIS_URL", "redis://redis.internal:6380/2")
+    monkeypatch.setenv("FSM_REDIS_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("FSM_STATE_TTL_SECONDS", "600")
+
+    storage = create_fsm_storage()
+
+    assert isinstance(storage, RedisStorage)
+    pool = storage.redis.connection_pool
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs['host'] == "redis.internal" and pool.connection_kwargs['db'] == 2
+    assert storage.state_ttl == 600 and storage.data_ttl is None
+    asyncio.run(storage.close())
+
+
+def test_unknown_storage_is_rejected(monkeypatch):
+    monkeypatch.setenv("FSM_STORAGE", "etcd")
+    with pytest.raises(ValueError):
+        create_fsm_storage()
+
+
+def test_state_is_shared_between_bot_instances(fake_server):
+    names: List[str] = []
+    first = instance_dispatcher(create_redis_storage("", client=fake_client(fake_server)), names)
+    second = instance_dispatcher(create_redis_storage("", client=fake_client(fake_server)), names)
+    bot = Bot(token="42:TEST")
+
+    async def scenario():
+        # Команду приймає один екземпляр, відповідь гравця - інший
+        await first.feed_update(bot, message_update(1, 77, "/name"))
+        await second.feed_update(bot, message_update(2, 77, "Aragorn"))
+        # Інший гравець не бачить чужого стану
+        await second.feed_update(bot, message_update(3, 78, "Boromir"))
+        state = await first.storage.get_state(StorageKey(bot_id=bot.id, chat_id=77, user_id=77))
+        await first.storage.close()
+        await second.storage.close()
+        return state
+
+    state = asyncio.run(scenario())
+
+    assert names == ["/name:Aragorn"]
+    assert state is None
+
+
+def test_state_ttl_is_applied(fake_server):
+    client = fake_client(fake_server)
+    storage = create_redis_storage("", key_prefix="rpg", state_ttl=600, client=client)
+    key = StorageKey(bot_id=42, chat_id=77, user_id=77)
+
+    async def scenario():
+        await storage.set_state(key, NameForm.waiting_name)
+        redis_key = storage.key_builder.build(key, "state")
+        result = redis_key, await client.ttl(redis_key), await storage.get_state(key)
+        await storage.close()
+        return result
+
+    redis_key, ttl, state = asyncio.run(scenario())
+
+    assert redis_key.startswith("rpg:")
+    assert 0 < ttl <= 600
+    assert state == NameForm.waiting_name.state
@@ -0,0 +1,196 @@
+# tests/presentation/telegram/test_throttling_middleware.py
+"""
+Тести для ThrottlingMiddleware: ковзне вікно на користувача та команду,
+відповідь про перевищення ліміту та реєстрація в диспетчері.
+"""
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram import Bot
+from aiogram.types import Update, User
+
+from presentation.telegram.dispatcher import create_dispatcher
+from presentation.telegram.middlewares import RateLimit, ThrottlingMiddleware
+from presentation.telegram.middlewares.throttling import command_of, parse_limits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def user(user_id: int) -> User:
+    return User(id=user_id, is_bot=False, first_name="Player")
+
+
+def message_update(user_id: int, text: str) -> Update:
+    return Update.model_validate({
+        'update_id': 1,
+        'message': {
+            'message_id': 1, 'date': int(time.time()), 'text': text,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Player'},
+        },
+    })
+
+
+def callback_update(user_id: int, data: str) -> Update:
+    return Update.model_validate({
+        'update_id': 1,
+        'callback_query': {
+            'id': '1', 'chat_instance': '1', 'data': data,
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Player'},
+        },
+    })
+
+
+def test_parse_limits():
+    assert parse_limits("attack=5/1, /rest=2/5,*=10/0.5") == {
+        'attack': RateLimit(5, 1.0), 'rest': RateLimit(2, 5.0), '*': RateLimit(10, 0.5),
+    }
+    assert parse_limits("") == {}
+    with pytest.raises(ValueError):
+        parse_limits("attack=5")
+    with pytest.raises(ValueError):
+        parse_limits("attack=0/1")
+
+
+def test_command_of_messages_and_buttons():
+    assert command_of(message_update(1, "/attack@rpg_bot now")) == "attack"
+    assert command_of(message_update(1, "Арагорн")) == "*"
+    assert command_of(callback_update(1, "attack:2")) == "attack"
+    assert command_of(callback_update(1, "travel_to:forest")) == "travel_to"
+    assert command_of(callback_update(1, "flee")) == "flee"
+
+
+def test_sliding_window_per_user_and_command():
+    clock = FakeClock()
+    middleware = ThrottlingMiddleware({'attack': RateLimit(2, 1.0), '*': RateLimit(1, 1.0)}, clock=clock)
+
+    assert middleware.check(1, 'attack') is None
+    clock.now += 0.5
+    assert middleware.check(1, 'attack') is None
+    # Третя атака в тому ж вікні: місце звільниться, коли вийде перша
+    assert middleware.check(1, 'attack') == pytest.approx(0.5)
+    # Інший користувач та інша команда мають власні вікна
+    assert middleware.check(2, 'attack') is None
+    assert middleware.check(1, 'explore') is None
+
+    clock.now += 0.5
+    assert middleware.check(1, 'attack') is None
+    assert middleware.check(1, 'attack') is not None
+
+
+def test_dropped_updates_skip_handler_and_reply_is_rate_limited():
+    clock = FakeClock()
+    middleware = ThrottlingMiddleware({'attack': RateLimit(1, 1.0)}, cooldown_reply_seconds=5, clock=clock)
+    handler = AsyncMock(return_value="handled")
+    updates = [message_update(1, "/attack") for _ in range(4)]
+
+    async def scenario():
+        results = []
+        for update in updates:
+            object.__setattr__(update.message, 'answer', AsyncMock())
+            results.append(await middleware(handler, update, {'event_from_user': user(1)}))
+            clock.now += 0.1
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert results == ["handled", None, None, None]
+    assert handler.await_count == 1
+    # Відповідь про ліміт - лише на перше відкинуте оновлення
+    assert [update.message.answer.await_count for update in updates] == [0, 1, 0, 0]
+    assert "Спробуйте через 1 с" in updates[1].message.answer.await_args.args[0]
+    assert middleware.metrics() == {
+        'allowed_updates': 1, 'dropped_updates': 3, 'dropped_by_command': {'attack': 3},
+        'cooldown_replies': 1, 'tracked_windows': 1,
+    }
+
+
+def test_unknown_commands_share_default_window():
+    middleware = ThrottlingMiddleware({'attack': RateLimit(5, 1.0), '*': RateLimit(2, 1.0)}, clock=FakeClock())
+    handler = AsyncMock()
+
+    async def scenario():
+        for index in range(6):
+            await middleware(handler, message_update(1, f"/x{index}"), {'event_from_user': user(1)})
+
+    asyncio.run(scenario())
+
+    # /x0.../x5 не обходять ліміт "*" і не створюють окремих вікон та лічильників
+    assert handler.await_count == 2
+    assert middleware.metrics()['dropped_by_command'] == {'*': 4}
+    assert middleware.metrics()['tracked_windows'] == 1
+    assert set(middleware.allowed) == {'*'}
+
+
+def test_dropped_button_presses_are_always_answered():
+    middleware = ThrottlingMiddleware({'attack': RateLimit(1, 1.0)}, cooldown_reply_seconds=5, clock=FakeClock())
+    updates = [callback_update(1, f"attack:{index % 3 + 1}") for index in range(4)]
+
+    async def scenario():
+        for update in updates:
+            object.__setattr__(update.callback_query, 'answer', AsyncMock())
+            await middleware(AsyncMock(), update, {'event_from_user': user(1)})
+
+    asyncio.run(scenario())
+
+    answers = [update.callback_query.answer.await_args_list for update in updates]
+    assert answers[0] == []
+    assert "Не так швидко" in answers[1][0].args[0]
+    # У межах cooldown - порожня відповідь, лише щоб зняти індикатор завантаження
+    assert [calls[0].args for calls in answers[2:]] == [(None,), (None,)]
+    assert middleware.cooldown_replies == 1
+
+
+def test_commands_without_limit_and_updates_without_user_pass():
+    middleware = ThrottlingMiddleware({'attack': RateLimit(1, 60.0)}, clock=FakeClock())
+    handler = AsyncMock()
+
+    async def scenario():
+        for _ in range(3):
+            await middleware(handler, message_update(1, "/rest"), {'event_from_user': user(1)})
+            await middleware(handler, message_update(1, "/attack"), {})
+
+    asyncio.run(scenario())
+
+    assert handler.await_count == 6
+    assert middleware.metrics()['dropped_updates'] == 0
+
+
+def test_idle_windows_are_pruned():
+    clock = FakeClock()
+    middleware = ThrottlingMiddleware({'*': RateLimit(1, 1.0)}, cooldown_reply_seconds=1,
+                                      max_tracked_users=2, clock=clock)
+    middleware.check(1, 'explore')
+    middleware.check(2, 'explore')
+    clock.now += 2
+    middleware.check(3, 'explore')
+
+    assert middleware.metrics()['tracked_windows'] == 1
+
+
+def test_flood_is_dropped_before_handlers_in_dispatcher(monkeypatch):
+    throttling = ThrottlingMiddleware({'help': RateLimit(1, 10.0)}, clock=FakeClock())
+    dp, user_ordering = create_dispatcher(AsyncMock(), throttling=throttling)
+    bot = Bot(token="42:TEST")
+    sent = AsyncMock()
+    monkeypatch.setattr(Bot, '__call__', sent)
+
+    async def scenario():
+        for _ in range(3):
+            await dp.feed_update(bot, message_update(77, "/help"))
+
+    asyncio.run(scenario())
+
+    # Довідка та одна відповідь про ліміт; відкинуті оновлення не доходять до черги користувача
+    texts = [call.args[0].text for call in sent.await_args_list]
+    assert len(texts) == 2 and "Доступні команди" in texts[0] and "Не так швидко" in texts[1]
+    assert (throttling.metrics()['allowed_updates'], throttling.metrics()['dropped_updates']) == (1, 2)
+    assert user_ordering.metrics()['processed_updates'] == 1
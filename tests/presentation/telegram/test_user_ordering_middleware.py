@@ -0,0 +1,125 @@
+# tests/presentation/telegram/test_user_ordering_middleware.py
+"""
+Тести для UserOrderingMiddleware: послідовність оновлень одного
+користувача та паралельність різних.
+"""
+import asyncio
+
+from aiogram.types import User
+
+from presentation.telegram.middlewares import KeyedLock, UserOrderingMiddleware
+
+
+def user(user_id: int) -> User:
+    return User(id=user_id, is_bot=False, first_name="Player")
+
+
+def test_updates_of_one_user_run_in_order_without_overlap():
+    middleware = UserOrderingMiddleware()
+    log = []
+
+    async def handler(event, data):
+        log.append(('start', event))
+        await asyncio.sleep(0.01)
+        log.append(('end', event))
+
+    async def scenario():
+        await asyncio.gather(*(
+            middleware(handler, index, {'event_from_user': user(1)}) for index in range(5)
+        ))
+
+    asyncio.run(scenario())
+
+    expected = []
+    for index in range(5):
+        expected += [('start', index), ('end', index)]
+    assert log == expected
+
+
+def test_different_users_run_in_parallel():
+    middleware = UserOrderingMiddleware()
+    running = 0
+    max_running = 0
+
+    async def handler(event, data):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def scenario():
+        await asyncio.gather(*(
+            middleware(handler, None, {'event_from_user': user(user_id)}) for user_id in range(10)
+        ))
+
+    asyncio.run(scenario())
+
+    assert max_running == 10
+
+
+def test_queue_depth_metrics_and_cleanup():
+    middleware = UserOrderingMiddleware()
+    release = None
+    observed = {}
+
+    async def handler(event, data):
+        await release.wait()
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(middleware(handler, None, {'event_from_user': user(7)}))
+                 for _ in range(3)]
+        tasks.append(asyncio.create_task(middleware(handler, None, {'event_from_user': user(8)})))
+        await asyncio.sleep(0)
+        observed['depth'] = middleware.queue_depth(7)
+        observed['metrics'] = middleware.metrics()
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert observed['depth'] == 3
+    assert observed['metrics']['active_users'] == 2
+    assert observed['metrics']['queued_updates'] == 2
+    assert observed['metrics']['deepest_queue'] == 3
+    # Після обробки блокування неактивних користувачів видаляються
+    assert middleware.locks.active_keys == 0
+    assert middleware.metrics()['max_queue_depth'] == 3
+    assert middleware.metrics()['processed_updates'] == 4
+
+
+def test_lock_is_released_when_handler_fails():
+    locks = KeyedLock()
+    middleware = UserOrderingMiddleware(locks)
+
+    async def failing(event, data):
+        raise RuntimeError("boom")
+
+    async def ok(event, data):
+        return "ok"
+
+    async def scenario():
+        results = await asyncio.gather(
+            middleware(failing, None, {'event_from_user': user(3)}),
+            middleware(ok, None, {'event_from_user': user(3)}),
+            return_exceptions=True,
+        )
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert isinstance(results[0], RuntimeError)
+    assert results[1] == "ok"
+    assert locks.active_keys == 0
+
+
+def test_updates_without_user_are_not_locked():
+    middleware = UserOrderingMiddleware()
+
+    async def handler(event, data):
+        return event
+
+    assert asyncio.run(middleware(handler, "channel_post", {})) == "channel_post"
+    assert middleware.metrics()['processed_updates'] == 0
@@ -0,0 +1,162 @@
+# tests/presentation/telegram/test_webhook.py
+"""
+Тести webhook-сервера: прийом синтетичних оновлень, обмеження
+паралельності, перевірка стану та плавна зупинка.
+"""
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import SendMessage
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from presentation.telegram.webhook import REQUEST_HANDLER_KEY, WebhookSettings, create_webhook_app
+
+
+def synthetic_update(update_id: int, user_id: int, text: str = "/stats") -> dict:
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Player'},
+            'text': text,
+        },
+    }
+
+
+def make_dispatcher(handled: list, delay: float = 0.0, gate: asyncio.Event = None) -> Dispatcher:
+    dp = Dispatcher()
+
+    @dp.message()
+    async def record(message: Message):
+        if gate is not None:
+            await gate.wait()
+        await asyncio.sleep(delay)
+        handled.append(message.text)
+
+    return dp
+
+
+async def serve(app, scenario):
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    try:
+        return await scenario(client)
+    finally:
+        await client.close()
+
+
+def test_updates_are_fed_to_dispatcher():
+    handled = []
+    settings = WebhookSettings(secret_token="s3cret")
+    app = create_webhook_app(make_dispatcher(handled), Bot(token="42:TEST"), settings)
+
+    async def scenario(client):
+        unauthorized = await client.post(settings.path, json=synthetic_update(1, 7))
+        accepted = await client.post(settings.path, json=synthetic_update(2, 7, "/explore"),
+                                     headers={'X-Telegram-Bot-Api-Secret-Token': "s3cret"})
+        await asyncio.sleep(0.05)
+        health = await (await client.get(settings.health_path)).json()
+        return unauthorized.status, accepted.status, health
+
+    unauthorized, accepted, health = asyncio.run(serve(app, scenario))
+
+    assert (unauthorized, accepted) == (401, 200)
+    assert handled == ["/explore"]
+    assert health['status'] == 'ok'
+    assert health['processed'] == 1 and health['pending'] == 0
+
+
+def test_concurrency_and_pending_limits():
+    handled = []
+    gate = asyncio.Event()
+    settings = WebhookSettings(max_concurrent_updates=2, max_pending_updates=3)
+    app = create_webhook_app(make_dispatcher(handled, gate=gate), Bot(token="42:TEST"), settings,
+                             metrics=lambda: {'active_users': 0})
+    request_handler = app[REQUEST_HANDLER_KEY]
+
+    async def scenario(client):
+        statuses = [(await client.post(settings.path, json=synthetic_update(i, i))).status for i in range(5)]
+        await asyncio.sleep(0.05)
+        in_flight = 2 - request_handler._semaphore._value
+        pending = request_handler.pending
+        gate.set()
+        await asyncio.sleep(0.05)
+        health = await (await client.get(settings.health_path)).json()
+        return statuses, in_flight, pending, health
+
+    statuses, in_flight, pending, health = asyncio.run(serve(app, scenario))
+
+    # Три оновлення прийнято, решта відхилено, щоб Telegram надіслав їх пізніше.
+    assert statuses == [200, 200, 200, 503, 503]
+    assert in_flight == 2 and pending == 3
+    assert len(handled) == 3
+    assert health['rejected'] == 2 and health['max_pending'] == 3
+    assert health['active_users'] == 0
+
+
+def test_method_returned_by_handler_is_sent(monkeypatch):
+    """Метод API, повернутий обробником, надсилається окремим запитом після відповіді на webhook."""
+    sent = []
+    dp = Dispatcher()
+
+    @dp.message()
+    async def reply(message: Message):
+        return SendMessage(chat_id=message.chat.id, text="pong")
+
+    async def record_request(bot, result):
+        sent.append(result)
+
+    monkeypatch.setattr(dp, "silent_call_request", record_request)
+    settings = WebhookSettings()
+    app = create_webhook_app(dp, Bot(token="42:TEST"), settings)
+
+    async def scenario(client):
+        response = await client.post(settings.path, json=synthetic_update(1, 7))
+        await asyncio.sleep(0.05)
+        return response.status
+
+    assert asyncio.run(serve(app, scenario)) == 200
+    assert [(method.chat_id, method.text) for method in sent] == [(7, "pong")]
+    assert app[REQUEST_HANDLER_KEY].stats.processed == 1
+
+
+def test_shutdown_waits_for_accepted_updates():
+    handled = []
+    settings = WebhookSettings(shutdown_timeout_seconds=5)
+    app = create_webhook_app(make_dispatcher(handled, delay=0.1), Bot(token="42:TEST"), settings)
+    request_handler = app[REQUEST_HANDLER_KEY]
+
+    async def scenario(client):
+        for i in range(3):
+            assert (await client.post(settings.path, json=synthetic_update(i, i))).status == 200
+        # Закриття клієнта зупиняє сервер і викликає on_shutdown застосунку.
+
+    asyncio.run(serve(app, scenario))
+
+    assert len(handled) == 3
+    assert request_handler.closing
+    assert request_handler.stats.processed == 3
+
+
+def test_shutdown_timeout_cancels_slow_updates():
+    handled = []
+    gate = asyncio.Event()
+    app = create_webhook_app(make_dispatcher(handled, gate=gate), Bot(token="42:TEST"), WebhookSettings())
+    request_handler = app[REQUEST_HANDLER_KEY]
+
+    async def scenario(client):
+        await client.post('/webhook', json=synthetic_update(1, 1))
+        await asyncio.sleep(0.01)
+        finished = await request_handler.drain(timeout=0.05)
+        rejected = await client.post('/webhook', json=synthetic_update(2, 2))
+        health = await client.get('/health')
+        return finished, rejected.status, health.status
+
+    finished, rejected, health = asyncio.run(serve(app, scenario))
+
+    assert not finished
+    assert (rejected, health) == (503, 503)
+    assert handled == []
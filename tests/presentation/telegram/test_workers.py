@@ -0,0 +1,156 @@
+# tests/presentation/telegram/test_workers.py
+"""
+Тести обробки оновлень у кількох процесах: розподіл гравців між
+процесами-обробниками та відповіді через спільного відправника.
+"""
+import asyncio
+import os
+import queue
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import SendMessage, TelegramMethod
+from aiogram.types import Chat, Message, Update
+
+from presentation.telegram.workers import (
+    ForwardingMiddleware, OutboundSender, QueueSession, WorkerPool, create_receiver, worker_for,
+)
+
+
+class RecordingSession(BaseSession):
+    """Сесія-заглушка Bot API: записує виклики та імітує помилки для окремих чатів."""
+    def __init__(self):
+        super().__init__()
+        self.calls: List[TelegramMethod] = []
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None) -> Any:
+        self.calls.append(method)
+        if method.chat_id == 429:
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=7)
+        if method.chat_id == 400:
+            raise TelegramBadRequest(method=method, message="Bad Request: chat not found")
+        return Message(message_id=len(self.calls), date=0, text=method.text,
+                       chat=Chat(id=method.chat_id, type="private"))
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def echo_dispatcher() -> Tuple[Dispatcher, None]:
+    """Диспетчер процесу-обробника для тестів: відповідає номером процесу."""
+    dp = Dispatcher()
+
+    @dp.message()
+    async def echo(message: Message):
+        await message.answer(f"{os.getpid()}:{message.text}")
+
+    return dp, None
+
+
+def update(update_id: int, user_id: int, text: str) -> Update:
+    return Update.model_validate({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 0, 'text': text,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Player'},
+        },
+    })
+
+
+def test_players_are_pinned_to_workers():
+    assert worker_for(1001, 4) == worker_for(1001, 4) == 1001 % 4
+    assert {worker_for(user_id, 4) for user_id in range(100)} == {0, 1, 2, 3}
+
+
+def test_forwarding_middleware_routes_by_user():
+    queues = [queue.Queue(), queue.Queue()]
+    receiver = Dispatcher()
+    forwarding = ForwardingMiddleware(queues)
+    receiver.update.outer_middleware(forwarding)
+    bot = Bot(token="42:TEST", session=RecordingSession())
+
+    async def scenario():
+        for update_id, user_id in enumerate((10, 11, 12, 10)):
+            await receiver.feed_update(bot, update(update_id, user_id, f"/cmd{update_id}"))
+
+    asyncio.run(scenario())
+
+    assert forwarding.forwarded == [3, 1]
+    forwarded = Update.model_validate(queues[0].get_nowait())
+    assert forwarded.message.from_user.id == 10
+    assert forwarded.message.text == "/cmd0"
+
+
+def test_api_calls_go_through_shared_sender():
+    outbound, responses = queue.Queue(), [queue.Queue()]
+    recording = RecordingSession()
+    sender = OutboundSender(Bot(token="42:TEST", session=recording), outbound, responses)
+    worker_bot = Bot(token="42:TEST", session=QueueSession(0, outbound, responses[0]))
+
+    async def scenario():
+        sender_task = asyncio.create_task(sender.run())
+        try:
+            sent = await worker_bot.send_message(chat_id=5, text="<b>hi</b>", parse_mode="HTML")
+            with pytest.raises(TelegramRetryAfter) as retry_after:
+                await worker_bot.send_message(chat_id=429, text="flood")
+            with pytest.raises(TelegramBadRequest):
+                await worker_bot.send_message(chat_id=400, text="nobody")
+            return sent, retry_after.value
+        finally:
+            await worker_bot.session.close()
+            sender.stop()
+            await sender_task
+
+    sent, retry_after = asyncio.run(scenario())
+
+    assert sent.chat.id == 5 and sent.text == "<b>hi</b>" and sent.message_id == 1
+    assert retry_after.retry_after == 7
+    assert isinstance(recording.calls[0], SendMessage) and recording.calls[0].parse_mode == "HTML"
+    assert (sender.stats.sent, sender.stats.failed) == (1, 2)
+
+
+def test_worker_processes_keep_each_player_on_one_process():
+    recording = RecordingSession()
+    bot = Bot(token="42:TEST", session=recording)
+    users = (20, 21, 22, 23)
+    per_user = 5
+
+    async def scenario():
+        pool = WorkerPool(bot, workers=2, dispatcher_factory=echo_dispatcher)
+        receiver = create_receiver(pool)
+        pool.start()
+        try:
+            update_id = 0
+            for step in range(per_user):
+                for user_id in users:
+                    await receiver.feed_update(bot, update(update_id, user_id, f"step{step}"))
+                    update_id += 1
+            deadline = time.monotonic() + 60
+            while len(recording.calls) < len(users) * per_user and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        finally:
+            await pool.stop(timeout=30)
+        return pool.metrics()
+
+    metrics = asyncio.run(scenario())
+
+    replies: Dict[int, List[Tuple[str, str]]] = {}
+    for call in recording.calls:
+        pid, text = call.text.split(":")
+        replies.setdefault(call.chat_id, []).append((pid, text))
+    assert sorted(replies) == list(users)
+    for user_id, user_replies in replies.items():
+        assert len({pid for pid, _ in user_replies}) == 1
+        assert [text for _, text in user_replies] == [f"step{step}" for step in range(per_user)]
+    assert len({user_replies[0][0] for user_replies in replies.values()}) == 2
+    assert metrics['forwarded_updates'] == [10, 10]
+    assert metrics['alive_workers'] == 0